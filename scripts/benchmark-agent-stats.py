@@ -0,0 +1,158 @@
+#! /usr/bin/env python3
+"""
+Benchmark the collection ticks of the agent's container metrics, simulating 200 containers
+with 20 metrics each, against the previous Decimal-based implementation.
+
+Usage: ./py scripts/benchmark-agent-stats.py [--containers N] [--metrics N] [--ticks N]
+"""
+
+import argparse
+import random
+import time
+import timeit
+from decimal import Decimal
+
+from ai.backend.agent.stats import Measurement, Metric, MetricTypes, MovingStatistics
+from ai.backend.agent.utils import remove_exponent
+
+STATS_FILTERS = (frozenset({"max"}), frozenset({"avg", "max"}), frozenset({"rate"}))
+
+
+class LegacyMovingStatistics:
+    """The previous implementation based on Decimal and list.pop(0)."""
+
+    def __init__(self, initial_value: Decimal) -> None:
+        self._sum = initial_value
+        self._min = initial_value
+        self._max = initial_value
+        self._count = 1
+        self._last = [(initial_value, time.perf_counter())]
+
+    def update(self, value: Decimal) -> None:
+        self._sum += value
+        self._min = min(self._min, value)
+        self._max = max(self._max, value)
+        self._count += 1
+        self._last.append((value, time.perf_counter()))
+        if len(self._last) > 2:
+            self._last.pop(0)
+
+    def to_serializable_dict(self) -> dict:
+        q = Decimal("0.000")
+        diff = Decimal(0)
+        rate = Decimal(0)
+        if len(self._last) == 2:
+            diff = self._last[-1][0] - self._last[-2][0]
+            rate = diff / Decimal(self._last[-1][1] - self._last[-2][1])
+        return {
+            "min": str(remove_exponent(self._min.quantize(q))),
+            "max": str(remove_exponent(self._max.quantize(q))),
+            "sum": str(remove_exponent(self._sum.quantize(q))),
+            "avg": str(remove_exponent((self._sum / self._count).quantize(q))),
+            "diff": str(remove_exponent(diff.quantize(q))),
+            "rate": str(remove_exponent(rate.quantize(q))),
+            "version": 2,
+        }
+
+
+class LegacyMetric:
+    def __init__(self, stats_filter: frozenset[str], value: Decimal, capacity: Decimal) -> None:
+        self.stats = LegacyMovingStatistics(value)
+        self.stats_filter = stats_filter
+        self.current = value
+        self.capacity = capacity
+
+    def update(self, value: Measurement) -> None:
+        self.capacity = value.capacity
+        self.stats.update(value.value)
+        self.current = value.value
+
+    def to_serializable_dict(self) -> dict:
+        q = Decimal("0.000")
+        return {
+            "current": str(remove_exponent(self.current.quantize(q))),
+            "capacity": str(remove_exponent(self.capacity.quantize(q))),
+            "pct": str(
+                remove_exponent((self.current / self.capacity * 100).quantize(Decimal("0.00")))
+            ),
+            "unit_hint": "bytes",
+            **{
+                f"stats.{k}": v
+                for k, v in self.stats.to_serializable_dict().items()
+                if k in self.stats_filter
+            },
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--containers", type=int, default=200)
+    parser.add_argument("--metrics", type=int, default=20)
+    parser.add_argument("--ticks", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    capacity = Decimal(2**34)
+    num_metrics = args.containers * args.metrics
+    measurements = [
+        [Measurement(Decimal(rng.randrange(2**33)), capacity) for _ in range(num_metrics)]
+        for _ in range(args.ticks)
+    ]
+    stats_filters = [STATS_FILTERS[idx % len(STATS_FILTERS)] for idx in range(num_metrics)]
+
+    legacy_metrics = [
+        LegacyMetric(stats_filter, Decimal(0), capacity) for stats_filter in stats_filters
+    ]
+    metrics = [
+        Metric(
+            f"metric{idx}",
+            MetricTypes.GAUGE,
+            unit_hint="bytes",
+            stats=MovingStatistics(Decimal(0)),
+            stats_filter=stats_filter,
+            current=Decimal(0),
+            capacity=capacity,
+        )
+        for idx, stats_filter in enumerate(stats_filters)
+    ]
+
+    def run_tick(target: list, tick: list[Measurement], serialize_twice: bool) -> None:
+        for metric, measurement in zip(target, tick):
+            metric.update(measurement)
+        for metric in target:
+            metric.to_serializable_dict()
+        if serialize_twice:
+            # e.g., the process metrics of the containers not updated in the tick
+            for metric in target:
+                metric.to_serializable_dict()
+
+    print(
+        f"{args.containers} containers x {args.metrics} metrics,"
+        f" average of {args.ticks} collection ticks"
+    )
+    print(f"{'operation':<30} {'Decimal':>14} {'float':>14} {'speedup':>8}")
+    for name, serialize_twice in [
+        ("update + serialize", False),
+        ("update + serialize twice", True),
+    ]:
+        legacy_time = timeit.timeit(
+            lambda: [run_tick(legacy_metrics, tick, serialize_twice) for tick in measurements],
+            number=1,
+        )
+        new_time = timeit.timeit(
+            lambda: [run_tick(metrics, tick, serialize_twice) for tick in measurements],
+            number=1,
+        )
+        print(
+            f"{name:<30} {legacy_time / args.ticks * 1e3:>11.2f} ms"
+            f" {new_time / args.ticks * 1e3:>11.2f} ms"
+            f" {legacy_time / new_time:>7.2f}x"
+        )
+    for legacy_metric, metric in zip(legacy_metrics, metrics):
+        # The rates differ by the timestamps of the updates.
+        if "stats.rate" not in legacy_metric.to_serializable_dict():
+            assert legacy_metric.to_serializable_dict() == metric.to_serializable_dict()
+
+
+if __name__ == "__main__":
+    main()
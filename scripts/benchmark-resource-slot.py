@@ -0,0 +1,73 @@
+#! /usr/bin/env python3
+"""
+Microbenchmarks comparing ResourceSlot and CompactResourceSlot on the operations
+frequently used in the scheduler hot paths.
+
+Usage: ./py scripts/benchmark-resource-slot.py [--number N]
+"""
+
+import argparse
+import timeit
+from decimal import Decimal
+
+from ai.backend.common.types import CompactResourceSlot, ResourceSlot, SlotSchema
+
+SLOT_NAMES = ("cpu", "mem", "cuda.shares", "cuda.device", "rocm.device")
+
+
+def make_slots(seed: int) -> ResourceSlot:
+    return ResourceSlot({
+        "cpu": Decimal(seed % 16 + 1),
+        "mem": Decimal((seed % 8 + 1) * 2**30),
+        "cuda.shares": Decimal("0.5") * (seed % 4),
+        "cuda.device": Decimal(seed % 2),
+        "rocm.device": Decimal(0),
+    })
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=100_000)
+    args = parser.parse_args()
+
+    schema = SlotSchema.of(SLOT_NAMES)
+    r1, r2 = make_slots(3), make_slots(7)
+    c1 = CompactResourceSlot.from_resource_slot(r1, schema)
+    c2 = CompactResourceSlot.from_resource_slot(r2, schema)
+    many_slots = [make_slots(i) for i in range(1000)]
+    many_compact = [CompactResourceSlot.from_resource_slot(s, schema) for s in many_slots]
+
+    cases = [
+        ("add", lambda: r1 + r2, lambda: c1 + c2),
+        ("sub", lambda: r1 - r2, lambda: c1 - c2),
+        ("ge", lambda: r1 >= r2, lambda: c1 >= c2),
+        ("eq", lambda: r1 == r2, lambda: c1 == c2),
+        ("remaining >= requested", lambda: r1 - r2 >= r2, lambda: c1 - c2 >= c2),
+        (
+            "convert from/to ResourceSlot",
+            lambda: ResourceSlot(r1.data),
+            lambda: CompactResourceSlot.from_resource_slot(r1, schema).to_resource_slot(),
+        ),
+    ]
+    print(f"{'operation':<30} {'ResourceSlot':>14} {'Compact':>14} {'speedup':>8}")
+    for name, legacy_op, compact_op in cases:
+        legacy_time = timeit.timeit(legacy_op, number=args.number)
+        compact_time = timeit.timeit(compact_op, number=args.number)
+        print(
+            f"{name:<30} {legacy_time / args.number * 1e9:>11.0f} ns"
+            f" {compact_time / args.number * 1e9:>11.0f} ns"
+            f" {legacy_time / compact_time:>7.2f}x"
+        )
+
+    number = max(1, args.number // 1000)
+    legacy_time = timeit.timeit(lambda: sum(many_slots, ResourceSlot()), number=number)
+    compact_time = timeit.timeit(lambda: CompactResourceSlot.sum(many_compact), number=number)
+    print(
+        f"{'sum of 1000 slots':<30} {legacy_time / number * 1e6:>11.0f} us"
+        f" {compact_time / number * 1e6:>11.0f} us"
+        f" {legacy_time / compact_time:>7.2f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#! /usr/bin/env python3
+"""
+Benchmark the throughput of the wsproxy's TCP relay modes over the loopback interface,
+relaying the data between a client and an echo server through a ``TCPBackend``.
+
+Usage: ./py scripts/benchmark-wsproxy-tcp-relay.py [--size MiB] [--connections N] [--rounds N]
+"""
+
+import argparse
+import asyncio
+import socket
+import time
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Coroutine
+from uuid import UUID
+
+from ai.backend.wsproxy.proxy.backend.relay import SPLICE_AVAILABLE, configure_socket
+from ai.backend.wsproxy.proxy.backend.tcp import TCPBackend
+from ai.backend.wsproxy.types import LoadBalancingStrategy, ProxyProtocol, RouteInfo, TCPRelayMode
+
+CHUNK_SIZE = 256 * 1024
+
+
+class TaskSet:
+    """Keeps the connection handler tasks to cancel them at the end of the benchmark."""
+
+    def __init__(self) -> None:
+        self.tasks: set[asyncio.Task] = set()
+
+    def spawn(self, coro: Coroutine[Any, Any, None]) -> None:
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    def wrap(
+        self, handler: Callable[[asyncio.StreamReader, asyncio.StreamWriter], Awaitable[None]]
+    ) -> Callable[[asyncio.StreamReader, asyncio.StreamWriter], None]:
+        return lambda reader, writer: self.spawn(handler(reader, writer))  # type: ignore[arg-type]
+
+    async def cancel(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+
+async def start_echo_server(tasks: TaskSet) -> asyncio.Server:
+    async def handler(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        while data := await reader.read(CHUNK_SIZE):
+            writer.write(data)
+            await writer.drain()
+        writer.close()
+
+    return await asyncio.start_server(tasks.wrap(handler), "127.0.0.1", 0)
+
+
+async def start_proxy(
+    backend: TCPBackend, mode: TCPRelayMode, tasks: TaskSet
+) -> tuple[int, Callable[[], None]]:
+    loop = asyncio.get_running_loop()
+    if mode == TCPRelayMode.STREAM:
+        server = await asyncio.start_server(tasks.wrap(backend.bind), "127.0.0.1", 0)
+        return server.sockets[0].getsockname()[1], server.close
+
+    listen_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listen_sock.bind(("127.0.0.1", 0))
+    listen_sock.listen(128)
+    listen_sock.setblocking(False)
+
+    async def _accept() -> None:
+        while True:
+            down_sock, _ = await loop.sock_accept(listen_sock)
+            configure_socket(down_sock)
+            tasks.spawn(backend.relay(down_sock, mode))
+
+    accept_task = asyncio.create_task(_accept())
+
+    def _close() -> None:
+        accept_task.cancel()
+        listen_sock.close()
+
+    return listen_sock.getsockname()[1], _close
+
+
+async def run_client(port: int, size: int) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    payload = b"x" * CHUNK_SIZE
+
+    async def _send() -> None:
+        remaining = size
+        while remaining > 0:
+            writer.write(payload[:remaining])
+            await writer.drain()
+            remaining -= CHUNK_SIZE
+
+    async def _receive() -> None:
+        # The stream mode does not propagate the half-close, so count the echoed bytes
+        # instead of waiting for EOF.
+        received = 0
+        while received < size:
+            data = await reader.read(CHUNK_SIZE)
+            if not data:
+                raise ConnectionError(f"received {received} bytes instead of {size} bytes")
+            received += len(data)
+
+    await asyncio.gather(_send(), _receive())
+    writer.close()
+    await writer.wait_closed()
+
+
+async def run_benchmark(
+    mode: TCPRelayMode, echo_port: int, tasks: TaskSet, args: argparse.Namespace
+) -> float:
+    root_context = SimpleNamespace(
+        local_config=SimpleNamespace(
+            wsproxy=SimpleNamespace(load_balancing_strategy=LoadBalancingStrategy.RANDOM),
+        ),
+    )
+    route = RouteInfo(
+        session_id=UUID(int=0),
+        session_name=None,
+        kernel_host="127.0.0.1",
+        kernel_port=echo_port,
+        protocol=ProxyProtocol.TCP,
+        traffic_ratio=1.0,
+    )
+    backend = TCPBackend([route], root_context, None)  # type: ignore[arg-type]
+    proxy_port, close_proxy = await start_proxy(backend, mode, tasks)
+    size = args.size * 1024 * 1024
+    try:
+        best = 0.0
+        for _ in range(args.rounds):
+            begin = time.perf_counter()
+            await asyncio.gather(*[run_client(proxy_port, size) for _ in range(args.connections)])
+            elapsed = time.perf_counter() - begin
+            # Count both directions of the echoed data.
+            best = max(best, 2 * size * args.connections / elapsed)
+        return best
+    finally:
+        close_proxy()
+
+
+async def main(args: argparse.Namespace) -> None:
+    modes = [TCPRelayMode.STREAM, TCPRelayMode.SOCKET]
+    if SPLICE_AVAILABLE:
+        modes.append(TCPRelayMode.SPLICE)
+    tasks = TaskSet()
+    echo_server = await start_echo_server(tasks)
+    echo_port = echo_server.sockets[0].getsockname()[1]
+    print(
+        f"{args.connections} connection(s) x {args.size} MiB echoed through the relay,"
+        f" best of {args.rounds} rounds"
+    )
+    print(f"{'mode':<10} {'throughput':>14} {'speedup':>8}")
+    baseline = None
+    try:
+        for mode in modes:
+            throughput = await run_benchmark(mode, echo_port, tasks, args)
+            if baseline is None:
+                baseline = throughput
+            print(
+                f"{mode.value:<10} {throughput / 1024 / 1024:>9.1f} MiB/s"
+                f" {throughput / baseline:>7.2f}x"
+            )
+    finally:
+        echo_server.close()
+        # The stream mode keeps the connections until the upstream closes them.
+        await tasks.cancel()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=256, help="The size per connection in MiB")
+    parser.add_argument("--connections", type=int, default=1)
+    parser.add_argument("--rounds", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
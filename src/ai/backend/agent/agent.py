@@ -41,7 +41,7 @@ from typing import (
     TypeVar,
     cast,
 )
-from uuid import UUID
+from uuid import UUID, uuid4
 
 import aiotools
 import attrs
@@ -655,6 +655,11 @@ class AbstractAgent(
         self.kernel_registry = {}
         self.computers = {}
         self.images = {}  # repoTag -> digest
+        # The image inventory reported to the manager via heartbeats
+        self._image_inventory_epoch = uuid4().hex
+        self._image_inventory_generation = 0
+        self._reported_images: frozenset[str] = frozenset()
+        self._last_image_inventory_sync = 0.0
         self.restarting_kernels = {}
         self.stat_ctx = StatContext(
             self,
@@ -695,6 +700,9 @@ class AbstractAgent(
             etcd_redis_config.get_override_config(RedisRole.STREAM),
             db=REDIS_STREAM_DB,
             log_events=self.local_config["debug"]["log-events"],
+            batch_size=self.local_config["agent"]["event-batch-size"],
+            batch_window=self.local_config["agent"]["event-batch-window"],
+            max_buffer_size=self.local_config["agent"]["event-buffer-size"],
         )
         self.event_dispatcher = await event_dispatcher_cls.new(
             etcd_redis_config.get_override_config(RedisRole.STREAM),
@@ -931,6 +939,24 @@ class AbstractAgent(
                 rpc_addr = self.local_config["agent"]["advertised-rpc-addr"]
             else:
                 rpc_addr = self.local_config["agent"]["rpc-listen-addr"]
+            # Report only the changes of the images since the last heartbeat,
+            # except the periodic full synchronization.
+            images = self.images
+            added_images = images.keys() - self._reported_images
+            removed_images = [*(self._reported_images - images.keys())]
+            generation = self._image_inventory_generation
+            if added_images or removed_images:
+                generation += 1
+            now = time.monotonic()
+            full_sync = (
+                now - self._last_image_inventory_sync
+                >= self.local_config["agent"]["image-inventory-sync-interval"]
+                or self._last_image_inventory_sync == 0.0
+            )
+            if full_sync:
+                reported_images = [(repo_tag, digest) for repo_tag, digest in images.items()]
+            else:
+                reported_images = [(repo_tag, images[repo_tag]) for repo_tag in added_images]
             agent_info = {
                 "ip": str(rpc_addr.host),
                 "region": self.local_config["agent"]["region"],
@@ -947,16 +973,24 @@ class AbstractAgent(
                     }
                     for key, computer in self.computers.items()
                 },
-                "images": zlib.compress(
-                    msgpack.packb([(repo_tag, digest) for repo_tag, digest in self.images.items()])
-                ),
+                "images": zlib.compress(msgpack.packb(reported_images)),
                 "images.opts": {"compression": "zlib"},  # compression: zlib or None
+                "images.inventory": {
+                    "epoch": self._image_inventory_epoch,
+                    "generation": generation,
+                    "full": full_sync,
+                    "removed": removed_images,
+                },
                 "architecture": get_arch_name(),
                 "auto_terminate_abusing_kernel": self.local_config["agent"][
                     "force-terminate-abusing-containers"
                 ],
             }
             await self.produce_event(AgentHeartbeatEvent(agent_info))
+            self._image_inventory_generation = generation
+            self._reported_images = frozenset(images.keys())
+            if full_sync:
+                self._last_image_inventory_sync = now
         except asyncio.TimeoutError:
             log.warning("event dispatch timeout: instance_heartbeat")
         except Exception:
@@ -81,6 +81,10 @@ agent_local_config_iv = (
             | tx.Path(type="dir", allow_nonexisting=True),
             t.Key("force-terminate-abusing-containers", default=False): t.ToBool,
             t.Key("kernel-creation-concurrency", default=4): t.ToInt[1:32],
+            t.Key("event-batch-size", default=1): t.ToInt[1:],
+            t.Key("event-batch-window", default=0.005): t.ToFloat[0:],  # second
+            t.Key("event-buffer-size", default=10_000): t.ToInt[1:],
+            t.Key("image-inventory-sync-interval", default=60.0): t.ToFloat[0:],  # second
             t.Key("use-experimental-redis-event-dispatcher", default=False): t.ToBool,
             t.Key(
                 "sync-container-lifecycles", default=default_sync_container_lifecycles_config
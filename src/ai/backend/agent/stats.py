@@ -6,13 +6,17 @@ Reference: https://www.datadoghq.com/blog/how-to-collect-docker-metrics/
 
 import asyncio
 import enum
+import functools
 import logging
+import math
 import sys
 import time
 from decimal import Decimal
 from typing import (
     TYPE_CHECKING,
     Callable,
+    Collection,
+    Final,
     FrozenSet,
     List,
     Mapping,
@@ -177,87 +181,167 @@ class ProcessMeasurement:
     unit_hint: str = "count"
 
 
+_MAX_EXACT_INT: Final = 2**53
+
+
+def _format_decimal(value: Decimal, q: Decimal) -> str:
+    # Fast path for integral values such as bytes and counts.
+    if (
+        value.is_finite()
+        and value == (int_value := int(value))
+        and -_MAX_EXACT_INT < int_value < _MAX_EXACT_INT
+    ):
+        return str(int_value)
+    return str(remove_exponent(value.quantize(q)))
+
+
+def _format_float(value: float, q: Decimal) -> str:
+    if value.is_integer() and -_MAX_EXACT_INT < value < _MAX_EXACT_INT:
+        return str(int(value))
+    return str(remove_exponent(_to_decimal(value).quantize(q)))
+
+
+def _to_decimal(value: float) -> Decimal:
+    # The shortest repr of a float restores the original decimal value of measurements
+    # having up to 15 significant digits, which is enough for all metrics.
+    return Decimal(repr(value))
+
+
+_STAT_QUANTUM: Final = Decimal("0.000")
+_PCT_QUANTUM: Final = Decimal("0.00")
+
+
 class MovingStatistics:
+    """
+    Keeps the running statistics of a metric in plain floats.
+
+    The latest two data points are kept in a fixed-size ring buffer to calculate the diff and
+    the rate without allocating a new list entry per update.
+    The properties return :class:`Decimal` values for the compatibility with compute plugins,
+    while the conversion is deferred until they are actually read.
+    """
+
     __slots__ = (
         "_sum",
         "_count",
         "_min",
         "_max",
-        "_last",
+        "_values",
+        "_timestamps",
+        "_pos",
     )
-    _sum: Decimal
+    _sum: float
     _count: int
-    _min: Decimal
-    _max: Decimal
-    _last: List[Tuple[Decimal, float]]
+    _min: float
+    _max: float
+    _values: List[float]
+    _timestamps: List[float]
+    _pos: int  # the index of the latest data point in the ring buffer
 
     def __init__(self, initial_value: Optional[Decimal] = None):
-        self._last = []
+        self._values = [0.0, 0.0]
+        self._timestamps = [0.0, 0.0]
+        self._pos = 0
         if initial_value is None:
-            self._sum = Decimal(0)
-            self._min = Decimal("inf")
-            self._max = Decimal("-inf")
+            self._sum = 0.0
+            self._min = math.inf
+            self._max = -math.inf
             self._count = 0
         else:
-            self._sum = initial_value
-            self._min = initial_value
-            self._max = initial_value
+            value = float(initial_value)
+            self._sum = value
+            self._min = value
+            self._max = value
             self._count = 1
-            point = (initial_value, time.perf_counter())
-            self._last.append(point)
-
-    def update(self, value: Decimal):
-        self._sum += value
-        self._min = min(self._min, value)
-        self._max = max(self._max, value)
+            self._values[0] = value
+            self._timestamps[0] = time.perf_counter()
+
+    def update(self, value: Decimal | float):
+        fvalue = float(value)
+        self._sum += fvalue
+        if fvalue < self._min:
+            self._min = fvalue
+        if fvalue > self._max:
+            self._max = fvalue
         self._count += 1
-        point = (value, time.perf_counter())
-        self._last.append(point)
-        # keep only the latest two data points
-        if len(self._last) > 2:
-            self._last.pop(0)
+        # overwrite the older one of the latest two data points
+        pos = self._pos ^ 1 if self._count > 1 else 0
+        self._values[pos] = fvalue
+        self._timestamps[pos] = time.perf_counter()
+        self._pos = pos
 
     @property
     def min(self) -> Decimal:
-        return self._min
+        return _to_decimal(self._min)
 
     @property
     def max(self) -> Decimal:
-        return self._max
+        return _to_decimal(self._max)
 
     @property
     def sum(self) -> Decimal:
-        return self._sum
+        return _to_decimal(self._sum)
 
     @property
     def avg(self) -> Decimal:
-        return self._sum / self._count
+        return _to_decimal(self._sum / self._count)
+
+    def _diff(self) -> float:
+        if self._count < 2:
+            return 0.0
+        return self._values[self._pos] - self._values[self._pos ^ 1]
+
+    def _rate(self) -> float:
+        if self._count < 2:
+            return 0.0
+        interval = self._timestamps[self._pos] - self._timestamps[self._pos ^ 1]
+        return (self._values[self._pos] - self._values[self._pos ^ 1]) / interval
 
     @property
     def diff(self) -> Decimal:
-        if len(self._last) == 2:
-            return self._last[-1][0] - self._last[-2][0]
-        return Decimal(0)
+        return _to_decimal(self._diff())
 
     @property
     def rate(self) -> Decimal:
-        if len(self._last) == 2:
-            return (self._last[-1][0] - self._last[-2][0]) / Decimal(
-                self._last[-1][1] - self._last[-2][1]
-            )
-        return Decimal(0)
-
-    def to_serializable_dict(self) -> MovingStatValue:
-        q = Decimal("0.000")
-        return {
-            "min": str(remove_exponent(self.min.quantize(q))),
-            "max": str(remove_exponent(self.max.quantize(q))),
-            "sum": str(remove_exponent(self.sum.quantize(q))),
-            "avg": str(remove_exponent(self.avg.quantize(q))),
-            "diff": str(remove_exponent(self.diff.quantize(q))),
-            "rate": str(remove_exponent(self.rate.quantize(q))),
-            "version": 2,
-        }
+        return _to_decimal(self._rate())
+
+    def to_serializable_dict(
+        self,
+        stats_filter: Optional[Collection[str]] = None,
+    ) -> MovingStatValue:
+        """
+        Serialize the statistics.
+        If ``stats_filter`` is given, only the specified fields are calculated and included.
+        """
+        return cast(
+            MovingStatValue,
+            {
+                key: self.serialize_field(key)
+                for key in (stats_filter if stats_filter is not None else _MOVING_STAT_KEYS)
+                if key in _MOVING_STAT_KEYS
+            },
+        )
+
+    def serialize_field(self, key: str) -> str | int:
+        match key:
+            case "min":
+                return _format_float(self._min, _STAT_QUANTUM)
+            case "max":
+                return _format_float(self._max, _STAT_QUANTUM)
+            case "sum":
+                return _format_float(self._sum, _STAT_QUANTUM)
+            case "avg":
+                return _format_float(self._sum / self._count, _STAT_QUANTUM)
+            case "diff":
+                return _format_float(self._diff(), _STAT_QUANTUM)
+            case "rate":
+                return _format_float(self._rate(), _STAT_QUANTUM)
+            case "version":
+                return 2
+        raise KeyError(key)
+
+
+_MOVING_STAT_KEYS: Final = ("min", "max", "sum", "avg", "diff", "rate", "version")
 
 
 @attrs.define(auto_attribs=True, slots=True)
@@ -270,6 +354,9 @@ class Metric:
     current: Decimal
     capacity: Optional[Decimal] = None
     current_hook: Optional[Callable[["Metric"], Decimal]] = None
+    # The serialized value is cached until the next update because the metrics of idle
+    # processes and devices are serialized repeatedly without any change.
+    _serialized: Optional[MetricValue] = attrs.field(default=None, init=False, eq=False, repr=False)
 
     def update(self, value: Measurement):
         if value.capacity is not None:
@@ -278,33 +365,41 @@ class Metric:
         self.current = value.value
         if self.current_hook is not None:
             self.current = self.current_hook(self)
+        self._serialized = None
 
     def to_serializable_dict(self) -> MetricValue:
-        q = Decimal("0.000")
-        q_pct = Decimal("0.00")
-        return {
-            "current": str(remove_exponent(self.current.quantize(q))),
+        """
+        Serialize the metric in the wire format stored in Redis.
+        The returned dict is shared until the next update, so the callers must not modify it.
+        """
+        if self._serialized is not None:
+            return self._serialized
+        capacity = self.capacity
+        serialized: dict[str, str | int | None] = {
+            "current": _format_decimal(self.current, _STAT_QUANTUM),
             "capacity": (
-                str(remove_exponent(self.capacity.quantize(q)))
-                if self.capacity is not None
-                else None
+                _format_decimal(capacity, _STAT_QUANTUM) if capacity is not None else None
             ),
             "pct": (
-                str(
-                    remove_exponent(
-                        (Decimal(self.current) / Decimal(self.capacity) * 100).quantize(q_pct)
-                    )
+                _format_decimal(
+                    Decimal(self.current) / Decimal(capacity) * 100,
+                    _PCT_QUANTUM,
                 )
-                if (self.capacity is not None and self.capacity.is_normal() and self.capacity > 0)
+                if (capacity is not None and capacity.is_normal() and capacity > 0)
                 else "0.00"
             ),
             "unit_hint": self.unit_hint,
-            **{
-                f"stats.{k}": v  # type: ignore
-                for k, v in self.stats.to_serializable_dict().items()
-                if k in self.stats_filter
-            },
         }
+        for key, field in _get_stats_fields(self.stats_filter):
+            serialized[field] = self.stats.serialize_field(key)
+        self._serialized = cast(MetricValue, serialized)
+        return self._serialized
+
+
+@functools.cache
+def _get_stats_fields(stats_filter: FrozenSet[str]) -> tuple[tuple[str, str], ...]:
+    # Keep the key order of the unfiltered serialization.
+    return tuple((k, f"stats.{k}") for k in _MOVING_STAT_KEYS if k in stats_filter)
 
 
 class StatContext:
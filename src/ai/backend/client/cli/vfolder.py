@@ -16,7 +16,7 @@ from ai.backend.cli.params import (
     OptionalType,
 )
 from ai.backend.cli.types import ExitCode
-from ai.backend.client.config import DEFAULT_CHUNK_SIZE, APIConfig
+from ai.backend.client.config import DEFAULT_CHUNK_SIZE, DEFAULT_UPLOAD_PARALLELISM, APIConfig
 from ai.backend.client.func.vfolder import _default_list_fields
 from ai.backend.client.session import Session
 
@@ -324,7 +324,17 @@ def info(name):
         " include the protocol part and the port number to replace."
     ),
 )
-def upload(name, filenames, base_dir, recursive, chunk_size, override_storage_proxy):
+@click.option(
+    "-p",
+    "--parallel",
+    type=click.IntRange(min=1),
+    default=DEFAULT_UPLOAD_PARALLELISM,
+    help=(
+        "Upload each large file via the given number of connections in parallel,"
+        " if the storage proxy supports it. Set 1 to upload the files sequentially."
+    ),
+)
+def upload(name, filenames, base_dir, recursive, chunk_size, override_storage_proxy, parallel):
     """
     TUS Upload a file to the virtual folder from the current working directory.
     The files with the same names will be overwritten.
@@ -343,6 +353,7 @@ def upload(name, filenames, base_dir, recursive, chunk_size, override_storage_pr
                 show_progress=True,
                 address_map=override_storage_proxy
                 or APIConfig.DEFAULTS["storage_proxy_address_map"],
+                parallel=parallel,
             )
             print_done("Done.")
         except Exception as e:
@@ -29,6 +29,8 @@ __all__ = [
     "API_VERSION",
     "DEFAULT_CHUNK_SIZE",
     "MAX_INFLIGHT_CHUNKS",
+    "DEFAULT_UPLOAD_PARALLELISM",
+    "MIN_PARALLEL_UPLOAD_SIZE",
 ]
 
 
@@ -44,6 +46,9 @@ MIN_API_VERSION = (7, "20230615")
 
 DEFAULT_CHUNK_SIZE = 16 * (2**20)  # 16 MiB
 MAX_INFLIGHT_CHUNKS = 4
+# The number of connections to upload a large file in parallel.
+DEFAULT_UPLOAD_PARALLELISM = 4
+MIN_PARALLEL_UPLOAD_SIZE = 64 * (2**20)  # 64 MiB
 
 local_state_path = Path(appdirs.user_state_dir("backend.ai", "Lablup"))
 local_cache_path = Path(appdirs.user_cache_dir("backend.ai", "Lablup"))
@@ -1,9 +1,20 @@
 from __future__ import annotations
 
 import asyncio
+import json
+import os
 import uuid
 from pathlib import Path
-from typing import Any, Mapping, Optional, Sequence, TypeAlias, TypeVar, Union
+from typing import (
+    Any,
+    AsyncIterator,
+    Mapping,
+    Optional,
+    Sequence,
+    TypeAlias,
+    TypeVar,
+    Union,
+)
 
 import aiohttp
 import janus
@@ -25,7 +36,12 @@ from ai.backend.client.output.types import FieldSpec, PaginatedResult
 from ai.backend.common.types import ResultSet
 
 from ..compat import current_loop
-from ..config import DEFAULT_CHUNK_SIZE, MAX_INFLIGHT_CHUNKS
+from ..config import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_UPLOAD_PARALLELISM,
+    MAX_INFLIGHT_CHUNKS,
+    MIN_PARALLEL_UPLOAD_SIZE,
+)
 from ..exceptions import BackendClientError
 from ..pagination import fetch_paginated_result
 from ..request import Request
@@ -48,11 +64,41 @@ _default_list_fields = (
 T = TypeVar("T")
 list_: TypeAlias = list[T]
 
+# Align the parts of parallel uploads so that the storage proxy could concatenate them
+# by sharing the filesystem blocks (reflinks).
+UPLOAD_PART_ALIGNMENT = 1 * (2**20)  # 1 MiB
+UPLOAD_PART_MAX_RETRIES = 20
+# The parts are listed in a single "Upload-Concat" header of the final upload request, which must
+# fit in the header size limit of the storage proxy (8190 bytes by default in aiohttp).
+MAX_UPLOAD_PARTS = 64
+
 
 class ResponseFailed(Exception):
     pass
 
 
+def _build_list_files_params(
+    *,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    sort_by: Optional[str] = None,
+    order: Optional[str] = None,
+    name_prefix: Optional[str] = None,
+) -> dict[str, str]:
+    params = {}
+    if limit is not None:
+        params["limit"] = str(limit)
+    if cursor is not None:
+        params["cursor"] = cursor
+    if sort_by is not None:
+        params["sort_by"] = sort_by
+    if order is not None:
+        params["order"] = order
+    if name_prefix:
+        params["name_prefix"] = name_prefix
+    return params
+
+
 class VFolderByName(BaseFunction):
     name: str
     id: Optional[uuid.UUID] = None
@@ -460,6 +506,143 @@ class VFolderByName(BaseFunction):
                 file_path, download_url, chunk_size, max_retries, show_progress
             )
 
+    async def _supports_tus_concatenation(self, upload_url: URL) -> bool:
+        async with aiohttp.ClientSession() as http_session:
+            async with http_session.options(upload_url.with_query(None), ssl=False) as resp:
+                if resp.status != 200:
+                    return False
+                extensions = resp.headers.get("Tus-Extension", "")
+        return "concatenation" in (ext.strip() for ext in extensions.split(","))
+
+    async def _upload_part(
+        self,
+        http_session: aiohttp.ClientSession,
+        upload_url: URL,
+        fd: int,
+        part_start: int,
+        part_length: int,
+        chunk_size: int,
+        pbar: tqdm,
+    ) -> str:
+        async with http_session.post(
+            upload_url,
+            headers={"Upload-Concat": "partial", "Upload-Length": str(part_length)},
+            ssl=False,
+        ) as resp:
+            resp.raise_for_status()
+            location = resp.headers[hdrs.LOCATION]
+        part_url = upload_url.join(URL(location))
+        loop = current_loop()
+        offset = 0
+        resync = False
+        try:
+            async for attempt in AsyncRetrying(
+                wait=wait_exponential(multiplier=0.02, min=0.02, max=5.0),
+                stop=stop_after_attempt(UPLOAD_PART_MAX_RETRIES),
+                retry=retry_if_exception_type(TryAgain),
+            ):
+                with attempt:
+                    try:
+                        if resync:
+                            # Resume from the offset the storage proxy has received.
+                            async with http_session.head(part_url, ssl=False) as resp:
+                                resp.raise_for_status()
+                                received = int(resp.headers["Upload-Offset"])
+                            pbar.update(received - offset)
+                            offset = received
+                            resync = False
+                        while offset < part_length:
+                            chunk = await loop.run_in_executor(
+                                None,
+                                os.pread,
+                                fd,
+                                min(chunk_size, part_length - offset),
+                                part_start + offset,
+                            )
+                            async with http_session.patch(
+                                part_url,
+                                data=chunk,
+                                headers={
+                                    "Upload-Offset": str(offset),
+                                    "Content-Type": "application/offset+octet-stream",
+                                },
+                                ssl=False,
+                            ) as resp:
+                                if resp.status == 409 or resp.status >= 500:
+                                    raise ResponseFailed
+                                resp.raise_for_status()
+                            offset += len(chunk)
+                            pbar.update(len(chunk))
+                    except (
+                        ResponseFailed,
+                        aiohttp.ClientPayloadError,
+                        aiohttp.ClientConnectionError,
+                        asyncio.TimeoutError,
+                    ):
+                        resync = True
+                        raise TryAgain
+        except RetryError:
+            raise BackendClientError(
+                f"Uploading a part of the file failed after {UPLOAD_PART_MAX_RETRIES} retries"
+            )
+        return location
+
+    async def _upload_file_in_parts(
+        self,
+        file_path: Path,
+        upload_url: URL,
+        file_size: int,
+        num_parts: int,
+        chunk_size: int,
+        show_progress: bool,
+    ) -> None:
+        """
+        Upload a file via multiple connections in parallel using the tus "concatenation"
+        extension, where each connection uploads a range of the file as a partial upload
+        and the storage proxy concatenates them into the final upload.
+        """
+        part_size = -(-file_size // num_parts)
+        part_size = -(-part_size // UPLOAD_PART_ALIGNMENT) * UPLOAD_PART_ALIGNMENT
+        async with aiohttp.ClientSession(headers={"Tus-Resumable": "1.0.0"}) as http_session:
+            with (
+                open(file_path, "rb") as input_file,
+                tqdm(
+                    total=file_size,
+                    unit="bytes",
+                    unit_scale=True,
+                    unit_divisor=1024,
+                    disable=not show_progress,
+                ) as pbar,
+            ):
+                locations = await asyncio.gather(*[
+                    self._upload_part(
+                        http_session,
+                        upload_url,
+                        input_file.fileno(),
+                        part_start,
+                        min(part_size, file_size - part_start),
+                        chunk_size,
+                        pbar,
+                    )
+                    for part_start in range(0, file_size, part_size)
+                ])
+            # Refer to the parts without the token, which the storage proxy takes from the final
+            # upload request, to keep the header short.
+            part_refs = [
+                str(URL(location).with_query({"part": URL(location).query["part"]}))
+                for location in locations
+            ]
+            async with http_session.post(
+                upload_url,
+                headers={"Upload-Concat": "final;" + " ".join(part_refs)},
+                ssl=False,
+            ) as resp:
+                if resp.status != 201:
+                    raise BackendClientError(
+                        f"Failed to concatenate the uploaded parts of {file_path}: "
+                        f"{resp.status} {await resp.text()}"
+                    )
+
     async def _upload_files(
         self,
         file_paths: Sequence[Path],
@@ -467,6 +650,9 @@ class VFolderByName(BaseFunction):
         dst_dir: Optional[Union[str, Path]] = None,
         chunk_size: int = DEFAULT_CHUNK_SIZE,
         address_map: Optional[Mapping[str, str]] = None,
+        *,
+        parallel: int = DEFAULT_UPLOAD_PARALLELISM,
+        show_progress: bool = False,
     ) -> None:
         base_path = Path.cwd() if basedir is None else Path(basedir).resolve()
         await self.update_id_by_name()
@@ -496,12 +682,27 @@ class VFolderByName(BaseFunction):
                 if dst_dir is not None:
                     params["dst_dir"] = dst_dir
                 upload_url = URL(overriden_url).with_query(params)
-            tus_client = client.TusClient()
             if basedir:
-                input_file = open(base_path / file_path, "rb")
+                input_file_path = base_path / file_path
             else:
-                input_file = open(str(Path(file_path).relative_to(base_path)), "rb")
+                input_file_path = Path(file_path).relative_to(base_path)
             print(f"Uploading {base_path / file_path} via {upload_info['url']} ...")
+            if (
+                parallel > 1
+                and file_size >= MIN_PARALLEL_UPLOAD_SIZE
+                and await self._supports_tus_concatenation(upload_url)
+            ):
+                await self._upload_file_in_parts(
+                    input_file_path,
+                    upload_url,
+                    file_size,
+                    min(parallel, -(-file_size // chunk_size), MAX_UPLOAD_PARTS),
+                    chunk_size,
+                    show_progress,
+                )
+                continue
+            tus_client = client.TusClient()
+            input_file = open(input_file_path, "rb")
             # TODO: refactor out the progress bar
             uploader = tus_client.async_uploader(
                 file_stream=input_file,
@@ -519,6 +720,9 @@ class VFolderByName(BaseFunction):
         dst_dir: Optional[Union[str, Path]] = None,
         chunk_size: int = DEFAULT_CHUNK_SIZE,
         address_map: Optional[Mapping[str, str]] = None,
+        *,
+        parallel: int = DEFAULT_UPLOAD_PARALLELISM,
+        show_progress: bool = False,
     ) -> None:
         dir_list: list[Path] = []
         file_list: list[Path] = []
@@ -529,10 +733,24 @@ class VFolderByName(BaseFunction):
             else:
                 await self._mkdir([path.relative_to(base_path)])
                 dir_list.append(path)
-        await self._upload_files(file_list, basedir, dst_dir, chunk_size, address_map)
+        await self._upload_files(
+            file_list,
+            basedir,
+            dst_dir,
+            chunk_size,
+            address_map,
+            parallel=parallel,
+            show_progress=show_progress,
+        )
         for dir in dir_list:
             await self._upload_recursively(
-                list(dir.glob("*")), basedir, dst_dir, chunk_size, address_map
+                list(dir.glob("*")),
+                basedir,
+                dst_dir,
+                chunk_size,
+                address_map,
+                parallel=parallel,
+                show_progress=show_progress,
             )
 
     @api_function
@@ -546,15 +764,37 @@ class VFolderByName(BaseFunction):
         chunk_size: int = DEFAULT_CHUNK_SIZE,
         address_map: Optional[Mapping[str, str]] = None,
         show_progress: bool = False,
+        parallel: int = DEFAULT_UPLOAD_PARALLELISM,
     ) -> None:
+        """
+        Upload the given files via the tus protocol.  The files larger than
+        ``MIN_PARALLEL_UPLOAD_SIZE`` are uploaded via ``parallel`` connections if the storage
+        proxy supports the tus "concatenation" extension.
+        """
         if basedir:
             src_paths = [basedir / Path(src) for src in sources]
         else:
             src_paths = [Path(src).resolve() for src in sources]
         if recursive:
-            await self._upload_recursively(src_paths, basedir, dst_dir, chunk_size, address_map)
+            await self._upload_recursively(
+                src_paths,
+                basedir,
+                dst_dir,
+                chunk_size,
+                address_map,
+                parallel=parallel,
+                show_progress=show_progress,
+            )
         else:
-            await self._upload_files(src_paths, basedir, dst_dir, chunk_size, address_map)
+            await self._upload_files(
+                src_paths,
+                basedir,
+                dst_dir,
+                chunk_size,
+                address_map,
+                parallel=parallel,
+                show_progress=show_progress,
+            )
 
     async def _mkdir(
         self,
@@ -616,14 +856,73 @@ class VFolderByName(BaseFunction):
             return await resp.text()
 
     @api_function
-    async def list_files(self, path: Union[str, Path] = "."):
+    async def list_files(
+        self,
+        path: Union[str, Path] = ".",
+        *,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        order: Optional[str] = None,
+        name_prefix: Optional[str] = None,
+    ):
+        """
+        List the files in the given path of the vfolder.
+
+        If any of the pagination, sorting and filtering arguments is given, the result
+        contains up to ``limit`` items and ``next_cursor`` to pass as ``cursor`` to fetch
+        the next page, which is ``None`` at the last page.
+
+        :param limit: The maximum number of items in a page.
+        :param cursor: The cursor returned with the previous page.
+        :param sort_by: One of ``"name"``, ``"size"`` and ``"modified"``.
+        :param order: Either ``"asc"`` or ``"desc"``.
+        :param name_prefix: List only the files whose names start with the prefix.
+        """
         await self.update_id_by_name()
-        rqst = Request(
-            "GET", "/folders/{}/files".format(self.request_key), params={"path": str(path)}
+        params = {"path": str(path)}
+        params.update(
+            _build_list_files_params(
+                limit=limit,
+                cursor=cursor,
+                sort_by=sort_by,
+                order=order,
+                name_prefix=name_prefix,
+            )
         )
+        rqst = Request("GET", "/folders/{}/files".format(self.request_key), params=params)
         async with rqst.fetch() as resp:
             return await resp.json()
 
+    @api_function
+    async def iter_files(
+        self,
+        path: Union[str, Path] = ".",
+        *,
+        sort_by: Optional[str] = None,
+        order: Optional[str] = None,
+        name_prefix: Optional[str] = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Iterate over the files in the given path of the vfolder, which are streamed from
+        the server without being loaded at once even if there are many files.
+
+        :param sort_by: One of ``"name"``, ``"size"`` and ``"modified"``.
+        :param order: Either ``"asc"`` or ``"desc"``.
+        :param name_prefix: List only the files whose names start with the prefix.
+        """
+        await self.update_id_by_name()
+        params = {"path": str(path), "stream": "true"}
+        params.update(
+            _build_list_files_params(sort_by=sort_by, order=order, name_prefix=name_prefix)
+        )
+        rqst = Request("GET", "/folders/{}/files".format(self.request_key), params=params)
+        async with rqst.fetch() as resp:
+            async for line in resp.raw_response.content:
+                if not line.strip():
+                    continue
+                yield json.loads(line)
+
     @api_function
     async def invite(self, perm: str, emails: Sequence[str]):
         await self.update_id_by_name()
@@ -491,8 +491,18 @@ class AsyncSession(BaseSession):
         *,
         config: Optional[APIConfig] = None,
         proxy_mode: bool = False,
+        aiohttp_session: Optional[aiohttp.ClientSession] = None,
     ) -> None:
+        """
+        :param aiohttp_session: An externally managed HTTP client session to share its
+                                connection pool with other API sessions.
+                                It is not closed when this API session is closed.
+        """
         super().__init__(config=config, proxy_mode=proxy_mode)
+        self._owns_aiohttp_session = aiohttp_session is None
+        if aiohttp_session is not None:
+            self.aiohttp_session = aiohttp_session
+            return
         ssl: SSLContextType = True
         if self._config.skip_sslcert_validation:
             ssl = False
@@ -511,7 +521,8 @@ class AsyncSession(BaseSession):
         if self._closed:
             return
         self._closed = True
-        await _close_aiohttp_session(self.aiohttp_session)
+        if self._owns_aiohttp_session:
+            await _close_aiohttp_session(self.aiohttp_session)
         api_session.reset(self._context_token)
 
     def close(self) -> Awaitable[None]:
@@ -1,3 +1,4 @@
+import uuid
 from typing import Optional
 
 from pydantic import AliasChoices, Field
@@ -24,3 +25,7 @@ class CloneVFolderReq(BaseRequestModel):
         description="The destination virtual folder ID.",
         validation_alias=AliasChoices("dst_vfid", "dst_vfolder_id"),
     )
+    bgtask_id: Optional[uuid.UUID] = Field(
+        default=None,
+        description="The ID of the manager's background task to report the clone progress.",
+    )
@@ -10,13 +10,15 @@ import socket
 import time
 import uuid
 from abc import abstractmethod
-from collections import defaultdict
+from collections import defaultdict, deque
 from contextlib import aclosing
 from typing import (
     Any,
+    Awaitable,
     Callable,
     ClassVar,
     Coroutine,
+    Final,
     Generic,
     Mapping,
     Optional,
@@ -35,7 +37,8 @@ from aiomonitor.task import preserve_termination_log
 from aiotools.server import process_index
 from aiotools.taskgroup import PersistentTaskGroup
 from aiotools.taskgroup.types import AsyncExceptionHandler
-from redis.asyncio import ConnectionPool
+from redis.asyncio import ConnectionPool, Redis
+from redis.asyncio.client import Pipeline
 
 from ai.backend.common.docker import ImageRef
 from ai.backend.logging import BraceStyleAdapter, LogLevel
@@ -56,6 +59,7 @@ from .types import (
 
 __all__ = (
     "AbstractEvent",
+    "ArgsPositionMatcher",
     "EventCallback",
     "EventDispatcher",
     "EventHandler",
@@ -1030,6 +1034,26 @@ class VFolderDeletionFailureEvent(AbstractEvent):
         )
 
 
+@attrs.define(slots=True, frozen=True)
+class DoInvalidateAuthCacheEvent(AbstractEvent):
+    """
+    Requests the managers to drop the cached credentials of the given access key,
+    or all cached credentials if the access key is not specified,
+    after changing the keypairs, the users or their resource policies.
+    """
+
+    name = "do_invalidate_auth_cache"
+
+    access_key: Optional[str] = attrs.field(default=None)
+
+    def serialize(self) -> tuple:
+        return (self.access_key,)
+
+    @classmethod
+    def deserialize(cls, value: tuple) -> Self:
+        return cls(value[0])
+
+
 class RedisConnectorFunc(Protocol):
     def __call__(
         self,
@@ -1057,6 +1081,86 @@ class EventHandler(Generic[TContext, TEvent]):
     args_matcher: Callable[[tuple], bool] | None
 
 
+@attrs.define(auto_attribs=True, slots=True, frozen=True)
+class ArgsPositionMatcher:
+    """
+    An args matcher which matches the events having the given value as the argument
+    at the given position (e.g., the session ID or the kernel ID).
+
+    Unlike arbitrary callables, the event dispatcher indexes the handlers having this matcher
+    by the value, so that only the matching handlers are looked up for each event.
+    """
+
+    position: int
+    value: Any
+
+    def __call__(self, args: tuple) -> bool:
+        return len(args) > self.position and args[self.position] == self.value
+
+
+class EventHandlerIndex:
+    """
+    A set of event handlers for an event name, indexed by their :class:`ArgsPositionMatcher`.
+    """
+
+    __slots__ = ("unindexed", "by_position")
+
+    unindexed: set[EventHandler[Any, AbstractEvent]]
+    by_position: dict[int, dict[Any, set[EventHandler[Any, AbstractEvent]]]]
+
+    def __init__(self) -> None:
+        self.unindexed = set()
+        self.by_position = {}
+
+    def add(self, handler: EventHandler[Any, AbstractEvent]) -> None:
+        matcher = handler.args_matcher
+        if isinstance(matcher, ArgsPositionMatcher):
+            self.by_position.setdefault(matcher.position, {}).setdefault(matcher.value, set()).add(
+                handler
+            )
+        else:
+            self.unindexed.add(handler)
+
+    def discard(self, handler: EventHandler[Any, AbstractEvent]) -> None:
+        matcher = handler.args_matcher
+        if isinstance(matcher, ArgsPositionMatcher):
+            by_value = self.by_position.get(matcher.position)
+            if by_value is None:
+                return
+            handlers = by_value.get(matcher.value)
+            if handlers is None:
+                return
+            handlers.discard(handler)
+            if not handlers:
+                del by_value[matcher.value]
+                if not by_value:
+                    del self.by_position[matcher.position]
+        else:
+            self.unindexed.discard(handler)
+
+    def match(self, args: tuple) -> list[EventHandler[Any, AbstractEvent]]:
+        """
+        Return the handlers which may match the given event arguments.
+        The handlers with other kinds of args matchers are returned as well, to be filtered
+        when invoking them.
+        """
+        handlers = [*self.unindexed]
+        for position, by_value in self.by_position.items():
+            if position >= len(args):
+                continue
+            try:
+                matched = by_value.get(args[position])
+            except TypeError:  # unhashable argument
+                continue
+            if matched:
+                handlers.extend(matched)
+        return handlers
+
+
+# The number of event handler tasks to spawn before yielding to the event loop.
+_DISPATCH_BATCH_SIZE: Final = 64
+
+
 class CoalescingOptions(TypedDict):
     max_wait: float
     max_batch_size: int
@@ -1154,6 +1258,8 @@ class EventDispatcher(aobject):
 
     consumers: defaultdict[str, set[EventHandler[Any, AbstractEvent]]]
     subscribers: defaultdict[str, set[EventHandler[Any, AbstractEvent]]]
+    _consumer_index: defaultdict[str, EventHandlerIndex]
+    _subscriber_index: defaultdict[str, EventHandlerIndex]
     redis_client: RedisConnectionInfo
     consumer_loop_task: asyncio.Task
     subscriber_loop_task: asyncio.Task
@@ -1188,6 +1294,8 @@ class EventDispatcher(aobject):
         self._closed = False
         self.consumers = defaultdict(set)
         self.subscribers = defaultdict(set)
+        self._consumer_index = defaultdict(EventHandlerIndex)
+        self._subscriber_index = defaultdict(EventHandlerIndex)
         self._stream_key = stream_key
         self._consumer_group = consumer_group
         self._consumer_name = _generate_consumer_id(node_id)
@@ -1240,6 +1348,8 @@ class EventDispatcher(aobject):
         args_matcher:
           Optional. A callable which accepts event argument and supplies a bool as a return value.
           When specified, EventDispatcher will only execute callback when this lambda returns True.
+          Use :class:`ArgsPositionMatcher` to match an argument with a specific value
+          so that the handler is looked up by the value instead of calling every matcher.
         """
 
         if name is None:
@@ -1254,6 +1364,7 @@ class EventDispatcher(aobject):
             args_matcher,
         )
         self.consumers[event_cls.name].add(cast(EventHandler[Any, AbstractEvent], handler))
+        self._consumer_index[event_cls.name].add(cast(EventHandler[Any, AbstractEvent], handler))
         return handler
 
     def unconsume(
@@ -1263,6 +1374,9 @@ class EventDispatcher(aobject):
         self.consumers[handler.event_cls.name].discard(
             cast(EventHandler[Any, AbstractEvent], handler)
         )
+        self._consumer_index[handler.event_cls.name].discard(
+            cast(EventHandler[Any, AbstractEvent], handler)
+        )
 
     def subscribe(
         self,
@@ -1281,6 +1395,8 @@ class EventDispatcher(aobject):
         args_matcher:
           Optional. A callable which accepts event argument and supplies a bool as a return value.
           When specified, EventDispatcher will only execute callback when this lambda returns True.
+          Use :class:`ArgsPositionMatcher` to match an argument with a specific value
+          so that the handler is looked up by the value instead of calling every matcher.
         """
 
         if name is None:
@@ -1296,6 +1412,9 @@ class EventDispatcher(aobject):
         )
         override_event_name = override_event_name or event_cls.name
         self.subscribers[override_event_name].add(cast(EventHandler[Any, AbstractEvent], handler))
+        self._subscriber_index[override_event_name].add(
+            cast(EventHandler[Any, AbstractEvent], handler)
+        )
         return handler
 
     def unsubscribe(
@@ -1308,8 +1427,24 @@ class EventDispatcher(aobject):
         self.subscribers[override_event_name].discard(
             cast(EventHandler[Any, AbstractEvent], handler)
         )
+        self._subscriber_index[override_event_name].discard(
+            cast(EventHandler[Any, AbstractEvent], handler)
+        )
+
+    async def handle(
+        self,
+        evh_type: str,
+        evh: EventHandler,
+        source: AgentId,
+        args: tuple,
+        decoded_events: dict[type[AbstractEvent], AbstractEvent] | None = None,
+    ) -> None:
+        """
+        Invoke the event handler if its args matcher accepts the event arguments.
 
-    async def handle(self, evh_type: str, evh: EventHandler, source: AgentId, args: tuple) -> None:
+        The event object is deserialized only once per event class and shared among
+        the handlers of the same message through ``decoded_events``.
+        """
         if evh.args_matcher and not evh.args_matcher(args):
             return
         coalescing_opts = evh.coalescing_opts
@@ -1323,11 +1458,37 @@ class EventDispatcher(aobject):
                 return
             if self._log_events:
                 log.debug("DISPATCH_{}(evh:{})", evh_type, evh.name)
+            if decoded_events is None:
+                event = event_cls.deserialize(args)
+            else:
+                event = decoded_events.get(event_cls)
+                if event is None:
+                    event = event_cls.deserialize(args)
+                    decoded_events[event_cls] = event
             if asyncio.iscoroutinefunction(cb):
                 # mypy cannot catch the meaning of asyncio.iscoroutinefunction().
-                await cb(evh.context, source, event_cls.deserialize(args))  # type: ignore
+                await cb(evh.context, source, event)  # type: ignore
             else:
-                cb(evh.context, source, event_cls.deserialize(args))  # type: ignore
+                cb(evh.context, source, event)  # type: ignore
+
+    async def _dispatch_handlers(
+        self,
+        evh_type: str,
+        handler_index: EventHandlerIndex | None,
+        taskgroup: PersistentTaskGroup,
+        source: AgentId,
+        args: tuple,
+    ) -> None:
+        if handler_index is None:
+            return
+        decoded_events: dict[type[AbstractEvent], AbstractEvent] = {}
+        for idx, handler in enumerate(handler_index.match(args), start=1):
+            taskgroup.create_task(
+                self.handle(evh_type, handler, source, args, decoded_events),
+            )
+            if idx % _DISPATCH_BATCH_SIZE == 0:
+                await asyncio.sleep(0)
+        await asyncio.sleep(0)
 
     async def dispatch_consumers(
         self,
@@ -1337,11 +1498,13 @@ class EventDispatcher(aobject):
     ) -> None:
         if self._log_events:
             log.debug("DISPATCH_CONSUMERS(ev:{}, ag:{})", event_name, source)
-        for consumer in self.consumers[event_name].copy():
-            self.consumer_taskgroup.create_task(
-                self.handle("CONSUMER", consumer, source, args),
-            )
-            await asyncio.sleep(0)
+        await self._dispatch_handlers(
+            "CONSUMER",
+            self._consumer_index.get(event_name),
+            self.consumer_taskgroup,
+            source,
+            args,
+        )
 
     async def dispatch_subscribers(
         self,
@@ -1351,11 +1514,45 @@ class EventDispatcher(aobject):
     ) -> None:
         if self._log_events:
             log.debug("DISPATCH_SUBSCRIBERS(ev:{}, ag:{})", event_name, source)
-        for subscriber in self.subscribers[event_name].copy():
-            self.subscriber_taskgroup.create_task(
-                self.handle("SUBSCRIBER", subscriber, source, args),
+        await self._dispatch_handlers(
+            "SUBSCRIBER",
+            self._subscriber_index.get(event_name),
+            self.subscriber_taskgroup,
+            source,
+            args,
+        )
+
+    async def _dispatch_message(
+        self,
+        msg_data: Mapping[bytes, bytes],
+        dispatch: Callable[[str, AgentId, tuple], Awaitable[None]],
+    ) -> None:
+        """
+        Decode a message from the event stream and dispatch it to the matching handlers,
+        reporting the dispatch latency of the message to the event observer.
+        """
+        event_type = "unknown"
+        start = time.perf_counter()
+        try:
+            decoded = msg_data[b"name"].decode()
+            if decoded and isinstance(decoded, str):
+                event_type = decoded
+            await dispatch(
+                decoded,
+                AgentId(msg_data[b"source"].decode()),
+                msgpack.unpackb(msg_data[b"args"]),
+            )
+        except BaseException as e:
+            self._metric_observer.observe_event_failure(
+                event_type=event_type,
+                duration=time.perf_counter() - start,
+                exception=e,
             )
-            await asyncio.sleep(0)
+            raise
+        self._metric_observer.observe_event_success(
+            event_type=event_type,
+            duration=time.perf_counter() - start,
+        )
 
     @preserve_termination_log
     async def _consume_loop(self) -> None:
@@ -1372,35 +1569,10 @@ class EventDispatcher(aobject):
                     return
                 if msg_data is None:
                     continue
-                event_type = "unknown"
-                start = time.perf_counter()
                 try:
-                    decoded = msg_data[b"name"].decode()
-                    if decoded and isinstance(decoded, str):
-                        event_type = decoded
-                    await self.dispatch_consumers(
-                        decoded,
-                        msg_data[b"source"].decode(),
-                        msgpack.unpackb(msg_data[b"args"]),
-                    )
-                    self._metric_observer.observe_event_success(
-                        event_type=event_type,
-                        duration=time.perf_counter() - start,
-                    )
-                except Exception as e:
-                    self._metric_observer.observe_event_failure(
-                        event_type=event_type,
-                        duration=time.perf_counter() - start,
-                        exception=e,
-                    )
+                    await self._dispatch_message(msg_data, self.dispatch_consumers)
+                except Exception:
                     log.exception("EventDispatcher.consume(): unexpected-error")
-                except BaseException as e:
-                    self._metric_observer.observe_event_failure(
-                        event_type=event_type,
-                        duration=time.perf_counter() - start,
-                        exception=e,
-                    )
-                    raise
 
     @preserve_termination_log
     async def _subscribe_loop(self) -> None:
@@ -1415,38 +1587,26 @@ class EventDispatcher(aobject):
                     return
                 if msg_data is None:
                     continue
-                event_type = "unknown"
-                start = time.perf_counter()
                 try:
-                    decoded = msg_data[b"name"].decode()
-                    if decoded and isinstance(decoded, str):
-                        event_type = decoded
-                    await self.dispatch_subscribers(
-                        decoded,
-                        msg_data[b"source"].decode(),
-                        msgpack.unpackb(msg_data[b"args"]),
-                    )
-                    self._metric_observer.observe_event_success(
-                        event_type=event_type,
-                        duration=time.perf_counter() - start,
-                    )
-                except Exception as e:
-                    self._metric_observer.observe_event_failure(
-                        event_type=event_type,
-                        duration=time.perf_counter() - start,
-                        exception=e,
-                    )
+                    await self._dispatch_message(msg_data, self.dispatch_subscribers)
+                except Exception:
                     log.exception("EventDispatcher.subscribe(): unexpected-error")
-                except BaseException as e:
-                    self._metric_observer.observe_event_failure(
-                        event_type=event_type,
-                        duration=time.perf_counter() - start,
-                        exception=e,
-                    )
-                    raise
 
 
 class EventProducer(aobject):
+    """
+    Produces events to the Redis stream.
+
+    When ``batch_size`` is larger than 1, the events are buffered in the client-side and
+    the buffered events are added to the stream with a single pipelined batch of ``XADD``
+    commands when the buffer has ``batch_size`` events or ``batch_window`` seconds have passed
+    since the first buffered event, preserving the order of the events.
+    The producers wait for the buffer to be flushed when it reaches ``max_buffer_size``, so that
+    the memory usage is bounded even when Redis is slower than the producers.
+    Call :meth:`flush()` to ensure all buffered events are delivered, which is also done when
+    closing the producer.
+    """
+
     redis_client: RedisConnectionInfo
     _log_events: bool
 
@@ -1458,6 +1618,9 @@ class EventProducer(aobject):
         service_name: str | None = None,
         stream_key: str = "events",
         log_events: bool = False,
+        batch_size: int = 1,
+        batch_window: float = 0.005,
+        max_buffer_size: int = 10_000,
     ) -> None:
         _redis_config = redis_config.copy()
         if service_name:
@@ -1470,12 +1633,33 @@ class EventProducer(aobject):
         )
         self._log_events = log_events
         self._stream_key = stream_key
+        self._batch_size = batch_size
+        self._batch_window = batch_window
+        self._max_buffer_size = max(max_buffer_size, batch_size)
+        self._buffer: deque[dict[bytes, bytes]] = deque()
+        self._buffer_ready = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task | None = None
+
+    @property
+    def buffered(self) -> bool:
+        return self._batch_size > 1
 
     async def __ainit__(self) -> None:
-        pass
+        if self.buffered:
+            self._flush_task = asyncio.create_task(self._flush_loop())
 
     async def close(self) -> None:
         self._closed = True
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            try:
+                await self.flush()
+            except Exception:
+                log.exception(
+                    "failed to flush the buffered events ({} events dropped)", len(self._buffer)
+                )
         await self.redis_client.close()
 
     async def produce_event(
@@ -1491,11 +1675,58 @@ class EventProducer(aobject):
             b"source": source.encode(),
             b"args": msgpack.packb(event.serialize()),
         }
+        if self.buffered:
+            self._buffer.append(raw_event)
+            if len(self._buffer) >= self._max_buffer_size:
+                # Apply back-pressure to the producers instead of growing the buffer.
+                await self.flush()
+            else:
+                self._buffer_ready.set()
+            return
         await redis_helper.execute(
             self.redis_client,
             lambda r: r.xadd(self._stream_key, raw_event),  # type: ignore # aio-libs/aioredis-py#1182
         )
 
+    async def flush(self) -> None:
+        """
+        Add all buffered events to the stream.
+        """
+        async with self._flush_lock:
+            while self._buffer:
+                num_events = min(len(self._buffer), self._batch_size)
+                batch = [self._buffer[idx] for idx in range(num_events)]
+
+                def _pipe_builder(r: Redis) -> Pipeline:
+                    pipe = r.pipeline(transaction=False)
+                    for raw_event in batch:
+                        pipe.xadd(self._stream_key, raw_event)  # type: ignore # aio-libs/aioredis-py#1182
+                    return pipe
+
+                await redis_helper.execute(self.redis_client, _pipe_builder)
+                # Remove the events only after they are delivered, so that a failed batch
+                # is retried by the next flush in the same order.
+                for _ in range(num_events):
+                    self._buffer.popleft()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await self._buffer_ready.wait()
+            if len(self._buffer) < self._batch_size:
+                # Wait for more events to coalesce.
+                await asyncio.sleep(self._batch_window)
+            self._buffer_ready.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception(
+                    "failed to flush the buffered events (buffered: {})", len(self._buffer)
+                )
+                self._buffer_ready.set()
+                await asyncio.sleep(self._batch_window)
+
 
 def _generate_consumer_id(node_id: str | None = None) -> str:
     h = hashlib.sha1()
@@ -12,11 +12,11 @@ from aiotools.taskgroup.types import AsyncExceptionHandler
 
 from ai.backend.logging import BraceStyleAdapter
 
-from . import msgpack
-from .events import AbstractEvent, EventHandler, _generate_consumer_id
+from .events import AbstractEvent, EventHandler, EventHandlerIndex, _generate_consumer_id
 from .events import EventDispatcher as _EventDispatcher
 from .redis_client import RedisClient, RedisConnection
-from .types import AgentId, RedisConfig
+from .redis_helper import get_trim_min_id, is_behind_trim_window, report_stream_gap
+from .types import RedisConfig
 
 log = BraceStyleAdapter(logging.getLogger(__spec__.name))
 
@@ -28,29 +28,50 @@ async def read_stream(
     stream_key: str,
     *,
     block_timeout: int = 10_000,  # in msec
+    count: int = 256,
+    trim_window: float = 60.0,  # in sec
+    trim_interval: float = 1.0,  # in sec
 ) -> AsyncIterable[tuple[bytes, dict[bytes, bytes]]]:
     """
     A high-level wrapper for the XREAD command.
+    See :func:`ai.backend.common.redis_helper.read_stream()` for the trimming policy.
     """
     last_id = b"$"
+    last_trimmed_at = 0.0
+    loop = asyncio.get_running_loop()
     while True:
         try:
             reply = await client.execute(
-                ["XREAD", "BLOCK", block_timeout, "STREAMS", stream_key, last_id],
+                [
+                    "XREAD",
+                    "COUNT",
+                    count,
+                    "BLOCK",
+                    block_timeout,
+                    "STREAMS",
+                    stream_key,
+                    last_id,
+                ],
                 command_timeout=(block_timeout + 5_000) / 1000,
             )
             if not reply:
                 continue
-            # Keep some latest messages so that other manager
-            # processes to have chances of fetching them.
-            await client.execute([
-                "XTRIM",
-                stream_key,
-                "MAXLEN",
-                "~",
-                128,
-            ])
-            for msg_id, msg_data_list in reply[stream_key.encode()]:
+            messages = reply[stream_key.encode()]
+            first_id, newest_id = messages[0][0], messages[-1][0]
+            if last_id != b"$" and is_behind_trim_window(last_id, newest_id, trim_window):
+                oldest = await client.execute(["XRANGE", stream_key, "-", "+", "COUNT", 1])
+                if oldest and oldest[0][0] == first_id:
+                    report_stream_gap(stream_key, last_id, first_id)
+            if loop.time() - last_trimmed_at >= trim_interval:
+                last_trimmed_at = loop.time()
+                await client.execute([
+                    "XTRIM",
+                    stream_key,
+                    "MINID",
+                    "~",
+                    get_trim_min_id(newest_id, trim_window),
+                ])
+            for msg_id, msg_data_list in messages:
                 try:
                     msg_data = {}
                     for idx in range(0, len(msg_data_list), 2):
@@ -205,6 +226,8 @@ class EventDispatcher(_EventDispatcher):
         self._closed = False
         self.consumers = defaultdict(set)
         self.subscribers = defaultdict(set)
+        self._consumer_index = defaultdict(EventHandlerIndex)
+        self._subscriber_index = defaultdict(EventHandlerIndex)
         self._stream_key = stream_key
         self._consumer_group = consumer_group
         self._consumer_name = _generate_consumer_id(node_id)
@@ -257,11 +280,7 @@ class EventDispatcher(_EventDispatcher):
                         if msg_data is None:
                             continue
                         try:
-                            await self.dispatch_subscribers(
-                                msg_data[b"name"].decode(),
-                                AgentId(msg_data[b"source"].decode()),
-                                msgpack.unpackb(msg_data[b"args"]),
-                            )
+                            await self._dispatch_message(msg_data, self.dispatch_subscribers)
                         except asyncio.CancelledError:
                             raise
             except hiredis.HiredisError as e:
@@ -313,11 +332,7 @@ class EventDispatcher(_EventDispatcher):
                         if msg_data is None:
                             continue
                         try:
-                            await self.dispatch_consumers(
-                                msg_data[b"name"].decode(),
-                                AgentId(msg_data[b"source"].decode()),
-                                msgpack.unpackb(msg_data[b"args"]),
-                            )
+                            await self._dispatch_message(msg_data, self.dispatch_consumers)
                         except asyncio.CancelledError:
                             raise
             except hiredis.HiredisError as e:
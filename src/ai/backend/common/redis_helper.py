@@ -332,39 +332,99 @@ async def execute_script(
     return ret
 
 
+def parse_stream_id(msg_id: bytes | str) -> tuple[int, int]:
+    """
+    Parse a Redis stream entry ID into the millisecond timestamp and the sequence number.
+    """
+    if isinstance(msg_id, bytes):
+        msg_id = msg_id.decode()
+    ts, _, seq = msg_id.partition("-")
+    return int(ts), int(seq or 0)
+
+
+def get_trim_min_id(newest_id: bytes | str, trim_window: float) -> str:
+    """
+    Return the minimum ID of the entries to keep when trimming a stream by the time window
+    relative to the given newest entry, so that the trimming does not depend on the local clock.
+    """
+    newest_ts, _ = parse_stream_id(newest_id)
+    return f"{max(0, newest_ts - int(trim_window * 1000))}-0"
+
+
+def is_behind_trim_window(
+    last_id: bytes | str,
+    newest_id: bytes | str,
+    trim_window: float,
+) -> bool:
+    """
+    Check if the entries after the last read ID may have been trimmed by other readers,
+    which trim the entries older than the time window relative to the newest entry.
+    """
+    return parse_stream_id(last_id) < parse_stream_id(get_trim_min_id(newest_id, trim_window))
+
+
+def report_stream_gap(stream_key: str, last_id: bytes | str, first_id: bytes | str) -> None:
+    log.warning(
+        "read_stream(): the messages of the stream {!r} in the range ({}, {}) may have been"
+        " trimmed before being read",
+        stream_key,
+        last_id,
+        first_id,
+    )
+
+
 async def read_stream(
     r: RedisConnectionInfo,
     stream_key: str,
     *,
     block_timeout: int = 10_000,  # in msec
+    count: int = 256,
+    trim_window: float = 60.0,  # in sec
+    trim_interval: float = 1.0,  # in sec
 ) -> AsyncGenerator[tuple[bytes, Any], None]:
     """
     A high-level wrapper for the XREAD command.
+
+    It reads up to ``count`` messages at once, and trims the messages older than
+    ``trim_window`` seconds than the latest message at most once per ``trim_interval`` seconds,
+    so that the readers in other processes have chances of fetching them.
+    Since the trimming is idempotent, the readers do not need to coordinate with each other.
+    If the reader has fallen behind the trim window, it reports the range of the messages
+    which may have been trimmed before being read.
     """
     last_id = b"$"
+    last_trimmed_at = 0.0
+    loop = asyncio.get_running_loop()
     while True:
         try:
             reply = await execute(
                 r,
                 lambda r: r.xread(
                     {stream_key: last_id},
+                    count=count,
                     block=block_timeout,
                 ),
                 command_timeout=block_timeout / 1000,
             )
             if not reply:
                 continue
-            # Keep some latest messages so that other manager
-            # processes to have chances of fetching them.
-            await execute(
-                r,
-                lambda r: r.xtrim(
-                    stream_key,
-                    maxlen=128,
-                    approximate=True,
-                ),
-            )
-            for msg_id, msg_data in reply[0][1]:
+            messages = reply[0][1]
+            first_id, newest_id = messages[0][0], messages[-1][0]
+            if last_id != b"$" and is_behind_trim_window(last_id, newest_id, trim_window):
+                oldest = await execute(r, lambda r: r.xrange(stream_key, count=1))
+                if oldest and oldest[0][0] == first_id:
+                    report_stream_gap(stream_key, last_id, first_id)
+            if loop.time() - last_trimmed_at >= trim_interval:
+                last_trimmed_at = loop.time()
+                await execute(
+                    r,
+                    lambda r: r.xtrim(
+                        stream_key,
+                        minid=get_trim_min_id(newest_id, trim_window),
+                        approximate=True,
+                    ),
+                )
+            for msg_id, msg_data in messages:
                 try:
                     yield msg_id, msg_data
                 finally:
@@ -2,25 +2,29 @@ from __future__ import annotations
 
 import dataclasses
 import enum
+import functools
 import ipaddress
 import itertools
 import math
 import numbers
+import operator
 import textwrap
 import uuid
 from abc import ABCMeta, abstractmethod
 from collections import UserDict, defaultdict, namedtuple
-from collections.abc import Iterable
+from collections.abc import Iterable, Iterator
 from contextvars import ContextVar
 from dataclasses import dataclass, field
-from decimal import Decimal
+from decimal import ROUND_HALF_EVEN, Decimal
 from ipaddress import ip_address, ip_network
 from pathlib import Path, PurePosixPath
 from ssl import SSLContext
 from typing import (
     TYPE_CHECKING,
     Any,
+    ClassVar,
     Dict,
+    Final,
     Generic,
     List,
     Literal,
@@ -91,6 +95,8 @@ __all__ = (
     "AutoPullBehavior",
     "ServicePort",
     "ResourceSlot",
+    "SlotSchema",
+    "CompactResourceSlot",
     "ResourceGroupType",
     "SlotName",
     "SlotTypes",
@@ -963,6 +969,283 @@ class ResourceSlot(UserDict):
         return {k: _stringify_number(Decimal(v)) for k, v in self.data.items() if v is not None}
 
 
+_COMPACT_SLOT_SCALE: Final = 1000  # matches the quantum of the decimal slot values
+
+
+# The distinct slot values are few in practice, so the conversions are memoized.
+@functools.lru_cache(maxsize=4096)
+def _scale_slot_value(value: Any) -> int | float:
+    if type(value) is int:
+        return value * _COMPACT_SLOT_SCALE
+    if type(value) is not Decimal:
+        value = Decimal(value)
+    if not value.is_finite():
+        if value.is_nan():
+            raise ValueError("Cannot represent NaN as a resource slot value.")
+        return math.inf if value > 0 else -math.inf
+    scaled = value * _COMPACT_SLOT_SCALE
+    result = int(scaled)
+    if result != scaled:
+        result = int(scaled.to_integral_value(rounding=ROUND_HALF_EVEN))
+    return result
+
+
+@functools.lru_cache(maxsize=4096)
+def _unscale_slot_value(value: int | float) -> Decimal:
+    if isinstance(value, float):
+        return Decimal(value)
+    quotient, remainder = divmod(value, _COMPACT_SLOT_SCALE)
+    if remainder == 0:
+        return Decimal(quotient)
+    return Decimal(value).scaleb(-3).normalize()
+
+
+class SlotSchema:
+    """
+    An interned, ordered tuple of slot names shared by :class:`CompactResourceSlot` objects.
+    Use :meth:`SlotSchema.of()` to get the schema instance, which is compared by identity.
+    """
+
+    __slots__ = ("slot_names", "index", "_union_cache")
+
+    _interned: ClassVar[dict[tuple[str, ...], SlotSchema]] = {}
+
+    slot_names: tuple[SlotName, ...]
+    index: Mapping[str, int]
+
+    def __init__(self, slot_names: tuple[str, ...]) -> None:
+        self.slot_names = tuple(SlotName(name) for name in slot_names)
+        self.index = {name: idx for idx, name in enumerate(slot_names)}
+        self._union_cache: dict[SlotSchema, SlotSchema] = {}
+
+    @classmethod
+    def of(cls, slot_names: Iterable[str]) -> SlotSchema:
+        key = tuple(slot_names)
+        schema = cls._interned.get(key)
+        if schema is None:
+            schema = cls._interned.setdefault(key, cls(key))
+        return schema
+
+    def __len__(self) -> int:
+        return len(self.slot_names)
+
+    def __repr__(self) -> str:
+        return f"SlotSchema({self.slot_names!r})"
+
+    def union(self, other: SlotSchema) -> SlotSchema:
+        if other is self:
+            return self
+        schema = self._union_cache.get(other)
+        if schema is None:
+            schema = SlotSchema.of((
+                *self.slot_names,
+                *(name for name in other.slot_names if name not in self.index),
+            ))
+            self._union_cache[other] = schema
+        return schema
+
+
+class CompactResourceSlot:
+    """
+    A fixed-schema variant of :class:`ResourceSlot` for the hot paths.
+
+    The values are kept as a tuple of integers scaled by :attr:`scale` (matching the quantum of
+    the decimal slot values) in the order of the slot names of an interned :class:`SlotSchema`,
+    and the infinite values (e.g., unlimited resource policies) are kept as float infinities.
+    The operators work like :class:`ResourceSlot` by treating the missing slots as zero,
+    but never mutate the operands, and operands of the same schema are combined element-wise
+    without any dict allocation.
+    """
+
+    __slots__ = ("schema", "values")
+
+    scale: ClassVar[int] = _COMPACT_SLOT_SCALE
+
+    schema: SlotSchema
+    values: tuple[int | float, ...]
+
+    def __init__(self, schema: SlotSchema, values: Iterable[int | float]) -> None:
+        self.schema = schema
+        self.values = tuple(values)
+        if len(self.values) != len(schema):
+            raise ValueError("The number of values does not match the slot schema.")
+
+    @classmethod
+    def _make(cls, schema: SlotSchema, values: tuple[int | float, ...]) -> CompactResourceSlot:
+        # Skip the validation in __init__() for the results of element-wise operations.
+        obj = object.__new__(cls)
+        obj.schema = schema
+        obj.values = values
+        return obj
+
+    @classmethod
+    def zeros(cls, schema: SlotSchema) -> CompactResourceSlot:
+        return cls._make(schema, (0,) * len(schema))
+
+    @classmethod
+    def from_resource_slot(
+        cls,
+        slots: Mapping[str, Any],
+        schema: Optional[SlotSchema] = None,
+    ) -> CompactResourceSlot:
+        """
+        Convert the given mapping of decimal slot values (e.g., a :class:`ResourceSlot`).
+        If the schema is given, the result uses it (extended with the slots not in the schema).
+        """
+        if isinstance(slots, UserDict):
+            slots = slots.data  # avoid the slow UserDict methods
+        if schema is None:
+            schema = SlotSchema.of(slots.keys())
+        elif not schema.index.keys() >= slots.keys():
+            schema = schema.union(SlotSchema.of(slots.keys()))
+        scale_value = _scale_slot_value
+        return cls._make(
+            schema, tuple([scale_value(slots.get(name, 0)) for name in schema.slot_names])
+        )
+
+    @classmethod
+    def from_json(
+        cls,
+        obj: Mapping[str, Any],
+        schema: Optional[SlotSchema] = None,
+    ) -> CompactResourceSlot:
+        return cls.from_resource_slot({k: v for k, v in obj.items() if v is not None}, schema)
+
+    def to_resource_slot(self) -> ResourceSlot:
+        unscale_value = _unscale_slot_value
+        slots = ResourceSlot()
+        slots.data = {
+            name: unscale_value(value) for name, value in zip(self.schema.slot_names, self.values)
+        }
+        return slots
+
+    def to_json(self) -> Mapping[str, str]:
+        return self.to_resource_slot().to_json()
+
+    @classmethod
+    def sum(
+        cls,
+        slots: Iterable[CompactResourceSlot | Mapping[str, Any]],
+        schema: Optional[SlotSchema] = None,
+    ) -> CompactResourceSlot:
+        """
+        Sum up the given slots, converting :class:`ResourceSlot` objects on the fly.
+        """
+        total = cls.zeros(schema if schema is not None else SlotSchema.of(()))
+        for item in slots:
+            if not isinstance(item, CompactResourceSlot):
+                item = cls.from_resource_slot(item, total.schema)
+            total = total + item
+        return total
+
+    def with_schema(self, schema: SlotSchema) -> CompactResourceSlot:
+        """
+        Project the values onto the given schema, dropping the slots not in the schema.
+        """
+        if schema is self.schema:
+            return self
+        return self._make(schema, self._values_in(schema))
+
+    def _values_in(self, schema: SlotSchema) -> tuple[int | float, ...]:
+        if schema is self.schema:
+            return self.values
+        index = self.schema.index
+        values = self.values
+        return tuple(
+            values[idx] if (idx := index.get(name)) is not None else 0 for name in schema.slot_names
+        )
+
+    def _align(
+        self, other: CompactResourceSlot
+    ) -> tuple[SlotSchema, tuple[int | float, ...], tuple[int | float, ...]]:
+        if other.schema is self.schema:
+            return self.schema, self.values, other.values
+        schema = self.schema.union(other.schema)
+        return schema, self._values_in(schema), other._values_in(schema)
+
+    def __add__(self, other: CompactResourceSlot) -> CompactResourceSlot:
+        if not isinstance(other, CompactResourceSlot):
+            return NotImplemented
+        schema, lhs, rhs = self._align(other)
+        return self._make(schema, tuple(map(operator.add, lhs, rhs)))
+
+    def __sub__(self, other: CompactResourceSlot) -> CompactResourceSlot:
+        if not isinstance(other, CompactResourceSlot):
+            return NotImplemented
+        schema, lhs, rhs = self._align(other)
+        return self._make(schema, tuple(map(operator.sub, lhs, rhs)))
+
+    def __neg__(self) -> CompactResourceSlot:
+        return self._make(self.schema, tuple(map(operator.neg, self.values)))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CompactResourceSlot):
+            return NotImplemented
+        _, lhs, rhs = self._align(other)
+        return lhs == rhs
+
+    def __ne__(self, other: object) -> bool:
+        if not isinstance(other, CompactResourceSlot):
+            return NotImplemented
+        _, lhs, rhs = self._align(other)
+        return lhs != rhs
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __le__(self, other: CompactResourceSlot) -> bool:
+        if not isinstance(other, CompactResourceSlot):
+            return NotImplemented
+        _, lhs, rhs = self._align(other)
+        return all(map(operator.le, lhs, rhs))
+
+    def __lt__(self, other: CompactResourceSlot) -> bool:
+        if not isinstance(other, CompactResourceSlot):
+            return NotImplemented
+        _, lhs, rhs = self._align(other)
+        return all(map(operator.le, lhs, rhs)) and lhs != rhs
+
+    def __ge__(self, other: CompactResourceSlot) -> bool:
+        if not isinstance(other, CompactResourceSlot):
+            return NotImplemented
+        _, lhs, rhs = self._align(other)
+        return all(map(operator.ge, lhs, rhs))
+
+    def __gt__(self, other: CompactResourceSlot) -> bool:
+        if not isinstance(other, CompactResourceSlot):
+            return NotImplemented
+        _, lhs, rhs = self._align(other)
+        return all(map(operator.ge, lhs, rhs)) and lhs != rhs
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __iter__(self) -> Iterator[SlotName]:
+        return iter(self.schema.slot_names)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.schema.index
+
+    def __getitem__(self, name: str) -> Decimal:
+        return _unscale_slot_value(self.values[self.schema.index[name]])
+
+    def get(self, name: str, default: Any = None) -> Any:
+        idx = self.schema.index.get(name)
+        if idx is None:
+            return default
+        return _unscale_slot_value(self.values[idx])
+
+    def keys(self) -> tuple[SlotName, ...]:
+        return self.schema.slot_names
+
+    def items(self) -> Iterator[tuple[SlotName, Decimal]]:
+        unscale_value = _unscale_slot_value
+        for name, value in zip(self.schema.slot_names, self.values):
+            yield name, unscale_value(value)
+
+    def __repr__(self) -> str:
+        return f"CompactResourceSlot({dict(self.items())!r})"
+
+
 class JSONSerializableMixin(metaclass=ABCMeta):
     @abstractmethod
     def to_json(self) -> dict[str, Any]:
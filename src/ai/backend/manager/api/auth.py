@@ -1,18 +1,22 @@
 from __future__ import annotations
 
+import asyncio
 import functools
 import hashlib
 import hmac
 import logging
 import secrets
-from collections import ChainMap
+import time
+from collections import ChainMap, OrderedDict, defaultdict
 from datetime import datetime, timedelta
-from typing import TYPE_CHECKING, Any, Final, Iterable, Mapping, Tuple, cast
+from typing import TYPE_CHECKING, Any, Final, Iterable, Mapping, Optional, Tuple, cast
 
 import aiohttp_cors
+import attrs
 import sqlalchemy as sa
 import trafaret as t
 from aiohttp import web
+from aiotools import apartial
 from dateutil.parser import parse as dtparse
 from dateutil.tz import tzutc
 from redis.asyncio import Redis
@@ -20,9 +24,10 @@ from redis.asyncio.client import Pipeline as RedisPipeline
 
 from ai.backend.common import redis_helper
 from ai.backend.common import validators as tx
+from ai.backend.common.events import DoInvalidateAuthCacheEvent, EventHandler
 from ai.backend.common.exception import InvalidIpAddressValue
 from ai.backend.common.plugin.hook import ALL_COMPLETED, FIRST_COMPLETED, PASSED
-from ai.backend.common.types import ReadableCIDR
+from ai.backend.common.types import AgentId, ReadableCIDR, RedisConnectionInfo
 from ai.backend.logging import BraceStyleAdapter
 
 from ..models import keypair_resource_policies, keypairs, user_resource_policies, users
@@ -50,7 +55,7 @@ from .exceptions import (
     RejectedByHook,
     UserNotFound,
 )
-from .types import CORSOptions, WebMiddleware
+from .types import CORSOptions, WebMiddleware, WebRequestHandler
 from .utils import check_api_params, get_handler_attr, set_handler_attr
 
 if TYPE_CHECKING:
@@ -424,8 +429,133 @@ async def check_password_age(
                 )
 
 
-@web.middleware
-async def auth_middleware(request: web.Request, handler) -> web.StreamResponse:
+# The retention period of the per-keypair API call statistics.
+_kp_stats_retention: Final = 86400 * 30  # 1 month
+
+
+class CredentialCache:
+    """
+    An in-process cache of the keypair and user rows with their resource policies
+    fetched by :func:`auth_middleware()` for each access key.
+
+    The entries expire after ``ttl`` seconds and are dropped earlier by
+    :class:`DoInvalidateAuthCacheEvent` when the keypairs, the users or the resource policies
+    are changed via the manager APIs.  The least recently used entries are evicted when
+    the cache has more than ``max_size`` entries.
+    """
+
+    def __init__(self, ttl: float, max_size: int) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        # Incremented for each invalidation not to store the rows fetched before it.
+        self.generation = 0
+        self._entries: OrderedDict[str, tuple[float, Row, Row]] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def get(self, access_key: str) -> Optional[tuple[Row, Row]]:
+        if (entry := self._entries.get(access_key)) is None:
+            return None
+        expires_at, user_row, keypair_row = entry
+        if expires_at <= time.monotonic():
+            del self._entries[access_key]
+            return None
+        self._entries.move_to_end(access_key)
+        return user_row, keypair_row
+
+    def set(self, access_key: str, user_row: Row, keypair_row: Row, *, generation: int) -> None:
+        if not self.enabled or generation != self.generation:
+            return
+        self._entries[access_key] = (time.monotonic() + self.ttl, user_row, keypair_row)
+        self._entries.move_to_end(access_key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, access_key: Optional[str] = None) -> None:
+        self.generation += 1
+        if access_key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(access_key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class KeypairCallStats:
+    """
+    Aggregates the per-keypair API call counters in the manager process and writes them to
+    the statistics Redis in a single pipeline every ``flush_interval`` seconds,
+    instead of querying Redis for each API call.
+    """
+
+    def __init__(self, redis_stat: RedisConnectionInfo, flush_interval: float) -> None:
+        self.redis_stat = redis_stat
+        self.flush_interval = flush_interval
+        self._num_queries: defaultdict[str, int] = defaultdict(int)
+        self._last_call_times: dict[str, float] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def close(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        try:
+            await self.flush()
+        except Exception:
+            log.exception("failed to flush the keypair API call statistics")
+
+    def record(self, access_key: str) -> None:
+        self._num_queries[access_key] += 1
+        self._last_call_times[access_key] = time.time()
+
+    async def flush(self) -> None:
+        if not self._num_queries:
+            return
+        num_queries, self._num_queries = self._num_queries, defaultdict(int)
+        last_call_times, self._last_call_times = self._last_call_times, {}
+
+        async def _pipe_builder(r: Redis) -> RedisPipeline:
+            pipe = r.pipeline()
+            for access_key, count in num_queries.items():
+                num_queries_key = f"kp:{access_key}:num_queries"
+                await pipe.incrby(num_queries_key, count)
+                await pipe.expire(num_queries_key, _kp_stats_retention)
+                last_call_time_key = f"kp:{access_key}:last_call_time"
+                await pipe.set(last_call_time_key, last_call_times[access_key])
+                await pipe.expire(last_call_time_key, _kp_stats_retention)
+            return pipe
+
+        try:
+            await redis_helper.execute(self.redis_stat, _pipe_builder)
+        except Exception:
+            # Merge back the counters to retry in the next flush.
+            for access_key, count in num_queries.items():
+                self._num_queries[access_key] += count
+                self._last_call_times.setdefault(access_key, last_call_times[access_key])
+            raise
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("failed to flush the keypair API call statistics")
+
+
+async def auth_middleware(
+    app: web.Application,
+    request: web.Request,
+    handler: WebRequestHandler,
+) -> web.StreamResponse:
     """
     Fetches user information and sets up keypair, user, and is_authorized
     attributes.
@@ -442,6 +572,7 @@ async def auth_middleware(request: web.Request, handler) -> web.StreamResponse:
 
     # This is a global middleware: request.app is the root app.
     root_ctx: RootContext = request.app["_root.context"]
+    app_ctx: PrivateContext = app["auth.context"]
     request["is_authorized"] = False
     request["is_admin"] = False
     request["is_superadmin"] = False
@@ -493,6 +624,16 @@ async def auth_middleware(request: web.Request, handler) -> web.StreamResponse:
             user_row = result.first()
             return user_row, keypair_row
 
+    async def _get_cred(access_key):
+        credential_cache = app_ctx.credential_cache
+        if (cached := credential_cache.get(access_key)) is not None:
+            return cached
+        generation = credential_cache.generation
+        user_row, keypair_row = await execute_with_retry(functools.partial(_query_cred, access_key))
+        if user_row is not None and keypair_row is not None:
+            credential_cache.set(access_key, user_row, keypair_row, generation=generation)
+        return user_row, keypair_row
+
     if hook_result.status != PASSED:
         raise RejectedByHook.from_hook_result(hook_result)
     elif hook_result.result:
@@ -500,26 +641,10 @@ async def auth_middleware(request: web.Request, handler) -> web.StreamResponse:
         # The "None" access_key means that the hook has allowed anonymous access.
         access_key = hook_result.result
         if access_key is not None:
-            user_row, keypair_row = await execute_with_retry(
-                functools.partial(_query_cred, access_key)
-            )
+            user_row, keypair_row = await _get_cred(access_key)
             if keypair_row is None:
                 raise AuthorizationFailed("Access key not found")
-
-            now = await redis_helper.execute(root_ctx.redis_stat, lambda r: r.time())
-            now = now[0] + (now[1] / (10**6))
-
-            async def _pipe_builder(r: Redis) -> RedisPipeline:
-                pipe = r.pipeline()
-                num_queries_key = f"kp:{access_key}:num_queries"
-                await pipe.incr(num_queries_key)
-                await pipe.expire(num_queries_key, 86400 * 30)  # retention: 1 month
-                last_call_time_key = f"kp:{access_key}:last_call_time"
-                await pipe.set(last_call_time_key, now)
-                await pipe.expire(last_call_time_key, 86400 * 30)  # retention: 1 month
-                return pipe
-
-            await redis_helper.execute(root_ctx.redis_stat, _pipe_builder)
+            app_ctx.call_stats.record(access_key)
         else:
             # unsigned requests may be still accepted for public APIs
             pass
@@ -529,9 +654,7 @@ async def auth_middleware(request: web.Request, handler) -> web.StreamResponse:
         params = _extract_auth_params(request)
         if params:
             sign_method, access_key, signature = params
-            user_row, keypair_row = await execute_with_retry(
-                functools.partial(_query_cred, access_key)
-            )
+            user_row, keypair_row = await _get_cred(access_key)
             if keypair_row is None:
                 raise AuthorizationFailed("Access key not found")
             my_signature = await sign_request(
@@ -539,21 +662,7 @@ async def auth_middleware(request: web.Request, handler) -> web.StreamResponse:
             )
             if not secrets.compare_digest(my_signature, signature):
                 raise AuthorizationFailed("Signature mismatch")
-
-            now = await redis_helper.execute(root_ctx.redis_stat, lambda r: r.time())
-            now = now[0] + (now[1] / (10**6))
-
-            async def _pipe_builder(r: Redis) -> RedisPipeline:
-                pipe = r.pipeline()
-                num_queries_key = f"kp:{access_key}:num_queries"
-                await pipe.incr(num_queries_key)
-                await pipe.expire(num_queries_key, 86400 * 30)  # retention: 1 month
-                last_call_time_key = f"kp:{access_key}:last_call_time"
-                await pipe.set(last_call_time_key, now)
-                await pipe.expire(last_call_time_key, 86400 * 30)  # retention: 1 month
-                return pipe
-
-            await redis_helper.execute(root_ctx.redis_stat, _pipe_builder)
+            app_ctx.call_stats.record(access_key)
         else:
             # unsigned requests may be still accepted for public APIs
             pass
@@ -917,6 +1026,7 @@ async def signout(request: web.Request, params: Any) -> web.Response:
             keypairs.update().values(is_active=False).where(keypairs.c.user_id == params["email"])
         )
         await conn.execute(query)
+    await root_ctx.event_producer.produce_event(DoInvalidateAuthCacheEvent())
     return web.json_response({})
 
 
@@ -954,6 +1064,7 @@ async def update_full_name(request: web.Request, params: Any) -> web.Response:
         }
         update_query = users.update().values(data).where(users.c.email == email)
         await conn.execute(update_query)
+    await root_ctx.event_producer.produce_event(DoInvalidateAuthCacheEvent())
     return web.json_response({}, status=200)
 
 
@@ -1003,6 +1114,7 @@ async def update_password(request: web.Request, params: Any) -> web.Response:
         }
         query = users.update().values(data).where(users.c.email == email)
         await conn.execute(query)
+    await root_ctx.event_producer.produce_event(DoInvalidateAuthCacheEvent())
     return web.json_response({}, status=200)
 
 
@@ -1071,6 +1183,7 @@ async def update_password_no_auth(request: web.Request, params: Any) -> web.Resp
             return result.scalar()
 
     changed_at = await execute_with_retry(_update)
+    await root_ctx.event_producer.produce_event(DoInvalidateAuthCacheEvent())
     return web.json_response({"password_changed_at": changed_at.isoformat()}, status=201)
 
 
@@ -1105,6 +1218,7 @@ async def generate_ssh_keypair(request: web.Request) -> web.Response:
         }
         query = keypairs.update().values(data).where(keypairs.c.access_key == access_key)
         await conn.execute(query)
+    await root_ctx.event_producer.produce_event(DoInvalidateAuthCacheEvent(access_key))
     return web.json_response(data, status=200)
 
 
@@ -1131,15 +1245,60 @@ async def upload_ssh_keypair(request: web.Request, params: Any) -> web.Response:
         }
         query = keypairs.update().values(data).where(keypairs.c.access_key == access_key)
         await conn.execute(query)
+    await root_ctx.event_producer.produce_event(DoInvalidateAuthCacheEvent(access_key))
     return web.json_response(data, status=200)
 
 
+@attrs.define(slots=True, auto_attribs=True, init=False)
+class PrivateContext:
+    credential_cache: CredentialCache
+    call_stats: KeypairCallStats
+    invalidation_handler: EventHandler[web.Application, DoInvalidateAuthCacheEvent]
+
+
+async def invalidate_credential_cache(
+    app: web.Application,
+    source: AgentId,
+    event: DoInvalidateAuthCacheEvent,
+) -> None:
+    app_ctx: PrivateContext = app["auth.context"]
+    app_ctx.credential_cache.invalidate(event.access_key)
+
+
+async def init(app: web.Application) -> None:
+    root_ctx: RootContext = app["_root.context"]
+    app_ctx: PrivateContext = app["auth.context"]
+    manager_config = root_ctx.local_config["manager"]
+    app_ctx.credential_cache = CredentialCache(
+        ttl=manager_config["auth-cache-ttl"],
+        max_size=manager_config["auth-cache-size"],
+    )
+    app_ctx.call_stats = KeypairCallStats(
+        root_ctx.redis_stat,
+        flush_interval=manager_config["api-call-stats-flush-interval"],
+    )
+    app_ctx.call_stats.start()
+    app_ctx.invalidation_handler = root_ctx.event_dispatcher.subscribe(
+        DoInvalidateAuthCacheEvent, app, invalidate_credential_cache
+    )
+
+
+async def shutdown(app: web.Application) -> None:
+    root_ctx: RootContext = app["_root.context"]
+    app_ctx: PrivateContext = app["auth.context"]
+    root_ctx.event_dispatcher.unsubscribe(app_ctx.invalidation_handler)
+    await app_ctx.call_stats.close()
+
+
 def create_app(
     default_cors_options: CORSOptions,
 ) -> Tuple[web.Application, Iterable[WebMiddleware]]:
     app = web.Application()
     app["prefix"] = "auth"  # slashed to distinguish with "/vN/authorize"
     app["api_versions"] = (1, 2, 3, 4)
+    app["auth.context"] = PrivateContext()
+    app.on_startup.append(init)
+    app.on_shutdown.append(shutdown)
     cors = aiohttp_cors.setup(app, defaults=default_cors_options)
     root_resource = cors.add(app.router.add_resource(r""))
     cors.add(root_resource.add_route("GET", test))
@@ -1157,4 +1316,5 @@ def create_app(
     cors.add(app.router.add_route("GET", "/ssh-keypair", get_ssh_keypair))
     cors.add(app.router.add_route("PATCH", "/ssh-keypair", generate_ssh_keypair))
     cors.add(app.router.add_route("POST", "/ssh-keypair", upload_ssh_keypair))
-    return app, [auth_middleware]
+    # middleware must be wrapped by web.middleware at the outermost level.
+    return app, [web.middleware(apartial(auth_middleware, app))]
@@ -40,6 +40,7 @@ from yarl import URL
 from ai.backend.common import typed_validators as tv
 from ai.backend.common.bgtask import ProgressReporter
 from ai.backend.common.events import (
+    ArgsPositionMatcher,
     EventHandler,
     KernelLifecycleEventReason,
     ModelServiceStatusEvent,
@@ -761,8 +762,8 @@ async def try_start(request: web.Request, params: NewServiceRequestModel) -> Try
                             forced=True,
                         )
 
-        session_event_matcher = lambda args: args[0] == str(result["sessionId"])
-        model_service_event_matcher = lambda args: args[1] == str(result["sessionId"])
+        session_event_matcher = ArgsPositionMatcher(0, str(result["sessionId"]))
+        model_service_event_matcher = ArgsPositionMatcher(1, str(result["sessionId"]))
 
         handlers: list[EventHandler] = [
             root_ctx.event_dispatcher.subscribe(
@@ -7,6 +7,7 @@ import trafaret as t
 from aiohttp import web
 
 from ai.backend.common import msgpack
+from ai.backend.common.events import DoInvalidateAuthCacheEvent
 from ai.backend.logging import BraceStyleAdapter
 
 from ..models import (
@@ -85,6 +86,7 @@ async def create(request: web.Request, params: Any) -> web.Response:
             .where(keypairs.c.access_key == owner_access_key)
         )
         await conn.execute(query)
+    await root_ctx.event_producer.produce_event(DoInvalidateAuthCacheEvent(owner_access_key))
     return web.json_response({})
 
 
@@ -163,6 +165,7 @@ async def update(request: web.Request, params: Any) -> web.Response:
             .where(keypairs.c.access_key == owner_access_key)
         )
         await conn.execute(query)
+    await root_ctx.event_producer.produce_event(DoInvalidateAuthCacheEvent(owner_access_key))
     return web.json_response({})
 
 
@@ -195,7 +198,8 @@ async def delete(request: web.Request, params: Any) -> web.Response:
             .where(keypairs.c.access_key == owner_access_key)
         )
         await conn.execute(query)
-        return web.json_response({"success": True})
+    await root_ctx.event_producer.produce_event(DoInvalidateAuthCacheEvent(owner_access_key))
+    return web.json_response({"success": True})
 
 
 @server_status_required(READ_ALLOWED)
@@ -221,6 +225,7 @@ async def update_bootstrap_script(request: web.Request, params: Any) -> web.Resp
             .where(keypairs.c.access_key == access_key)
         )
         await conn.execute(query)
+    await root_ctx.event_producer.produce_event(DoInvalidateAuthCacheEvent(access_key))
     return web.json_response({})
 
 
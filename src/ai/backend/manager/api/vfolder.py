@@ -20,6 +20,7 @@ from typing import (
     Callable,
     Concatenate,
     Dict,
+    Final,
     List,
     Mapping,
     MutableMapping,
@@ -144,6 +145,9 @@ if TYPE_CHECKING:
 
 log = BraceStyleAdapter(logging.getLogger(__spec__.name))
 
+# The number of entries to write at once when streaming the file list.
+LIST_FILES_STREAM_BATCH_SIZE: Final = 256
+
 VFolderRow: TypeAlias = Mapping[str, Any]
 P = ParamSpec("P")
 
@@ -1660,6 +1664,67 @@ async def delete_files(request: web.Request, params: Any, row: VFolderRow) -> we
     return web.json_response({}, status=200)
 
 
+def _convert_file_item(item: Mapping[str, Any]) -> dict[str, Any]:
+    return {
+        "name": item["name"],
+        "type": item["type"],
+        "size": item["stat"]["size"],  # humanize?
+        "mode": oct(item["stat"]["mode"])[2:][-3:],
+        "created": item["stat"]["created"],
+        "modified": item["stat"]["modified"],
+    }
+
+
+async def _list_files_paginated(
+    request: web.Request,
+    params: Any,
+    proxy_name: str,
+    volume_name: str,
+    row: VFolderRow,
+    list_params: Mapping[str, Any],
+) -> web.StreamResponse:
+    root_ctx: RootContext = request.app["_root.context"]
+    async with root_ctx.storage_manager.request(
+        proxy_name,
+        "POST",
+        "folder/file/list",
+        json={
+            "volume": volume_name,
+            "vfid": str(VFolderID(row["quota_scope_id"], row["id"])),
+            "relpath": params["path"],
+            "stream": params["stream"],
+            **list_params,
+        },
+    ) as (_, storage_resp):
+        if not params["stream"]:
+            result = await storage_resp.json()
+            return web.json_response(
+                {
+                    "items": [_convert_file_item(item) for item in result["items"]],
+                    "next_cursor": result["next_cursor"],
+                },
+                status=200,
+            )
+        response = web.StreamResponse(status=200)
+        response.content_type = "application/x-ndjson"
+        await response.prepare(request)
+        lines: list[bytes] = []
+        async for line in storage_resp.content:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if "name" in item:
+                item = _convert_file_item(item)
+            lines.append(json.dumps(item).encode("utf-8") + b"\n")
+            if len(lines) >= LIST_FILES_STREAM_BATCH_SIZE:
+                await response.write(b"".join(lines))
+                lines.clear()
+        if lines:
+            await response.write(b"".join(lines))
+        await response.write_eof()
+        return response
+
+
 @auth_required
 @server_status_required(READ_ALLOWED)
 @with_vfolder_rows_resolved(VFolderPermissionSetAlias.READABLE)
@@ -1667,9 +1732,22 @@ async def delete_files(request: web.Request, params: Any, row: VFolderRow) -> we
 @check_api_params(
     t.Dict({
         t.Key("path", default=""): t.String(allow_blank=True),
+        t.Key("limit", default=None): t.Null | t.ToInt[1:],
+        t.Key("cursor", default=None): t.Null | t.String(),
+        t.Key("sort_by", default=None): t.Null | t.Enum("name", "size", "modified"),
+        t.Key("order", default=None): t.Null | t.Enum("asc", "desc"),
+        t.Key("name_prefix", default=""): t.String(allow_blank=True),
+        t.Key("stream", default=False): t.ToBool,
     })
 )
-async def list_files(request: web.Request, params: Any, row: VFolderRow) -> web.Response:
+async def list_files(request: web.Request, params: Any, row: VFolderRow) -> web.StreamResponse:
+    """
+    List the files in a directory of the vfolder.
+
+    If any of ``limit``, ``cursor``, ``sort_by``, ``order``, ``name_prefix`` and ``stream`` is
+    given, the files are returned in pages with ``next_cursor`` to fetch the next page,
+    or streamed as newline-delimited JSON objects with ``stream``.
+    """
     # we can skip check_vfolder_status() guard here since the status is already verified by
     # vfolder_permission_required() decorator
     root_ctx: RootContext = request.app["_root.context"]
@@ -1684,6 +1762,15 @@ async def list_files(request: web.Request, params: Any, row: VFolderRow) -> web.
     proxy_name, volume_name = root_ctx.storage_manager.get_proxy_and_volume(
         row["host"], is_unmanaged(row["unmanaged_path"])
     )
+    list_params = {
+        key: params[key]
+        for key in ("limit", "cursor", "sort_by", "order", "name_prefix")
+        if params[key] not in (None, "")
+    }
+    if list_params or params["stream"]:
+        return await _list_files_paginated(
+            request, params, proxy_name, volume_name, row, list_params
+        )
     async with root_ctx.storage_manager.request(
         proxy_name,
         "POST",
@@ -1696,17 +1783,7 @@ async def list_files(request: web.Request, params: Any, row: VFolderRow) -> web.
     ) as (_, storage_resp):
         result = await storage_resp.json()
         resp = {
-            "items": [
-                {
-                    "name": item["name"],
-                    "type": item["type"],
-                    "size": item["stat"]["size"],  # humanize?
-                    "mode": oct(item["stat"]["mode"])[2:][-3:],
-                    "created": item["stat"]["created"],
-                    "modified": item["stat"]["modified"],
-                }
-                for item in result["items"]
-            ],
+            "items": [_convert_file_item(item) for item in result["items"]],
             "files": json.dumps([  # for legacy (to be removed in 21.03)
                 {
                     "filename": item["name"],
@@ -270,6 +270,8 @@ manager_local_config_iv = (
                 "rpc-auth-manager-keypair", default="fixtures/manager/manager.key_secret"
             ): tx.Path(type="file"),
             t.Key("heartbeat-timeout", default=40.0): t.Float[1.0:],  # type: ignore
+            t.Key("heartbeat-batch-window", default=0.05): t.ToFloat[0:],  # second
+            t.Key("heartbeat-batch-size", default=1000): t.ToInt[1:],
             t.Key("secret", default=None): t.Null | t.String,
             t.Key("ssl-enabled", default=False): t.ToBool,
             t.Key("ssl-cert", default=None): t.Null | tx.Path(type="file"),
@@ -291,6 +293,10 @@ manager_local_config_iv = (
             t.Key(
                 "session_schedule_lock_lifetime", default=_default_global_lock_lifetime["schedule"]
             ): t.ToFloat(),
+            t.Key("session_schedule_lock_scope", default="global"): t.Enum(
+                "global", "resource-group"
+            ),
+            t.Key("session_schedule_concurrency", default=4): t.ToInt[1:],  # type: ignore
             t.Key(
                 "session_check_precondition_lock_lifetime",
                 default=_default_global_lock_lifetime["check_precondition"],
@@ -317,6 +323,14 @@ manager_local_config_iv = (
             ],
             t.Key("aiomonitor-webui-port", default=39100): t.ToInt[1:65535],
             t.Key("use-experimental-redis-event-dispatcher", default=False): t.ToBool,
+            t.Key("event-batch-size", default=1): t.ToInt[1:],
+            t.Key("event-batch-window", default=0.005): t.ToFloat[0:],  # second
+            t.Key("event-buffer-size", default=10_000): t.ToInt[1:],
+            t.Key("auth-cache-ttl", default=5.0): t.ToFloat[0:],  # second
+            t.Key("auth-cache-size", default=10_000): t.ToInt[1:],
+            t.Key("api-call-stats-flush-interval", default=1.0): t.ToFloat[0.05:],  # second
+            t.Key("scheduling-mode", default="per-session"): t.Enum("per-session", "snapshot"),
+            t.Key("predicate-check-mode", default="per-session"): t.Enum("per-session", "batched"),
             t.Key("status-update-interval", default=None): t.Null | t.ToFloat[0:],  # second
             t.Key("status-lifetime", default=None): t.Null | t.ToInt[0:],  # second
             t.Key("public-metrics-port", default=None): t.Null | t.ToInt[1:65535],
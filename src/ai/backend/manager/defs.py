@@ -4,6 +4,7 @@ Common definitions/constants used throughout the manager.
 
 import enum
 import re
+import zlib
 from typing import Final
 
 from ai.backend.common.arch import CURRENT_ARCH
@@ -77,6 +78,7 @@ class LockID(enum.IntEnum):
     LOCKID_SCHEDULE = 91
     LOCKID_CHECK_PRECOND = 92
     LOCKID_START = 93
+    LOCKID_SCHEDULE_ADMISSION = 94
     LOCKID_SCHEDULE_TIMER = 191
     LOCKID_CHECK_PRECOND_TIMER = 192
     LOCKID_START_TIMER = 198
@@ -86,6 +88,14 @@ class LockID(enum.IntEnum):
     LOCKID_SESSION_STATUS_UPDATE_TIMER = 197
 
 
+def get_sgroup_schedule_lock_id(sgroup_name: str) -> int:
+    """
+    Derive the lock ID to schedule the given resource group exclusively.
+    The derived IDs never overlap with the members of ``LockID`` as they are placed above 2**32.
+    """
+    return (LockID.LOCKID_SCHEDULE << 32) | zlib.crc32(sgroup_name.encode("utf-8"))
+
+
 SERVICE_MAX_RETRIES = 5  # FIXME: make configurable
 
 DEFAULT_KEYPAIR_RESOURCE_POLICY_NAME: Final = "default"
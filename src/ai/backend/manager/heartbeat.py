@@ -0,0 +1,653 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import time
+import zlib
+from collections.abc import Iterable, Mapping, Sequence
+from datetime import datetime
+from decimal import Decimal
+from typing import TYPE_CHECKING, Any, Final, Optional
+
+import attrs
+import sqlalchemy as sa
+from dateutil.tz import tzutc
+from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+
+from ai.backend.common import msgpack, redis_helper
+from ai.backend.common.docker import ImageRef
+from ai.backend.common.events import AgentStartedEvent
+from ai.backend.common.types import (
+    AgentId,
+    RedisConnectionInfo,
+    ResourceSlot,
+    SlotName,
+    SlotTypes,
+)
+from ai.backend.logging import BraceStyleAdapter
+
+from .models import AgentStatus, agents
+from .models.utils import execute_with_retry
+
+if TYPE_CHECKING:
+    from .registry import AgentRegistry
+
+__all__ = (
+    "AgentHeartbeat",
+    "AgentHeartbeatIngestor",
+    "ImageInventoryState",
+    "ImageInventoryUpdate",
+    "update_image_inventories",
+    "remove_agent_images",
+)
+
+log = BraceStyleAdapter(logging.getLogger(__spec__.name))  # type: ignore
+
+# The columns of an agent row reported by its heartbeats, except the status.
+# occupied_slots are updated when kernels starts/terminates.
+_REPORTED_COLUMNS: Final = (
+    "addr",
+    "public_host",
+    "public_key",
+    "scaling_group",
+    "available_slots",
+    "version",
+    "compute_plugins",
+    "architecture",
+    "auto_terminate_abusing_kernel",
+)
+# Changes of these columns require updating the RPC connection info in the agent cache.
+_RPC_COLUMNS: Final = frozenset({"addr", "public_key"})
+
+# The keys in the image Redis database, where the other keys are the canonical names of
+# the images mapped to the set of agents having them.
+AGENT_IMAGES_KEY_PREFIX: Final = "agent.images."
+IMAGE_INVENTORY_STATE_KEY: Final = "agent.image_inventory_state"
+
+
+@attrs.define(auto_attribs=True, slots=True)
+class AgentHeartbeat:
+    agent_id: AgentId
+    agent_info: Mapping[str, Any]
+    slot_key_and_units: dict[SlotName, SlotTypes]
+    # The values of the agent row columns reported by the heartbeat.
+    columns: dict[str, Any]
+
+    @classmethod
+    def parse(cls, agent_id: AgentId, agent_info: Mapping[str, Any]) -> AgentHeartbeat:
+        return cls(
+            agent_id,
+            agent_info,
+            slot_key_and_units={
+                SlotName(k): SlotTypes(v[0]) for k, v in agent_info["resource_slots"].items()
+            },
+            columns={
+                "addr": agent_info["addr"],
+                "public_host": agent_info["public_host"],
+                "public_key": agent_info["public_key"],
+                "scaling_group": agent_info.get("scaling_group", "default"),
+                "available_slots": ResourceSlot({
+                    SlotName(k): Decimal(v[1]) for k, v in agent_info["resource_slots"].items()
+                }),
+                "version": agent_info["version"],
+                "compute_plugins": agent_info["compute_plugins"],
+                "architecture": agent_info.get("architecture", "x86_64"),
+                "auto_terminate_abusing_kernel": agent_info.get(
+                    "auto_terminate_abusing_kernel", False
+                ),
+            },
+        )
+
+    @property
+    def scaling_group(self) -> str:
+        return self.columns["scaling_group"]
+
+    @property
+    def available_slots(self) -> ResourceSlot:
+        return self.columns["available_slots"]
+
+
+@attrs.define(auto_attribs=True, slots=True)
+class _PendingHeartbeat:
+    heartbeat: AgentHeartbeat
+    # The image inventory updates of all coalesced heartbeats merged in order
+    image_update: ImageInventoryUpdate
+    waiters: list[asyncio.Future[None]]
+
+
+@attrs.define(auto_attribs=True, slots=True)
+class _CachedAgentRow:
+    status: Optional[AgentStatus]
+    columns: dict[str, Any]
+    loaded_at: float  # monotonic
+
+
+@attrs.define(auto_attribs=True, slots=True)
+class _AgentRowChanges:
+    joined: list[AgentHeartbeat] = attrs.Factory(list)
+    revived: list[AgentHeartbeat] = attrs.Factory(list)
+    updated: list[AgentHeartbeat] = attrs.Factory(list)
+    rpc_changed: list[AgentHeartbeat] = attrs.Factory(list)
+    cache_updates: dict[AgentId, _CachedAgentRow] = attrs.Factory(dict)
+
+
+@attrs.define(auto_attribs=True, slots=True, frozen=True)
+class ImageInventoryState:
+    epoch: str
+    generation: int
+
+    @classmethod
+    def parse(cls, raw_state: Optional[str | bytes]) -> Optional[ImageInventoryState]:
+        if raw_state is None:
+            return None
+        if isinstance(raw_state, bytes):
+            raw_state = raw_state.decode()
+        epoch, _, generation = raw_state.rpartition(":")
+        return cls(epoch, int(generation))
+
+    def __str__(self) -> str:
+        return f"{self.epoch}:{self.generation}"
+
+
+@attrs.define(auto_attribs=True, slots=True)
+class ImageInventoryUpdate:
+    """
+    The changes of the kernel images in an agent reported by a heartbeat.
+
+    The agents report the full list of their images periodically and only the added and removed
+    images in between, along with the generation of their image inventory which is incremented
+    for every change.  The legacy agents without the generation always report the full list.
+    """
+
+    agent_id: AgentId
+    # None for the legacy agents
+    state: Optional[ImageInventoryState]
+    full: bool
+    # The canonical names of the images
+    images: set[str]
+    removed_images: set[str]
+    # The generation which the changes are based on, which is older than the generation of
+    # the state when the changes of multiple heartbeats are merged.
+    base_generation: int = 0
+
+    @classmethod
+    def from_heartbeat(cls, heartbeat: AgentHeartbeat) -> ImageInventoryUpdate:
+        agent_info = heartbeat.agent_info
+        loaded_images = msgpack.unpackb(zlib.decompress(agent_info["images"]))
+        inventory = agent_info.get("images.inventory")
+        if inventory is None:
+            state = None
+            full = True
+            removed_images = set()
+            base_generation = 0
+        else:
+            state = ImageInventoryState(inventory["epoch"], inventory["generation"])
+            full = inventory["full"]
+            removed_images = _canonicalize_images(inventory["removed"])
+            # The generation is incremented only when the images have changed.
+            base_generation = state.generation
+            if not full and (loaded_images or inventory["removed"]):
+                base_generation -= 1
+        return cls(
+            heartbeat.agent_id,
+            state,
+            full,
+            _canonicalize_images(item[0] for item in loaded_images),
+            removed_images,
+            base_generation=base_generation,
+        )
+
+    def merge(self, newer: ImageInventoryUpdate) -> ImageInventoryUpdate:
+        """
+        Merge the update of a newer heartbeat of the same agent into this update, so that
+        coalescing the heartbeats does not lose the image changes of the earlier ones.
+        """
+        if (
+            newer.full
+            or newer.state is None
+            or self.state is None
+            or newer.state.epoch != self.state.epoch
+        ):
+            return newer
+        if newer.state.generation <= self.state.generation:
+            return self
+        if newer.base_generation != self.state.generation:
+            log.warning(
+                "missed image inventory updates of agent {} (generation {} -> {});"
+                " waiting for the next full synchronization",
+                self.agent_id,
+                self.state.generation,
+                newer.base_generation,
+            )
+        images = (self.images - newer.removed_images) | newer.images
+        if self.full:
+            # The full list with the later changes applied
+            return ImageInventoryUpdate(self.agent_id, newer.state, True, images, set())
+        return ImageInventoryUpdate(
+            self.agent_id,
+            newer.state,
+            False,
+            images,
+            (self.removed_images - newer.images) | newer.removed_images,
+            base_generation=self.base_generation,
+        )
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.full and not self.images and not self.removed_images
+
+    def plan(
+        self,
+        stored_state: Optional[ImageInventoryState],
+        current_images: set[str],
+    ) -> Optional[tuple[set[str], set[str]]]:
+        """
+        Return the images to add and remove for the agent, or None if the update is outdated.
+        """
+        if self.state is not None and stored_state is not None:
+            if stored_state.epoch == self.state.epoch:
+                if stored_state.generation > self.state.generation or (
+                    not self.full and stored_state.generation == self.state.generation
+                ):
+                    return None
+                if not self.full and stored_state.generation < self.base_generation:
+                    log.warning(
+                        "missed image inventory updates of agent {} (generation {} -> {});"
+                        " waiting for the next full synchronization",
+                        self.agent_id,
+                        stored_state.generation,
+                        self.state.generation,
+                    )
+        if self.full:
+            return self.images - current_images, current_images - self.images
+        return self.images, self.removed_images
+
+
+_LEGACY_IMAGE_INVENTORY_STATE: Final = ImageInventoryState("", 0)
+
+
+def _canonicalize_images(images: Iterable[str]) -> set[str]:
+    canonical_names = set()
+    for image in images:
+        try:
+            canonical_names.add(ImageRef.parse_image_str(image, "*").canonical)
+        except ValueError:
+            # Skip opaque (non-Backend.AI) image.
+            continue
+    return canonical_names
+
+
+def _decode_members(members: Optional[Iterable[str | bytes]]) -> set[str]:
+    return {m.decode() if isinstance(m, bytes) else m for m in members or ()}
+
+
+async def update_image_inventories(
+    redis_image: RedisConnectionInfo,
+    updates: Sequence[ImageInventoryUpdate],
+) -> None:
+    """
+    Apply the image inventory updates to the sets of agents per image and the reverse index of
+    images per agent, reading and writing them with a single pipeline each.
+    """
+    updates = [update for update in updates if not update.is_empty]
+    if not updates:
+        return
+
+    async def _read_pipe_builder(r: Redis) -> Pipeline:
+        pipe = r.pipeline(transaction=False)
+        for update in updates:
+            pipe.hget(IMAGE_INVENTORY_STATE_KEY, update.agent_id)
+            if update.full:
+                pipe.smembers(f"{AGENT_IMAGES_KEY_PREFIX}{update.agent_id}")
+        return pipe
+
+    results = iter(await redis_helper.execute(redis_image, _read_pipe_builder))
+    plans: list[tuple[ImageInventoryUpdate, set[str], set[str], Optional[str]]] = []
+    for update in updates:
+        stored_state = ImageInventoryState.parse(next(results))
+        current_images = _decode_members(next(results)) if update.full else set()
+        plan = update.plan(stored_state, current_images)
+        if plan is None:
+            continue
+        added_images, removed_images = plan
+        # The state is stored only after a full synchronization, which marks that
+        # the reverse index has all images of the agent.
+        new_state = None
+        if update.full or stored_state is not None:
+            new_state = str(update.state or _LEGACY_IMAGE_INVENTORY_STATE)
+        plans.append((update, added_images, removed_images, new_state))
+    if not plans:
+        return
+
+    async def _write_pipe_builder(r: Redis) -> Pipeline:
+        pipe = r.pipeline(transaction=False)
+        for update, added_images, removed_images, new_state in plans:
+            agent_images_key = f"{AGENT_IMAGES_KEY_PREFIX}{update.agent_id}"
+            for image in added_images:
+                pipe.sadd(image, update.agent_id)
+            for image in removed_images:
+                pipe.srem(image, update.agent_id)
+            if added_images:
+                pipe.sadd(agent_images_key, *added_images)
+            if removed_images:
+                pipe.srem(agent_images_key, *removed_images)
+            if new_state is not None:
+                pipe.hset(IMAGE_INVENTORY_STATE_KEY, update.agent_id, new_state)
+        return pipe
+
+    await redis_helper.execute(redis_image, _write_pipe_builder)
+
+
+async def remove_agent_images(redis_image: RedisConnectionInfo, agent_id: AgentId) -> None:
+    """
+    Remove the agent from the sets of agents per image using the reverse index.
+    """
+    agent_images_key = f"{AGENT_IMAGES_KEY_PREFIX}{agent_id}"
+
+    async def _pipe_builder(r: Redis) -> Pipeline:
+        pipe = r.pipeline()
+        if await r.hexists(IMAGE_INVENTORY_STATE_KEY, agent_id):
+            for image in _decode_members(await r.smembers(agent_images_key)):
+                pipe.srem(image, agent_id)
+        else:
+            # The images reported before the reverse index was introduced,
+            # skipping the reverse index of the other agents.
+            async for key in r.scan_iter(_type="set"):
+                image = key.decode() if isinstance(key, bytes) else key
+                if image.startswith(AGENT_IMAGES_KEY_PREFIX):
+                    continue
+                pipe.srem(image, agent_id)
+        pipe.delete(agent_images_key)
+        pipe.hdel(IMAGE_INVENTORY_STATE_KEY, agent_id)
+        return pipe
+
+    await redis_helper.execute(redis_image, _pipe_builder)
+
+
+class AgentHeartbeatIngestor:
+    """
+    Ingests the agent heartbeats in batches.
+
+    The heartbeats arriving within a short window are coalesced per agent and compared with
+    an in-memory cache of the last-known agent rows, so that only the new or changed agents
+    are written to the database in a single transaction, and the liveness timestamps of
+    the whole batch are written to Redis at once.
+
+    A cached row is loaded again from the database when it becomes older than
+    ``cache_lifetime``.  As long as it does not exceed the heartbeat timeout, the cached status
+    cannot miss a "lost" mark made by other manager instances, because an agent is marked lost
+    only when no heartbeat has been received for the timeout.
+    The other status changes are reflected by :meth:`forget()`.
+    """
+
+    def __init__(
+        self,
+        registry: AgentRegistry,
+        *,
+        batch_window: float = 0.0,
+        batch_size: int = 1000,
+        cache_lifetime: float = 40.0,
+    ) -> None:
+        self._registry = registry
+        self._batch_window = batch_window
+        self._batch_size = batch_size
+        self._cache_lifetime = cache_lifetime
+        self._pending: dict[AgentId, _PendingHeartbeat] = {}
+        self._cache: dict[AgentId, _CachedAgentRow] = {}
+        self._wakeup = asyncio.Event()
+        self._flush_task: Optional[asyncio.Task[None]] = None
+
+    def start(self) -> None:
+        self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def close(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        while self._pending:
+            await self.flush()
+
+    def forget(self, agent_id: AgentId) -> None:
+        """
+        Drop the cached row of the agent after its status is changed by other code paths,
+        so that the next heartbeat loads it again.
+        """
+        self._cache.pop(agent_id, None)
+
+    async def submit(self, agent_id: AgentId, agent_info: Mapping[str, Any]) -> None:
+        """
+        Add a heartbeat to the next batch and wait until the batch is processed.
+        When the agent has already sent another heartbeat in the same batch,
+        only the latest one is processed with the image inventory changes of both merged.
+        """
+        heartbeat = AgentHeartbeat.parse(agent_id, agent_info)
+        image_update = ImageInventoryUpdate.from_heartbeat(heartbeat)
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        pending = self._pending.get(agent_id)
+        if pending is None:
+            self._pending[agent_id] = _PendingHeartbeat(heartbeat, image_update, [waiter])
+        else:
+            pending.heartbeat = heartbeat
+            pending.image_update = pending.image_update.merge(image_update)
+            pending.waiters.append(waiter)
+        if self._flush_task is None:
+            await self.flush()
+        else:
+            self._wakeup.set()
+        await waiter
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            if self._batch_window > 0:
+                await asyncio.sleep(self._batch_window)
+            self._wakeup.clear()
+            while self._pending:
+                await self.flush()
+
+    async def flush(self) -> None:
+        agent_ids = [*itertools.islice(self._pending.keys(), self._batch_size)]
+        batch = [self._pending.pop(agent_id) for agent_id in agent_ids]
+        if not batch:
+            return
+        try:
+            await self._process(
+                [pending.heartbeat for pending in batch],
+                {pending.heartbeat.agent_id: pending.image_update for pending in batch},
+            )
+        except Exception as e:
+            log.exception("error while processing {} agent heartbeats", len(batch))
+            for pending in batch:
+                for waiter in pending.waiters:
+                    if not waiter.done():
+                        waiter.set_exception(e)
+        else:
+            for pending in batch:
+                for waiter in pending.waiters:
+                    if not waiter.done():
+                        waiter.set_result(None)
+
+    async def _process(
+        self,
+        heartbeats: Sequence[AgentHeartbeat],
+        image_updates: Mapping[AgentId, ImageInventoryUpdate],
+    ) -> None:
+        registry = self._registry
+        now = datetime.now(tzutc())
+
+        # Update "last seen" timestamps for liveness tracking
+        last_seen = {hb.agent_id: now.timestamp() for hb in heartbeats}
+        await redis_helper.execute(
+            registry.redis_live,
+            lambda r: r.hset("agent.last_seen", mapping=last_seen),
+        )
+
+        try:
+            changes = await self._update_agent_rows(heartbeats, now)
+        except sa.exc.IntegrityError:
+            if len(heartbeats) == 1:
+                log.error("Scaling group named [{}] does not exist.", heartbeats[0].scaling_group)
+                return
+            # Isolate the heartbeats referring to non-existent scaling groups.
+            changes = _AgentRowChanges()
+            accepted_heartbeats = []
+            for hb in heartbeats:
+                try:
+                    hb_changes = await self._update_agent_rows([hb], now)
+                except sa.exc.IntegrityError:
+                    log.error("Scaling group named [{}] does not exist.", hb.scaling_group)
+                    continue
+                accepted_heartbeats.append(hb)
+                changes.joined.extend(hb_changes.joined)
+                changes.revived.extend(hb_changes.revived)
+                changes.updated.extend(hb_changes.updated)
+                changes.rpc_changed.extend(hb_changes.rpc_changed)
+                changes.cache_updates.update(hb_changes.cache_updates)
+            heartbeats = accepted_heartbeats
+        self._cache.update(changes.cache_updates)
+
+        slot_key_and_units: dict[SlotName, SlotTypes] = {}
+        for hb in (*changes.joined, *changes.updated, *changes.revived):
+            slot_key_and_units.update(hb.slot_key_and_units)
+        if slot_key_and_units:
+            await registry.shared_config.update_resource_slots(slot_key_and_units)
+        for hb in (*changes.joined, *changes.rpc_changed, *changes.revived):
+            registry.agent_cache.update(
+                hb.agent_id,
+                hb.columns["addr"],
+                hb.columns["public_key"],
+            )
+        for hb in changes.revived:
+            await registry.event_producer.produce_event(
+                AgentStartedEvent("revived"),
+                source=hb.agent_id,
+            )
+
+        # Update the mapping of kernel images to agents.
+        await update_image_inventories(
+            registry.redis_image,
+            [image_updates[hb.agent_id] for hb in heartbeats],
+        )
+
+        for hb in heartbeats:
+            await registry.hook_plugin_ctx.notify(
+                "POST_AGENT_HEARTBEAT",
+                (hb.agent_id, hb.scaling_group, hb.available_slots),
+            )
+
+    async def _update_agent_rows(
+        self,
+        heartbeats: Sequence[AgentHeartbeat],
+        now: datetime,
+    ) -> _AgentRowChanges:
+        changes = _AgentRowChanges()
+
+        async def _update() -> None:
+            nonlocal changes
+            changes = _AgentRowChanges()
+            async with self._registry.db.begin() as conn:
+                rows: dict[AgentId, _CachedAgentRow] = {}
+                current_time = time.monotonic()
+                for hb in heartbeats:
+                    cached = self._cache.get(hb.agent_id)
+                    if (
+                        cached is not None
+                        and current_time - cached.loaded_at < self._cache_lifetime
+                    ):
+                        rows[hb.agent_id] = cached
+                agent_ids_to_load = [hb.agent_id for hb in heartbeats if hb.agent_id not in rows]
+                if agent_ids_to_load:
+                    fetch_query = (
+                        sa.select([
+                            agents.c.id,
+                            agents.c.status,
+                            *(agents.c[name] for name in _REPORTED_COLUMNS),
+                        ])
+                        .select_from(agents)
+                        .where(agents.c.id.in_(agent_ids_to_load))
+                        .with_for_update()
+                    )
+                    for row in await conn.execute(fetch_query):
+                        rows[row["id"]] = _CachedAgentRow(
+                            row["status"],
+                            {name: row[name] for name in _REPORTED_COLUMNS},
+                            current_time,
+                        )
+
+                inserts: list[dict[str, Any]] = []
+                updates: dict[frozenset[str], list[dict[str, Any]]] = {}
+                revivals: list[dict[str, Any]] = []
+                for hb in heartbeats:
+                    row = rows.get(hb.agent_id)
+                    if row is None or row.status is None:
+                        # new agent detected!
+                        log.info(
+                            "instance_lifecycle: agent {0} joined (via heartbeat)!", hb.agent_id
+                        )
+                        changes.joined.append(hb)
+                        inserts.append({
+                            "id": hb.agent_id,
+                            "status": AgentStatus.ALIVE,
+                            "region": hb.agent_info["region"],
+                            "occupied_slots": {},
+                            "first_contact": now,
+                            **hb.columns,
+                        })
+                    elif row.status == AgentStatus.ALIVE:
+                        changed_columns = {
+                            name: value
+                            for name, value in hb.columns.items()
+                            if row.columns[name] != value
+                        }
+                        if not changed_columns:
+                            continue
+                        changes.updated.append(hb)
+                        if not _RPC_COLUMNS.isdisjoint(changed_columns):
+                            changes.rpc_changed.append(hb)
+                        updates.setdefault(frozenset(changed_columns), []).append({
+                            "_agent_id": hb.agent_id,
+                            **{f"_{name}": value for name, value in changed_columns.items()},
+                        })
+                    elif row.status in (AgentStatus.LOST, AgentStatus.TERMINATED):
+                        changes.revived.append(hb)
+                        revivals.append({
+                            "_agent_id": hb.agent_id,
+                            "_region": hb.agent_info["region"],
+                            **{f"_{name}": value for name, value in hb.columns.items()},
+                        })
+                    else:
+                        log.error("should not reach here! {0}", type(row.status))
+                        continue
+                    changes.cache_updates[hb.agent_id] = _CachedAgentRow(
+                        AgentStatus.ALIVE,
+                        hb.columns,
+                        row.loaded_at if row is not None else current_time,
+                    )
+
+                if inserts:
+                    await conn.execute(sa.insert(agents), inserts)
+                for column_names, params in updates.items():
+                    update_query = (
+                        sa.update(agents)
+                        .values({name: sa.bindparam(f"_{name}") for name in column_names})
+                        .where(agents.c.id == sa.bindparam("_agent_id"))
+                    )
+                    await conn.execute(update_query, params)
+                if revivals:
+                    update_query = (
+                        sa.update(agents)
+                        .values({
+                            "status": AgentStatus.ALIVE,
+                            "region": sa.bindparam("_region"),
+                            "lost_at": sa.null(),
+                            **{name: sa.bindparam(f"_{name}") for name in _REPORTED_COLUMNS},
+                        })
+                        .where(agents.c.id == sa.bindparam("_agent_id"))
+                    )
+                    await conn.execute(update_query, revivals)
+
+        await execute_with_retry(_update)
+        return changes
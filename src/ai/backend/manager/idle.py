@@ -1,9 +1,12 @@
 from __future__ import annotations
 
-import asyncio
+import array
 import enum
+import itertools
 import logging
 import math
+import struct
+import sys
 from abc import ABCMeta, abstractmethod
 from collections import UserDict, defaultdict
 from collections.abc import (
@@ -28,6 +31,7 @@ from typing import (
 )
 
 import aiotools
+import attrs
 import sqlalchemy as sa
 import trafaret as t
 from aiotools import TaskGroupError
@@ -92,6 +96,7 @@ log = BraceStyleAdapter(logging.getLogger(__spec__.name))
 DEFAULT_CHECK_INTERVAL: Final = 15.0
 # idle checker's remaining time should be -1 when the remaining time is negative
 IDLE_TIMEOUT_VALUE: Final = -1
+_BIG_ENDIAN: Final = sys.byteorder == "big"
 
 
 class IdleCheckerError(TaskGroupError):
@@ -129,6 +134,25 @@ async def get_db_now(dbconn: SAConnection) -> datetime:
     return await dbconn.scalar(sa.select(sa.func.now()))
 
 
+async def set_many(
+    redis_obj: RedisConnectionInfo,
+    items: Sequence[tuple[str, bytes | str, int]],
+) -> None:
+    """
+    Set the given ``(key, value, expiration)`` items in a single pipeline.
+    """
+    if not items:
+        return
+
+    async def _pipe_builder(r: Redis):
+        pipe = r.pipeline(transaction=False)
+        for key, value, ex in items:
+            await pipe.set(key, value, ex=ex)
+        return pipe
+
+    await redis_helper.execute(redis_obj, _pipe_builder)
+
+
 class UtilizationExtraInfo(NamedTuple):
     avg_util: float
     threshold: float
@@ -188,6 +212,114 @@ class ReportInfo(TypedDict):
     extra: dict[str, Any] | None
 
 
+@attrs.define(auto_attribs=True, slots=True, frozen=True)
+class IdleCheckTarget:
+    kernel: Row
+    policy: Row
+    grace_period_end: Optional[datetime] = None
+
+
+@attrs.define(auto_attribs=True, slots=True)
+class IdleCheckBatch:
+    """
+    The kernels to check in an idle check tick with the data shared by the idle checkers,
+    loaded at once so that each checker evaluates all kernels with a few round-trips.
+    """
+
+    targets: Sequence[IdleCheckTarget]
+    db_now: datetime
+    redis_now: float
+    # The IDs of the live kernels of multi-node sessions.
+    cluster_kernel_ids: Mapping[SessionId, Sequence[KernelId]] = attrs.Factory(dict)
+
+    @classmethod
+    async def load(
+        cls,
+        dbconn: SAConnection,
+        redis_live: RedisConnectionInfo,
+        kernel_rows: Sequence[Row],
+        grace_period_checker: NewUserGracePeriodChecker,
+    ) -> IdleCheckBatch:
+        access_keys = {kernel["access_key"] for kernel in kernel_rows}
+        query = (
+            sa.select([
+                keypairs.c.access_key,
+                keypair_resource_policies.c.max_session_lifetime,
+                keypair_resource_policies.c.idle_timeout,
+            ])
+            .select_from(
+                sa.join(
+                    keypairs,
+                    keypair_resource_policies,
+                    keypair_resource_policies.c.name == keypairs.c.resource_policy,
+                ),
+            )
+            .where(keypairs.c.access_key.in_(access_keys))
+        )
+        policies: dict[AccessKey, Row] = {
+            row["access_key"]: row for row in (await dbconn.execute(query)).fetchall()
+        }
+        targets = []
+        for kernel in kernel_rows:
+            policy = policies.get(kernel["access_key"])
+            assert policy is not None
+            targets.append(
+                IdleCheckTarget(
+                    kernel,
+                    policy,
+                    await grace_period_checker.get_grace_period_end(kernel),
+                )
+            )
+        return cls(
+            targets,
+            await get_db_now(dbconn),
+            await get_redis_now(redis_live),
+            await cls._load_cluster_kernel_ids(dbconn, kernel_rows),
+        )
+
+    @classmethod
+    async def load_single(
+        cls,
+        dbconn: SAConnection,
+        redis_live: RedisConnectionInfo,
+        kernel: Row,
+        policy: Row,
+        grace_period_end: Optional[datetime] = None,
+    ) -> IdleCheckBatch:
+        return cls(
+            [IdleCheckTarget(kernel, policy, grace_period_end)],
+            await get_db_now(dbconn),
+            await get_redis_now(redis_live),
+            await cls._load_cluster_kernel_ids(dbconn, [kernel]),
+        )
+
+    @staticmethod
+    async def _load_cluster_kernel_ids(
+        dbconn: SAConnection,
+        kernel_rows: Sequence[Row],
+    ) -> dict[SessionId, list[KernelId]]:
+        cluster_session_ids = {
+            kernel["session_id"] for kernel in kernel_rows if kernel["cluster_size"] > 1
+        }
+        cluster_kernel_ids: dict[SessionId, list[KernelId]] = {}
+        if not cluster_session_ids:
+            return cluster_kernel_ids
+        query = sa.select([kernels.c.id, kernels.c.session_id]).where(
+            (kernels.c.session_id.in_(cluster_session_ids)) & (kernels.c.status.in_(LIVE_STATUS)),
+        )
+        for row in (await dbconn.execute(query)).fetchall():
+            cluster_kernel_ids.setdefault(row["session_id"], []).append(row["id"])
+        return cluster_kernel_ids
+
+    def get_kernel_ids(self, kernel: Row) -> Sequence[KernelId]:
+        """
+        Return the IDs of all live kernels of the session that the given main kernel belongs to.
+        """
+        if kernel["cluster_size"] > 1:
+            return self.cluster_kernel_ids.get(kernel["session_id"], [])
+        return [kernel["id"]]
+
+
 class IdleCheckerHost:
     check_interval: ClassVar[float] = DEFAULT_CHECK_INTERVAL
 
@@ -278,7 +410,6 @@ class IdleCheckerHost:
         event: DoIdleCheckEvent,
     ) -> None:
         log.debug("do_idle_check(): triggered")
-        policy_cache: dict[AccessKey, Row] = {}
         async with self._db.begin_readonly() as conn:
             j = sa.join(kernels, users, kernels.c.user_uuid == users.c.uuid)
             query = (
@@ -302,62 +433,49 @@ class IdleCheckerHost:
             )
             result = await conn.execute(query)
             rows = result.fetchall()
-            for kernel in rows:
-                grace_period_end = await self._grace_period_checker.get_grace_period_end(kernel)
-                policy = policy_cache.get(kernel["access_key"], None)
-                if policy is None:
-                    query = (
-                        sa.select([
-                            keypair_resource_policies.c.max_session_lifetime,
-                            keypair_resource_policies.c.idle_timeout,
-                        ])
-                        .select_from(
-                            sa.join(
-                                keypairs,
-                                keypair_resource_policies,
-                                keypair_resource_policies.c.name == keypairs.c.resource_policy,
-                            ),
-                        )
-                        .where(keypairs.c.access_key == kernel["access_key"])
+            if not rows:
+                return
+            batch = await IdleCheckBatch.load(
+                conn, self._redis_live, rows, self._grace_period_checker
+            )
+            # The checkers run one by one as they share the DB connection.
+            checker_results: list[Sequence[bool | BaseException]] = []
+            for checker in self._checkers:
+                try:
+                    checker_results.append(
+                        await checker.check_idleness_batch(batch, conn, self._redis_live)
                     )
-                    result = await conn.execute(query)
-                    policy = result.first()
-                    assert policy is not None
-                    policy_cache[kernel["access_key"]] = policy
-
-                check_task = [
-                    checker.check_idleness(
-                        kernel, conn, policy, self._redis_live, grace_period_end=grace_period_end
+                except Exception as e:
+                    checker_results.append([e] * len(batch.targets))
+        errors: list[BaseException] = []
+        for idx, target in enumerate(batch.targets):
+            session_id = target.kernel["session_id"]
+            terminated = False
+            for checker, results in zip(self._checkers, checker_results):
+                result = results[idx]
+                if isinstance(result, aiotools.TaskGroupError):
+                    errors.extend(result.__errors__)
+                    continue
+                elif isinstance(result, BaseException):
+                    # mark to be destroyed afterwards
+                    errors.append(result)
+                    continue
+                if not result:
+                    log.info(
+                        "The {} idle checker triggered termination of s:{}",
+                        checker.name,
+                        session_id,
                     )
-                    for checker in self._checkers
-                ]
-                check_results = await asyncio.gather(*check_task, return_exceptions=True)
-                terminated = False
-                errors = []
-                for checker, result in zip(self._checkers, check_results):
-                    if isinstance(result, aiotools.TaskGroupError):
-                        errors.extend(result.__errors__)
-                        continue
-                    elif isinstance(result, Exception):
-                        # mark to be destroyed afterwards
-                        errors.append(result)
-                        continue
-                    if not result:
-                        log.info(
-                            "The {} idle checker triggered termination of s:{}",
-                            checker.name,
-                            kernel["session_id"],
+                    if not terminated:
+                        terminated = True
+                        await self._event_producer.produce_event(
+                            DoTerminateSessionEvent(
+                                session_id,
+                                checker.terminate_reason,
+                            ),
                         )
-                        if not terminated:
-                            terminated = True
-                            await self._event_producer.produce_event(
-                                DoTerminateSessionEvent(
-                                    kernel["session_id"],
-                                    checker.terminate_reason,
-                                ),
-                            )
-                if errors:
-                    raise IdleCheckerError("idle checker(s) raise errors", errors)
+        if errors:
+            raise IdleCheckerError("idle checker(s) raise errors", errors)
 
     async def get_idle_check_report(
         self,
@@ -472,17 +590,23 @@ class AbstractIdleCheckReporter(metaclass=ABCMeta):
         """
         pass
 
+    def make_remaining_time_report(
+        self, session_id: SessionId, remaining: float
+    ) -> tuple[str, bytes, int]:
+        """
+        Return the key, value and expiration of the remaining time report to set in batch.
+        """
+        return (
+            self.get_report_key(session_id),
+            msgpack.packb(remaining),
+            int(DEFAULT_CHECK_INTERVAL) * 10,
+        )
+
     async def set_remaining_time_report(
         self, redis_obj: RedisConnectionInfo, session_id: SessionId, remaining: float
     ) -> None:
-        await redis_helper.execute(
-            redis_obj,
-            lambda r: r.set(
-                self.get_report_key(session_id),
-                msgpack.packb(remaining),
-                ex=int(DEFAULT_CHECK_INTERVAL) * 10,
-            ),
-        )
+        key, value, ex = self.make_remaining_time_report(session_id, remaining)
+        await redis_helper.execute(redis_obj, lambda r: r.set(key, value, ex=ex))
 
 
 class AbstractIdleChecker(metaclass=ABCMeta):
@@ -504,6 +628,51 @@ class AbstractIdleChecker(metaclass=ABCMeta):
         """
         return True
 
+    async def check_idleness_batch(
+        self,
+        batch: IdleCheckBatch,
+        dbconn: SAConnection,
+        redis_obj: RedisConnectionInfo,
+    ) -> Sequence[bool | BaseException]:
+        """
+        Check all kernels in the batch and return the results or the errors
+        in the order of the batch targets.
+        The default implementation checks the kernels one by one.
+        """
+        results: list[bool | BaseException] = []
+        for target in batch.targets:
+            try:
+                results.append(
+                    await self.check_idleness(
+                        target.kernel,
+                        dbconn,
+                        target.policy,
+                        redis_obj,
+                        grace_period_end=target.grace_period_end,
+                    )
+                )
+            except Exception as e:
+                results.append(e)
+        return results
+
+    async def _check_single(
+        self,
+        redis_live: RedisConnectionInfo,
+        kernel: Row,
+        dbconn: SAConnection,
+        policy: Row,
+        redis_obj: RedisConnectionInfo,
+        grace_period_end: Optional[datetime],
+    ) -> bool:
+        # Checks a single kernel with the batch implementation of the checker.
+        batch = await IdleCheckBatch.load_single(
+            dbconn, redis_live, kernel, policy, grace_period_end
+        )
+        (result,) = await self.check_idleness_batch(batch, dbconn, redis_obj)
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
 
 class NewUserGracePeriodChecker(AbstractIdleCheckReporter):
     remaining_time_type: RemainingTimeType = RemainingTimeType.GRACE_PERIOD
@@ -708,49 +877,74 @@ class NetworkTimeoutIdleChecker(BaseIdleChecker):
         Check the kernel is timeout or not.
         And save remaining time until timeout of kernel to Redis.
         """
-        session_id = kernel["session_id"]
+        return await self._check_single(
+            self._redis_live, kernel, dbconn, policy, redis_obj, grace_period_end
+        )
 
-        if kernel["session_type"] == SessionTypes.BATCH:
-            return True
+    async def check_idleness_batch(
+        self,
+        batch: IdleCheckBatch,
+        dbconn: SAConnection,
+        redis_obj: RedisConnectionInfo,
+    ) -> Sequence[bool | BaseException]:
+        results: list[bool | BaseException] = [True] * len(batch.targets)
+        targets = [
+            (idx, target)
+            for idx, target in enumerate(batch.targets)
+            if target.kernel["session_type"] != SessionTypes.BATCH
+        ]
+        if not targets:
+            return results
 
-        active_streams = await redis_helper.execute(
-            self._redis_live,
-            lambda r: r.zcount(
-                f"session.{session_id}.active_app_connections",
-                float("-inf"),
-                float("+inf"),
-            ),
-        )
-        if active_streams is not None and active_streams > 0:
-            return True
-        now: float = await get_redis_now(self._redis_live)
-        raw_last_access = await redis_helper.execute(
-            self._redis_live,
-            lambda r: r.get(f"session.{session_id}.last_access"),
-        )
-        if raw_last_access is None or raw_last_access == "0":
-            return True
-        last_access = float(raw_last_access)
-        # serves as the default fallback if keypair resource policy's idle_timeout is "undefined"
-        idle_timeout: float = self.idle_timeout.total_seconds()
-        # setting idle_timeout:
-        # - zero/inf means "infinite"
-        # - negative means "undefined"
-        if policy["idle_timeout"] >= 0:
-            idle_timeout = float(policy["idle_timeout"])
-        if (idle_timeout <= 0) or (math.isinf(idle_timeout) and idle_timeout > 0):
-            return True
-        tz = grace_period_end.tzinfo if grace_period_end is not None else None
-        remaining = calculate_remaining_time(
-            datetime.fromtimestamp(now, tz=tz),
-            datetime.fromtimestamp(last_access, tz=tz),
-            timedelta(seconds=idle_timeout),
-            grace_period_end,
-        )
-        await self.set_remaining_time_report(
-            redis_obj, session_id, remaining if remaining > 0 else IDLE_TIMEOUT_VALUE
-        )
-        return remaining >= 0
+        async def _pipe_builder(r: Redis):
+            pipe = r.pipeline(transaction=False)
+            for _, target in targets:
+                session_id = target.kernel["session_id"]
+                await pipe.zcount(
+                    f"session.{session_id}.active_app_connections",
+                    float("-inf"),
+                    float("+inf"),
+                )
+                await pipe.get(f"session.{session_id}.last_access")
+            return pipe
+
+        raw_states = await redis_helper.execute(self._redis_live, _pipe_builder)
+        now = batch.redis_now
+        reports: list[tuple[str, bytes | str, int]] = []
+        for (idx, target), active_streams, raw_last_access in zip(
+            targets, raw_states[0::2], raw_states[1::2]
+        ):
+            if active_streams is not None and active_streams > 0:
+                continue
+            if raw_last_access is None or raw_last_access == "0":
+                continue
+            last_access = float(raw_last_access)
+            # serves as the default fallback if keypair resource policy's idle_timeout is "undefined"
+            idle_timeout: float = self.idle_timeout.total_seconds()
+            # setting idle_timeout:
+            # - zero/inf means "infinite"
+            # - negative means "undefined"
+            if target.policy["idle_timeout"] >= 0:
+                idle_timeout = float(target.policy["idle_timeout"])
+            if (idle_timeout <= 0) or (math.isinf(idle_timeout) and idle_timeout > 0):
+                continue
+            grace_period_end = target.grace_period_end
+            tz = grace_period_end.tzinfo if grace_period_end is not None else None
+            remaining = calculate_remaining_time(
+                datetime.fromtimestamp(now, tz=tz),
+                datetime.fromtimestamp(last_access, tz=tz),
+                timedelta(seconds=idle_timeout),
+                grace_period_end,
+            )
+            reports.append(
+                self.make_remaining_time_report(
+                    target.kernel["session_id"],
+                    remaining if remaining > 0 else IDLE_TIMEOUT_VALUE,
+                )
+            )
+            results[idx] = remaining >= 0
+        await set_many(redis_obj, reports)
+        return results
 
     async def get_checker_result(
         self,
@@ -790,22 +984,36 @@ class SessionLifetimeChecker(BaseIdleChecker):
         Check the kernel has been living longer than resource policy's `max_session_lifetime`.
         And save remaining time until `max_session_lifetime` of kernel to Redis.
         """
+        return await self._check_single(
+            self._redis_live, kernel, dbconn, policy, redis_obj, grace_period_end
+        )
 
-        session_id = kernel["session_id"]
-        if (max_session_lifetime := policy["max_session_lifetime"]) > 0:
-            # TODO: once per-status time tracking is implemented, let's change created_at
-            #       to the timestamp when the session entered PREPARING status.
-            idle_timeout = timedelta(seconds=max_session_lifetime)
-            now: datetime = await get_db_now(dbconn)
-            kernel_created_at: datetime = kernel["created_at"]
-            remaining = calculate_remaining_time(
-                now, kernel_created_at, idle_timeout, grace_period_end
-            )
-            await self.set_remaining_time_report(
-                redis_obj, session_id, remaining if remaining > 0 else IDLE_TIMEOUT_VALUE
-            )
-            return remaining > 0
-        return True
+    async def check_idleness_batch(
+        self,
+        batch: IdleCheckBatch,
+        dbconn: SAConnection,
+        redis_obj: RedisConnectionInfo,
+    ) -> Sequence[bool | BaseException]:
+        results: list[bool | BaseException] = [True] * len(batch.targets)
+        reports: list[tuple[str, bytes | str, int]] = []
+        for idx, target in enumerate(batch.targets):
+            if (max_session_lifetime := target.policy["max_session_lifetime"]) > 0:
+                # TODO: once per-status time tracking is implemented, let's change created_at
+                #       to the timestamp when the session entered PREPARING status.
+                idle_timeout = timedelta(seconds=max_session_lifetime)
+                kernel_created_at: datetime = target.kernel["created_at"]
+                remaining = calculate_remaining_time(
+                    batch.db_now, kernel_created_at, idle_timeout, target.grace_period_end
+                )
+                reports.append(
+                    self.make_remaining_time_report(
+                        target.kernel["session_id"],
+                        remaining if remaining > 0 else IDLE_TIMEOUT_VALUE,
+                    )
+                )
+                results[idx] = remaining > 0
+        await set_many(redis_obj, reports)
+        return results
 
     async def get_checker_result(
         self,
@@ -899,6 +1107,166 @@ class UtilizationConfig(BaseSchema):
     ]
 
 
+_UTIL_SERIES_MAGIC: Final = b"UTS1"
+# magic, capacity, number of metrics
+_UTIL_SERIES_HEADER: Final = struct.Struct("<4sIH")
+# name length, number of values, next write position, running sum
+_UTIL_SERIES_METRIC_HEADER: Final = struct.Struct("<HIId")
+
+
+@attrs.define(auto_attribs=True, slots=True)
+class _UtilizationRing:
+    values: array.array[float]
+    count: int = 0
+    pos: int = 0
+    sum: float = 0.0
+
+    def ordered_values(self) -> array.array[float]:
+        # Return the values from the oldest to the latest.
+        if self.count < len(self.values):
+            return self.values[: self.count]
+        return self.values[self.pos :] + self.values[: self.pos]
+
+
+class UtilizationSeries:
+    """
+    The utilization time series of a session, kept as a ring buffer per metric with its
+    running sum so that appending a value and taking the average are O(1).
+
+    It is serialized as fixed-width packed floats, and the legacy msgpack-encoded dicts
+    of value lists are converted on load.
+    """
+
+    capacity: int
+    _rings: dict[str, _UtilizationRing]
+
+    def __init__(self, capacity: int) -> None:
+        if capacity <= 0:
+            raise ValueError("The capacity of a utilization series must be positive.")
+        self.capacity = capacity
+        self._rings = {}
+
+    @classmethod
+    def load(cls, raw_series: Optional[bytes], capacity: int) -> UtilizationSeries:
+        """
+        Deserialize the series, resizing it to the given capacity while keeping the latest values.
+        An empty series is returned when the data is missing or malformed.
+        """
+        if raw_series is None:
+            return cls(capacity)
+        try:
+            if raw_series[:4] == _UTIL_SERIES_MAGIC:
+                return cls._from_packed(raw_series, capacity)
+            legacy_series = msgpack.unpackb(raw_series)
+            if not isinstance(legacy_series, Mapping):
+                raise TypeError("Unknown utilization series format")
+            series = cls(capacity)
+            for metric_key, values in legacy_series.items():
+                series._set_values(metric_key, array.array("d", map(float, values)))
+            return series
+        except (TypeError, ValueError, struct.error) as e:
+            log.warning("Dropping malformed utilization series ({!r})", e)
+            return cls(capacity)
+
+    @classmethod
+    def _from_packed(cls, raw_series: bytes, capacity: int) -> UtilizationSeries:
+        _, stored_capacity, num_metrics = _UTIL_SERIES_HEADER.unpack_from(raw_series)
+        offset = _UTIL_SERIES_HEADER.size
+        series = cls(capacity)
+        for _ in range(num_metrics):
+            name_length, count, pos, running_sum = _UTIL_SERIES_METRIC_HEADER.unpack_from(
+                raw_series, offset
+            )
+            offset += _UTIL_SERIES_METRIC_HEADER.size
+            metric_key = raw_series[offset : offset + name_length].decode()
+            offset += name_length
+            values = array.array("d")
+            values.frombytes(raw_series[offset : offset + count * values.itemsize])
+            offset += count * values.itemsize
+            if len(values) != count:
+                raise ValueError("Truncated utilization series")
+            if _BIG_ENDIAN:
+                values.byteswap()
+            if pos >= stored_capacity or count > stored_capacity:
+                raise ValueError("Corrupted utilization series")
+            if stored_capacity == capacity:
+                values.extend(itertools.repeat(0.0, capacity - count))
+                series._rings[metric_key] = _UtilizationRing(values, count, pos, running_sum)
+            else:
+                ring = _UtilizationRing(values, count, pos)
+                series._set_values(metric_key, ring.ordered_values())
+        return series
+
+    def _set_values(self, metric_key: str, values: array.array[float]) -> None:
+        # Set the values from the oldest to the latest, keeping only the latest ones.
+        values = values[-self.capacity :]
+        count = len(values)
+        running_sum = math.fsum(values)
+        values.extend(itertools.repeat(0.0, self.capacity - count))
+        self._rings[metric_key] = _UtilizationRing(
+            values, count, count % self.capacity, running_sum
+        )
+
+    def push(self, metric_key: str, value: float) -> bool:
+        """
+        Append the value to the series of the metric, evicting the oldest value when it is full.
+        Returns whether the series was already full.
+        """
+        ring = self._rings.get(metric_key)
+        if ring is None:
+            ring = _UtilizationRing(array.array("d", itertools.repeat(0.0, self.capacity)))
+            self._rings[metric_key] = ring
+        full = ring.count == self.capacity
+        if full:
+            ring.sum -= ring.values[ring.pos]
+        else:
+            ring.count += 1
+        ring.values[ring.pos] = value
+        ring.sum += value
+        ring.pos = (ring.pos + 1) % self.capacity
+        if ring.pos == 0:
+            # Recalculate the sum once per cycle so that the rounding errors do not accumulate.
+            ring.sum = math.fsum(ring.values)
+        return full
+
+    def values(self, metric_key: str) -> list[float]:
+        return self._rings[metric_key].ordered_values().tolist()
+
+    def averages(self) -> dict[str, float]:
+        return {
+            metric_key: ring.sum / ring.count if ring.count else 0.0
+            for metric_key, ring in self._rings.items()
+        }
+
+    def to_bytes(self) -> bytes:
+        chunks = [_UTIL_SERIES_HEADER.pack(_UTIL_SERIES_MAGIC, self.capacity, len(self._rings))]
+        for metric_key, ring in self._rings.items():
+            name = metric_key.encode()
+            chunks.append(
+                _UTIL_SERIES_METRIC_HEADER.pack(len(name), ring.count, ring.pos, ring.sum)
+            )
+            chunks.append(name)
+            # Only the filled part is stored until the ring is full.
+            values = ring.values[: ring.count]
+            if _BIG_ENDIAN:
+                values.byteswap()
+            chunks.append(values.tobytes())
+        return b"".join(chunks)
+
+
+@attrs.define(auto_attribs=True, slots=True)
+class _UtilizationEvaluation:
+    idx: int
+    session_id: SessionId
+    kernel_ids: Sequence[KernelId]
+    occupied_slots: ResourceSlot
+    excluded_resources: set[str]
+    time_window: timedelta
+    window_size: int
+    util_first_collected: float
+    raw_util_series: Optional[bytes]
+
+
 class UtilizationIdleChecker(BaseIdleChecker):
     """
     Checks the idleness of a session by the average utilization of compute devices.
@@ -969,92 +1337,10 @@ class UtilizationIdleChecker(BaseIdleChecker):
     def _get_first_collected_key(self, session_id: SessionId) -> str:
         return f"session.{session_id}.util_first_collected"
 
-    async def check_idleness(
-        self,
-        kernel: Row,
-        dbconn: SAConnection,
-        policy: Row,
-        redis_obj: RedisConnectionInfo,
-        *,
-        grace_period_end: Optional[datetime] = None,
-    ) -> bool:
-        """
-        Check the the average utilization of kernel and whether it exceeds the threshold or not.
-        And save the average utilization of kernel to Redis.
-        """
-        session_id = kernel["session_id"]
-
-        interval = IdleCheckerHost.check_interval
-        # time_window: Utilization is calculated within this window.
-        time_window: timedelta = self.get_time_window(policy)
-        occupied_slots = cast(ResourceSlot, kernel["occupied_slots"])
-        requested_slots = cast(ResourceSlot, kernel["requested_slots"])
-        excluded_resources: set[str] = set()
-
-        util_series_key = f"session.{session_id}.util_series"
-        util_first_collected_key = self._get_first_collected_key(session_id)
-        util_last_collected_key = self._get_last_collected_key(session_id)
-
-        # window_size: the length of utilization reports.
-        window_size = int(time_window.total_seconds() / interval)
-        if (window_size <= 0) or (math.isinf(window_size) and window_size > 0):
-            return True
-
-        # Wait until the time "interval" is passed after the last udpated time.
-        t = await redis_helper.execute(self._redis_live, lambda r: r.time())
-        util_now: float = t[0] + (t[1] / (10**6))
-        raw_util_last_collected = cast(
-            bytes | None,
-            await redis_helper.execute(
-                self._redis_live,
-                lambda r: r.get(util_last_collected_key),
-            ),
-        )
-        util_last_collected: float = (
-            float(raw_util_last_collected) if raw_util_last_collected else 0.0
-        )
-        if util_now - util_last_collected < interval:
-            return True
-
-        raw_util_first_collected = cast(
-            bytes | None,
-            await redis_helper.execute(
-                self._redis_live,
-                lambda r: r.get(util_first_collected_key),
-            ),
-        )
-        if raw_util_first_collected is None:
-            util_first_collected = util_now
-            await redis_helper.execute(
-                self._redis_live,
-                lambda r: r.set(
-                    util_first_collected_key,
-                    f"{util_now:.06f}",
-                    ex=max(86400, int(self.time_window.total_seconds() * 2)),
-                ),
-            )
-        else:
-            util_first_collected = float(raw_util_first_collected)
-
-        # Report time remaining until the first time window is full as expire time
-        db_now: datetime = await get_db_now(dbconn)
-        kernel_created_at: datetime = kernel["created_at"]
-        if grace_period_end is not None:
-            start_from = max(grace_period_end, kernel_created_at)
-        else:
-            start_from = kernel_created_at
-        total_initial_grace_period_end = start_from + self.initial_grace_period
-        remaining = calculate_remaining_time(
-            db_now, kernel_created_at, time_window, total_initial_grace_period_end
-        )
-        await self.set_remaining_time_report(
-            redis_obj, session_id, remaining if remaining > 0 else IDLE_TIMEOUT_VALUE
-        )
-
-        # Respect initial grace period (no calculation of utilization and no termination of the session)
-        if db_now <= total_initial_grace_period_end:
-            return True
+    def _get_util_series_key(self, session_id: SessionId) -> str:
+        return f"session.{session_id}.util_series"
 
+    def _get_excluded_resources(self, requested_slots: Mapping[str, Any]) -> set[str]:
         # Register requested resources.
         requested_resource_names: set[str] = set()
         for slot_name, val in requested_slots.items():
@@ -1068,85 +1354,198 @@ class UtilizationIdleChecker(BaseIdleChecker):
 
         # Do not take into account unallocated resources. For example, do not garbage collect
         # a session without GPU even if cuda_util is configured in resource-thresholds.
+        excluded_resources: set[str] = set()
         for resource_key in self.resource_thresholds.keys():
             if _get_resource_name_from_metric_key(resource_key) not in requested_resource_names:
                 excluded_resources.add(resource_key)
+        return excluded_resources
 
-        # Get current utilization data from all containers of the session.
-        if kernel["cluster_size"] > 1:
-            query = sa.select([kernels.c.id]).where(
-                (kernels.c.session_id == session_id) & (kernels.c.status.in_(LIVE_STATUS)),
-            )
-            rows = (await dbconn.execute(query)).fetchall()
-            kernel_ids = [k["id"] for k in rows]
-        else:
-            kernel_ids = [kernel["id"]]
-        current_utilizations = await self.get_current_utilization(kernel_ids, occupied_slots)
-        if current_utilizations is None:
-            return True
-
-        # Update utilization time-series data.
-        raw_util_series = cast(
-            Optional[bytes],
-            await redis_helper.execute(self._redis_live, lambda r: r.get(util_series_key)),
+    async def check_idleness(
+        self,
+        kernel: Row,
+        dbconn: SAConnection,
+        policy: Row,
+        redis_obj: RedisConnectionInfo,
+        *,
+        grace_period_end: Optional[datetime] = None,
+    ) -> bool:
+        """
+        Check the the average utilization of kernel and whether it exceeds the threshold or not.
+        And save the average utilization of kernel to Redis.
+        """
+        return await self._check_single(
+            self._redis_live, kernel, dbconn, policy, redis_obj, grace_period_end
         )
 
-        def default_util_series() -> dict[str, list[float]]:
-            return {resource: [] for resource in current_utilizations.keys()}
+    async def check_idleness_batch(
+        self,
+        batch: IdleCheckBatch,
+        dbconn: SAConnection,
+        redis_obj: RedisConnectionInfo,
+    ) -> Sequence[bool | BaseException]:
+        """
+        Check the average utilization of all kernels in the batch.
+        The collection timestamps, the utilization series and the live stats of all sessions
+        are read in a few pipelined calls, and the updated series and the reports are
+        written back in a single pipeline.
+        """
+        interval = IdleCheckerHost.check_interval
+        results: list[bool | BaseException] = [True] * len(batch.targets)
+        targets: list[tuple[int, IdleCheckTarget, timedelta, int]] = []
+        for idx, target in enumerate(batch.targets):
+            # time_window: Utilization is calculated within this window.
+            time_window = self.get_time_window(target.policy)
+            # window_size: the length of utilization reports.
+            window_size = int(time_window.total_seconds() / interval)
+            if (window_size <= 0) or (math.isinf(window_size) and window_size > 0):
+                continue
+            targets.append((idx, target, time_window, window_size))
+        if not targets:
+            return results
+
+        async def _read_pipe_builder(r: Redis):
+            pipe = r.pipeline(transaction=False)
+            for _, target, _, _ in targets:
+                session_id = target.kernel["session_id"]
+                await pipe.get(self._get_last_collected_key(session_id))
+                await pipe.get(self._get_first_collected_key(session_id))
+                await pipe.get(self._get_util_series_key(session_id))
+            return pipe
 
-        if raw_util_series is not None:
+        raw_states = await redis_helper.execute(self._redis_live, _read_pipe_builder)
+        util_now = batch.redis_now
+        db_now = batch.db_now
+        series_ex = max(86400, int(self.time_window.total_seconds() * 2))
+        live_items: list[tuple[str, bytes | str, int]] = []
+        report_items: list[tuple[str, bytes | str, int]] = []
+        evaluations: list[_UtilizationEvaluation] = []
+        for (idx, target, time_window, window_size), raw_last, raw_first, raw_series in zip(
+            targets, raw_states[0::3], raw_states[1::3], raw_states[2::3]
+        ):
+            kernel = target.kernel
+            session_id = kernel["session_id"]
             try:
-                raw_data: dict[str, list[float]] = msgpack.unpackb(raw_util_series, use_list=True)
-                util_series: dict[str, list[float]] = {
-                    metric_key: v for metric_key, v in raw_data.items()
-                }
-            except TypeError:
-                util_series = default_util_series()
+                # Wait until the time "interval" is passed after the last udpated time.
+                util_last_collected: float = float(raw_last) if raw_last else 0.0
+                if util_now - util_last_collected < interval:
+                    continue
+                if raw_first is None:
+                    util_first_collected = util_now
+                    live_items.append((
+                        self._get_first_collected_key(session_id),
+                        f"{util_now:.06f}",
+                        series_ex,
+                    ))
+                else:
+                    util_first_collected = float(raw_first)
+
+                # Report time remaining until the first time window is full as expire time
+                kernel_created_at: datetime = kernel["created_at"]
+                if target.grace_period_end is not None:
+                    start_from = max(target.grace_period_end, kernel_created_at)
+                else:
+                    start_from = kernel_created_at
+                total_initial_grace_period_end = start_from + self.initial_grace_period
+                remaining = calculate_remaining_time(
+                    db_now, kernel_created_at, time_window, total_initial_grace_period_end
+                )
+                report_items.append(
+                    self.make_remaining_time_report(
+                        session_id, remaining if remaining > 0 else IDLE_TIMEOUT_VALUE
+                    )
+                )
+
+                # Respect initial grace period (no calculation of utilization and no termination of the session)
+                if db_now <= total_initial_grace_period_end:
+                    continue
+
+                evaluations.append(
+                    _UtilizationEvaluation(
+                        idx,
+                        session_id,
+                        batch.get_kernel_ids(kernel),
+                        cast(ResourceSlot, kernel["occupied_slots"]),
+                        self._get_excluded_resources(cast(ResourceSlot, kernel["requested_slots"])),
+                        time_window,
+                        window_size,
+                        util_first_collected,
+                        raw_series,
+                    )
+                )
+            except Exception as e:
+                results[idx] = e
+
+        # Get current utilization data from all containers of the sessions.
+        try:
+            live_stats = await self._get_live_stats([
+                kernel_id for evaluation in evaluations for kernel_id in evaluation.kernel_ids
+            ])
+        except Exception as e:
+            log.warning("Unable to collect utilization for idleness check", exc_info=e)
+            evaluations = []
+        for evaluation in evaluations:
+            try:
+                current_utilizations = self._calculate_utilization(
+                    evaluation.kernel_ids, live_stats, evaluation.occupied_slots
+                )
+                if current_utilizations is None:
+                    continue
+                results[evaluation.idx] = self._evaluate_utilization(
+                    evaluation,
+                    current_utilizations,
+                    util_now,
+                    live_items,
+                    report_items,
+                    series_ex,
+                )
+            except Exception as e:
+                results[evaluation.idx] = e
+
+        if redis_obj is self._redis_live:
+            await set_many(redis_obj, [*live_items, *report_items])
         else:
-            util_series = default_util_series()
+            await set_many(self._redis_live, live_items)
+            await set_many(redis_obj, report_items)
+        return results
 
-        do_idle_check: bool = True
+    def _evaluate_utilization(
+        self,
+        evaluation: _UtilizationEvaluation,
+        current_utilizations: Mapping[str, float],
+        util_now: float,
+        live_items: list[tuple[str, bytes | str, int]],
+        report_items: list[tuple[str, bytes | str, int]],
+        series_ex: int,
+    ) -> bool:
+        session_id = evaluation.session_id
+        window_size = evaluation.window_size
 
+        # Update utilization time-series data.
+        util_series = UtilizationSeries.load(evaluation.raw_util_series, window_size)
+        do_idle_check: bool = True
         for metric_key, val in current_utilizations.items():
-            if metric_key not in util_series:
-                util_series[metric_key] = []
-            util_series[metric_key].append(val)
-            if len(util_series[metric_key]) > window_size:
-                util_series[metric_key].pop(0)
-            else:
+            if not util_series.push(metric_key, val):
                 do_idle_check = False
 
         # Do not skip idleness-check if the current time passed the time window
-        if util_now - util_first_collected >= time_window.total_seconds():
+        if util_now - evaluation.util_first_collected >= evaluation.time_window.total_seconds():
             do_idle_check = True
 
-        await redis_helper.execute(
-            self._redis_live,
-            lambda r: r.set(
-                util_series_key,
-                msgpack.packb(util_series),
-                ex=max(86400, int(self.time_window.total_seconds() * 2)),
-            ),
-        )
-        await redis_helper.execute(
-            self._redis_live,
-            lambda r: r.set(
-                util_last_collected_key,
-                f"{util_now:.06f}",
-                ex=max(86400, int(self.time_window.total_seconds() * 2)),
-            ),
-        )
-
-        def _avg(util_list: list[float]) -> float:
-            try:
-                return sum(util_list) / len(util_list)
-            except ZeroDivisionError:
-                return 0.0
+        live_items.append((
+            self._get_util_series_key(session_id),
+            util_series.to_bytes(),
+            series_ex,
+        ))
+        live_items.append((
+            self._get_last_collected_key(session_id),
+            f"{util_now:.06f}",
+            series_ex,
+        ))
 
-        avg_utils: Mapping[str, float] = {k: _avg(v) for k, v in util_series.items()}
+        avg_utils: Mapping[str, float] = util_series.averages()
 
         util_avg_thresholds = UtilizationResourceReport.from_avg_threshold(
-            avg_utils, self.resource_thresholds, excluded_resources
+            avg_utils, self.resource_thresholds, evaluation.excluded_resources
         )
         report = {
             "thresholds_check_operator": self.thresholds_check_operator.value,
@@ -1154,14 +1553,7 @@ class UtilizationIdleChecker(BaseIdleChecker):
         }
         _key = self.get_extra_info_key(session_id)
         assert _key is not None
-        await redis_helper.execute(
-            redis_obj,
-            lambda r: r.set(
-                _key,
-                msgpack.packb(report),
-                ex=int(DEFAULT_CHECK_INTERVAL) * 10,
-            ),
-        )
+        report_items.append((_key, msgpack.packb(report), int(DEFAULT_CHECK_INTERVAL) * 10))
 
         if not do_idle_check:
             return True
@@ -1184,6 +1576,18 @@ class UtilizationIdleChecker(BaseIdleChecker):
             )
         return check_result
 
+    async def _get_live_stats(
+        self,
+        kernel_ids: Sequence[KernelId],
+    ) -> dict[KernelId, Optional[bytes]]:
+        if not kernel_ids:
+            return {}
+        raw_live_stats = await redis_helper.execute(
+            self._redis_stat,
+            lambda r: r.mget([str(kernel_id) for kernel_id in kernel_ids]),
+        )
+        return dict(zip(kernel_ids, raw_live_stats))
+
     async def get_current_utilization(
         self,
         kernel_ids: Sequence[KernelId],
@@ -1194,18 +1598,26 @@ class UtilizationIdleChecker(BaseIdleChecker):
         components of a cluster session. If there are multiple kernel_ids, this method
         will return the averaged values over the kernels for each utilization.
         """
+        try:
+            live_stats = await self._get_live_stats(kernel_ids)
+        except Exception as e:
+            _msg = f"Unable to collect utilization for idleness check (kernels:{kernel_ids})"
+            log.warning(_msg, exc_info=e)
+            return None
+        return self._calculate_utilization(kernel_ids, live_stats, occupied_slots)
+
+    def _calculate_utilization(
+        self,
+        kernel_ids: Sequence[KernelId],
+        live_stats: Mapping[KernelId, Optional[bytes]],
+        occupied_slots: Mapping[str, Any],
+    ) -> Mapping[str, float] | None:
         try:
             utilizations: defaultdict[str, float] = defaultdict(float)
             live_stat = {}
             kernel_counter = 0
             for kernel_id in kernel_ids:
-                raw_live_stat = cast(
-                    bytes | None,
-                    await redis_helper.execute(
-                        self._redis_stat,
-                        lambda r: r.get(str(kernel_id)),
-                    ),
-                )
+                raw_live_stat = live_stats.get(kernel_id)
                 if raw_live_stat is None:
                     log.warning(
                         f"Utilization data not found or failed to fetch utilization data. Skip idle check (k:{kernel_id})"
@@ -1592,7 +1592,14 @@ async def recalc_concurrency_used(
     db_sess: SASession,
     redis_stat: RedisConnectionInfo,
     access_key: AccessKey,
+    *,
+    uncommitted_concurrency_used: int = 0,
+    uncommitted_sftp_concurrency_used: int = 0,
 ) -> None:
+    """
+    Recalculate the concurrency counters of the access key in Redis from the kernels occupying
+    resources, adding the given counts of the kernels scheduled but not committed yet.
+    """
     concurrency_used: int
     from .session import PRIVATE_SESSION_TYPES
 
@@ -1624,13 +1631,13 @@ async def recalc_concurrency_used(
         redis_stat,
         lambda r: r.set(
             f"keypair.concurrency_used.{access_key}",
-            concurrency_used,
+            concurrency_used + uncommitted_concurrency_used,
         ),
     )
     await redis_helper.execute(
         redis_stat,
         lambda r: r.set(
             f"keypair.sftp_concurrency_used.{access_key}",
-            sftp_concurrency_used,
+            sftp_concurrency_used + uncommitted_sftp_concurrency_used,
         ),
     )
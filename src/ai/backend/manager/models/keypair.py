@@ -21,6 +21,7 @@ from sqlalchemy.sql.expression import false
 
 from ai.backend.common import msgpack, redis_helper
 from ai.backend.common.defs import REDIS_RATE_LIMIT_DB, RedisRole
+from ai.backend.common.events import DoInvalidateAuthCacheEvent
 from ai.backend.common.types import AccessKey, EtcdRedisConfig, SecretKey
 
 if TYPE_CHECKING:
@@ -647,7 +648,10 @@ class ModifyKeyPair(graphene.Mutation):
         set_if_set(props, data, "rate_limit")
         # props.concurrency_limit is always ignored
         update_query = sa.update(keypairs).values(data).where(keypairs.c.access_key == access_key)
-        return await simple_db_mutate(cls, ctx, update_query)
+        result = await simple_db_mutate(cls, ctx, update_query)
+        if result.ok:
+            await ctx.registry.event_producer.produce_event(DoInvalidateAuthCacheEvent(access_key))
+        return result
 
 
 class DeleteKeyPair(graphene.Mutation):
@@ -684,6 +688,7 @@ class DeleteKeyPair(graphene.Mutation):
                 ctx.redis_stat,
                 lambda r: r.delete(f"keypair.concurrency_used.{access_key}"),
             )
+            await ctx.registry.event_producer.produce_event(DoInvalidateAuthCacheEvent(access_key))
         return result
 
 
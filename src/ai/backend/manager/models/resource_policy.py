@@ -10,6 +10,7 @@ from graphene.types.datetime import DateTime as GQLDateTime
 from sqlalchemy.engine.row import Row
 from sqlalchemy.orm import relationship, selectinload
 
+from ai.backend.common.events import DoInvalidateAuthCacheEvent
 from ai.backend.common.types import DefaultForUnspecified, ResourceSlot
 from ai.backend.logging import BraceStyleAdapter
 from ai.backend.manager.models.utils import execute_with_retry
@@ -439,7 +440,11 @@ class ModifyKeyPairResourcePolicy(graphene.Mutation):
             .values(data)
             .where(keypair_resource_policies.c.name == name)
         )
-        return await simple_db_mutate(cls, info.context, update_query)
+        result = await simple_db_mutate(cls, info.context, update_query)
+        if result.ok:
+            graph_ctx: GraphQueryContext = info.context
+            await graph_ctx.registry.event_producer.produce_event(DoInvalidateAuthCacheEvent())
+        return result
 
 
 class DeleteKeyPairResourcePolicy(graphene.Mutation):
@@ -461,7 +466,11 @@ class DeleteKeyPairResourcePolicy(graphene.Mutation):
         delete_query = sa.delete(keypair_resource_policies).where(
             keypair_resource_policies.c.name == name
         )
-        return await simple_db_mutate(cls, info.context, delete_query)
+        result = await simple_db_mutate(cls, info.context, delete_query)
+        if result.ok:
+            graph_ctx: GraphQueryContext = info.context
+            await graph_ctx.registry.event_producer.produce_event(DoInvalidateAuthCacheEvent())
+        return result
 
 
 class UserResourcePolicy(graphene.ObjectType):
@@ -652,7 +661,11 @@ class ModifyUserResourcePolicy(graphene.Mutation):
         update_query = (
             sa.update(UserResourcePolicyRow).values(data).where(UserResourcePolicyRow.name == name)
         )
-        return await simple_db_mutate(cls, info.context, update_query)
+        result = await simple_db_mutate(cls, info.context, update_query)
+        if result.ok:
+            graph_ctx: GraphQueryContext = info.context
+            await graph_ctx.registry.event_producer.produce_event(DoInvalidateAuthCacheEvent())
+        return result
 
 
 class DeleteUserResourcePolicy(graphene.Mutation):
@@ -672,7 +685,11 @@ class DeleteUserResourcePolicy(graphene.Mutation):
         name: str,
     ) -> DeleteUserResourcePolicy:
         delete_query = sa.delete(UserResourcePolicyRow).where(UserResourcePolicyRow.name == name)
-        return await simple_db_mutate(cls, info.context, delete_query)
+        result = await simple_db_mutate(cls, info.context, delete_query)
+        if result.ok:
+            graph_ctx: GraphQueryContext = info.context
+            await graph_ctx.registry.event_producer.produce_event(DoInvalidateAuthCacheEvent())
+        return result
 
 
 class ProjectResourcePolicy(graphene.ObjectType):
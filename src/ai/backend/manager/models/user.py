@@ -23,6 +23,7 @@ from sqlalchemy.sql.expression import bindparam
 from sqlalchemy.types import VARCHAR, TypeDecorator
 
 from ai.backend.common import redis_helper
+from ai.backend.common.events import DoInvalidateAuthCacheEvent
 from ai.backend.common.types import RedisConnectionInfo, VFolderID
 from ai.backend.logging import BraceStyleAdapter
 
@@ -987,7 +988,7 @@ class ModifyUser(graphene.Mutation):
 
             return updated_user
 
-        return await simple_db_mutate_returning_item(
+        result = await simple_db_mutate_returning_item(
             cls,
             graph_ctx,
             update_query,
@@ -995,6 +996,9 @@ class ModifyUser(graphene.Mutation):
             pre_func=_pre_func,
             post_func=_post_func,
         )
+        if result.ok:
+            await graph_ctx.registry.event_producer.produce_event(DoInvalidateAuthCacheEvent())
+        return result
 
 
 class DeleteUser(graphene.Mutation):
@@ -1034,7 +1038,10 @@ class DeleteUser(graphene.Mutation):
             .values(status=UserStatus.DELETED, status_info="admin-requested")
             .where(users.c.email == email)
         )
-        return await simple_db_mutate(cls, graph_ctx, update_query, pre_func=_pre_func)
+        result = await simple_db_mutate(cls, graph_ctx, update_query, pre_func=_pre_func)
+        if result.ok:
+            await graph_ctx.registry.event_producer.produce_event(DoInvalidateAuthCacheEvent())
+        return result
 
 
 class PurgeUser(graphene.Mutation):
@@ -1115,6 +1122,7 @@ class PurgeUser(graphene.Mutation):
 
         async with graph_ctx.db.connect() as db_conn:
             await execute_with_txn_retry(_delete, graph_ctx.db.begin_session, db_conn)
+        await graph_ctx.registry.event_producer.produce_event(DoInvalidateAuthCacheEvent())
         return PurgeUser(True, "success")
 
     @classmethod
@@ -201,7 +201,7 @@ class ExtendedAsyncSAEngine(SAEngine):
                 yield sess
 
     @actxmgr
-    async def advisory_lock(self, lock_id: LockID) -> AsyncIterator[None]:
+    async def advisory_lock(self, lock_id: LockID | int) -> AsyncIterator[None]:
         lock_acquired = False
         # Here we use the session-level advisory lock,
         # which follows the lifetime of underlying DB connection.
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import enum
 import logging
 import os.path
@@ -154,6 +155,11 @@ __all__: Sequence[str] = (
 
 log = BraceStyleAdapter(logging.getLogger(__spec__.name))
 
+VFOLDER_CLONE_MAX_RETRIES: Final = 10
+VFOLDER_CLONE_RETRY_INTERVAL: Final = 10.0
+# The overall time limit to keep retrying since the first connection failure.
+VFOLDER_CLONE_RETRY_TIMEOUT: Final = 300.0
+
 
 class VFolderOwnershipType(enum.StrEnum):
     """
@@ -1282,21 +1288,41 @@ async def initiate_vfolder_clone(
 
         await execute_with_retry(_insert_vfolder)
 
-        try:
-            async with storage_manager.request(
-                source_proxy,
-                "POST",
-                "folder/clone",
-                json={
-                    "src_volume": source_volume,
-                    "src_vfid": str(vfolder_info.source_vfolder_id),
-                    "dst_volume": target_volume,
-                    "dst_vfid": str(target_folder_id),
-                },
-            ):
-                pass
-        except aiohttp.ClientResponseError:
-            raise VFolderOperationFailed(extra_msg=str(vfolder_info.source_vfolder_id))
+        loop = asyncio.get_running_loop()
+        retry_deadline: Optional[float] = None
+        for attempt in range(VFOLDER_CLONE_MAX_RETRIES + 1):
+            try:
+                async with storage_manager.request(
+                    source_proxy,
+                    "POST",
+                    "folder/clone",
+                    json={
+                        "src_volume": source_volume,
+                        "src_vfid": str(vfolder_info.source_vfolder_id),
+                        "dst_volume": target_volume,
+                        "dst_vfid": str(target_folder_id),
+                        "bgtask_id": str(reporter.task_id),
+                    },
+                    # Copying a large vfolder may take a long time.
+                    timeout=aiohttp.ClientTimeout(total=None, sock_connect=30),
+                ):
+                    pass
+                break
+            except aiohttp.ClientResponseError:
+                raise VFolderOperationFailed(extra_msg=str(vfolder_info.source_vfolder_id))
+            except aiohttp.ClientConnectionError as e:
+                # The storage proxy resumes the clone when it is requested again
+                # after being restarted.
+                now = loop.time()
+                if retry_deadline is None:
+                    retry_deadline = now + VFOLDER_CLONE_RETRY_TIMEOUT
+                if attempt == VFOLDER_CLONE_MAX_RETRIES or now >= retry_deadline:
+                    raise VFolderOperationFailed(extra_msg=str(vfolder_info.source_vfolder_id))
+                log.warning(
+                    "vfolder clone: retrying after the storage proxy connection failure ({!r})",
+                    e,
+                )
+                await asyncio.sleep(min(VFOLDER_CLONE_RETRY_INTERVAL, retry_deadline - now))
 
         async def _update_source_vfolder() -> None:
             async with db_engine.begin_session() as db_session:
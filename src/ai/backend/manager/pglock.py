@@ -11,7 +11,7 @@ from .models.utils import ExtendedAsyncSAEngine
 class PgAdvisoryLock(AbstractDistributedLock):
     _lock_ctx: AsyncContextManager | None
 
-    def __init__(self, db: ExtendedAsyncSAEngine, lock_id: LockID) -> None:
+    def __init__(self, db: ExtendedAsyncSAEngine, lock_id: LockID | int) -> None:
         self.db = db
         self.lock_id = lock_id
         self._lock_ctx = None
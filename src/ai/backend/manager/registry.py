@@ -10,7 +10,6 @@ import secrets
 import time
 import typing
 import uuid
-import zlib
 from collections import defaultdict
 from collections.abc import (
     Iterable,
@@ -104,6 +103,7 @@ from ai.backend.common.types import (
     ClusterSSHKeyPair,
     ClusterSSHPortMapping,
     CommitStatus,
+    CompactResourceSlot,
     DeviceId,
     HardwareMetadata,
     ImageAlias,
@@ -119,7 +119,7 @@ from ai.backend.common.types import (
     SessionId,
     SessionTypes,
     SlotName,
-    SlotTypes,
+    SlotSchema,
 )
 from ai.backend.common.utils import str_to_timedelta
 from ai.backend.logging import BraceStyleAdapter
@@ -143,6 +143,7 @@ from .api.exceptions import (
 from .config import LocalConfig, SharedConfig
 from .defs import DEFAULT_IMAGE_ARCH, DEFAULT_ROLE, DEFAULT_SHARED_MEMORY_SIZE, INTRINSIC_SLOTS
 from .exceptions import MultiAgentError
+from .heartbeat import AgentHeartbeatIngestor, remove_agent_images
 from .models import (
     AGENT_RESOURCE_OCCUPYING_KERNEL_STATUSES,
     AGENT_RESOURCE_OCCUPYING_SESSION_STATUSES,
@@ -258,6 +259,9 @@ class AgentRegistry:
         debug: bool = False,
         manager_public_key: PublicKey,
         manager_secret_key: SecretKey,
+        heartbeat_batch_window: float = 0.0,
+        heartbeat_batch_size: int = 1000,
+        heartbeat_timeout: float = 40.0,
     ) -> None:
         self.local_config = local_config
         self.shared_config = shared_config
@@ -288,9 +292,15 @@ class AgentRegistry:
             hook_plugin_ctx,
             self,
         )
+        self.heartbeat_ingestor = AgentHeartbeatIngestor(
+            self,
+            batch_window=heartbeat_batch_window,
+            batch_size=heartbeat_batch_size,
+            cache_lifetime=heartbeat_timeout,
+        )
 
     async def init(self) -> None:
-        self.heartbeat_lock = asyncio.Lock()
+        self.heartbeat_ingestor.start()
         self.session_creation_tracker = {}
         self.pending_waits = set()
         self.database_ptask_group = aiotools.PersistentTaskGroup()
@@ -371,6 +381,12 @@ class AgentRegistry:
         evd.consume(AgentStartedEvent, self, handle_agent_lifecycle)
         evd.consume(AgentTerminatedEvent, self, handle_agent_lifecycle)
         evd.consume(AgentHeartbeatEvent, self, handle_agent_heartbeat)
+        evd.subscribe(
+            AgentStartedEvent, self, invalidate_agent_heartbeat_cache, name="api.agent.hbcache"
+        )
+        evd.subscribe(
+            AgentTerminatedEvent, self, invalidate_agent_heartbeat_cache, name="api.agent.hbcache"
+        )
         evd.consume(RouteCreatedEvent, self, handle_route_creation)
 
         evd.consume(VFolderDeletionSuccessEvent, self, handle_vfolder_deletion_success)
@@ -384,6 +400,7 @@ class AgentRegistry:
         evd.consume(DoAgentResourceCheckEvent, self, handle_check_agent_resource)
 
     async def shutdown(self) -> None:
+        await self.heartbeat_ingestor.close()
         await cancel_tasks(self.pending_waits)
         await self.database_ptask_group.shutdown()
         await self.webhook_ptask_group.shutdown()
@@ -415,6 +432,7 @@ class AgentRegistry:
                 await conn.execute(query)
 
         await execute_with_retry(_update)
+        self.heartbeat_ingestor.forget(inst_id)
 
     async def gather_agent_hwinfo(self, instance_id: AgentId) -> Mapping[str, HardwareMetadata]:
         agent = await self.get_instance(instance_id, agents.c.addr)
@@ -2104,8 +2122,8 @@ class AgentRegistry:
 
     async def recalc_resource_usage(self, do_fullscan: bool = False) -> None:
         async def _recalc() -> Mapping[AccessKey, ConcurrencyUsed]:
-            occupied_slots_per_agent: MutableMapping[str, ResourceSlot] = defaultdict(
-                lambda: ResourceSlot({"cpu": 0, "mem": 0})
+            occupied_slots_per_agent: MutableMapping[str, CompactResourceSlot] = defaultdict(
+                lambda: CompactResourceSlot.zeros(SlotSchema.of(("cpu", "mem")))
             )
             access_key_to_concurrency_used: dict[AccessKey, ConcurrencyUsed] = {}
 
@@ -2139,8 +2157,12 @@ class AgentRegistry:
                     for kernel in session_row.kernels:
                         session_status = cast(SessionStatus, session_row.status)
                         if session_status in AGENT_RESOURCE_OCCUPYING_SESSION_STATUSES:
-                            occupied_slots_per_agent[kernel.agent] += ResourceSlot(
-                                kernel.occupied_slots
+                            agent_occupied_slots = occupied_slots_per_agent[kernel.agent]
+                            occupied_slots_per_agent[kernel.agent] = (
+                                agent_occupied_slots
+                                + CompactResourceSlot.from_resource_slot(
+                                    kernel.occupied_slots or {}, agent_occupied_slots.schema
+                                )
                             )
                         if session_row.status in USER_RESOURCE_OCCUPYING_SESSION_STATUSES:
                             access_key = cast(AccessKey, session_row.access_key)
@@ -2166,7 +2188,7 @@ class AgentRegistry:
                             .values(occupied_slots=sa.bindparam("occupied_slots"))
                         ),
                         [
-                            {"agent_id": aid, "occupied_slots": slots}
+                            {"agent_id": aid, "occupied_slots": slots.to_resource_slot()}
                             for aid, slots in occupied_slots_per_agent.items()
                         ],
                     )
@@ -3005,184 +3027,11 @@ class AgentRegistry:
         await asyncio.gather(*tasks, return_exceptions=True)
 
     async def handle_heartbeat(self, agent_id, agent_info):
-        now = datetime.now(tzutc())
-        slot_key_and_units = {
-            SlotName(k): SlotTypes(v[0]) for k, v in agent_info["resource_slots"].items()
-        }
-        available_slots = ResourceSlot({
-            SlotName(k): Decimal(v[1]) for k, v in agent_info["resource_slots"].items()
-        })
-        current_addr = agent_info["addr"]
-        sgroup = agent_info.get("scaling_group", "default")
-        auto_terminate_abusing_kernel = agent_info.get("auto_terminate_abusing_kernel", False)
-        async with self.heartbeat_lock:
-            instance_rejoin = False
-
-            # Update "last seen" timestamp for liveness tracking
-            await redis_helper.execute(
-                self.redis_live,
-                lambda r: r.hset("agent.last_seen", agent_id, now.timestamp()),
-            )
-
-            # Check and update status of the agent record in DB
-            async def _update() -> None:
-                nonlocal instance_rejoin
-                async with self.db.begin() as conn:
-                    fetch_query = (
-                        sa.select([
-                            agents.c.status,
-                            agents.c.addr,
-                            agents.c.public_host,
-                            agents.c.public_key,
-                            agents.c.scaling_group,
-                            agents.c.available_slots,
-                            agents.c.version,
-                            agents.c.compute_plugins,
-                            agents.c.architecture,
-                            agents.c.auto_terminate_abusing_kernel,
-                        ])
-                        .select_from(agents)
-                        .where(agents.c.id == agent_id)
-                        .with_for_update()
-                    )
-                    result = await conn.execute(fetch_query)
-                    row = result.first()
-
-                    if row is None or row["status"] is None:
-                        # new agent detected!
-                        log.info("instance_lifecycle: agent {0} joined (via heartbeat)!", agent_id)
-                        await self.shared_config.update_resource_slots(slot_key_and_units)
-                        self.agent_cache.update(
-                            agent_id,
-                            current_addr,
-                            agent_info["public_key"],
-                        )
-                        insert_query = sa.insert(agents).values({
-                            "id": agent_id,
-                            "status": AgentStatus.ALIVE,
-                            "region": agent_info["region"],
-                            "scaling_group": sgroup,
-                            "available_slots": available_slots,
-                            "occupied_slots": {},
-                            "addr": agent_info["addr"],
-                            "public_host": agent_info["public_host"],
-                            "public_key": agent_info["public_key"],
-                            "first_contact": now,
-                            "lost_at": sa.null(),
-                            "version": agent_info["version"],
-                            "compute_plugins": agent_info["compute_plugins"],
-                            "architecture": agent_info.get("architecture", "x86_64"),
-                            "auto_terminate_abusing_kernel": auto_terminate_abusing_kernel,
-                        })
-                        result = await conn.execute(insert_query)
-                        assert result.rowcount == 1
-                    elif row["status"] == AgentStatus.ALIVE:
-                        updates = {}
-                        invalidate_agent_cache = False
-                        if row["available_slots"] != available_slots:
-                            updates["available_slots"] = available_slots
-                        if row["scaling_group"] != sgroup:
-                            updates["scaling_group"] = sgroup
-                        if row["addr"] != current_addr:
-                            updates["addr"] = current_addr
-                            invalidate_agent_cache = True
-                        if row["public_host"] != agent_info["public_host"]:
-                            updates["public_host"] = agent_info["public_host"]
-                        if row["public_key"] != agent_info["public_key"]:
-                            updates["public_key"] = agent_info["public_key"]
-                            invalidate_agent_cache = True
-                        if row["version"] != agent_info["version"]:
-                            updates["version"] = agent_info["version"]
-                        if row["compute_plugins"] != agent_info["compute_plugins"]:
-                            updates["compute_plugins"] = agent_info["compute_plugins"]
-                        if row["architecture"] != agent_info["architecture"]:
-                            updates["architecture"] = agent_info["architecture"]
-                        if row["auto_terminate_abusing_kernel"] != auto_terminate_abusing_kernel:
-                            updates["auto_terminate_abusing_kernel"] = auto_terminate_abusing_kernel
-                        # occupied_slots are updated when kernels starts/terminates
-                        if invalidate_agent_cache:
-                            self.agent_cache.update(
-                                agent_id,
-                                current_addr,
-                                agent_info["public_key"],
-                            )
-                        if updates:
-                            await self.shared_config.update_resource_slots(slot_key_and_units)
-                            update_query = (
-                                sa.update(agents).values(updates).where(agents.c.id == agent_id)
-                            )
-                            await conn.execute(update_query)
-                    elif row["status"] in (AgentStatus.LOST, AgentStatus.TERMINATED):
-                        await self.shared_config.update_resource_slots(slot_key_and_units)
-                        instance_rejoin = True
-                        self.agent_cache.update(
-                            agent_id,
-                            current_addr,
-                            agent_info["public_key"],
-                        )
-                        update_query = (
-                            sa.update(agents)
-                            .values({
-                                "status": AgentStatus.ALIVE,
-                                "region": agent_info["region"],
-                                "scaling_group": sgroup,
-                                "addr": agent_info["addr"],
-                                "public_host": agent_info["public_host"],
-                                "public_key": agent_info["public_key"],
-                                "lost_at": sa.null(),
-                                "available_slots": available_slots,
-                                "version": agent_info["version"],
-                                "compute_plugins": agent_info["compute_plugins"],
-                                "architecture": agent_info["architecture"],
-                                "auto_terminate_abusing_kernel": auto_terminate_abusing_kernel,
-                            })
-                            .where(agents.c.id == agent_id)
-                        )
-                        await conn.execute(update_query)
-                    else:
-                        log.error("should not reach here! {0}", type(row["status"]))
-
-            try:
-                await execute_with_retry(_update)
-            except sa.exc.IntegrityError:
-                log.error("Scaling group named [{}] does not exist.", sgroup)
-                return
-
-            if instance_rejoin:
-                await self.event_producer.produce_event(
-                    AgentStartedEvent("revived"),
-                    source=agent_id,
-                )
-
-            # Update the mapping of kernel images to agents.
-            loaded_images = msgpack.unpackb(zlib.decompress(agent_info["images"]))
-
-            async def _pipe_builder(r: Redis):
-                pipe = r.pipeline()
-                for image, _ in loaded_images:
-                    try:
-                        await pipe.sadd(ImageRef.parse_image_str(image, "*").canonical, agent_id)
-                    except ValueError:
-                        # Skip opaque (non-Backend.AI) image.
-                        continue
-                return pipe
-
-            await redis_helper.execute(self.redis_image, _pipe_builder)
-
-        await self.hook_plugin_ctx.notify(
-            "POST_AGENT_HEARTBEAT",
-            (agent_id, sgroup, available_slots),
-        )
+        await self.heartbeat_ingestor.submit(agent_id, agent_info)
 
     async def mark_agent_terminated(self, agent_id: AgentId, status: AgentStatus) -> None:
         await redis_helper.execute(self.redis_live, lambda r: r.hdel("agent.last_seen", agent_id))
 
-        async def _pipe_builder(r: Redis):
-            pipe = r.pipeline()
-            async for imgname in r.scan_iter():
-                await pipe.srem(imgname, agent_id)
-            return pipe
-
         async def _update() -> None:
             async with self.db.begin() as conn:
                 fetch_query = (
@@ -3216,8 +3065,9 @@ class AgentRegistry:
                 )
                 await conn.execute(update_query)
 
-        await redis_helper.execute(self.redis_image, _pipe_builder)
+        await remove_agent_images(self.redis_image, agent_id)
         await execute_with_retry(_update)
+        self.heartbeat_ingestor.forget(agent_id)
 
     async def sync_kernel_stats(
         self,
@@ -4207,6 +4057,15 @@ async def handle_agent_lifecycle(
             context.agent_cache.discard(source)
 
 
+async def invalidate_agent_heartbeat_cache(
+    context: AgentRegistry,
+    source: AgentId,
+    event: AgentStartedEvent | AgentTerminatedEvent,
+) -> None:
+    # The status changes are applied by the manager instance consuming the event.
+    context.heartbeat_ingestor.forget(source)
+
+
 async def handle_agent_heartbeat(
     context: AgentRegistry,
     source: AgentId,
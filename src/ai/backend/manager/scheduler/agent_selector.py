@@ -15,6 +15,7 @@ from ai.backend.common.types import (
 from ai.backend.logging import BraceStyleAdapter
 
 from ..models import AgentRow, KernelRow, SessionRow
+from .capacity_matrix import AgentCapacityMatrix
 from .types import (
     AbstractAgentSelector,
     NullAgentSelectorState,
@@ -52,6 +53,10 @@ def get_num_extras(agent: AgentRow, requested_slots: ResourceSlot) -> int:
 
 
 class BaseAgentSelector(AbstractAgentSelector[T_ResourceGroupState]):
+    # When set by the scheduler dispatcher, the selectors reuse the matrix (kept in sync with
+    # the occupied slots of the agents) instead of building a new one for each selection.
+    capacity_matrix: Optional[AgentCapacityMatrix] = None
+
     @property
     @override
     def config_iv(self) -> t.Dict:
@@ -79,6 +84,30 @@ class BaseAgentSelector(AbstractAgentSelector[T_ResourceGroupState]):
             )
         ]
 
+    def get_capacity_matrix(self, agents: Sequence[AgentRow]) -> AgentCapacityMatrix:
+        if self.capacity_matrix is not None and self.capacity_matrix.covers(agents):
+            return self.capacity_matrix
+        return AgentCapacityMatrix.from_agents(agents)
+
+    def filter_feasible_rows(
+        self,
+        agents: Sequence[AgentRow],
+        pending_session_or_kernel: SessionRow | KernelRow,
+    ) -> tuple[AgentCapacityMatrix, list[int], list[str]]:
+        """
+        The capacity-matrix version of ``filter_agents()``, returning the matrix rows of
+        the agents that can host the picked session and the resource slot keys to rank them.
+        """
+        matrix = self.get_capacity_matrix(agents)
+        requested_slots = pending_session_or_kernel.requested_slots
+        rows = matrix.filter_feasible(matrix.rows_of(agents), requested_slots)
+        if not rows:
+            return matrix, rows, []
+        resource_priorities = sort_requested_slots_by_priority(
+            matrix.with_known_slots(requested_slots), self.agent_selection_resource_priority
+        )
+        return matrix, rows, resource_priorities
+
 
 class LegacyAgentSelector(BaseAgentSelector[NullAgentSelectorState]):
     @override
@@ -92,21 +121,25 @@ class LegacyAgentSelector(BaseAgentSelector[NullAgentSelectorState]):
         agents: Sequence[AgentRow],
         pending_session_or_kernel: SessionRow | KernelRow,
     ) -> Optional[AgentId]:
-        agents = self.filter_agents(agents, pending_session_or_kernel)
-        if not agents:
+        matrix, rows, resource_priorities = self.filter_feasible_rows(
+            agents, pending_session_or_kernel
+        )
+        if not rows:
             return None
         requested_slots = pending_session_or_kernel.requested_slots
-        resource_priorities = sort_requested_slots_by_priority(
-            requested_slots, self.agent_selection_resource_priority
-        )
-        chosen_agent = max(
-            agents,
-            key=lambda agent: [
-                -get_num_extras(agent, requested_slots),
-                *[agent.available_slots.get(key, -sys.maxsize) for key in resource_priorities],
+        chosen_row = matrix.pick(
+            rows,
+            [
+                [-num_extras for num_extras in matrix.count_extras(rows, requested_slots)],
+                *[
+                    matrix.available_values(rows, key, default=-sys.maxsize)
+                    for key in resource_priorities
+                ],
             ],
+            maximize=True,
         )
-        return chosen_agent.id
+        assert chosen_row is not None
+        return matrix.agent_ids[chosen_row]
 
 
 class RoundRobinAgentSelector(BaseAgentSelector[RRAgentSelectorState]):
@@ -182,13 +215,12 @@ class ConcentratedAgentSelector(BaseAgentSelector[NullAgentSelectorState]):
         agents: Sequence[AgentRow],
         pending_session_or_kernel: SessionRow | KernelRow,
     ) -> Optional[AgentId]:
-        agents = self.filter_agents(agents, pending_session_or_kernel)
-        if not agents:
+        matrix, rows, resource_priorities = self.filter_feasible_rows(
+            agents, pending_session_or_kernel
+        )
+        if not rows:
             return None
         requested_slots = pending_session_or_kernel.requested_slots
-        resource_priorities = sort_requested_slots_by_priority(
-            requested_slots, self.agent_selection_resource_priority
-        )
 
         # When not using enforce_spreading_endpoint_replica, treat all agent kernel counts as 0.
         kernel_counts_at_same_endpoint = (
@@ -197,19 +229,20 @@ class ConcentratedAgentSelector(BaseAgentSelector[NullAgentSelectorState]):
             else {}
         )
 
-        chosen_agent = min(
-            agents,
-            key=lambda agent: (
-                kernel_counts_at_same_endpoint.get(agent.id, 0),
-                get_num_extras(agent, requested_slots),
+        chosen_row = matrix.pick(
+            rows,
+            [
+                [kernel_counts_at_same_endpoint.get(matrix.agent_ids[row], 0) for row in rows],
+                matrix.count_extras(rows, requested_slots),
                 *[
-                    (agent.available_slots - agent.occupied_slots).get(key, sys.maxsize)
+                    matrix.remaining_values(rows, key, default=sys.maxsize)
                     for key in resource_priorities
                 ],
-            ),
+            ],
+            maximize=False,
         )
-
-        return chosen_agent.id
+        assert chosen_row is not None
+        return matrix.agent_ids[chosen_row]
 
 
 class DispersedAgentSelector(BaseAgentSelector[NullAgentSelectorState]):
@@ -224,21 +257,22 @@ class DispersedAgentSelector(BaseAgentSelector[NullAgentSelectorState]):
         agents: Sequence[AgentRow],
         pending_session_or_kernel: SessionRow | KernelRow,
     ) -> Optional[AgentId]:
-        agents = self.filter_agents(agents, pending_session_or_kernel)
-        if not agents:
+        matrix, rows, resource_priorities = self.filter_feasible_rows(
+            agents, pending_session_or_kernel
+        )
+        if not rows:
             return None
         requested_slots = pending_session_or_kernel.requested_slots
-        resource_priorities = sort_requested_slots_by_priority(
-            requested_slots, self.agent_selection_resource_priority
-        )
-        chosen_agent = max(
-            agents,
-            key=lambda agent: [
-                -get_num_extras(agent, requested_slots),
+        chosen_row = matrix.pick(
+            rows,
+            [
+                [-num_extras for num_extras in matrix.count_extras(rows, requested_slots)],
                 *[
-                    (agent.available_slots - agent.occupied_slots).get(key, -sys.maxsize)
+                    matrix.remaining_values(rows, key, default=-sys.maxsize)
                     for key in resource_priorities
                 ],
             ],
+            maximize=True,
         )
-        return chosen_agent.id
+        assert chosen_row is not None
+        return matrix.agent_ids[chosen_row]
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping, Sequence
+from decimal import ROUND_CEILING, Decimal
+from typing import Optional
+
+from ai.backend.common.types import AgentId, ResourceSlot, SlotName
+
+from ..models import AgentRow
+
+__all__ = ("AgentCapacityMatrix",)
+
+
+def _num_fraction_digits(value: Decimal) -> int:
+    exponent = value.as_tuple().exponent
+    if not isinstance(exponent, int):
+        raise ValueError(f"Cannot represent a non-finite slot value in the matrix: {value!r}")
+    return max(0, -exponent)
+
+
+class AgentCapacityMatrix:
+    """
+    A dense (agents × slot types) representation of the available and occupied slots of
+    the agents in a resource group.
+
+    Each slot column stores its values as integers scaled by a per-column power of 10 which is
+    large enough to represent all values in the column exactly, so that the feasibility checks
+    and the ranking of agents are done with plain integer comparisons instead of allocating
+    :class:`ResourceSlot` objects with the :class:`Decimal` arithmetic for every agent.
+    The values are stored column-wise to evaluate a slot type over many agents at once.
+
+    A slot is "present" for an agent when it appears in either the available or the occupied
+    slots of the agent, mirroring the key set of ``agent.available_slots - agent.occupied_slots``.
+    """
+
+    agent_ids: list[AgentId]
+    slot_names: list[SlotName]
+
+    def __init__(self) -> None:
+        self.agent_ids = []
+        self.slot_names = []
+        self._row_index: dict[AgentId, int] = {}
+        self._col_index: dict[str, int] = {}
+        self._scale_digits: list[int] = []
+        self._available: list[list[int]] = []
+        self._occupied: list[list[int]] = []
+        self._present: list[list[bool]] = []
+
+    @classmethod
+    def from_agents(cls, agents: Iterable[AgentRow]) -> AgentCapacityMatrix:
+        matrix = cls()
+        for agent in agents:
+            matrix.add_agent(agent.id, agent.available_slots, agent.occupied_slots)
+        return matrix
+
+    def __len__(self) -> int:
+        return len(self.agent_ids)
+
+    def __contains__(self, agent_id: object) -> bool:
+        return agent_id in self._row_index
+
+    def covers(self, agents: Iterable[AgentRow]) -> bool:
+        return all(agent.id in self._row_index for agent in agents)
+
+    def add_agent(
+        self,
+        agent_id: AgentId,
+        available_slots: Mapping[str, Decimal],
+        occupied_slots: Mapping[str, Decimal],
+    ) -> None:
+        if agent_id in self._row_index:
+            raise ValueError(f"The agent {agent_id} is already in the matrix")
+        for slot_name, value in (*available_slots.items(), *occupied_slots.items()):
+            self._ensure_column(slot_name, _num_fraction_digits(Decimal(value)))
+        self._row_index[agent_id] = len(self.agent_ids)
+        self.agent_ids.append(agent_id)
+        for col, slot_name in enumerate(self.slot_names):
+            self._available[col].append(self._scale(col, available_slots.get(slot_name, 0)))
+            self._occupied[col].append(self._scale(col, occupied_slots.get(slot_name, 0)))
+            self._present[col].append(slot_name in available_slots or slot_name in occupied_slots)
+
+    def _ensure_column(self, slot_name: str, digits: int) -> int:
+        col = self._col_index.get(slot_name)
+        if col is None:
+            col = len(self.slot_names)
+            self._col_index[slot_name] = col
+            self.slot_names.append(SlotName(slot_name))
+            self._scale_digits.append(digits)
+            num_rows = len(self.agent_ids)
+            self._available.append([0] * num_rows)
+            self._occupied.append([0] * num_rows)
+            self._present.append([False] * num_rows)
+        elif digits > self._scale_digits[col]:
+            # Rescale the column to keep all values exact.
+            factor = 10 ** (digits - self._scale_digits[col])
+            self._available[col] = [v * factor for v in self._available[col]]
+            self._occupied[col] = [v * factor for v in self._occupied[col]]
+            self._scale_digits[col] = digits
+        return col
+
+    def _scale(self, col: int, value: Decimal | int) -> int:
+        return int(Decimal(value).scaleb(self._scale_digits[col]))
+
+    def _scale_ceil(self, col: int, value: Decimal) -> int:
+        return int(
+            Decimal(value).scaleb(self._scale_digits[col]).to_integral_value(rounding=ROUND_CEILING)
+        )
+
+    def rows_of(self, agents: Iterable[AgentRow]) -> list[int]:
+        return [self._row_index[agent.id] for agent in agents]
+
+    def with_known_slots(self, requested_slots: ResourceSlot) -> ResourceSlot:
+        """
+        Return a copy of the requested slots extended with zero values of the other slot types
+        in the matrix, like the requested slots after being compared with the agents' slots.
+        """
+        slots = ResourceSlot(requested_slots.data)
+        for slot_name in self.slot_names:
+            if slot_name not in slots.data:
+                slots.data[slot_name] = Decimal(0)
+        return slots
+
+    def filter_feasible(self, rows: Sequence[int], requested_slots: ResourceSlot) -> list[int]:
+        """
+        Return the rows whose remaining slots are greater than or equal to the requested slots
+        for all requested slot types, preserving the given order.
+        """
+        candidates = [*rows]
+        for slot_name, requested in requested_slots.data.items():
+            if not candidates:
+                break
+            requested = Decimal(requested)
+            col = self._col_index.get(slot_name)
+            if col is None:
+                # The remaining amount of a slot type unknown to all agents is zero.
+                if requested > 0:
+                    return []
+                continue
+            if requested.is_infinite():
+                if requested > 0:
+                    return []
+                continue
+            scaled_requested = self._scale_ceil(col, requested)
+            available = self._available[col]
+            occupied = self._occupied[col]
+            candidates = [
+                row for row in candidates if available[row] - occupied[row] >= scaled_requested
+            ]
+        return candidates
+
+    def count_extras(self, rows: Sequence[int], requested_slots: ResourceSlot) -> list[int]:
+        """
+        Count the slot types that are available in each agent but not requested (or requested
+        as zero), to prefer (or not) agents with additional unused slots.
+        """
+        counts = [0] * len(rows)
+        for col, slot_name in enumerate(self.slot_names):
+            if requested_slots.data.get(slot_name, 0) != 0:
+                continue
+            available = self._available[col]
+            for idx, row in enumerate(rows):
+                if available[row] > 0:
+                    counts[idx] += 1
+        return counts
+
+    def available_values(self, rows: Sequence[int], slot_name: str, default: int) -> list[int]:
+        """
+        Return the available amount of the given slot type in each row, or the default value
+        (e.g., ``sys.maxsize``) when the slot type is not present in the agent.
+        """
+        col = self._col_index.get(slot_name)
+        if col is None:
+            return [default] * len(rows)
+        scaled_default = default * 10 ** self._scale_digits[col]
+        available = self._available[col]
+        present = self._present[col]
+        return [available[row] if present[row] else scaled_default for row in rows]
+
+    def remaining_values(self, rows: Sequence[int], slot_name: str, default: int) -> list[int]:
+        """
+        Return the remaining (available minus occupied) amount of the given slot type in each
+        row, or the default value when the slot type is not present in the agent.
+        """
+        col = self._col_index.get(slot_name)
+        if col is None:
+            return [default] * len(rows)
+        scaled_default = default * 10 ** self._scale_digits[col]
+        available = self._available[col]
+        occupied = self._occupied[col]
+        present = self._present[col]
+        return [available[row] - occupied[row] if present[row] else scaled_default for row in rows]
+
+    @staticmethod
+    def pick(
+        rows: Sequence[int],
+        key_columns: Sequence[Sequence[int]],
+        *,
+        maximize: bool,
+    ) -> Optional[int]:
+        """
+        Pick the first row having the maximum (or minimum) key composed from the given columns,
+        with the same tie-breaking as the builtin ``max()`` and ``min()``.
+        """
+        if not rows:
+            return None
+        keys = [*zip(*key_columns)] if key_columns else [()] * len(rows)
+        choose = max if maximize else min
+        return rows[choose(range(len(rows)), key=keys.__getitem__)]
+
+    def reserve(self, agent_id: AgentId, slots: Mapping[str, Decimal]) -> None:
+        self._add_occupied(agent_id, slots, 1)
+
+    def release(self, agent_id: AgentId, slots: Mapping[str, Decimal]) -> None:
+        self._add_occupied(agent_id, slots, -1)
+
+    def _add_occupied(self, agent_id: AgentId, slots: Mapping[str, Decimal], sign: int) -> None:
+        row = self._row_index[agent_id]
+        for slot_name, value in slots.items():
+            value = Decimal(value)
+            col = self._ensure_column(slot_name, _num_fraction_digits(value))
+            self._occupied[col][row] += sign * self._scale(col, value)
+            self._present[col][row] = True
@@ -12,6 +12,7 @@ from collections.abc import (
     Mapping,
     Sequence,
 )
+from contextlib import AbstractAsyncContextManager, nullcontext
 from contextvars import ContextVar
 from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta, timezone
@@ -87,7 +88,12 @@ from ..api.exceptions import (
     InstanceNotAvailable,
     SessionNotFound,
 )
-from ..defs import SERVICE_MAX_RETRIES, START_SESSION_TIMEOUT_SEC, LockID
+from ..defs import (
+    SERVICE_MAX_RETRIES,
+    START_SESSION_TIMEOUT_SEC,
+    LockID,
+    get_sgroup_schedule_lock_id,
+)
 from ..exceptions import convert_to_status_data
 from ..models import (
     AgentRow,
@@ -117,7 +123,10 @@ from ..models.utils import (
     sql_json_increment,
     sql_json_merge,
 )
+from .agent_selector import BaseAgentSelector
+from .drf import DRFScheduler
 from .predicates import (
+    PredicateBatch,
     check_concurrency,
     check_dependencies,
     check_domain_resource_limit,
@@ -128,6 +137,13 @@ from .predicates import (
     check_reserved_batch_session,
     check_user_resource_limit,
 )
+from .snapshot import (
+    ResourceGroupSnapshot,
+    SchedulingFailure,
+    SchedulingFailureKind,
+    SessionAllocation,
+    load_resource_group_snapshot,
+)
 from .types import (
     AbstractAgentSelector,
     AbstractResourceGroupState,
@@ -239,6 +255,13 @@ async def get_kernel_count_per_agent_at_endpoint(
     return kernel_count_per_agent
 
 
+class AdmissionRejected(Exception):
+    """
+    Raised when a session that has passed the predicate checks exceeds the resource limits
+    shared with the concurrently scheduled resource groups while committing it.
+    """
+
+
 @dataclass
 class LoadSchedulerArgs:
     scheduler_name: str
@@ -250,6 +273,8 @@ class LoadAgentSelectorArgs:
     sgroup_opts: ScalingGroupOpts
     pending_session_id: uuid.UUID
     pending_session_type: SessionTypes
+    # When given, the agent selector uses it instead of querying the kernel counts from the DB.
+    kernel_counts_at_same_endpoint: Optional[Mapping[AgentId, int]] = None
 
 
 class SchedulerDispatcher(aobject):
@@ -312,6 +337,12 @@ class SchedulerDispatcher(aobject):
         evd.consume(
             SessionTerminatedEvent, None, self.schedule, coalescing_opts, name="dispatcher.term"
         )
+        evd.subscribe(
+            SessionTerminatedEvent,
+            None,
+            self._forget_terminated_session,
+            name="dispatcher.term.drf",
+        )
         evd.consume(AgentStartedEvent, None, self.schedule)
         evd.consume(DoScheduleEvent, None, self.schedule, coalescing_opts)
         evd.consume(DoStartSessionEvent, None, self.start)
@@ -374,6 +405,15 @@ class SchedulerDispatcher(aobject):
         await self.redis_live.close()
         log.info("Session scheduler stopped")
 
+    async def _forget_terminated_session(
+        self,
+        context: None,
+        source: AgentId,
+        event: SessionTerminatedEvent,
+    ) -> None:
+        # Keep the incrementally tracked dominant shares in sync on all manager instances.
+        DRFScheduler.forget_session(event.session_id)
+
     async def schedule(
         self,
         context: None,
@@ -417,38 +457,30 @@ class SchedulerDispatcher(aobject):
         )
 
         lock_lifetime = self.local_config["manager"]["session_schedule_lock_lifetime"]
+        if self.local_config["manager"]["scheduling-mode"] == "snapshot":
+            schedule_in_sgroup = self._schedule_in_sgroup_with_snapshot
+        else:
+            schedule_in_sgroup = self._schedule_in_sgroup
+        if self.local_config["manager"]["session_schedule_lock_scope"] == "resource-group":
+            await self._schedule_sgroups_concurrently(
+                sched_ctx,
+                schedule_in_sgroup,
+                redis_key,
+                lock_lifetime,
+            )
+            return
         try:
             # The schedule() method should be executed with a global lock
             # as its individual steps are composed of many short-lived transactions.
             async with self.lock_factory(LockID.LOCKID_SCHEDULE, lock_lifetime):
-                async with self.db.begin_readonly_session() as db_sess:
-                    # query = (
-                    #     sa.select(ScalingGroupRow)
-                    #     .join(ScalingGroupRow.agents.and_(AgentRow.status == AgentStatus.ALIVE))
-                    # )
-                    query = (
-                        sa.select(AgentRow.scaling_group)
-                        .where(AgentRow.status == AgentStatus.ALIVE)
-                        .group_by(AgentRow.scaling_group)
-                    )
-                    result = await db_sess.execute(query)
-                    schedulable_scaling_groups = [row.scaling_group for row in result.fetchall()]
+                schedulable_scaling_groups = await self._list_schedulable_sgroups()
                 for sgroup_name in schedulable_scaling_groups:
-                    try:
-                        await self._schedule_in_sgroup(
-                            sched_ctx,
-                            sgroup_name,
-                        )
-                        await redis_helper.execute(
-                            self.redis_live,
-                            lambda r: r.hset(
-                                redis_key,
-                                "resource_group",
-                                sgroup_name,
-                            ),
-                        )
-                    except Exception as e:
-                        log.exception("schedule({}): scheduling error!\n{}", sgroup_name, repr(e))
+                    await self._schedule_sgroup_and_report(
+                        sched_ctx,
+                        schedule_in_sgroup,
+                        sgroup_name,
+                        redis_key,
+                    )
                 await redis_helper.execute(
                     self.redis_live,
                     lambda r: r.hset(
@@ -466,6 +498,97 @@ class SchedulerDispatcher(aobject):
                 raise asyncio.CancelledError()
             raise
 
+    async def _schedule_sgroups_concurrently(
+        self,
+        sched_ctx: SchedulingContext,
+        schedule_in_sgroup: Callable[[SchedulingContext, str], Awaitable[None]],
+        redis_key: str,
+        lock_lifetime: float,
+    ) -> None:
+        """
+        Schedule the resource groups concurrently, holding a separate lock for each resource
+        group instead of the global schedule lock, so that a slow resource group does not delay
+        the others and multiple manager processes may work on different resource groups.
+        The number of resource groups being scheduled at the same time in this process is
+        bounded by the ``session_schedule_concurrency`` config.
+        """
+        schedulable_scaling_groups = await self._list_schedulable_sgroups()
+        concurrency_sema = asyncio.Semaphore(
+            self.local_config["manager"]["session_schedule_concurrency"]
+        )
+
+        async def _schedule_with_sgroup_lock(sgroup_name: str) -> None:
+            async with concurrency_sema:
+                try:
+                    async with self.lock_factory(
+                        get_sgroup_schedule_lock_id(sgroup_name), lock_lifetime
+                    ):
+                        await self._schedule_sgroup_and_report(
+                            sched_ctx,
+                            schedule_in_sgroup,
+                            sgroup_name,
+                            redis_key,
+                        )
+                except Exception as e:
+                    if isinstance(e, DBAPIError) and getattr(e.orig, "pgcode", None) == "55P03":
+                        log.info(
+                            "schedule({}): skipped due to advisory lock timeout; "
+                            "maybe another schedule() call is still running",
+                            sgroup_name,
+                        )
+                        return
+                    # Do not abort the scheduling of the other resource groups.
+                    log.exception("schedule({}): error in the schedule lock", sgroup_name)
+
+        async with aiotools.TaskGroup() as tg:
+            for sgroup_name in schedulable_scaling_groups:
+                tg.create_task(_schedule_with_sgroup_lock(sgroup_name))
+        await redis_helper.execute(
+            self.redis_live,
+            lambda r: r.hset(
+                redis_key,
+                "finish_time",
+                datetime.now(tzutc()).isoformat(),
+            ),
+        )
+
+    async def _list_schedulable_sgroups(self) -> list[str]:
+        async with self.db.begin_readonly_session() as db_sess:
+            # query = (
+            #     sa.select(ScalingGroupRow)
+            #     .join(ScalingGroupRow.agents.and_(AgentRow.status == AgentStatus.ALIVE))
+            # )
+            query = (
+                sa.select(AgentRow.scaling_group)
+                .where(AgentRow.status == AgentStatus.ALIVE)
+                .group_by(AgentRow.scaling_group)
+            )
+            result = await db_sess.execute(query)
+            return [row.scaling_group for row in result.fetchall()]
+
+    async def _schedule_sgroup_and_report(
+        self,
+        sched_ctx: SchedulingContext,
+        schedule_in_sgroup: Callable[[SchedulingContext, str], Awaitable[None]],
+        sgroup_name: str,
+        redis_key: str,
+    ) -> None:
+        try:
+            await schedule_in_sgroup(
+                sched_ctx,
+                sgroup_name,
+            )
+            await redis_helper.execute(
+                self.redis_live,
+                lambda r: r.hset(
+                    redis_key,
+                    "resource_group",
+                    sgroup_name,
+                ),
+            )
+        except Exception as e:
+            log.exception("schedule({}): scheduling error!\n{}", sgroup_name, repr(e))
+
     def _load_scheduler(self, args: LoadSchedulerArgs) -> AbstractScheduler:
         global_scheduler_opts = {}
         if self.shared_config["plugins"]["scheduler"]:
@@ -488,22 +611,27 @@ class SchedulerDispatcher(aobject):
             case AgentSelectionStrategy.ROUNDROBIN:
                 agselector_name = "roundrobin"
             case AgentSelectionStrategy.CONCENTRATED:
-                async with self.db.begin_readonly_session() as db_sess:
-                    if (
-                        sgroup_opts.enforce_spreading_endpoint_replica
-                        and args.pending_session_type == SessionTypes.INFERENCE
-                    ):
-                        endpoint_id = await db_sess.scalar(
-                            sa.select(RoutingRow.endpoint).where(
-                                RoutingRow.session == args.pending_session_id
+                if (
+                    sgroup_opts.enforce_spreading_endpoint_replica
+                    and args.pending_session_type == SessionTypes.INFERENCE
+                ):
+                    if args.kernel_counts_at_same_endpoint is not None:
+                        dynamic_config["kernel_counts_at_same_endpoint"] = {
+                            **args.kernel_counts_at_same_endpoint
+                        }
+                    else:
+                        async with self.db.begin_readonly_session() as db_sess:
+                            endpoint_id = await db_sess.scalar(
+                                sa.select(RoutingRow.endpoint).where(
+                                    RoutingRow.session == args.pending_session_id
+                                )
                             )
-                        )
 
-                        dynamic_config[
-                            "kernel_counts_at_same_endpoint"
-                        ] = await get_kernel_count_per_agent_at_endpoint(
-                            db_sess, endpoint_id, USER_RESOURCE_OCCUPYING_KERNEL_STATUSES
-                        )
+                            dynamic_config[
+                                "kernel_counts_at_same_endpoint"
+                            ] = await get_kernel_count_per_agent_at_endpoint(
+                                db_sess, endpoint_id, USER_RESOURCE_OCCUPYING_KERNEL_STATUSES
+                            )
 
                 agselector_name = "concentrated"
             case AgentSelectionStrategy.DISPERSED:
@@ -558,6 +686,7 @@ class SchedulerDispatcher(aobject):
             )
         await self.flush_cancelled_sessions(cancelled_sessions)
         current_priority, pending_sessions = scheduler.prioritize(pending_sessions)
+        predicate_batch = await self._load_predicate_batch(sched_ctx, pending_sessions)
 
         log.debug(
             "running scheduler (sgroup:{}, pending:{} at prio:{}, existing:{}, cancelled:{})",
@@ -613,53 +742,11 @@ class SchedulerDispatcher(aobject):
 
             # Part 2: Predicate checks with predicate hook plugins
 
-            check_results = []
-            failed_predicates = []
-            passed_predicates = []
-            async for attempt in retry_txn():
-                with attempt:
-                    check_results = await self.check_predicates(
-                        sched_ctx,
-                        pending_sess,
-                        exc_handler=lambda _: log.exception(log_fmt + "predicate-error", *log_args),
-                    )
-            for predicate_name, result in check_results:
-                if isinstance(result, Exception):
-                    failed_predicates.append({
-                        "name": predicate_name,
-                        "msg": repr(result),
-                    })
-                    continue
-                if result.passed:
-                    passed_predicates.append({
-                        "name": predicate_name,
-                    })
-                else:
-                    failed_predicates.append({
-                        "name": predicate_name,
-                        "msg": result.message or "",
-                    })
-
-            hook_result = HookResult(status=PASSED, src_plugin=[], result=[])
-            async for attempt in retry_txn():
-                with attempt:
-                    hook_result = await self.check_predicates_hook(sched_ctx, pending_sess)
-            match hook_result.src_plugin:
-                case str():
-                    hook_name = hook_result.src_plugin
-                case list():
-                    hook_name = f"({', '.join(hook_result.src_plugin)})"
-                case _:
-                    hook_name = ""
-            if hook_result.status == PASSED:
-                if hook_result.src_plugin:
-                    # Append result only when plugin exists.
-                    passed_predicates.append({"name": hook_name})
-            else:
-                failed_predicates.append({
-                    "name": hook_name,
-                    "msg": hook_result.reason or "",
-                })
+            (
+                check_results,
+                passed_predicates,
+                failed_predicates,
+            ) = await self._evaluate_predicates(sched_ctx, pending_sess, predicate_batch)
 
             # Part 3: Interpret the predicate check results
 
@@ -702,6 +789,8 @@ class SchedulerDispatcher(aobject):
                             )
 
                 await execute_with_retry(_cancel_failed_system_session)
+                if predicate_batch is not None and pending_sess.is_private:
+                    predicate_batch.remove_pending(pending_sess)
                 # Predicate failures are *NOT* permanent errors.
                 # We need to retry the scheduling afterwards.
                 continue
@@ -734,74 +823,811 @@ class SchedulerDispatcher(aobject):
                         )
                         await db_sess.execute(session_query)
 
-                await execute_with_retry(_update_session_status_data)
+                await execute_with_retry(_update_session_status_data)
+
+            # Part 4: Assign agent(s) via the agent selector.
+
+            async with self.db.begin_readonly_session() as db_sess:
+                schedulable_sess = await SessionRow.get_session_by_id(
+                    db_sess,
+                    pending_sess.id,
+                    eager_loading_op=(
+                        noload("*"),
+                        selectinload(SessionRow.kernels).options(
+                            noload("*"),
+                            selectinload(KernelRow.agent_row).noload("*"),
+                        ),
+                    ),
+                )
+
+            try:
+                match schedulable_sess.cluster_mode:
+                    case ClusterMode.SINGLE_NODE:
+                        await self._schedule_single_node_session(
+                            sched_ctx,
+                            agent_selector,
+                            sgroup_name,
+                            candidate_agents,
+                            schedulable_sess,
+                            check_results,
+                        )
+                    case ClusterMode.MULTI_NODE:
+                        await self._schedule_multi_node_session(
+                            sched_ctx,
+                            agent_selector,
+                            sgroup_name,
+                            candidate_agents,
+                            schedulable_sess,
+                            check_results,
+                        )
+                    case _:
+                        log.exception(
+                            f"should not reach here; unknown cluster_mode: {schedulable_sess.cluster_mode}"
+                        )
+                        continue
+                # For complex schedulers like DRF, they may need internal state updates
+                # based on the scheduling result.
+                scheduler.update_allocation(schedulable_sess)
+                if predicate_batch is not None:
+                    predicate_batch.add_allocation(schedulable_sess)
+            except InstanceNotAvailable as e:
+                # Proceed to the next pending session and come back later.
+                log.debug(
+                    "schedule({}): instance not available ({})",
+                    sgroup_name,
+                    e.extra_msg,
+                )
+                continue
+            except AdmissionRejected:
+                # Proceed to the next pending session and come back later.
+                log.debug(log_fmt + "resource-limits-exceeded-at-commit", *log_args)
+                continue
+            except GenericBadRequest as e:
+                # Proceed to the next pending session and come back later.
+                log.debug(
+                    "schedule({}): bad request ({})",
+                    sgroup_name,
+                    e.extra_msg,
+                )
+                continue
+            except Exception:
+                # _schedule_{single,multi}_node_session() already handle general exceptions.
+                # Proceed to the next pending session and come back later
+                continue
+            num_scheduled += 1
+        if num_scheduled > 0:
+            await self.event_producer.produce_event(DoCheckPrecondEvent())
+
+    async def _schedule_in_sgroup_with_snapshot(
+        self,
+        sched_ctx: SchedulingContext,
+        sgroup_name: str,
+    ) -> None:
+        """
+        Schedule the pending sessions of the given resource group against an in-memory snapshot
+        of its agents and pending sessions, which is loaded only once per scheduling pass.
+
+        Unlike ``_schedule_in_sgroup()``, the agent occupancy is updated in memory while making
+        the scheduling decisions, and all kernel-agent bindings and scheduling failures are
+        committed in a single transaction at the end of the pass.
+        """
+        # Part 0: Load the scheduler and the resource group snapshot.
+        async with self.db.begin_readonly_session() as db_sess:
+            result = await db_sess.execute(
+                sa.select(ScalingGroupRow.scheduler, ScalingGroupRow.scheduler_opts).where(
+                    ScalingGroupRow.name == sgroup_name
+                )
+            )
+            row = result.first()
+            if row is None:
+                raise ValueError(f'Scaling group "{sgroup_name}" not found!')
+            scheduler_name, sgroup_opts = row.scheduler, row.scheduler_opts
+            scheduler = self._load_scheduler(LoadSchedulerArgs(scheduler_name, sgroup_opts))
+            existing_sessions, pending_sessions, cancelled_sessions = await _list_managed_sessions(
+                db_sess, sgroup_name, scheduler.sgroup_opts.pending_timeout
+            )
+            current_priority, pending_sessions = scheduler.prioritize(pending_sessions)
+            snapshot = await load_resource_group_snapshot(
+                db_sess,
+                sgroup_name,
+                pending_sessions,
+                load_endpoint_kernel_counts=(
+                    sgroup_opts.agent_selection_strategy == AgentSelectionStrategy.CONCENTRATED
+                    and sgroup_opts.enforce_spreading_endpoint_replica
+                ),
+            )
+        await self.flush_cancelled_sessions(cancelled_sessions)
+        predicate_batch = await self._load_predicate_batch(sched_ctx, pending_sessions)
+        (
+            snapshot.max_container_count,
+            snapshot.container_counts,
+        ) = await self._get_container_counts(snapshot.candidate_agents)
+
+        log.debug(
+            "running scheduler with snapshot (sgroup:{}, pending:{} at prio:{}, existing:{},"
+            " cancelled:{}, agents:{})",
+            sgroup_name,
+            len(pending_sessions),
+            current_priority,
+            len(existing_sessions),
+            len(cancelled_sessions),
+            len(snapshot.schedulable_agent_ids),
+        )
+        # The total capacity does not depend on the occupancy, so we calculate it only once.
+        total_capacity = snapshot.total_capacity
+        default_agent_selector: AbstractAgentSelector | None = None
+        try:
+            while len(pending_sessions) > 0:
+                # Part 1: Choose the pending session to try scheduling.
+
+                picked_session_id = scheduler.pick_session(
+                    total_capacity,
+                    pending_sessions,
+                    existing_sessions,
+                )
+                if picked_session_id is None:
+                    # no session is picked.
+                    break
+                for picked_idx, pending_sess in enumerate(pending_sessions):
+                    if pending_sess.id == picked_session_id:
+                        break
+                else:
+                    # no matching entry for picked session?
+                    raise RuntimeError("should not reach here")
+                pending_sess = pending_sessions.pop(picked_idx)
+                log_fmt = "schedule(s:{}, prio:{}, type:{}, name:{}, ak:{}, cluster_mode:{}): "
+                log_args = (
+                    pending_sess.id,
+                    pending_sess.priority,
+                    pending_sess.session_type,
+                    pending_sess.name,
+                    pending_sess.access_key,
+                    pending_sess.cluster_mode,
+                )
+                _log_fmt.set(log_fmt)
+                _log_args.set(log_args)
+                log.debug(log_fmt + "try-scheduling", *log_args)
+
+                endpoint_id = snapshot.session_endpoints.get(pending_sess.id)
+                if endpoint_id is not None:
+                    # The kernel counts of an endpoint change as its replicas get scheduled
+                    # in this pass, so we need a fresh agent selector for each replica.
+                    agent_selector = await self._load_agent_selector(
+                        LoadAgentSelectorArgs(
+                            sgroup_opts,
+                            pending_sess.id,
+                            pending_sess.session_type,
+                            kernel_counts_at_same_endpoint=snapshot.endpoint_kernel_counts[
+                                endpoint_id
+                            ],
+                        )
+                    )
+                else:
+                    if default_agent_selector is None:
+                        default_agent_selector = await self._load_agent_selector(
+                            LoadAgentSelectorArgs(
+                                sgroup_opts,
+                                pending_sess.id,
+                                pending_sess.session_type,
+                                kernel_counts_at_same_endpoint={},
+                            )
+                        )
+                    agent_selector = default_agent_selector
+                if isinstance(agent_selector, BaseAgentSelector):
+                    agent_selector.capacity_matrix = snapshot.capacity_matrix
+
+                # Part 2: Predicate checks with predicate hook plugins
+
+                (
+                    check_results,
+                    passed_predicates,
+                    failed_predicates,
+                ) = await self._evaluate_predicates(sched_ctx, pending_sess, predicate_batch)
+                status_update_data = {
+                    "last_try": datetime.now(tzutc()).isoformat(),
+                    "failed_predicates": failed_predicates,
+                    "passed_predicates": passed_predicates,
+                }
+                if failed_predicates:
+                    log.debug(log_fmt + "predicate-checks-failed (temporary)", *log_args)
+                    snapshot.add_failure(
+                        SchedulingFailure(
+                            pending_sess,
+                            SchedulingFailureKind.PREDICATE_CHECKS_FAILED,
+                            status_update_data,
+                            cancel=pending_sess.is_private,
+                        )
+                    )
+                    await self._rollback_snapshot_predicate_mutations(
+                        sched_ctx, snapshot, pending_sess
+                    )
+                    if predicate_batch is not None and pending_sess.is_private:
+                        predicate_batch.remove_pending(pending_sess)
+                    # Predicate failures are *NOT* permanent errors.
+                    # We need to retry the scheduling afterwards.
+                    continue
+                snapshot.status_updates[pending_sess.id] = status_update_data
+
+                # Part 3: Assign agent(s) via the agent selector against the snapshot.
+
+                try:
+                    match pending_sess.cluster_mode:
+                        case ClusterMode.SINGLE_NODE:
+                            allocation = await self._allocate_single_node_session(
+                                snapshot,
+                                agent_selector,
+                                pending_sess,
+                                status_update_data,
+                            )
+                        case ClusterMode.MULTI_NODE:
+                            allocation = await self._allocate_multi_node_session(
+                                snapshot,
+                                agent_selector,
+                                pending_sess,
+                                status_update_data,
+                            )
+                        case _:
+                            log.exception(
+                                f"should not reach here; unknown cluster_mode: {pending_sess.cluster_mode}"
+                            )
+                            continue
+                except InstanceNotAvailable as e:
+                    # Proceed to the next pending session and come back later.
+                    log.debug(
+                        "schedule({}): instance not available ({})",
+                        sgroup_name,
+                        e.extra_msg,
+                    )
+                    await self._rollback_snapshot_predicate_mutations(
+                        sched_ctx, snapshot, pending_sess
+                    )
+                    continue
+                except Exception:
+                    # _allocate_{single,multi}_node_session() already record general failures.
+                    # Proceed to the next pending session and come back later
+                    await self._rollback_snapshot_predicate_mutations(
+                        sched_ctx, snapshot, pending_sess
+                    )
+                    continue
+                snapshot.add_allocation(allocation)
+                # For complex schedulers like DRF, they may need internal state updates
+                # based on the scheduling result.
+                scheduler.update_allocation(pending_sess)
+                if predicate_batch is not None:
+                    predicate_batch.add_allocation(pending_sess)
+        except BaseException:
+            # Keep the scheduling decisions made so far even when the pass is interrupted,
+            # without hiding the original error with a commit failure.
+            try:
+                await self._commit_snapshot(sched_ctx, snapshot)
+            except Exception:
+                log.exception("schedule({}): failed to commit the snapshot", sgroup_name)
+            raise
+        # Part 4: Commit all scheduling decisions made so far at once.
+        await self._commit_snapshot(sched_ctx, snapshot)
+        if snapshot.allocations:
+            await self.event_producer.produce_event(DoCheckPrecondEvent())
+
+    async def _get_container_counts(
+        self,
+        agents: Sequence[AgentRow],
+    ) -> tuple[Optional[int], dict[AgentId, int]]:
+        """
+        Return the configured maximum number of containers per agent and the current number of
+        containers of the given agents.  The counts are empty if there is no limit configured.
+        """
+        raw_value = await self.shared_config.etcd.get("config/agent/max-container-count")
+        if raw_value is None:
+            return None, {}
+        max_container_count = int(raw_value)
+        if not agents:
+            return max_container_count, {}
+
+        async def _pipe_builder(r: Redis) -> RedisPipeline:
+            pipe = r.pipeline()
+            for ag in agents:
+                await pipe.get(f"container_count.{ag.id}")
+            return pipe
+
+        raw_counts = await redis_helper.execute(self.registry.redis_stat, _pipe_builder)
+        return max_container_count, {
+            ag.id: int(cnt) if cnt is not None else 0 for ag, cnt in zip(agents, raw_counts)
+        }
+
+    def _check_designated_agent_capacity(
+        self,
+        snapshot: ResourceGroupSnapshot,
+        agent_id: AgentId,
+        requested_slots: ResourceSlot,
+    ) -> None:
+        if agent_id not in snapshot.agents:
+            raise GenericBadRequest(f"No such agent exist in DB: {agent_id}")
+        remaining_slots = snapshot.get_remaining_slots(agent_id)
+        for key, remaining in remaining_slots.items():
+            requested = requested_slots.get(key, Decimal(0))
+            if remaining < requested:
+                raise InstanceNotAvailable(
+                    extra_msg=(
+                        f"The designated agent ({agent_id}) does not have "
+                        f"the enough remaining capacity ({key}, "
+                        f"requested: {requested}, "
+                        f"remaining: {remaining})."
+                    ),
+                )
+
+    async def _allocate_single_node_session(
+        self,
+        snapshot: ResourceGroupSnapshot,
+        agent_selector: AbstractAgentSelector,
+        sess_ctx: SessionRow,
+        status_update_data: Mapping[str, Any],
+    ) -> SessionAllocation:
+        """
+        Finds and reserves an agent in the snapshot having resources enough to host the entire
+        session.  Failures are recorded in the snapshot and re-raised.
+        """
+        log_fmt = _log_fmt.get("")
+        log_args = _log_args.get(tuple())
+
+        try:
+            requested_architectures = set(k.architecture for k in sess_ctx.kernels)
+            if len(requested_architectures) > 1:
+                raise GenericBadRequest(
+                    "Cannot assign multiple kernels with different architectures' single node session",
+                )
+            if not sess_ctx.kernels:
+                raise GenericBadRequest(
+                    f"The session {sess_ctx.id!r} does not have any child kernel."
+                )
+            requested_architecture = requested_architectures.pop()
+            candidate_agents = snapshot.candidate_agents
+            compatible_candidate_agents = [
+                ag for ag in candidate_agents if ag.architecture == requested_architecture
+            ]
+            if not candidate_agents:
+                raise InstanceNotAvailable(extra_msg="No agents are available for scheduling")
+            if not compatible_candidate_agents:
+                raise InstanceNotAvailable(
+                    extra_msg=(
+                        "No agents found to be compatible with the image architecture "
+                        f"(image[0]: {sess_ctx.main_kernel.image}, "
+                        f"arch: {requested_architecture})"
+                    ),
+                )
+            available_candidate_agents = snapshot.filter_by_container_limit(
+                compatible_candidate_agents
+            )
+            if not available_candidate_agents:
+                raise InstanceNotAvailable(
+                    extra_msg=(
+                        "No agents found to be available because all agents have reached the hard"
+                        " limit of the number of containers."
+                    ),
+                )
+
+            # If sess_ctx.agent_id is already set for manual assignment by superadmin,
+            # skip assign_agent_for_session().
+            agent_id: AgentId | None = sess_ctx.main_kernel.agent
+            if agent_id is not None:
+                self._check_designated_agent_capacity(snapshot, agent_id, sess_ctx.requested_slots)
+            else:
+                # Let the agent selector decide the target agent
+                agent_id = await agent_selector.assign_agent_for_session(
+                    available_candidate_agents,
+                    sess_ctx,
+                )
+                if agent_id is None:
+                    raise InstanceNotAvailable(
+                        extra_msg=(
+                            "Could not find a contiguous resource region in any agent big"
+                            f" enough to host the session (id: {sess_ctx.id}, resource group:"
+                            f" {sess_ctx.scaling_group_name})"
+                        ),
+                    )
+            agent_alloc_ctx = snapshot.reserve(
+                agent_id,
+                sess_ctx.requested_slots,
+                num_containers=len(sess_ctx.kernels),
+            )
+        except InstanceNotAvailable as sched_failure:
+            log.debug(log_fmt + "no-available-instances", *log_args)
+            snapshot.add_failure(
+                SchedulingFailure(
+                    sess_ctx,
+                    SchedulingFailureKind.NO_AVAILABLE_INSTANCES,
+                    {**status_update_data, "msg": sched_failure.extra_msg},
+                )
+            )
+            raise
+        except Exception as e:
+            log.exception(
+                log_fmt + "unexpected-error, during agent allocation",
+                *log_args,
+            )
+            snapshot.add_failure(
+                SchedulingFailure(
+                    sess_ctx,
+                    SchedulingFailureKind.SCHEDULER_ERROR,
+                    convert_to_status_data(e, self.local_config["debug"]["enabled"]),
+                )
+            )
+            raise
+        return SessionAllocation(
+            sess_ctx,
+            [KernelAgentBinding(kernel, agent_alloc_ctx, set()) for kernel in sess_ctx.kernels],
+        )
+
+    async def _allocate_multi_node_session(
+        self,
+        snapshot: ResourceGroupSnapshot,
+        agent_selector: AbstractAgentSelector,
+        sess_ctx: SessionRow,
+        status_update_data: Mapping[str, Any],
+    ) -> SessionAllocation:
+        """
+        Finds and reserves agents in the snapshot having resources enough to host each kernel
+        in the session.  When any kernel fails, the reservations made for the preceding kernels
+        are released so that the snapshot reflects only complete sessions.
+        """
+        log_fmt = _log_fmt.get("")
+        log_args = _log_args.get(tuple())
+
+        kernel_agent_bindings: list[KernelAgentBinding] = []
+
+        def _release_partial_bindings() -> None:
+            for binding in kernel_agent_bindings:
+                assert binding.agent_alloc_ctx.agent_id is not None
+                snapshot.release(binding.agent_alloc_ctx.agent_id, binding.kernel.requested_slots)
+
+        kernel: KernelRow
+        for kernel in sess_ctx.kernels:
+            try:
+                agent_id: Optional[AgentId] = kernel.agent
+                if agent_id is not None:
+                    # Check the resource availability of the manually designated agent
+                    self._check_designated_agent_capacity(
+                        snapshot, agent_id, kernel.requested_slots
+                    )
+                else:
+                    # Each kernel may have different images and different architectures
+                    candidate_agents = snapshot.candidate_agents
+                    compatible_candidate_agents = [
+                        ag for ag in candidate_agents if ag.architecture == kernel.architecture
+                    ]
+                    if not candidate_agents:
+                        raise InstanceNotAvailable(
+                            extra_msg="No agents are available for scheduling"
+                        )
+                    if not compatible_candidate_agents:
+                        raise InstanceNotAvailable(
+                            extra_msg=(
+                                "No agents found to be compatible with the image architecture "
+                                f"(image: {kernel.image}, "
+                                f"arch: {kernel.architecture})"
+                            ),
+                        )
+                    available_candidate_agents = snapshot.filter_by_container_limit(
+                        compatible_candidate_agents
+                    )
+                    if not available_candidate_agents:
+                        raise InstanceNotAvailable(
+                            extra_msg=(
+                                "No agents found to be available because all agents have"
+                                " reached the hard limit of the number of containers."
+                            ),
+                        )
+                    # Let the agent selector decide the target agent
+                    agent_id = await agent_selector.assign_agent_for_kernel(
+                        available_candidate_agents,
+                        kernel,
+                    )
+                    if agent_id is None:
+                        raise InstanceNotAvailable(
+                            extra_msg=(
+                                "Could not find a contiguous resource region in any agent big"
+                                f" enough to host a kernel in the session (id: {sess_ctx.id},"
+                                f" resource group: {sess_ctx.scaling_group_name})"
+                            ),
+                        )
+                # Update the in-memory occupancy to schedule the next kernel in the session
+                agent_alloc_ctx = snapshot.reserve(agent_id, kernel.requested_slots)
+            except InstanceNotAvailable as sched_failure:
+                log.debug(log_fmt + "no-available-instances", *log_args)
+                _release_partial_bindings()
+                snapshot.add_failure(
+                    SchedulingFailure(
+                        sess_ctx,
+                        SchedulingFailureKind.NO_AVAILABLE_INSTANCES,
+                        {**status_update_data, "msg": sched_failure.extra_msg},
+                        kernel_id=kernel.id,
+                    )
+                )
+                raise
+            except Exception as e:
+                log.exception(
+                    log_fmt + "unexpected-error, during agent allocation",
+                    *log_args,
+                )
+                _release_partial_bindings()
+                snapshot.add_failure(
+                    SchedulingFailure(
+                        sess_ctx,
+                        SchedulingFailureKind.SCHEDULER_ERROR,
+                        convert_to_status_data(e, self.local_config["debug"]["enabled"]),
+                        kernel_id=kernel.id,
+                    )
+                )
+                raise
+            kernel_agent_bindings.append(KernelAgentBinding(kernel, agent_alloc_ctx, set()))
+        return SessionAllocation(sess_ctx, kernel_agent_bindings)
+
+    async def _commit_snapshot(
+        self,
+        sched_ctx: SchedulingContext,
+        snapshot: ResourceGroupSnapshot,
+    ) -> None:
+        """
+        Write all allocations and failures accumulated in the snapshot in a single transaction
+        and then emit the corresponding events.
+        """
+        if not snapshot.allocations and not snapshot.failures:
+            return
+
+        rejected_sessions: list[SessionRow] = []
+
+        async def _commit() -> None:
+            async with self.db.begin_session() as db_sess:
+                await _apply_snapshot_allocations(db_sess, snapshot)
+                await _apply_snapshot_status_updates(db_sess, snapshot)
+                await _apply_snapshot_failures(db_sess, snapshot)
+                # Recalculate the concurrency counters including the allocations just applied.
+                rollbacked_access_keys = set()
+                for sess_ctx in rejected_sessions:
+                    if sess_ctx.access_key in rollbacked_access_keys:
+                        continue
+                    await _rollback_predicate_mutations(db_sess, sched_ctx, sess_ctx)
+                    rollbacked_access_keys.add(sess_ctx.access_key)
+
+        async with self._get_admission_lock():
+            rejected_sessions = await self._recheck_snapshot_resource_limits(sched_ctx, snapshot)
+            await execute_with_retry(_commit)
+        log.debug(
+            "schedule({}): committed snapshot (scheduled:{}, failed:{})",
+            snapshot.sgroup_name,
+            len(snapshot.allocations),
+            len(snapshot.failures),
+        )
+        for allocation in snapshot.allocations:
+            await self.registry.event_producer.produce_event(
+                SessionScheduledEvent(allocation.session.id, allocation.session.creation_id),
+            )
+        for failure in snapshot.failures:
+            if failure.cancel:
+                await self.event_producer.produce_event(
+                    SessionCancelledEvent(
+                        failure.session.id,
+                        failure.session.creation_id,
+                        reason=KernelLifecycleEventReason.PENDING_TIMEOUT,
+                    )
+                )
+
+    async def _recheck_snapshot_resource_limits(
+        self,
+        sched_ctx: SchedulingContext,
+        snapshot: ResourceGroupSnapshot,
+    ) -> list[SessionRow]:
+        """
+        Check the resource limits of the allocated sessions again against the occupancy
+        including the sessions committed by the other resource groups in the meantime, and
+        turn the allocations exceeding the limits into predicate failures to retry them later.
+        The allocations of the same pass are accumulated as they are checked, because the
+        per-session predicates do not count the sessions still pending in the snapshot.
+        This must be called while holding the admission lock.
+        """
+        if not snapshot.allocations:
+            return []
+
+        async def _load() -> PredicateBatch:
+            async with self.db.begin_readonly_session() as db_sess:
+                return await PredicateBatch.load(
+                    db_sess,
+                    sched_ctx,
+                    [allocation.session for allocation in snapshot.allocations],
+                )
 
-            # Part 4: Assign agent(s) via the agent selector.
+        batch = await execute_with_retry(_load)
+        rejected_sessions: list[SessionRow] = []
+        for allocation in [*snapshot.allocations]:
+            sess_ctx = allocation.session
+            failed_predicates = await _check_shared_resource_limits(batch, sched_ctx, sess_ctx)
+            if not failed_predicates:
+                batch.add_allocation(sess_ctx)
+                continue
+            log.debug(
+                "schedule({}): resource limits exceeded while committing (s:{})",
+                snapshot.sgroup_name,
+                sess_ctx.id,
+            )
+            snapshot.remove_allocation(allocation)
+            snapshot.add_failure(
+                SchedulingFailure(
+                    sess_ctx,
+                    SchedulingFailureKind.PREDICATE_CHECKS_FAILED,
+                    {
+                        "last_try": datetime.now(tzutc()).isoformat(),
+                        "failed_predicates": failed_predicates,
+                    },
+                )
+            )
+            rejected_sessions.append(sess_ctx)
+        return rejected_sessions
+
+    async def _admit_scheduled_session(
+        self,
+        sched_ctx: SchedulingContext,
+        sess_ctx: SessionRow,
+        reservations: Sequence[tuple[Optional[AgentId], ResourceSlot]],
+    ) -> None:
+        """
+        Check the resource limits of a session about to be committed again against the latest
+        occupancy when the resource groups are scheduled concurrently, as its predicates are
+        checked without holding the admission lock.  If the limits are exceeded, release the
+        agent reservations of the session and raise :exc:`AdmissionRejected` to retry it later.
+        This must be called while holding the admission lock.
+        """
+        if sess_ctx.is_private:
+            return
 
+        async def _load() -> PredicateBatch:
             async with self.db.begin_readonly_session() as db_sess:
-                schedulable_sess = await SessionRow.get_session_by_id(
-                    db_sess,
-                    pending_sess.id,
-                    eager_loading_op=(
-                        noload("*"),
-                        selectinload(SessionRow.kernels).options(
-                            noload("*"),
-                            selectinload(KernelRow.agent_row).noload("*"),
+                return await PredicateBatch.load(db_sess, sched_ctx, [sess_ctx])
+
+        batch = await execute_with_retry(_load)
+        failed_predicates = await _check_shared_resource_limits(batch, sched_ctx, sess_ctx)
+        if not failed_predicates:
+            return
+
+        async def _reject() -> None:
+            async with self.db.begin_session() as db_sess:
+                for agent_id, requested_slots in reservations:
+                    await _release_agent(db_sess, agent_id, requested_slots)
+                await _rollback_predicate_mutations(db_sess, sched_ctx, sess_ctx)
+                query = (
+                    sa.update(SessionRow)
+                    .values(
+                        status_info="predicate-checks-failed",
+                        status_data=sql_json_increment(
+                            SessionRow.status_data,
+                            ("scheduler", "retries"),
+                            parent_updates={
+                                "last_try": datetime.now(tzutc()).isoformat(),
+                                "failed_predicates": failed_predicates,
+                            },
                         ),
-                    ),
+                    )
+                    .where(SessionRow.id == sess_ctx.id)
                 )
+                await db_sess.execute(query)
 
-            try:
-                match schedulable_sess.cluster_mode:
-                    case ClusterMode.SINGLE_NODE:
-                        await self._schedule_single_node_session(
-                            sched_ctx,
-                            agent_selector,
-                            sgroup_name,
-                            candidate_agents,
-                            schedulable_sess,
-                            check_results,
-                        )
-                    case ClusterMode.MULTI_NODE:
-                        await self._schedule_multi_node_session(
-                            sched_ctx,
-                            agent_selector,
-                            sgroup_name,
-                            candidate_agents,
-                            schedulable_sess,
-                            check_results,
-                        )
-                    case _:
-                        log.exception(
-                            f"should not reach here; unknown cluster_mode: {schedulable_sess.cluster_mode}"
-                        )
-                        continue
-                # For complex schedulers like DRF, they may need internal state updates
-                # based on the scheduling result.
-                scheduler.update_allocation(schedulable_sess)
-            except InstanceNotAvailable as e:
-                # Proceed to the next pending session and come back later.
-                log.debug(
-                    "schedule({}): instance not available ({})",
-                    sgroup_name,
-                    e.extra_msg,
-                )
-                continue
-            except GenericBadRequest as e:
-                # Proceed to the next pending session and come back later.
-                log.debug(
-                    "schedule({}): bad request ({})",
-                    sgroup_name,
-                    e.extra_msg,
+        await execute_with_retry(_reject)
+        raise AdmissionRejected
+
+    def _schedules_sgroups_concurrently(self) -> bool:
+        return self.local_config["manager"]["session_schedule_lock_scope"] == "resource-group"
+
+    def _get_admission_lock(self) -> AbstractAsyncContextManager[Any]:
+        """
+        Return the lock to serialize the resource limit checks and the commits of the scheduled
+        sessions when the resource groups are scheduled concurrently, as the keypairs, users,
+        projects and domains share their resource limits across the resource groups.
+        """
+        if not self._schedules_sgroups_concurrently():
+            return nullcontext()
+        return self.lock_factory(
+            LockID.LOCKID_SCHEDULE_ADMISSION,
+            self.local_config["manager"]["session_schedule_lock_lifetime"],
+        )
+
+    async def _rollback_snapshot_predicate_mutations(
+        self,
+        sched_ctx: SchedulingContext,
+        snapshot: ResourceGroupSnapshot,
+        sess_ctx: SessionRow,
+    ) -> None:
+        """
+        Rollback the predicate mutations of a session failed to be scheduled right away,
+        as the later sessions of the same access key are checked in the same pass.
+        """
+
+        async def _rollback() -> None:
+            async with self.db.begin_session() as db_sess:
+                await _rollback_predicate_mutations(db_sess, sched_ctx, sess_ctx, snapshot)
+
+        await execute_with_retry(_rollback)
+
+    async def _load_predicate_batch(
+        self,
+        sched_ctx: SchedulingContext,
+        pending_sessions: Sequence[SessionRow],
+    ) -> Optional[PredicateBatch]:
+        """
+        Load the data to evaluate the predicates of all pending sessions of a scheduling pass
+        at once when the batched predicate checks are enabled.
+        """
+        if self.local_config["manager"]["predicate-check-mode"] != "batched":
+            return None
+
+        async def _load() -> PredicateBatch:
+            async with self.db.begin_readonly_session() as db_sess:
+                return await PredicateBatch.load(db_sess, sched_ctx, pending_sessions)
+
+        return await execute_with_retry(_load)
+
+    async def _evaluate_predicates(
+        self,
+        sched_ctx: SchedulingContext,
+        pending_sess: SessionRow,
+        predicate_batch: Optional[PredicateBatch] = None,
+    ) -> tuple[
+        list[tuple[str, Union[Exception, PredicateResult]]],
+        list[dict[str, str]],
+        list[dict[str, str]],
+    ]:
+        """
+        Run the predicate checks and the predicate hook plugins for the given pending session
+        and return the raw check results with the lists of passed and failed predicates.
+        """
+        log_fmt = _log_fmt.get("")
+        log_args = _log_args.get(tuple())
+        check_results: list[tuple[str, Union[Exception, PredicateResult]]] = []
+        failed_predicates: list[dict[str, str]] = []
+        passed_predicates: list[dict[str, str]] = []
+        async for attempt in retry_txn():
+            with attempt:
+                check_results = await self.check_predicates(
+                    sched_ctx,
+                    pending_sess,
+                    exc_handler=lambda _: log.exception(log_fmt + "predicate-error", *log_args),
+                    predicate_batch=predicate_batch,
                 )
+        for predicate_name, result in check_results:
+            if isinstance(result, Exception):
+                failed_predicates.append({
+                    "name": predicate_name,
+                    "msg": repr(result),
+                })
                 continue
-            except Exception:
-                # _schedule_{single,multi}_node_session() already handle general exceptions.
-                # Proceed to the next pending session and come back later
-                continue
-            num_scheduled += 1
-        if num_scheduled > 0:
-            await self.event_producer.produce_event(DoCheckPrecondEvent())
+            if result.passed:
+                passed_predicates.append({
+                    "name": predicate_name,
+                })
+            else:
+                failed_predicates.append({
+                    "name": predicate_name,
+                    "msg": result.message or "",
+                })
+
+        hook_result = HookResult(status=PASSED, src_plugin=[], result=[])
+        async for attempt in retry_txn():
+            with attempt:
+                hook_result = await self.check_predicates_hook(sched_ctx, pending_sess)
+        match hook_result.src_plugin:
+            case str():
+                hook_name = hook_result.src_plugin
+            case list():
+                hook_name = f"({', '.join(hook_result.src_plugin)})"
+            case _:
+                hook_name = ""
+        if hook_result.status == PASSED:
+            if hook_result.src_plugin:
+                # Append result only when plugin exists.
+                passed_predicates.append({"name": hook_name})
+        else:
+            failed_predicates.append({
+                "name": hook_name,
+                "msg": hook_result.reason or "",
+            })
+        return check_results, passed_predicates, failed_predicates
 
     async def _filter_agent_by_container_limit(
         self, candidate_agents: list[AgentRow]
@@ -1040,7 +1866,14 @@ class SchedulerDispatcher(aobject):
                 )
                 await db_sess.execute(session_query)
 
-        await execute_with_retry(_finalize_scheduled)
+        async with self._get_admission_lock():
+            if self._schedules_sgroups_concurrently():
+                await self._admit_scheduled_session(
+                    sched_ctx,
+                    sess_ctx,
+                    [(agent_alloc_ctx.agent_id, sess_ctx.requested_slots)],
+                )
+            await execute_with_retry(_finalize_scheduled)
         await self.registry.event_producer.produce_event(
             SessionScheduledEvent(sess_ctx.id, sess_ctx.creation_id),
         )
@@ -1276,7 +2109,17 @@ class SchedulerDispatcher(aobject):
                 )
                 await db_sess.execute(session_query)
 
-        await execute_with_retry(_finalize_scheduled)
+        async with self._get_admission_lock():
+            if self._schedules_sgroups_concurrently():
+                await self._admit_scheduled_session(
+                    sched_ctx,
+                    sess_ctx,
+                    [
+                        (binding.agent_alloc_ctx.agent_id, binding.kernel.requested_slots)
+                        for binding in kernel_agent_bindings
+                    ],
+                )
+            await execute_with_retry(_finalize_scheduled)
         await self.registry.event_producer.produce_event(
             SessionScheduledEvent(sess_ctx.id, sess_ctx.creation_id),
         )
@@ -1974,8 +2817,19 @@ class SchedulerDispatcher(aobject):
         pending_sess: SessionRow,
         *,
         exc_handler: Callable[[Exception], None] | None = None,
+        predicate_batch: Optional[PredicateBatch] = None,
     ) -> list[tuple[str, Union[Exception, PredicateResult]]]:
-        check_results: list[tuple[str, Union[Exception, PredicateResult]]] = []
+        """
+        Run the predicate checks of the given pending session.
+        If the predicate batch of the current scheduling pass is given, the predicates are
+        evaluated against it instead of querying the database for each predicate.
+        """
+        if predicate_batch is not None:
+            return await self._run_predicates(
+                pending_sess,
+                self._get_batched_predicates(predicate_batch, sched_ctx, pending_sess),
+                exc_handler,
+            )
         async with self.db.begin_session() as db_sess:
             predicates: list[tuple[str, Awaitable[PredicateResult]]] = [
                 (
@@ -2012,15 +2866,67 @@ class SchedulerDispatcher(aobject):
                         check_domain_resource_limit(db_sess, sched_ctx, pending_sess),
                     ),
                 ]
-            for predicate_name, check_coro in predicates:
-                try:
-                    check_results.append((predicate_name, await check_coro))
-                except DBAPIError:
-                    raise
-                except Exception as e:
-                    if exc_handler is not None:
-                        exc_handler(e)
-                    check_results.append((predicate_name, e))
+            return await self._run_predicates(pending_sess, predicates, exc_handler)
+
+    @staticmethod
+    def _get_batched_predicates(
+        predicate_batch: PredicateBatch,
+        sched_ctx: SchedulingContext,
+        pending_sess: SessionRow,
+    ) -> list[tuple[str, Awaitable[PredicateResult]]]:
+        predicates: list[tuple[str, Awaitable[PredicateResult]]] = [
+            (
+                "reserved_time",
+                predicate_batch.check_reserved_batch_session(sched_ctx, pending_sess),
+            ),
+            ("dependencies", predicate_batch.check_dependencies(sched_ctx, pending_sess)),
+            ("concurrency", predicate_batch.check_concurrency(sched_ctx, pending_sess)),
+        ]
+        if not pending_sess.is_private:
+            predicates += [
+                (
+                    "pending_session_resource_limit",
+                    predicate_batch.check_pending_session_resource_limit(sched_ctx, pending_sess),
+                ),
+                (
+                    "pending_session_count_limit",
+                    predicate_batch.check_pending_session_count_limit(sched_ctx, pending_sess),
+                ),
+                (
+                    "keypair_resource_limit",
+                    predicate_batch.check_keypair_resource_limit(sched_ctx, pending_sess),
+                ),
+                (
+                    "user_resource_limit",
+                    predicate_batch.check_user_resource_limit(sched_ctx, pending_sess),
+                ),
+                (
+                    "user_group_resource_limit",
+                    predicate_batch.check_group_resource_limit(sched_ctx, pending_sess),
+                ),
+                (
+                    "domain_resource_limit",
+                    predicate_batch.check_domain_resource_limit(sched_ctx, pending_sess),
+                ),
+            ]
+        return predicates
+
+    @staticmethod
+    async def _run_predicates(
+        pending_sess: SessionRow,
+        predicates: list[tuple[str, Awaitable[PredicateResult]]],
+        exc_handler: Callable[[Exception], None] | None,
+    ) -> list[tuple[str, Union[Exception, PredicateResult]]]:
+        check_results: list[tuple[str, Union[Exception, PredicateResult]]] = []
+        for predicate_name, check_coro in predicates:
+            try:
+                check_results.append((predicate_name, await check_coro))
+            except DBAPIError:
+                raise
+            except Exception as e:
+                if exc_handler is not None:
+                    exc_handler(e)
+                check_results.append((predicate_name, e))
         return check_results
 
     async def check_predicates_hook(
@@ -2144,13 +3050,64 @@ async def _reserve_agent(
     return AgentAllocationContext(agent_id, agent_addr, scaling_group)
 
 
+async def _release_agent(
+    db_sess: SASession,
+    agent_id: Optional[AgentId],
+    requested_slots: ResourceSlot,
+) -> None:
+    """
+    Release the resource slots reserved by :func:`_reserve_agent()`.
+    """
+    query = sa.select(AgentRow.occupied_slots).where(AgentRow.id == agent_id).with_for_update()
+    current_occupied_slots = (await db_sess.execute(query)).scalar()
+    if current_occupied_slots is None:
+        return
+    update_query = (
+        sa.update(AgentRow)
+        .values(
+            occupied_slots=(current_occupied_slots - requested_slots),
+        )
+        .where(AgentRow.id == agent_id)
+    )
+    await db_sess.execute(update_query)
+
+
+async def _check_shared_resource_limits(
+    batch: PredicateBatch,
+    sched_ctx: SchedulingContext,
+    sess_ctx: SessionRow,
+) -> list[dict[str, str]]:
+    """
+    Check the resource limits of the keypair, user, project and domain of the session, which
+    are shared across the resource groups, and return the failed predicates.
+    """
+    failed_predicates: list[dict[str, str]] = []
+    if sess_ctx.is_private:
+        return failed_predicates
+    for predicate_name, check in [
+        ("keypair_resource_limit", batch.check_keypair_resource_limit),
+        ("user_resource_limit", batch.check_user_resource_limit),
+        ("user_group_resource_limit", batch.check_group_resource_limit),
+        ("domain_resource_limit", batch.check_domain_resource_limit),
+    ]:
+        result = await check(sched_ctx, sess_ctx)
+        if not result.passed:
+            failed_predicates.append({
+                "name": predicate_name,
+                "msg": result.message or "",
+            })
+    return failed_predicates
+
+
 async def _rollback_predicate_mutations(
     db_sess: SASession,
     sched_ctx: SchedulingContext,
     session: SessionRow,
+    snapshot: Optional[ResourceGroupSnapshot] = None,
 ) -> None:
     """
     Rollback any changes performed by predicates.
+    When the snapshot is given, its allocations not committed yet are counted as well.
 
     NOTE: We don't use the DB-level transaction rollback because we need to
     store the "ERROR" status to corresponding rows in the kernels table.
@@ -2162,4 +3119,183 @@ async def _rollback_predicate_mutations(
     # may accumulate up multiple subtractions, resulting in
     # negative concurrency_occupied values.
     log.debug("recalculate concurrency used in rollback predicates (ak: {})", session.access_key)
-    await recalc_concurrency_used(db_sess, sched_ctx.registry.redis_stat, session.access_key)
+    num_kernels, num_private_kernels = (
+        snapshot.count_allocated_kernels(session.access_key) if snapshot is not None else (0, 0)
+    )
+    await recalc_concurrency_used(
+        db_sess,
+        sched_ctx.registry.redis_stat,
+        session.access_key,
+        uncommitted_concurrency_used=num_kernels,
+        uncommitted_sftp_concurrency_used=num_private_kernels,
+    )
+
+
+async def _apply_snapshot_allocations(
+    db_sess: SASession,
+    snapshot: ResourceGroupSnapshot,
+) -> None:
+    """
+    Apply the agent occupancy changes and the kernel/session status transitions of all
+    allocations in the snapshot using a fixed number of (executemany) statements.
+    """
+    if not snapshot.allocations:
+        return
+    query = (
+        sa.select(AgentRow.id, AgentRow.occupied_slots)
+        .where(AgentRow.id.in_(snapshot.occupied_deltas.keys()))
+        .with_for_update()
+    )
+    current_occupied_slots = {
+        row.id: row.occupied_slots for row in (await db_sess.execute(query)).fetchall()
+    }
+    agent_params = []
+    for agent_id, delta in snapshot.occupied_deltas.items():
+        if agent_id not in current_occupied_slots:
+            raise RuntimeError(f"No agent matching condition: {agent_id}")
+        agent_params.append({
+            "b_agent_id": agent_id,
+            "b_occupied_slots": current_occupied_slots[agent_id] + delta.to_resource_slot(),
+        })
+    agent_query = (
+        sa.update(AgentRow)
+        .values(occupied_slots=sa.bindparam("b_occupied_slots"))
+        .where(AgentRow.id == sa.bindparam("b_agent_id"))
+    )
+    await db_sess.execute(agent_query, agent_params)
+
+    now = datetime.now(tzutc())
+    kernel_query = (
+        sa.update(KernelRow)
+        .values(
+            agent=sa.bindparam("b_agent"),
+            agent_addr=sa.bindparam("b_agent_addr"),
+            scaling_group=snapshot.sgroup_name,
+            status=KernelStatus.SCHEDULED,
+            status_info="scheduled",
+            status_data={},
+            status_changed=now,
+            status_history=sql_json_merge(
+                KernelRow.status_history,
+                (),
+                {
+                    KernelStatus.SCHEDULED.name: now.isoformat(),
+                },
+            ),
+        )
+        .where(KernelRow.id == sa.bindparam("b_kernel_id"))
+    )
+    await db_sess.execute(
+        kernel_query,
+        [
+            {
+                "b_kernel_id": binding.kernel.id,
+                "b_agent": binding.agent_alloc_ctx.agent_id,
+                "b_agent_addr": binding.agent_alloc_ctx.agent_addr,
+            }
+            for allocation in snapshot.allocations
+            for binding in allocation.kernel_bindings
+        ],
+    )
+    session_query = (
+        sa.update(SessionRow)
+        .values(
+            scaling_group_name=snapshot.sgroup_name,
+            agent_ids=sa.bindparam("b_agent_ids"),
+            status=SessionStatus.SCHEDULED,
+            status_info="scheduled",
+            status_data={},
+            status_history=sql_json_merge(
+                SessionRow.status_history,
+                (),
+                {
+                    SessionStatus.SCHEDULED.name: now.isoformat(),
+                },
+            ),
+        )
+        .where(SessionRow.id == sa.bindparam("b_session_id"))
+    )
+    await db_sess.execute(
+        session_query,
+        [
+            {
+                "b_session_id": allocation.session.id,
+                "b_agent_ids": allocation.agent_ids,
+            }
+            for allocation in snapshot.allocations
+        ],
+    )
+
+
+async def _apply_snapshot_status_updates(
+    db_sess: SASession,
+    snapshot: ResourceGroupSnapshot,
+) -> None:
+    """
+    Store the scheduler status data of the sessions which have passed the predicates but
+    are not scheduled, as the scheduled ones get their status data cleared.
+    """
+    scheduled_session_ids = {allocation.session.id for allocation in snapshot.allocations}
+    for session_id, status_update_data in snapshot.status_updates.items():
+        if session_id in scheduled_session_ids:
+            continue
+        kernel_query = (
+            sa.update(KernelRow)
+            .where(KernelRow.session_id == session_id)
+            .values(
+                status_data=sql_json_merge(
+                    KernelRow.status_data,
+                    ("scheduler",),
+                    obj=status_update_data,
+                ),
+            )
+        )
+        await db_sess.execute(kernel_query)
+        session_query = (
+            sa.update(SessionRow)
+            .where(SessionRow.id == session_id)
+            .values(
+                status_data=sql_json_merge(
+                    SessionRow.status_data,
+                    ("scheduler",),
+                    obj=status_update_data,
+                ),
+            )
+        )
+        await db_sess.execute(session_query)
+
+
+async def _apply_snapshot_failures(
+    db_sess: SASession,
+    snapshot: ResourceGroupSnapshot,
+) -> None:
+    """
+    Store the scheduling failures in the snapshot.
+    The predicate mutations of the failed sessions are already rolled back during the pass.
+    """
+    if not snapshot.failures:
+        return
+    row_cls: type[KernelRow] | type[SessionRow]
+    for failure in snapshot.failures:
+        if failure.kernel_id is not None:
+            row_cls, row_id = KernelRow, failure.kernel_id
+        else:
+            row_cls, row_id = SessionRow, failure.session.id
+        match failure.kind:
+            case SchedulingFailureKind.SCHEDULER_ERROR:
+                status_data = failure.status_data
+            case _:
+                status_data = sql_json_increment(
+                    row_cls.status_data,
+                    ("scheduler", "retries"),
+                    parent_updates=failure.status_data,
+                )
+        query = (
+            sa.update(row_cls)
+            .values(status_info=failure.kind.value, status_data=status_data)
+            .where(row_cls.id == row_id)
+        )
+        await db_sess.execute(query)
+    cancelled_session_ids = [failure.session.id for failure in snapshot.failures if failure.cancel]
+    if cancelled_session_ids:
+        await _apply_cancellation(db_sess, cancelled_session_ids)
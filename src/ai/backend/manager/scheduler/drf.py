@@ -1,11 +1,13 @@
 from __future__ import annotations
 
+import heapq
 import logging
-from collections import defaultdict
+from collections import deque
 from collections.abc import Mapping, Sequence
 from decimal import Decimal
-from typing import Any, Optional, override
+from typing import Any, ClassVar, Optional, override
 
+import attrs
 import trafaret as t
 
 from ai.backend.common.types import (
@@ -22,8 +24,167 @@ from .types import AbstractScheduler
 log = BraceStyleAdapter(logging.getLogger("ai.backend.manager.scheduler"))
 
 
+def calculate_dominant_share(
+    total_capacity: Mapping[str, Any],
+    slots: Mapping[str, Any],
+) -> Decimal:
+    """
+    Calculate the largest share of the given slots over the total capacity,
+    ignoring the slots that the total capacity does not have.
+    """
+    dominant_share = Decimal(0)
+    for slot, value in slots.items():
+        slot_cap = Decimal(total_capacity.get(slot, 0))
+        if slot_cap == 0:
+            continue
+        slot_share = Decimal(value) / slot_cap
+        if dominant_share < slot_share:
+            dominant_share = slot_share
+    return dominant_share
+
+
+@attrs.define(auto_attribs=True, slots=True)
+class _SessionShare:
+    access_key: AccessKey
+    occupying_slots: dict[str, Any]
+    share: Decimal
+
+
+class DominantShareTracker:
+    """
+    Keeps the dominant shares of the access keys in a resource group across scheduling passes.
+
+    The shares of the existing sessions are reconciled with the existing sessions given in each
+    pass by their IDs and occupying slots, so that only the new or changed sessions are
+    calculated again, and the terminated sessions are removed as soon as their events arrive.
+    """
+
+    total_capacity: dict[str, Any]
+
+    def __init__(self) -> None:
+        self.total_capacity = {}
+        self._session_shares: dict[SessionId, _SessionShare] = {}
+        self._user_sessions: dict[AccessKey, set[SessionId]] = {}
+        self._existing_shares: dict[AccessKey, Decimal] = {}
+        # The shares from the allocations in the current scheduling pass.
+        self._allocation_shares: dict[AccessKey, Decimal] = {}
+
+    def dominant_share(self, access_key: AccessKey) -> Decimal:
+        return max(
+            self._existing_shares.get(access_key, Decimal(0)),
+            self._allocation_shares.get(access_key, Decimal(0)),
+        )
+
+    def dominant_shares(self) -> dict[AccessKey, Decimal]:
+        return {
+            access_key: self.dominant_share(access_key)
+            for access_key in self._existing_shares.keys() | self._allocation_shares.keys()
+        }
+
+    def reconcile(
+        self,
+        total_capacity: ResourceSlot,
+        existing_sessions: Sequence[SessionRow],
+        *,
+        keep_allocations: bool = False,
+    ) -> None:
+        """
+        Synchronize the shares with the existing sessions at the beginning of a scheduling pass.
+        """
+        if not keep_allocations:
+            self._allocation_shares.clear()
+        if total_capacity.data != self.total_capacity:
+            # All shares depend on the total capacity.
+            self.total_capacity = dict(total_capacity.data)
+            self._session_shares.clear()
+            self._user_sessions.clear()
+            self._existing_shares.clear()
+        existing_session_ids = set()
+        updated_users: set[AccessKey] = set()
+        for existing_sess in existing_sessions:
+            session_id = SessionId(existing_sess.id)
+            existing_session_ids.add(session_id)
+            occupying_slots = existing_sess.occupying_slots
+            occupying_slots_data = (
+                occupying_slots.data
+                if isinstance(occupying_slots, ResourceSlot)
+                else dict(occupying_slots or {})
+            )
+            known = self._session_shares.get(session_id)
+            if (
+                known is not None
+                and known.access_key == existing_sess.access_key
+                and known.occupying_slots == occupying_slots_data
+            ):
+                continue
+            if known is not None:
+                self._remove(session_id, updated_users)
+            self._add(
+                session_id,
+                existing_sess.access_key,
+                occupying_slots_data,
+                updated_users,
+            )
+        for session_id in self._session_shares.keys() - existing_session_ids:
+            self._remove(session_id, updated_users)
+        self._refresh_existing_shares(updated_users)
+
+    def forget_session(self, session_id: SessionId) -> None:
+        updated_users: set[AccessKey] = set()
+        self._remove(session_id, updated_users)
+        self._refresh_existing_shares(updated_users)
+
+    def add_allocation(self, access_key: AccessKey, requested_slots: ResourceSlot) -> Decimal:
+        """
+        Reflect an allocation made in the current pass and return the updated dominant share.
+        """
+        share = calculate_dominant_share(self.total_capacity, requested_slots.data)
+        if self._allocation_shares.get(access_key, Decimal(0)) < share:
+            self._allocation_shares[access_key] = share
+        return self.dominant_share(access_key)
+
+    def _add(
+        self,
+        session_id: SessionId,
+        access_key: AccessKey,
+        occupying_slots: Mapping[str, Any],
+        updated_users: set[AccessKey],
+    ) -> None:
+        self._session_shares[session_id] = _SessionShare(
+            access_key,
+            dict(occupying_slots),
+            calculate_dominant_share(self.total_capacity, occupying_slots),
+        )
+        self._user_sessions.setdefault(access_key, set()).add(session_id)
+        updated_users.add(access_key)
+
+    def _remove(self, session_id: SessionId, updated_users: set[AccessKey]) -> None:
+        known = self._session_shares.pop(session_id, None)
+        if known is None:
+            return
+        user_sessions = self._user_sessions[known.access_key]
+        user_sessions.discard(session_id)
+        if not user_sessions:
+            del self._user_sessions[known.access_key]
+        updated_users.add(known.access_key)
+
+    def _refresh_existing_shares(self, access_keys: set[AccessKey]) -> None:
+        for access_key in access_keys:
+            session_ids = self._user_sessions.get(access_key)
+            if not session_ids:
+                self._existing_shares.pop(access_key, None)
+                continue
+            self._existing_shares[access_key] = max(
+                self._session_shares[session_id].share for session_id in session_ids
+            )
+
+
 class DRFScheduler(AbstractScheduler):
-    per_user_dominant_share: dict[AccessKey, Decimal]
+    # The trackers are kept per resource group across the scheduler instances,
+    # which are created for each scheduling pass.
+    share_trackers: ClassVar[dict[str, DominantShareTracker]] = {}
+
+    tracker: Optional[DominantShareTracker]
     total_capacity: ResourceSlot
 
     def __init__(
@@ -32,13 +193,35 @@ class DRFScheduler(AbstractScheduler):
         config: Mapping[str, Any],
     ) -> None:
         super().__init__(sgroup_opts, config)
-        self.per_user_dominant_share = defaultdict(lambda: Decimal(0))
+        self.tracker = None
+        self._reconciled_capacity: Optional[dict[str, Any]] = None
+        # A min-heap of (dominant share, order of the first pending session, access key)
+        # of the users with pending sessions. Outdated entries are skipped when they are popped.
+        self._heap: list[tuple[Decimal, int, AccessKey]] = []
+        self._pending_queues: dict[AccessKey, deque[SessionRow]] = {}
+        self._user_orders: dict[AccessKey, int] = {}
+        self._num_pending = 0
+        self._last_picked: Optional[SessionRow] = None
 
     @property
     @override
     def config_iv(self) -> t.Dict:
         return t.Dict({}).allow_extra("*")
 
+    @classmethod
+    def forget_session(cls, session_id: SessionId) -> None:
+        """
+        Remove the terminated session from the dominant shares of all resource groups.
+        """
+        for tracker in cls.share_trackers.values():
+            tracker.forget_session(session_id)
+
+    @property
+    def per_user_dominant_share(self) -> dict[AccessKey, Decimal]:
+        if self.tracker is None:
+            return {}
+        return self.tracker.dominant_shares()
+
     @override
     def pick_session(
         self,
@@ -47,63 +230,103 @@ class DRFScheduler(AbstractScheduler):
         existing_sessions: Sequence[SessionRow],
     ) -> Optional[SessionId]:
         self.total_capacity = total_capacity
-
-        # Calculate the initial dominant shares of all users.
-        for existing_sess in existing_sessions:
-            dominant_share = Decimal(0)
-            self.total_capacity.sync_keys(existing_sess.occupying_slots)
-            for slot, value in existing_sess.occupying_slots.items():
-                slot_cap = Decimal(self.total_capacity[slot])
-                if slot_cap == 0:
-                    continue
-                slot_share = Decimal(value) / slot_cap
-                if dominant_share < slot_share:
-                    dominant_share = slot_share
-            if self.per_user_dominant_share[existing_sess.access_key] < dominant_share:
-                self.per_user_dominant_share[existing_sess.access_key] = dominant_share
-        log.debug("per-user dominant share: {}", dict(self.per_user_dominant_share))
+        if not pending_sessions:
+            return None
+        tracker = self.tracker
+        if tracker is None:
+            # The first pick in this scheduling pass.
+            sgroup_name = pending_sessions[0].scaling_group_name
+            tracker = self.share_trackers.setdefault(sgroup_name, DominantShareTracker())
+            tracker.reconcile(total_capacity, existing_sessions)
+            self.tracker = tracker
+            self._reconciled_capacity = dict(total_capacity.data)
+            self._rebuild_pending_queues(pending_sessions)
+        else:
+            self._update_pending_queues(pending_sessions)
+            if total_capacity.data != self._reconciled_capacity:
+                # The agents have changed in the middle of the pass.
+                tracker.reconcile(total_capacity, existing_sessions, keep_allocations=True)
+                self._reconciled_capacity = dict(total_capacity.data)
+                self._rebuild_heap()
+        log.debug("per-user dominant share: {}", self.per_user_dominant_share)
 
         # Find who has the least dominant share among the pending session.
-        users_with_pending_session: set[AccessKey] = {
-            pending_sess.access_key for pending_sess in pending_sessions
-        }
-        if not users_with_pending_session:
-            return None
-        least_dominant_share_user, dshare = min(
-            ((akey, self.per_user_dominant_share[akey]) for akey in users_with_pending_session),
-            key=lambda item: item[1],
-        )
-        log.debug("least dominant share user: {} ({})", least_dominant_share_user, dshare)
+        heap = self._heap
+        while heap:
+            dshare, order, access_key = heap[0]
+            if access_key not in self._pending_queues:
+                heapq.heappop(heap)
+                continue
+            current_dshare = tracker.dominant_share(access_key)
+            if dshare != current_dshare:
+                # The share has changed after the entry was pushed.
+                heapq.heapreplace(heap, (current_dshare, order, access_key))
+                continue
+            log.debug("least dominant share user: {} ({})", access_key, dshare)
+            # Pick the first pending session of the user
+            # who has the lowest dominant share.
+            picked_sess = self._pending_queues[access_key][0]
+            self._last_picked = picked_sess
+            return SessionId(picked_sess.id)
+        return None
 
-        # Pick the first pending session of the user
-        # who has the lowest dominant share.
-        for pending_sess in pending_sessions:
-            if pending_sess.access_key == least_dominant_share_user:
-                return SessionId(pending_sess.id)
+    def _rebuild_pending_queues(self, pending_sessions: Sequence[SessionRow]) -> None:
+        self._pending_queues.clear()
+        self._user_orders.clear()
+        for order, pending_sess in enumerate(pending_sessions):
+            access_key = pending_sess.access_key
+            if access_key not in self._pending_queues:
+                self._pending_queues[access_key] = deque()
+                self._user_orders[access_key] = order
+            self._pending_queues[access_key].append(pending_sess)
+        self._num_pending = len(pending_sessions)
+        self._last_picked = None
+        self._rebuild_heap()
 
-        return None
+    def _rebuild_heap(self) -> None:
+        assert self.tracker is not None
+        self._heap = [
+            (self.tracker.dominant_share(access_key), self._user_orders[access_key], access_key)
+            for access_key in self._pending_queues
+        ]
+        heapq.heapify(self._heap)
+
+    def _update_pending_queues(self, pending_sessions: Sequence[SessionRow]) -> None:
+        """
+        Drop the last picked session from the pending queues, as the scheduler dispatcher removes
+        the picked session from the pending session list after trying it.
+        """
+        if len(pending_sessions) == self._num_pending:
+            return
+        last_picked = self._last_picked
+        if last_picked is None or len(pending_sessions) != self._num_pending - 1:
+            # The pending session list has changed in an unexpected way.
+            self._rebuild_pending_queues(pending_sessions)
+            return
+        access_key = last_picked.access_key
+        queue = self._pending_queues[access_key]
+        queue.popleft()
+        if not queue:
+            del self._pending_queues[access_key]
+        self._num_pending -= 1
+        self._last_picked = None
 
     @override
     def update_allocation(
         self,
         scheduled_session_or_kernel: SessionRow | KernelRow,
     ) -> None:
-        # In such case, we just skip updating self.per_user_dominant_share state
+        # In such case, we just skip updating the dominant share state
         # and the scheduler dispatcher continues to pick another session within the same scaling group.
+        if self.tracker is None:
+            return
         access_key = scheduled_session_or_kernel.access_key
         requested_slots = scheduled_session_or_kernel.requested_slots
 
         # Update the dominant share.
         # This is required to use to the latest dominant share information
         # when iterating over multiple pending sessions in a single scaling group.
-        dominant_share_from_request = Decimal(0)
-        for slot, value in requested_slots.items():
-            self.total_capacity.sync_keys(requested_slots)
-            slot_cap = Decimal(self.total_capacity[slot])
-            if slot_cap == 0:
-                continue
-            slot_share = Decimal(value) / slot_cap
-            if dominant_share_from_request < slot_share:
-                dominant_share_from_request = slot_share
-        if self.per_user_dominant_share[access_key] < dominant_share_from_request:
-            self.per_user_dominant_share[access_key] = dominant_share_from_request
+        prev_dominant_share = self.tracker.dominant_share(access_key)
+        dominant_share = self.tracker.add_allocation(access_key, requested_slots)
+        if dominant_share != prev_dominant_share and access_key in self._pending_queues:
+            heapq.heappush(self._heap, (dominant_share, self._user_orders[access_key], access_key))
@@ -1,26 +1,44 @@
+from __future__ import annotations
+
 import logging
+import uuid
+from collections.abc import Mapping, Sequence
 from datetime import datetime
+from typing import Any, Optional
 
+import attrs
 import sqlalchemy as sa
 from dateutil.tz import tzutc
 from sqlalchemy.ext.asyncio import AsyncSession as SASession
 from sqlalchemy.orm import load_only, noload
 
 from ai.backend.common import redis_helper
-from ai.backend.common.types import ResourceSlot, SessionResult, SessionTypes
+from ai.backend.common.types import (
+    AccessKey,
+    CompactResourceSlot,
+    ResourceSlot,
+    SessionId,
+    SessionResult,
+    SessionTypes,
+    SlotName,
+    SlotSchema,
+    SlotTypes,
+)
 from ai.backend.logging import BraceStyleAdapter
 
 from ..models import (
     DefaultForUnspecified,
     DomainRow,
     GroupRow,
+    KernelRow,
     KeyPairResourcePolicyRow,
     KeyPairRow,
     SessionDependencyRow,
     SessionRow,
     UserRow,
 )
-from ..models.session import SessionStatus
+from ..models.kernel import USER_RESOURCE_OCCUPYING_KERNEL_STATUSES
+from ..models.session import PRIVATE_SESSION_TYPES, SessionStatus
 from ..models.utils import execute_with_retry
 from .types import PredicateResult, SchedulingContext
 
@@ -83,6 +101,14 @@ async def check_concurrency(
         return result.scalar()
 
     max_concurrent_sessions = await execute_with_retry(_get_max_concurrent_sessions)
+    return await _acquire_concurrency(sched_ctx, sess_ctx, max_concurrent_sessions)
+
+
+async def _acquire_concurrency(
+    sched_ctx: SchedulingContext,
+    sess_ctx: SessionRow,
+    max_concurrent_sessions: int,
+) -> PredicateResult:
     if sess_ctx.is_private:
         redis_key = f"keypair.sftp_concurrency_used.{sess_ctx.access_key}"
     else:
@@ -145,6 +171,33 @@ async def check_dependencies(
     )
 
 
+def _fits_in_limit(
+    occupied_slots: ResourceSlot,
+    requested_slots: ResourceSlot,
+    allowed_slots: ResourceSlot,
+) -> bool:
+    schema = SlotSchema.of(allowed_slots.keys())
+    return CompactResourceSlot.from_resource_slot(
+        occupied_slots, schema
+    ) + CompactResourceSlot.from_resource_slot(
+        requested_slots, schema
+    ) <= CompactResourceSlot.from_resource_slot(allowed_slots, schema)
+
+
+def _quota_exceeded(
+    scope: str,
+    total_allowed: ResourceSlot,
+    known_slot_types: Mapping[SlotName, SlotTypes],
+) -> PredicateResult:
+    return PredicateResult(
+        False,
+        "Your {} resource quota is exceeded. ({})".format(
+            scope,
+            " ".join(f"{k}={v}" for k, v in total_allowed.to_humanized(known_slot_types).items()),
+        ),
+    )
+
+
 async def check_keypair_resource_limit(
     db_sess: SASession,
     sched_ctx: SchedulingContext,
@@ -170,18 +223,8 @@ async def check_keypair_resource_limit(
     )
     log.debug("keypair:{} current-occupancy: {}", sess_ctx.access_key, key_occupied)
     log.debug("keypair:{} total-allowed: {}", sess_ctx.access_key, total_keypair_allowed)
-    if not (key_occupied + sess_ctx.requested_slots <= total_keypair_allowed):
-        return PredicateResult(
-            False,
-            "Your keypair resource quota is exceeded. ({})".format(
-                " ".join(
-                    f"{k}={v}"
-                    for k, v in total_keypair_allowed.to_humanized(
-                        sched_ctx.known_slot_types
-                    ).items()
-                )
-            ),
-        )
+    if not _fits_in_limit(key_occupied, sess_ctx.requested_slots, total_keypair_allowed):
+        return _quota_exceeded("keypair", total_keypair_allowed, sched_ctx.known_slot_types)
     return PredicateResult(True)
 
 
@@ -216,17 +259,9 @@ async def check_user_resource_limit(
     user_occupied = await sched_ctx.registry.get_user_occupancy(sess_ctx.user_uuid, db_sess=db_sess)
     log.debug("user:{} current-occupancy: {}", sess_ctx.user_uuid, user_occupied)
     log.debug("user:{} total-allowed: {}", sess_ctx.user_uuid, total_main_keypair_allowed)
-    if not (user_occupied + sess_ctx.requested_slots <= total_main_keypair_allowed):
-        return PredicateResult(
-            False,
-            "Your main-keypair resource quota is exceeded. ({})".format(
-                " ".join(
-                    f"{k}={v}"
-                    for k, v in total_main_keypair_allowed.to_humanized(
-                        sched_ctx.known_slot_types
-                    ).items()
-                )
-            ),
+    if not _fits_in_limit(user_occupied, sess_ctx.requested_slots, total_main_keypair_allowed):
+        return _quota_exceeded(
+            "main-keypair", total_main_keypair_allowed, sched_ctx.known_slot_types
         )
     return PredicateResult(True)
 
@@ -250,16 +285,8 @@ async def check_group_resource_limit(
     )
     log.debug("group:{} current-occupancy: {}", sess_ctx.group_id, group_occupied)
     log.debug("group:{} total-allowed: {}", sess_ctx.group_id, total_group_allowed)
-    if not (group_occupied + sess_ctx.requested_slots <= total_group_allowed):
-        return PredicateResult(
-            False,
-            "Your group resource quota is exceeded. ({})".format(
-                " ".join(
-                    f"{k}={v}"
-                    for k, v in total_group_allowed.to_humanized(sched_ctx.known_slot_types).items()
-                )
-            ),
-        )
+    if not _fits_in_limit(group_occupied, sess_ctx.requested_slots, total_group_allowed):
+        return _quota_exceeded("group", total_group_allowed, sched_ctx.known_slot_types)
     return PredicateResult(True)
 
 
@@ -282,18 +309,8 @@ async def check_domain_resource_limit(
     )
     log.debug("domain:{} current-occupancy: {}", sess_ctx.domain_name, domain_occupied)
     log.debug("domain:{} total-allowed: {}", sess_ctx.domain_name, total_domain_allowed)
-    if not (domain_occupied + sess_ctx.requested_slots <= total_domain_allowed):
-        return PredicateResult(
-            False,
-            "Your domain resource quota is exceeded. ({})".format(
-                " ".join(
-                    f"{k}={v}"
-                    for k, v in total_domain_allowed.to_humanized(
-                        sched_ctx.known_slot_types
-                    ).items()
-                )
-            ),
-        )
+    if not _fits_in_limit(domain_occupied, sess_ctx.requested_slots, total_domain_allowed):
+        return _quota_exceeded("domain", total_domain_allowed, sched_ctx.known_slot_types)
     return PredicateResult(True)
 
 
@@ -302,9 +319,6 @@ async def check_pending_session_count_limit(
     sched_ctx: SchedulingContext,
     sess_ctx: SessionRow,
 ) -> PredicateResult:
-    result = True
-    failure_msgs = []
-
     query = (
         sa.select(SessionRow)
         .where(
@@ -334,9 +348,20 @@ async def check_pending_session_count_limit(
     )
     policy: KeyPairResourcePolicyRow = (await db_sess.scalars(policy_stmt)).first()
 
-    pending_count_limit: int | None = policy.max_pending_session_count
+    return _evaluate_pending_session_count(
+        sess_ctx, len(pending_sessions), policy.max_pending_session_count
+    )
+
+
+def _evaluate_pending_session_count(
+    sess_ctx: SessionRow,
+    num_pending_sessions: int,
+    pending_count_limit: int | None,
+) -> PredicateResult:
+    result = True
+    failure_msgs = []
     if pending_count_limit is not None:
-        if len(pending_sessions) >= pending_count_limit:
+        if num_pending_sessions >= pending_count_limit:
             result = False
             failure_msgs.append(
                 f"You cannot create more than {pending_count_limit} pending session(s)."
@@ -345,7 +370,7 @@ async def check_pending_session_count_limit(
     log.debug(
         "access key:{} number of pending sessions: {} / {}",
         sess_ctx.access_key,
-        len(pending_sessions),
+        num_pending_sessions,
         pending_count_limit,
     )
     if not result:
@@ -358,9 +383,6 @@ async def check_pending_session_resource_limit(
     sched_ctx: SchedulingContext,
     sess_ctx: SessionRow,
 ) -> PredicateResult:
-    result = True
-    failure_msgs = []
-
     query = (
         sa.select(SessionRow)
         .where(
@@ -391,31 +413,406 @@ async def check_pending_session_resource_limit(
     policy: KeyPairResourcePolicyRow = (await db_sess.scalars(policy_stmt)).first()
 
     pending_resource_limit: ResourceSlot | None = policy.max_pending_session_resource_slots
-    if pending_resource_limit is not None and pending_resource_limit:
-        current_pending_session_slots: ResourceSlot = sum(
-            [session.requested_slots for session in pending_sessions], start=ResourceSlot()
-        )
-        if current_pending_session_slots >= pending_resource_limit:
-            result = False
-            msg = "Your pending session quota is exceeded. ({})".format(
-                " ".join(
-                    f"{k}={v}"
-                    for k, v in current_pending_session_slots.to_humanized(
-                        sched_ctx.known_slot_types
-                    ).items()
-                )
+    if pending_resource_limit is None or not pending_resource_limit:
+        return PredicateResult(True)
+    compact_pending_session_slots = CompactResourceSlot.sum(
+        (session.requested_slots for session in pending_sessions),
+        SlotSchema.of(pending_resource_limit.keys()),
+    )
+    return _evaluate_pending_session_resource(
+        sched_ctx, sess_ctx, compact_pending_session_slots, pending_resource_limit
+    )
+
+
+def _evaluate_pending_session_resource(
+    sched_ctx: SchedulingContext,
+    sess_ctx: SessionRow,
+    compact_pending_session_slots: CompactResourceSlot,
+    pending_resource_limit: ResourceSlot,
+) -> PredicateResult:
+    result = True
+    failure_msgs = []
+    current_pending_session_slots = compact_pending_session_slots.to_resource_slot()
+    if compact_pending_session_slots >= CompactResourceSlot.from_resource_slot(
+        pending_resource_limit, compact_pending_session_slots.schema
+    ):
+        result = False
+        msg = "Your pending session quota is exceeded. ({})".format(
+            " ".join(
+                f"{k}={v}"
+                for k, v in current_pending_session_slots.to_humanized(
+                    sched_ctx.known_slot_types
+                ).items()
             )
-            failure_msgs.append(msg)
-        log.debug(
-            "access key:{} current-occupancy of pending sessions: {}",
-            sess_ctx.access_key,
-            current_pending_session_slots,
-        )
-        log.debug(
-            "access key:{} total-allowed of pending sessions: {}",
-            sess_ctx.access_key,
-            pending_resource_limit,
         )
+        failure_msgs.append(msg)
+    log.debug(
+        "access key:{} current-occupancy of pending sessions: {}",
+        sess_ctx.access_key,
+        current_pending_session_slots,
+    )
+    log.debug(
+        "access key:{} total-allowed of pending sessions: {}",
+        sess_ctx.access_key,
+        pending_resource_limit,
+    )
     if not result:
         return PredicateResult(False, "\n".join(failure_msgs))
     return PredicateResult(True)
+
+
+def _add_occupancy(
+    occupancy: dict[Any, CompactResourceSlot],
+    key: Any,
+    slots: CompactResourceSlot,
+) -> None:
+    current = occupancy.get(key)
+    occupancy[key] = slots if current is None else current + slots
+
+
+@attrs.define(auto_attribs=True, slots=True)
+class PredicateBatch:
+    """
+    The resource policies, the occupancy and the pending sessions of all keypairs, users,
+    projects and domains that the pending sessions of a scheduling pass belong to.
+
+    It is loaded in a few aggregate queries at the beginning of a pass, so that the predicates
+    of each pending session are evaluated in memory with the same results as the predicate
+    functions above, which run their own queries for every session.
+    The occupancy and the pending sessions are updated in memory as the sessions get scheduled
+    in the pass through :meth:`add_allocation()` and :meth:`remove_pending()`.
+    """
+
+    known_slot_types: Mapping[SlotName, SlotTypes]
+    occupancy_schema: SlotSchema
+    keypair_policies: dict[AccessKey, KeyPairResourcePolicyRow] = attrs.Factory(dict)
+    main_keypair_policies: dict[uuid.UUID, KeyPairResourcePolicyRow] = attrs.Factory(dict)
+    group_resource_slots: dict[uuid.UUID, Any] = attrs.Factory(dict)
+    domain_resource_slots: dict[str, Any] = attrs.Factory(dict)
+    keypair_occupancy: dict[AccessKey, CompactResourceSlot] = attrs.Factory(dict)
+    user_occupancy: dict[uuid.UUID, CompactResourceSlot] = attrs.Factory(dict)
+    group_occupancy: dict[uuid.UUID, CompactResourceSlot] = attrs.Factory(dict)
+    domain_occupancy: dict[str, CompactResourceSlot] = attrs.Factory(dict)
+    # The requested slots of the pending sessions per access key.
+    pending_sessions: dict[AccessKey, dict[SessionId, ResourceSlot]] = attrs.Factory(dict)
+    starts_at: dict[SessionId, Optional[datetime]] = attrs.Factory(dict)
+    dependencies: dict[SessionId, list[Any]] = attrs.Factory(dict)
+
+    @classmethod
+    async def load(
+        cls,
+        db_sess: SASession,
+        sched_ctx: SchedulingContext,
+        pending_sessions: Sequence[SessionRow],
+    ) -> PredicateBatch:
+        known_slot_types = sched_ctx.known_slot_types
+        batch = cls(known_slot_types, SlotSchema.of(known_slot_types.keys()))
+        if not pending_sessions:
+            return batch
+        access_keys = {sess.access_key for sess in pending_sessions}
+        user_ids = {sess.user_uuid for sess in pending_sessions}
+        group_ids = {sess.group_id for sess in pending_sessions}
+        domain_names = {sess.domain_name for sess in pending_sessions}
+        session_ids = [sess.id for sess in pending_sessions]
+
+        # TODO: replace keypair resource policies with user resource policies
+        keypair_j = sa.join(
+            KeyPairRow,
+            KeyPairResourcePolicyRow,
+            KeyPairRow.resource_policy == KeyPairResourcePolicyRow.name,
+        )
+        query = (
+            sa.select(KeyPairRow.access_key, KeyPairResourcePolicyRow)
+            .select_from(keypair_j)
+            .where(KeyPairRow.access_key.in_(access_keys))
+        )
+        for row in (await db_sess.execute(query)).fetchall():
+            batch.keypair_policies[row.access_key] = row.KeyPairResourcePolicyRow
+        main_keypair_j = sa.join(
+            UserRow,
+            keypair_j,
+            UserRow.main_access_key == KeyPairRow.access_key,
+        )
+        query = (
+            sa.select(UserRow.uuid, KeyPairResourcePolicyRow)
+            .select_from(main_keypair_j)
+            .where(UserRow.uuid.in_(user_ids))
+        )
+        for row in (await db_sess.execute(query)).fetchall():
+            batch.main_keypair_policies[row.uuid] = row.KeyPairResourcePolicyRow
+        query = sa.select(GroupRow.id, GroupRow.total_resource_slots).where(
+            GroupRow.id.in_(group_ids)
+        )
+        for row in (await db_sess.execute(query)).fetchall():
+            batch.group_resource_slots[row.id] = row.total_resource_slots
+        query = sa.select(DomainRow.name, DomainRow.total_resource_slots).where(
+            DomainRow.name.in_(domain_names)
+        )
+        for row in (await db_sess.execute(query)).fetchall():
+            batch.domain_resource_slots[row.name] = row.total_resource_slots
+
+        # Aggregate the occupancy of all scopes from a single scan of the occupying kernels.
+        query = sa.select(
+            KernelRow.access_key,
+            KernelRow.user_uuid,
+            KernelRow.group_id,
+            KernelRow.domain_name,
+            KernelRow.occupied_slots,
+        ).where(
+            (KernelRow.status.in_(USER_RESOURCE_OCCUPYING_KERNEL_STATUSES))
+            & (KernelRow.session_type.not_in(PRIVATE_SESSION_TYPES))
+            & (
+                KernelRow.access_key.in_(access_keys)
+                | KernelRow.user_uuid.in_(user_ids)
+                | KernelRow.group_id.in_(group_ids)
+                | KernelRow.domain_name.in_(domain_names)
+            )
+        )
+        schema = batch.occupancy_schema
+        async for row in await db_sess.stream(query):
+            # drop no-longer used slot types
+            occupied_slots = CompactResourceSlot.from_resource_slot(
+                row.occupied_slots, schema
+            ).with_schema(schema)
+            if row.access_key in access_keys:
+                _add_occupancy(batch.keypair_occupancy, row.access_key, occupied_slots)
+            if row.user_uuid in user_ids:
+                _add_occupancy(batch.user_occupancy, row.user_uuid, occupied_slots)
+            if row.group_id in group_ids:
+                _add_occupancy(batch.group_occupancy, row.group_id, occupied_slots)
+            if row.domain_name in domain_names:
+                _add_occupancy(batch.domain_occupancy, row.domain_name, occupied_slots)
+
+        query = sa.select(
+            SessionRow.id,
+            SessionRow.access_key,
+            SessionRow.requested_slots,
+            SessionRow.starts_at,
+        ).where(
+            (SessionRow.access_key.in_(access_keys)) & (SessionRow.status == SessionStatus.PENDING)
+        )
+        for row in (await db_sess.execute(query)).fetchall():
+            batch.pending_sessions.setdefault(row.access_key, {})[row.id] = row.requested_slots
+            batch.starts_at[row.id] = row.starts_at
+
+        dependency_j = sa.join(
+            SessionDependencyRow,
+            SessionRow,
+            SessionDependencyRow.depends_on == SessionRow.id,
+        )
+        query = (
+            sa.select(
+                SessionDependencyRow.session_id,
+                SessionRow.id,
+                SessionRow.name,
+                SessionRow.status,
+                SessionRow.result,
+            )
+            .select_from(dependency_j)
+            .where(SessionDependencyRow.session_id.in_(session_ids))
+        )
+        for row in (await db_sess.execute(query)).fetchall():
+            batch.dependencies.setdefault(row.session_id, []).append(row)
+        log.debug(
+            "loaded predicate batch (sessions:{}, keypairs:{}, users:{}, groups:{}, domains:{})",
+            len(session_ids),
+            len(access_keys),
+            len(user_ids),
+            len(group_ids),
+            len(domain_names),
+        )
+        return batch
+
+    def remove_pending(self, sess_ctx: SessionRow) -> None:
+        """
+        Reflect that the session is no longer pending (e.g., cancelled) in the current pass.
+        """
+        pending_sessions = self.pending_sessions.get(sess_ctx.access_key)
+        if pending_sessions is not None:
+            pending_sessions.pop(sess_ctx.id, None)
+
+    def add_allocation(self, sess_ctx: SessionRow) -> None:
+        """
+        Reflect that the session is scheduled in the current pass.
+        """
+        self.remove_pending(sess_ctx)
+        if sess_ctx.is_private:
+            return
+        requested_slots = CompactResourceSlot.from_resource_slot(
+            sess_ctx.requested_slots, self.occupancy_schema
+        ).with_schema(self.occupancy_schema)
+        _add_occupancy(self.keypair_occupancy, sess_ctx.access_key, requested_slots)
+        _add_occupancy(self.user_occupancy, sess_ctx.user_uuid, requested_slots)
+        _add_occupancy(self.group_occupancy, sess_ctx.group_id, requested_slots)
+        _add_occupancy(self.domain_occupancy, sess_ctx.domain_name, requested_slots)
+
+    def _get_occupancy(
+        self,
+        occupancy: Mapping[Any, CompactResourceSlot],
+        key: Any,
+    ) -> ResourceSlot:
+        occupied = occupancy.get(key)
+        if occupied is None:
+            return ResourceSlot()
+        return occupied.to_resource_slot()
+
+    async def check_reserved_batch_session(
+        self,
+        sched_ctx: SchedulingContext,
+        sess_ctx: SessionRow,
+    ) -> PredicateResult:
+        if sess_ctx.session_type == SessionTypes.BATCH:
+            starts_at = self.starts_at.get(sess_ctx.id)
+            if starts_at is not None and datetime.now(tzutc()) < starts_at:
+                return PredicateResult(
+                    False,
+                    "Before start time",
+                )
+        return PredicateResult(True)
+
+    async def check_dependencies(
+        self,
+        sched_ctx: SchedulingContext,
+        sess_ctx: SessionRow,
+    ) -> PredicateResult:
+        pending_dependencies = [
+            row
+            for row in self.dependencies.get(sess_ctx.id, [])
+            if row.result != SessionResult.SUCCESS or row.status != SessionStatus.TERMINATED
+        ]
+        if not pending_dependencies:
+            return PredicateResult(True)
+        return PredicateResult(
+            False,
+            "Waiting dependency sessions to finish as success. ({})".format(
+                ", ".join(f"{row.name} ({row.id})" for row in pending_dependencies),
+            ),
+        )
+
+    async def check_concurrency(
+        self,
+        sched_ctx: SchedulingContext,
+        sess_ctx: SessionRow,
+    ) -> PredicateResult:
+        # The concurrency counters live in Redis and are shared with the session creation API,
+        # so they are still checked and incremented per session.
+        policy = self.keypair_policies[sess_ctx.access_key]
+        if sess_ctx.is_private:
+            max_concurrent_sessions = policy.max_concurrent_sftp_sessions
+        else:
+            max_concurrent_sessions = policy.max_concurrent_sessions
+        return await _acquire_concurrency(sched_ctx, sess_ctx, max_concurrent_sessions)
+
+    async def check_pending_session_resource_limit(
+        self,
+        sched_ctx: SchedulingContext,
+        sess_ctx: SessionRow,
+    ) -> PredicateResult:
+        policy = self.keypair_policies.get(sess_ctx.access_key)
+        pending_resource_limit: ResourceSlot | None = policy.max_pending_session_resource_slots
+        if pending_resource_limit is None or not pending_resource_limit:
+            return PredicateResult(True)
+        compact_pending_session_slots = CompactResourceSlot.sum(
+            self.pending_sessions.get(sess_ctx.access_key, {}).values(),
+            SlotSchema.of(pending_resource_limit.keys()),
+        )
+        return _evaluate_pending_session_resource(
+            sched_ctx, sess_ctx, compact_pending_session_slots, pending_resource_limit
+        )
+
+    async def check_pending_session_count_limit(
+        self,
+        sched_ctx: SchedulingContext,
+        sess_ctx: SessionRow,
+    ) -> PredicateResult:
+        policy = self.keypair_policies.get(sess_ctx.access_key)
+        return _evaluate_pending_session_count(
+            sess_ctx,
+            len(self.pending_sessions.get(sess_ctx.access_key, {})),
+            policy.max_pending_session_count,
+        )
+
+    async def check_keypair_resource_limit(
+        self,
+        sched_ctx: SchedulingContext,
+        sess_ctx: SessionRow,
+    ) -> PredicateResult:
+        resource_policy = self.keypair_policies.get(sess_ctx.access_key)
+        resource_policy_map = {
+            "total_resource_slots": resource_policy.total_resource_slots,
+            "default_for_unspecified": resource_policy.default_for_unspecified,
+        }
+        total_keypair_allowed = ResourceSlot.from_policy(
+            resource_policy_map, sched_ctx.known_slot_types
+        )
+        key_occupied = self._get_occupancy(self.keypair_occupancy, sess_ctx.access_key)
+        log.debug("keypair:{} current-occupancy: {}", sess_ctx.access_key, key_occupied)
+        log.debug("keypair:{} total-allowed: {}", sess_ctx.access_key, total_keypair_allowed)
+        if not _fits_in_limit(key_occupied, sess_ctx.requested_slots, total_keypair_allowed):
+            return _quota_exceeded("keypair", total_keypair_allowed, sched_ctx.known_slot_types)
+        return PredicateResult(True)
+
+    async def check_user_resource_limit(
+        self,
+        sched_ctx: SchedulingContext,
+        sess_ctx: SessionRow,
+    ) -> PredicateResult:
+        resource_policy = self.main_keypair_policies.get(sess_ctx.user_uuid)
+        if resource_policy is None:
+            return PredicateResult(
+                False,
+                f"User has no main-keypair or the main-keypair has no keypair resource policy (uid: {sess_ctx.user_uuid})",
+            )
+        resource_policy_map = {
+            "total_resource_slots": resource_policy.total_resource_slots,
+            "default_for_unspecified": resource_policy.default_for_unspecified,
+        }
+        total_main_keypair_allowed = ResourceSlot.from_policy(
+            resource_policy_map, sched_ctx.known_slot_types
+        )
+        user_occupied = self._get_occupancy(self.user_occupancy, sess_ctx.user_uuid)
+        log.debug("user:{} current-occupancy: {}", sess_ctx.user_uuid, user_occupied)
+        log.debug("user:{} total-allowed: {}", sess_ctx.user_uuid, total_main_keypair_allowed)
+        if not _fits_in_limit(user_occupied, sess_ctx.requested_slots, total_main_keypair_allowed):
+            return _quota_exceeded(
+                "main-keypair", total_main_keypair_allowed, sched_ctx.known_slot_types
+            )
+        return PredicateResult(True)
+
+    async def check_group_resource_limit(
+        self,
+        sched_ctx: SchedulingContext,
+        sess_ctx: SessionRow,
+    ) -> PredicateResult:
+        group_resource_policy = {
+            "total_resource_slots": self.group_resource_slots.get(sess_ctx.group_id),
+            "default_for_unspecified": DefaultForUnspecified.UNLIMITED,
+        }
+        total_group_allowed = ResourceSlot.from_policy(
+            group_resource_policy, sched_ctx.known_slot_types
+        )
+        group_occupied = self._get_occupancy(self.group_occupancy, sess_ctx.group_id)
+        log.debug("group:{} current-occupancy: {}", sess_ctx.group_id, group_occupied)
+        log.debug("group:{} total-allowed: {}", sess_ctx.group_id, total_group_allowed)
+        if not _fits_in_limit(group_occupied, sess_ctx.requested_slots, total_group_allowed):
+            return _quota_exceeded("group", total_group_allowed, sched_ctx.known_slot_types)
+        return PredicateResult(True)
+
+    async def check_domain_resource_limit(
+        self,
+        sched_ctx: SchedulingContext,
+        sess_ctx: SessionRow,
+    ) -> PredicateResult:
+        domain_resource_policy = {
+            "total_resource_slots": self.domain_resource_slots.get(sess_ctx.domain_name),
+            "default_for_unspecified": DefaultForUnspecified.UNLIMITED,
+        }
+        total_domain_allowed = ResourceSlot.from_policy(
+            domain_resource_policy, sched_ctx.known_slot_types
+        )
+        domain_occupied = self._get_occupancy(self.domain_occupancy, sess_ctx.domain_name)
+        log.debug("domain:{} current-occupancy: {}", sess_ctx.domain_name, domain_occupied)
+        log.debug("domain:{} total-allowed: {}", sess_ctx.domain_name, total_domain_allowed)
+        if not _fits_in_limit(domain_occupied, sess_ctx.requested_slots, total_domain_allowed):
+            return _quota_exceeded("domain", total_domain_allowed, sched_ctx.known_slot_types)
+        return PredicateResult(True)
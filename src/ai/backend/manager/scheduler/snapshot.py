@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import enum
+import logging
+import uuid
+from collections.abc import Iterable, Mapping, Sequence
+from decimal import Decimal
+from typing import Any, Optional
+
+import attrs
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession as SASession
+
+from ai.backend.common.types import (
+    AccessKey,
+    AgentId,
+    CompactResourceSlot,
+    KernelId,
+    ResourceSlot,
+    SessionId,
+    SessionTypes,
+)
+from ai.backend.logging import BraceStyleAdapter
+from ai.backend.manager.models.kernel import USER_RESOURCE_OCCUPYING_KERNEL_STATUSES
+
+from ..models import (
+    AgentRow,
+    RoutingRow,
+    SessionRow,
+    list_schedulable_agents_by_sgroup,
+)
+from .capacity_matrix import AgentCapacityMatrix
+from .types import AgentAllocationContext, KernelAgentBinding
+
+__all__ = (
+    "SchedulingFailureKind",
+    "SchedulingFailure",
+    "SessionAllocation",
+    "ResourceGroupSnapshot",
+    "load_resource_group_snapshot",
+)
+
+log = BraceStyleAdapter(logging.getLogger(__spec__.name))  # type: ignore
+
+
+class SchedulingFailureKind(enum.StrEnum):
+    """
+    The kind of a scheduling failure decided in a snapshot-based scheduling pass.
+    The values are stored as the ``status_info`` of the failed session or kernel.
+    """
+
+    PREDICATE_CHECKS_FAILED = "predicate-checks-failed"
+    NO_AVAILABLE_INSTANCES = "no-available-instances"
+    SCHEDULER_ERROR = "scheduler-error"
+
+
+@attrs.define(auto_attribs=True, slots=True)
+class SchedulingFailure:
+    session: SessionRow
+    kind: SchedulingFailureKind
+    status_data: Mapping[str, Any]
+    # Set when the failure is bound to a specific kernel of a multi-node session.
+    kernel_id: Optional[KernelId] = None
+    # Private (system) sessions are cancelled immediately upon predicate failures.
+    cancel: bool = False
+
+
+@attrs.define(auto_attribs=True, slots=True)
+class SessionAllocation:
+    session: SessionRow
+    kernel_bindings: list[KernelAgentBinding]
+
+    @property
+    def agent_ids(self) -> list[AgentId]:
+        return [
+            binding.agent_alloc_ctx.agent_id
+            for binding in self.kernel_bindings
+            if binding.agent_alloc_ctx.agent_id is not None
+        ]
+
+
+@attrs.define(auto_attribs=True, slots=True)
+class ResourceGroupSnapshot:
+    """
+    An in-memory view of a resource group loaded once per scheduling pass.
+
+    The occupied slots of the agents are updated in memory as the scheduler makes decisions,
+    and the accumulated decisions are committed in a single transaction at the end of the pass.
+    The agent rows are detached from their DB session, so mutating them here never writes
+    back to the database by itself.
+    """
+
+    sgroup_name: str
+    agents: dict[AgentId, AgentRow]
+    schedulable_agent_ids: list[AgentId]
+    max_container_count: Optional[int] = None
+    container_counts: dict[AgentId, int] = attrs.Factory(dict)
+    # Only populated when the resource group enforces spreading of endpoint replicas.
+    session_endpoints: dict[SessionId, uuid.UUID] = attrs.Factory(dict)
+    endpoint_kernel_counts: dict[uuid.UUID, dict[AgentId, int]] = attrs.Factory(dict)
+    allocations: list[SessionAllocation] = attrs.Factory(list)
+    failures: list[SchedulingFailure] = attrs.Factory(list)
+    # The scheduler status data of the sessions which have passed the predicates
+    status_updates: dict[SessionId, Mapping[str, Any]] = attrs.Factory(dict)
+    occupied_deltas: dict[AgentId, CompactResourceSlot] = attrs.Factory(dict)
+    # Mirrors the occupied slots of the agents for the agent selectors.
+    capacity_matrix: AgentCapacityMatrix = attrs.field(
+        default=attrs.Factory(
+            lambda self: AgentCapacityMatrix.from_agents(self.agents.values()), takes_self=True
+        )
+    )
+
+    @property
+    def candidate_agents(self) -> list[AgentRow]:
+        return [self.agents[agent_id] for agent_id in self.schedulable_agent_ids]
+
+    @property
+    def total_capacity(self) -> ResourceSlot:
+        return CompactResourceSlot.sum(
+            ag.available_slots for ag in self.candidate_agents
+        ).to_resource_slot()
+
+    def filter_by_container_limit(self, agents: Iterable[AgentRow]) -> list[AgentRow]:
+        if self.max_container_count is None:
+            return [*agents]
+        return [
+            ag for ag in agents if self.max_container_count > self.container_counts.get(ag.id, 0)
+        ]
+
+    def get_remaining_slots(self, agent_id: AgentId) -> ResourceSlot:
+        agent = self.agents[agent_id]
+        return ResourceSlot({
+            key: value - agent.occupied_slots.get(key, Decimal(0))
+            for key, value in agent.available_slots.items()
+        })
+
+    def reserve(
+        self,
+        agent_id: AgentId,
+        requested_slots: ResourceSlot,
+        *,
+        num_containers: int = 1,
+    ) -> AgentAllocationContext:
+        agent = self.agents[agent_id]
+        agent.occupied_slots = agent.occupied_slots + requested_slots
+        self.capacity_matrix.reserve(agent_id, requested_slots)
+        delta = self.occupied_deltas.get(agent_id)
+        if delta is None:
+            self.occupied_deltas[agent_id] = CompactResourceSlot.from_resource_slot(requested_slots)
+        else:
+            self.occupied_deltas[agent_id] = delta + CompactResourceSlot.from_resource_slot(
+                requested_slots, delta.schema
+            )
+        self.container_counts[agent_id] = self.container_counts.get(agent_id, 0) + num_containers
+        return AgentAllocationContext(agent_id, agent.addr, self.sgroup_name)
+
+    def release(
+        self,
+        agent_id: AgentId,
+        requested_slots: ResourceSlot,
+        *,
+        num_containers: int = 1,
+    ) -> None:
+        agent = self.agents[agent_id]
+        agent.occupied_slots = agent.occupied_slots - requested_slots
+        self.capacity_matrix.release(agent_id, requested_slots)
+        delta = self.occupied_deltas[agent_id]
+        self.occupied_deltas[agent_id] = delta - CompactResourceSlot.from_resource_slot(
+            requested_slots, delta.schema
+        )
+        self.container_counts[agent_id] = self.container_counts.get(agent_id, 0) - num_containers
+
+    def add_allocation(self, allocation: SessionAllocation) -> None:
+        self.allocations.append(allocation)
+        endpoint_id = self.session_endpoints.get(allocation.session.id)
+        if endpoint_id is not None:
+            kernel_counts = self.endpoint_kernel_counts.setdefault(endpoint_id, {})
+            for agent_id in allocation.agent_ids:
+                kernel_counts[agent_id] = kernel_counts.get(agent_id, 0) + 1
+
+    def remove_allocation(self, allocation: SessionAllocation) -> None:
+        """
+        Revert an allocation rejected when committing the snapshot, releasing its reservations.
+        """
+        self.allocations.remove(allocation)
+        for binding in allocation.kernel_bindings:
+            agent_id = binding.agent_alloc_ctx.agent_id
+            assert agent_id is not None
+            self.release(agent_id, binding.kernel.requested_slots)
+        endpoint_id = self.session_endpoints.get(allocation.session.id)
+        if endpoint_id is not None:
+            kernel_counts = self.endpoint_kernel_counts[endpoint_id]
+            for agent_id in allocation.agent_ids:
+                kernel_counts[agent_id] -= 1
+
+    def add_failure(self, failure: SchedulingFailure) -> None:
+        self.failures.append(failure)
+
+    def count_allocated_kernels(self, access_key: AccessKey) -> tuple[int, int]:
+        """
+        Return the numbers of the kernels of the regular and the private sessions allocated
+        to the access key in this pass, which are not committed yet.
+        """
+        num_kernels, num_private_kernels = 0, 0
+        for allocation in self.allocations:
+            if allocation.session.access_key != access_key:
+                continue
+            if allocation.session.is_private:
+                num_private_kernels += len(allocation.kernel_bindings)
+            else:
+                num_kernels += len(allocation.kernel_bindings)
+        return num_kernels, num_private_kernels
+
+
+async def load_resource_group_snapshot(
+    db_sess: SASession,
+    sgroup_name: str,
+    pending_sessions: Sequence[SessionRow],
+    *,
+    load_endpoint_kernel_counts: bool = False,
+) -> ResourceGroupSnapshot:
+    """
+    Load the schedulable agents of the resource group and the agents manually designated
+    by the given pending sessions in a few queries.
+
+    When ``load_endpoint_kernel_counts`` is set, it also loads the per-agent kernel counts
+    of the model-service endpoints that the pending inference sessions belong to,
+    so that the agent selector can spread replicas without querying the DB per session.
+    """
+    # Avoid circular imports
+    from .dispatcher import get_kernel_count_per_agent_at_endpoint
+
+    schedulable_agents = await list_schedulable_agents_by_sgroup(db_sess, sgroup_name)
+    agents: dict[AgentId, AgentRow] = {ag.id: ag for ag in schedulable_agents}
+    designated_agent_ids = {
+        kernel.agent
+        for sess in pending_sessions
+        for kernel in sess.kernels
+        if kernel.agent is not None and kernel.agent not in agents
+    }
+    if designated_agent_ids:
+        query = sa.select(AgentRow).where(AgentRow.id.in_(designated_agent_ids))
+        for ag in (await db_sess.scalars(query)).all():
+            agents[ag.id] = ag
+    snapshot = ResourceGroupSnapshot(
+        sgroup_name=sgroup_name,
+        agents=agents,
+        schedulable_agent_ids=[ag.id for ag in schedulable_agents],
+    )
+    if load_endpoint_kernel_counts:
+        inference_session_ids = [
+            sess.id for sess in pending_sessions if sess.session_type == SessionTypes.INFERENCE
+        ]
+        if inference_session_ids:
+            query = sa.select(RoutingRow.session, RoutingRow.endpoint).where(
+                RoutingRow.session.in_(inference_session_ids)
+            )
+            for row in (await db_sess.execute(query)).fetchall():
+                snapshot.session_endpoints[row.session] = row.endpoint
+            for endpoint_id in set(snapshot.session_endpoints.values()):
+                snapshot.endpoint_kernel_counts[
+                    endpoint_id
+                ] = await get_kernel_count_per_agent_at_endpoint(
+                    db_sess, endpoint_id, USER_RESOURCE_OCCUPYING_KERNEL_STATUSES
+                )
+    log.debug(
+        "loaded resource group snapshot (sgroup:{}, agents:{}, designated:{})",
+        sgroup_name,
+        len(schedulable_agents),
+        len(designated_agent_ids),
+    )
+    return snapshot
@@ -461,6 +461,9 @@ async def event_dispatcher_ctx(root_ctx: RootContext) -> AsyncIterator[None]:
     root_ctx.event_producer = await EventProducer.new(
         etcd_redis_config.get_override_config(RedisRole.STREAM),
         db=REDIS_STREAM_DB,
+        batch_size=root_ctx.local_config["manager"]["event-batch-size"],
+        batch_window=root_ctx.local_config["manager"]["event-batch-window"],
+        max_buffer_size=root_ctx.local_config["manager"]["event-buffer-size"],
     )
     root_ctx.event_dispatcher = await event_dispatcher_cls.new(
         etcd_redis_config.get_override_config(RedisRole.STREAM),
@@ -566,6 +569,9 @@ async def agent_registry_ctx(root_ctx: RootContext) -> AsyncIterator[None]:
         debug=root_ctx.local_config["debug"]["enabled"],
         manager_public_key=manager_public_key,
         manager_secret_key=manager_secret_key,
+        heartbeat_batch_window=root_ctx.local_config["manager"]["heartbeat-batch-window"],
+        heartbeat_batch_size=root_ctx.local_config["manager"]["heartbeat-batch-size"],
+        heartbeat_timeout=root_ctx.local_config["manager"]["heartbeat-timeout"],
     )
     await root_ctx.registry.init()
     yield
@@ -43,7 +43,7 @@ class UserScope:
 
 
 class DistributedLockFactory(Protocol):
-    def __call__(self, lock_id: LockID, lifetime_hint: float) -> AbstractDistributedLock: ...
+    def __call__(self, lock_id: LockID | int, lifetime_hint: float) -> AbstractDistributedLock: ...
 
 
 class MountOptionModel(BaseModel):
@@ -5,10 +5,15 @@ Client-facing API
 from __future__ import annotations
 
 import asyncio
+import errno
+import fcntl
 import json
 import logging
 import os
+import secrets
+import shutil
 import urllib.parse
+import weakref
 from datetime import datetime
 from pathlib import Path
 from typing import (
@@ -28,6 +33,7 @@ import janus
 import trafaret as t
 import zipstream
 from aiohttp import hdrs, web
+from yarl import URL
 
 from ai.backend.common import validators as tx
 from ai.backend.common.files import AsyncFileWriter
@@ -47,6 +53,29 @@ log = BraceStyleAdapter(logging.getLogger(__spec__.name))
 
 DEFAULT_CHUNK_SIZE: Final = 256 * 1024  # 256 KiB
 DEFAULT_INFLIGHT_CHUNKS: Final = 8
+# The number of bytes to copy per copy_file_range() call when concatenating the partial uploads.
+CONCAT_CHUNK_SIZE: Final = 64 * 1024 * 1024  # 64 MiB
+# The name of the temporary file to concatenate the partial uploads in the parts directory,
+# which never conflicts with the partial upload IDs.
+UPLOAD_CONCAT_TEMP_NAME: Final = ".concat"
+
+TUS_EXTENSIONS: Final = "concatenation"
+TUS_HEADERS: Final = (
+    "Tus-Resumable, Upload-Length, Upload-Metadata, Upload-Offset, Upload-Concat, Content-Type"
+)
+_COPY_FILE_RANGE_UNSUPPORTED_ERRNOS: Final = frozenset({
+    errno.EXDEV,
+    errno.ENOSYS,
+    errno.EOPNOTSUPP,
+    errno.EINVAL,
+})
+
+# The locks to serialize the requests modifying the same upload session or partial upload
+# in this process, which are released when no request holds or waits for them.
+_upload_locks: weakref.WeakValueDictionary[Path, asyncio.Lock] = weakref.WeakValueDictionary()
+
+# A partial upload ID consists of a random hex string and the length of the partial upload.
+upload_part_id_iv = t.Regexp(r"^[0-9a-f]{16}-[0-9]+$")
 
 
 class DownloadTokenData(TypedDict):
@@ -288,6 +317,7 @@ async def tus_check_session(request: web.Request) -> web.Response:
     class Params(TypedDict):
         token: UploadTokenData
         dst_dir: str
+        part: str | None
 
     async with cast(
         AsyncContextManager[Params],
@@ -300,6 +330,7 @@ async def tus_check_session(request: web.Request) -> web.Response:
                         inner_iv=upload_token_data_iv,
                     ),
                     t.Key("dst_dir", default=None): t.Null | t.String,
+                    t.Key("part", default=None): t.Null | upload_part_id_iv,
                 },
             ),
             read_from=CheckParamSource.QUERY,
@@ -308,9 +339,148 @@ async def tus_check_session(request: web.Request) -> web.Response:
         token_data = params["token"]
         async with ctx.get_volume(token_data["volume"]) as volume:
             headers = await prepare_tus_session_headers(request, token_data, volume)
+            if (part_id := params["part"]) is not None:
+                upload_temp_path = (
+                    volume.mangle_vfpath(token_data["vfid"]) / ".upload" / token_data["session"]
+                )
+                part_path = get_upload_part_path(upload_temp_path, part_id)
+                headers.update(prepare_tus_part_headers(part_path, part_id))
     return web.Response(headers=headers)
 
 
+async def tus_create_upload(request: web.Request) -> web.Response:
+    """
+    Create a partial upload or concatenate the partial uploads into the final upload
+    (the tus "concatenation" extension), so that clients could upload a large file
+    via multiple connections in parallel.
+
+    The upload sessions themselves are created by the manager, so only the requests with
+    the ``Upload-Concat`` header are accepted.
+    """
+    ctx: RootContext = request.app["ctx"]
+    secret = ctx.local_config["storage-proxy"]["secret"]
+
+    class Params(TypedDict):
+        token: UploadTokenData
+        dst_dir: str
+
+    async with cast(
+        AsyncContextManager[Params],
+        check_params(
+            request,
+            t.Dict(
+                {
+                    t.Key("token"): tx.JsonWebToken(
+                        secret=secret,
+                        inner_iv=upload_token_data_iv,
+                    ),
+                    t.Key("dst_dir", default=None): t.Null | t.String,
+                },
+            ),
+            read_from=CheckParamSource.QUERY,
+        ),
+    ) as params:
+        token_data = params["token"]
+        upload_concat = request.headers.get("Upload-Concat", "")
+        async with ctx.get_volume(token_data["volume"]) as volume:
+            headers = await prepare_tus_session_headers(request, token_data, volume)
+            vfpath = volume.mangle_vfpath(token_data["vfid"])
+            upload_temp_path: Path = vfpath / ".upload" / token_data["session"]
+            loop = asyncio.get_running_loop()
+            if upload_concat == "partial":
+                try:
+                    part_length = int(request.headers["Upload-Length"])
+                    if part_length < 0:
+                        raise ValueError
+                except (KeyError, ValueError):
+                    raise InvalidAPIParameters("Missing or invalid Upload-Length header.")
+                if part_length > int(token_data["size"]):
+                    raise InvalidAPIParameters("The partial upload is larger than the file.")
+                part_id = f"{secrets.token_hex(8)}-{part_length}"
+                part_path = get_upload_part_path(upload_temp_path, part_id)
+
+                def _create_part() -> None:
+                    part_path.parent.mkdir(exist_ok=True)
+                    part_path.touch()
+
+                await loop.run_in_executor(None, _create_part)
+                location = URL(request.rel_url.name).with_query({
+                    **request.rel_url.query,
+                    "part": part_id,
+                })
+                headers.update(prepare_tus_part_headers(part_path, part_id))
+                headers[hdrs.LOCATION] = str(location)
+                headers["Access-Control-Expose-Headers"] += ", Location"
+                return web.Response(status=201, headers=headers)
+            elif upload_concat.startswith("final;"):
+                async with get_upload_lock(upload_temp_path):
+                    await concat_upload(
+                        upload_concat,
+                        upload_temp_path,
+                        vfpath,
+                        params["dst_dir"],
+                        token_data,
+                    )
+                headers["Upload-Offset"] = str(token_data["size"])
+                return web.Response(status=201, headers=headers)
+            else:
+                raise InvalidAPIParameters(
+                    "Only the concatenation requests are allowed to create uploads."
+                )
+
+
+async def concat_upload(
+    upload_concat: str,
+    upload_temp_path: Path,
+    vfpath: Path,
+    dst_dir: str | None,
+    token_data: Mapping[str, Any],
+) -> None:
+    """
+    Validate the partial uploads listed in the ``Upload-Concat: final;...`` header and
+    concatenate them into the final upload.
+    """
+    if not upload_temp_path.exists():
+        # Another request has already concatenated the partial uploads.
+        raise _upload_conflict("The partial uploads are already concatenated")
+    part_paths: list[Path] = []
+    total_length = 0
+    for part_url in upload_concat.removeprefix("final;").split():
+        try:
+            part_id = upload_part_id_iv.check(URL(part_url).query.get("part"))
+        except (t.DataError, ValueError):
+            raise InvalidAPIParameters(f"Invalid partial upload URL: {part_url}")
+        part_path = get_upload_part_path(upload_temp_path, part_id)
+        part_length = get_upload_part_length(part_id)
+        try:
+            part_size = part_path.stat().st_size
+        except FileNotFoundError:
+            raise InvalidAPIParameters(f"No such partial upload: {part_id}")
+        if part_size != part_length:
+            raise InvalidAPIParameters(f"The partial upload is not completed: {part_id}")
+        if part_path in part_paths:
+            raise InvalidAPIParameters(f"Duplicate partial upload: {part_id}")
+        part_paths.append(part_path)
+        total_length += part_length
+    if not part_paths:
+        raise InvalidAPIParameters("No partial uploads to concatenate.")
+    if total_length != int(token_data["size"]):
+        raise InvalidAPIParameters(
+            "The total length of the partial uploads does not match the file size."
+        )
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(
+            None,
+            concat_upload_parts,
+            upload_temp_path,
+            part_paths,
+        )
+    except BlockingIOError:
+        raise _upload_conflict("The partial uploads are being concatenated by another request")
+    await finalize_upload(upload_temp_path, vfpath, dst_dir, token_data)
+
+
 async def tus_upload_part(request: web.Request) -> web.Response:
     """
     Perform the chunk upload.
@@ -321,6 +491,7 @@ async def tus_upload_part(request: web.Request) -> web.Response:
     class Params(TypedDict):
         token: UploadTokenData
         dst_dir: str
+        part: str | None
 
     async with cast(
         AsyncContextManager[Params],
@@ -333,6 +504,7 @@ async def tus_upload_part(request: web.Request) -> web.Response:
                         inner_iv=upload_token_data_iv,
                     ),
                     t.Key("dst_dir", default=None): t.Null | t.String,
+                    t.Key("part", default=None): t.Null | upload_part_id_iv,
                 },
             ),
             read_from=CheckParamSource.QUERY,
@@ -343,6 +515,13 @@ async def tus_upload_part(request: web.Request) -> web.Response:
             headers = await prepare_tus_session_headers(request, token_data, volume)
             vfpath = volume.mangle_vfpath(token_data["vfid"])
             upload_temp_path: Path = vfpath / ".upload" / token_data["session"]
+            if (part_id := params["part"]) is not None:
+                part_path = get_upload_part_path(upload_temp_path, part_id)
+                async with get_upload_lock(part_path):
+                    headers.update(prepare_tus_part_headers(part_path, part_id))
+                    await write_upload_part(request, part_path, part_id)
+                    headers["Upload-Offset"] = str(part_path.stat().st_size)
+                return web.Response(status=204, headers=headers)
 
             async with AsyncFileWriter(
                 target_filename=upload_temp_path,
@@ -355,25 +534,137 @@ async def tus_upload_part(request: web.Request) -> web.Response:
 
             current_size = Path(upload_temp_path).stat().st_size
             if current_size >= int(token_data["size"]):
-                parent_dir = vfpath
-                if (dst_dir := params["dst_dir"]) is not None:
-                    parent_dir = vfpath / dst_dir
-                target_path: Path = parent_dir / token_data["relpath"]
-                if not target_path.parent.exists():
-                    target_path.parent.mkdir(parents=True, exist_ok=True)
-                upload_temp_path.rename(target_path)
-                try:
-                    loop = asyncio.get_running_loop()
-                    await loop.run_in_executor(
-                        None,
-                        lambda: upload_temp_path.parent.rmdir(),
-                    )
-                except OSError:
-                    pass
+                await finalize_upload(upload_temp_path, vfpath, params["dst_dir"], token_data)
             headers["Upload-Offset"] = str(current_size)
     return web.Response(status=204, headers=headers)
 
 
+async def write_upload_part(request: web.Request, part_path: Path, part_id: str) -> None:
+    """
+    Append the request body to the partial upload, which must start from the current offset
+    and must not exceed the length of the partial upload.
+    """
+    current_size = part_path.stat().st_size
+    if (offset := request.headers.get("Upload-Offset")) is not None and offset != str(current_size):
+        raise web.HTTPConflict(
+            body=json.dumps(
+                {
+                    "title": "Upload-Offset does not match the current offset",
+                    "type": "https://api.backend.ai/probs/storage/upload-offset-mismatch",
+                },
+            ),
+            content_type="application/problem+json",
+        )
+    remaining = get_upload_part_length(part_id) - current_size
+    async with AsyncFileWriter(
+        target_filename=part_path,
+        access_mode="ab",
+        max_chunks=DEFAULT_INFLIGHT_CHUNKS,
+    ) as writer:
+        while not request.content.at_eof():
+            chunk = await request.content.read(DEFAULT_CHUNK_SIZE)
+            remaining -= len(chunk)
+            if remaining < 0:
+                raise InvalidAPIParameters("The data exceeds the length of the partial upload.")
+            await writer.write(chunk)
+
+
+def concat_upload_parts(upload_temp_path: Path, part_paths: list[Path]) -> None:
+    """
+    Concatenate the partial uploads into the upload session file.
+
+    The parts are concatenated into a temporary file, which replaces the session file only
+    after all parts are copied and flushed to the disk, and the parts are removed only after
+    that, so that a failed concatenation could be retried with the same parts.
+    Raises :exc:`BlockingIOError` if another process is concatenating the same parts.
+
+    The parts are appended with :func:`os.copy_file_range()`, which lets the filesystems
+    supporting reflinks or server-side copies share or copy the data without passing it
+    through the userspace.
+    """
+    concat_path = get_upload_parts_path(upload_temp_path) / UPLOAD_CONCAT_TEMP_NAME
+    # Not truncating the file before taking the lock, as another process may be writing it.
+    with open(os.open(concat_path, os.O_RDWR | os.O_CREAT, 0o644), "r+b") as fdst:
+        # The lock is released when the file is closed, also when the process is killed.
+        fcntl.flock(fdst.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        try:
+            current_ino: int | None = os.stat(concat_path).st_ino
+        except FileNotFoundError:
+            current_ino = None
+        if current_ino != os.fstat(fdst.fileno()).st_ino:
+            # Another process has renamed the file to the session file just before locking it.
+            raise BlockingIOError(errno.EAGAIN, "The partial uploads are already concatenated")
+        try:
+            fdst.truncate(0)
+            offset = 0
+            use_copy_file_range = hasattr(os, "copy_file_range")
+            for part_path in part_paths:
+                with open(part_path, "rb") as fsrc:
+                    copied: int | None = None
+                    if use_copy_file_range:
+                        try:
+                            copied = _copy_file_range_all(fsrc.fileno(), fdst.fileno(), offset)
+                        except OSError as e:
+                            if e.errno not in _COPY_FILE_RANGE_UNSUPPORTED_ERRNOS:
+                                raise
+                            use_copy_file_range = False
+                    if copied is None:
+                        fdst.seek(offset)
+                        shutil.copyfileobj(fsrc, fdst, DEFAULT_CHUNK_SIZE)
+                        fdst.flush()
+                        copied = fdst.tell() - offset
+                    offset += copied
+            os.fsync(fdst.fileno())
+            os.replace(concat_path, upload_temp_path)
+        except BaseException:
+            concat_path.unlink(missing_ok=True)
+            raise
+    for part_path in part_paths:
+        part_path.unlink(missing_ok=True)
+
+
+def _copy_file_range_all(src_fd: int, dst_fd: int, dst_offset: int) -> int:
+    copied_total = 0
+    while copied := os.copy_file_range(
+        src_fd,
+        dst_fd,
+        CONCAT_CHUNK_SIZE,
+        copied_total,
+        dst_offset + copied_total,
+    ):
+        copied_total += copied
+    return copied_total
+
+
+async def finalize_upload(
+    upload_temp_path: Path,
+    vfpath: Path,
+    dst_dir: str | None,
+    token_data: Mapping[str, Any],
+) -> None:
+    """
+    Move the completed upload to the target path and clean up the upload session.
+    """
+    parent_dir = vfpath
+    if dst_dir is not None:
+        parent_dir = vfpath / dst_dir
+    target_path: Path = parent_dir / token_data["relpath"]
+    if not target_path.parent.exists():
+        target_path.parent.mkdir(parents=True, exist_ok=True)
+    upload_temp_path.rename(target_path)
+
+    def _cleanup() -> None:
+        # Remove the partial uploads not included in the final upload as well.
+        shutil.rmtree(get_upload_parts_path(upload_temp_path), ignore_errors=True)
+        upload_temp_path.parent.rmdir()
+
+    try:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, _cleanup)
+    except OSError:
+        pass
+
+
 async def tus_options(request: web.Request) -> web.Response:
     """
     Let clients discover the supported features of our tus.io server-side implementation.
@@ -381,15 +672,12 @@ async def tus_options(request: web.Request) -> web.Response:
     ctx: RootContext = request.app["ctx"]
     headers = {}
     headers["Access-Control-Allow-Origin"] = "*"
-    headers["Access-Control-Allow-Headers"] = (
-        "Tus-Resumable, Upload-Length, Upload-Metadata, Upload-Offset, Content-Type"
-    )
-    headers["Access-Control-Expose-Headers"] = (
-        "Tus-Resumable, Upload-Length, Upload-Metadata, Upload-Offset, Content-Type"
-    )
+    headers["Access-Control-Allow-Headers"] = TUS_HEADERS
+    headers["Access-Control-Expose-Headers"] = TUS_HEADERS
     headers["Access-Control-Allow-Methods"] = "*"
     headers["Tus-Resumable"] = "1.0.0"
     headers["Tus-Version"] = "1.0.0"
+    headers["Tus-Extension"] = TUS_EXTENSIONS
     headers["Tus-Max-Size"] = str(
         int(ctx.local_config["storage-proxy"]["max-upload-size"]),
     )
@@ -416,12 +704,8 @@ async def prepare_tus_session_headers(
         )
     headers = {}
     headers["Access-Control-Allow-Origin"] = "*"
-    headers["Access-Control-Allow-Headers"] = (
-        "Tus-Resumable, Upload-Length, Upload-Metadata, Upload-Offset, Content-Type"
-    )
-    headers["Access-Control-Expose-Headers"] = (
-        "Tus-Resumable, Upload-Length, Upload-Metadata, Upload-Offset, Content-Type"
-    )
+    headers["Access-Control-Allow-Headers"] = TUS_HEADERS
+    headers["Access-Control-Expose-Headers"] = TUS_HEADERS
     headers["Access-Control-Allow-Methods"] = "*"
     headers["Cache-Control"] = "no-store"
     headers["Tus-Resumable"] = "1.0.0"
@@ -430,6 +714,57 @@ async def prepare_tus_session_headers(
     return headers
 
 
+def get_upload_lock(path: Path) -> asyncio.Lock:
+    if (lock := _upload_locks.get(path)) is None:
+        lock = asyncio.Lock()
+        _upload_locks[path] = lock
+    return lock
+
+
+def _upload_conflict(title: str) -> web.HTTPConflict:
+    return web.HTTPConflict(
+        body=json.dumps(
+            {
+                "title": title,
+                "type": "https://api.backend.ai/probs/storage/upload-conflict",
+            },
+        ),
+        content_type="application/problem+json",
+    )
+
+
+def get_upload_parts_path(upload_temp_path: Path) -> Path:
+    return upload_temp_path.with_name(f"{upload_temp_path.name}.parts")
+
+
+def get_upload_part_path(upload_temp_path: Path, part_id: str) -> Path:
+    return get_upload_parts_path(upload_temp_path) / part_id
+
+
+def get_upload_part_length(part_id: str) -> int:
+    return int(part_id.rpartition("-")[2])
+
+
+def prepare_tus_part_headers(part_path: Path, part_id: str) -> dict[str, str]:
+    try:
+        part_size = part_path.stat().st_size
+    except FileNotFoundError:
+        raise web.HTTPNotFound(
+            body=json.dumps(
+                {
+                    "title": "No such partial upload",
+                    "type": "https://api.backend.ai/probs/storage/no-such-upload-session",
+                },
+            ),
+            content_type="application/problem+json",
+        )
+    return {
+        "Upload-Concat": "partial",
+        "Upload-Offset": str(part_size),
+        "Upload-Length": str(get_upload_part_length(part_id)),
+    }
+
+
 async def init_client_app(ctx: RootContext) -> web.Application:
     app = web.Application()
     app["ctx"] = ctx
@@ -450,6 +785,7 @@ async def init_client_app(ctx: RootContext) -> web.Application:
     r = app.router.add_resource("/upload")
     r.add_route("OPTIONS", tus_options)
     r.add_route("HEAD", tus_check_session)
+    r.add_route("POST", tus_create_upload)
     r.add_route("PATCH", tus_upload_part)
 
     return app
@@ -5,9 +5,12 @@ Manager-facing API
 from __future__ import annotations
 
 import asyncio
+import base64
+import binascii
 import json
 import logging
 import os
+import uuid
 import weakref
 from contextlib import contextmanager as ctxmgr
 from datetime import datetime
@@ -18,7 +21,9 @@ from typing import (
     AsyncContextManager,
     Awaitable,
     Callable,
+    Final,
     Iterator,
+    Mapping,
     NotRequired,
     Optional,
     TypedDict,
@@ -54,6 +59,7 @@ from .. import __version__
 from ..exception import (
     ExecutionError,
     ExternalError,
+    InvalidAPIParameters,
     InvalidQuotaConfig,
     InvalidSubpathError,
     QuotaScopeAlreadyExists,
@@ -61,8 +67,8 @@ from ..exception import (
     StorageProxyError,
     VFolderNotFoundError,
 )
-from ..types import QuotaConfig, VFolderID
-from ..utils import check_params, log_manager_api_entry
+from ..types import DirEntry, DirEntrySortKey, ListFilesQuery, QuotaConfig, VFolderID
+from ..utils import check_params, log_manager_api_entry, report_bgtask_progress
 from ..watcher import ChownTask, MountTask, UmountTask
 from .vfolder.handler import VFolderHandler
 
@@ -72,6 +78,13 @@ if TYPE_CHECKING:
 
 log = BraceStyleAdapter(logging.getLogger(__spec__.name))
 
+# The chunk size used when the file cannot be sent with sendfile(), such as over TLS.
+FETCH_FILE_CHUNK_SIZE: Final = 1 * 1024 * 1024  # 1 MiB
+LIST_FILES_DEFAULT_PAGE_SIZE: Final = 1000
+LIST_FILES_MAX_PAGE_SIZE: Final = 10000
+# The number of entries to write at once when streaming the file list.
+LIST_FILES_STREAM_BATCH_SIZE: Final = 256
+
 
 @web.middleware
 async def token_auth_middleware(
@@ -464,6 +477,7 @@ async def clone_vfolder(request: web.Request) -> web.Response:
         dst_volume: str | None  # deprecated
         dst_vfid: VFolderID
         options: dict[str, Any] | None  # deprecated
+        bgtask_id: uuid.UUID | None
 
     async with cast(
         AsyncContextManager[Params],
@@ -476,6 +490,7 @@ async def clone_vfolder(request: web.Request) -> web.Response:
                     t.Key("dst_volume"): t.String() | t.Null,
                     t.Key("dst_vfid"): tx.VFolderID(),
                     t.Key("options", default=None): t.Null | t.Dict().allow_extra("*"),
+                    t.Key("bgtask_id", default=None): t.Null | tx.UUID,
                 },
             ),
         ),
@@ -486,10 +501,14 @@ async def clone_vfolder(request: web.Request) -> web.Response:
         ctx: RootContext = request.app["ctx"]
         if params["dst_volume"] is not None and params["dst_volume"] != params["src_volume"]:
             raise StorageProxyError("Cross-volume vfolder cloning is not implemented yet")
+        progress = None
+        if params["bgtask_id"] is not None:
+            progress = report_bgtask_progress(ctx.event_producer, params["bgtask_id"])
         async with ctx.get_volume(params["src_volume"]) as src_volume:
             await src_volume.clone_vfolder(
                 params["src_vfid"],
                 params["dst_vfid"],
+                progress=progress,
             )
         return web.Response(status=204)
 
@@ -606,6 +625,22 @@ async def fetch_file(request: web.Request) -> web.StreamResponse:
         prepared = False
         try:
             async with ctx.get_volume(params["volume"]) as volume:
+                with handle_fs_errors(volume, params["vfid"]):
+                    file_path = await volume.get_local_file_path(
+                        params["vfid"],
+                        params["relpath"],
+                    )
+                if file_path is not None:
+                    if not file_path.is_file():
+                        raise FileNotFoundError
+                    # FileResponse uses sendfile() when the transport allows it and
+                    # handles the range requests as well.
+                    response = web.FileResponse(
+                        file_path,
+                        chunk_size=FETCH_FILE_CHUNK_SIZE,
+                        headers={hdrs.CONTENT_TYPE: "application/octet-stream"},
+                    )
+                    return response
                 with handle_fs_errors(volume, params["vfid"]):
                     async for chunk in volume.read_file(
                         params["vfid"],
@@ -726,12 +761,14 @@ async def get_vfolder_usage(request: web.Request) -> web.Response:
             ctx: RootContext = request.app["ctx"]
             async with ctx.get_volume(params["volume"]) as volume:
                 usage = await volume.get_usage(params["vfid"])
-                return web.json_response(
-                    {
-                        "file_count": usage.file_count,
-                        "used_bytes": usage.used_bytes,
-                    },
-                )
+                resp: dict[str, Any] = {
+                    "file_count": usage.file_count,
+                    "used_bytes": usage.used_bytes,
+                }
+                if usage.collected_at is not None:
+                    # The usage may be served from the usage index being revalidated.
+                    resp["collected_at"] = usage.collected_at
+                return web.json_response(resp)
         except ExecutionError:
             return web.Response(
                 status=500,
@@ -898,11 +935,72 @@ async def mkdir(request: web.Request) -> web.Response:
         )
 
 
-async def list_files(request: web.Request) -> web.Response:
+def _dir_entry_to_json(item: DirEntry) -> dict[str, Any]:
+    return {
+        "name": item.name,
+        "type": item.type.name,
+        "stat": {
+            "mode": item.stat.mode,
+            "size": item.stat.size,
+            "created": item.stat.created.isoformat(),
+            "modified": item.stat.modified.isoformat(),
+        },
+        "symlink_target": item.symlink_target,
+    }
+
+
+# The schemas of the sort keys in the cursors, which must be comparable with the sort keys
+# of the directory entries.
+_list_files_cursor_key_schemas: Final[Mapping[DirEntrySortKey, t.Trafaret]] = {
+    DirEntrySortKey.NAME: t.Tuple(t.String(allow_blank=True)),
+    DirEntrySortKey.SIZE: t.Tuple(t.Int(), t.String(allow_blank=True)),
+    DirEntrySortKey.MODIFIED: t.Tuple(t.Float(), t.String(allow_blank=True)),
+}
+
+
+def _encode_list_files_cursor(query: ListFilesQuery, item: DirEntry) -> str:
+    sort_key = query.sort_by.get_sort_key(item)
+    payload = json.dumps([query.sort_by.value, query.descending, *sort_key])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def _decode_list_files_cursor(
+    cursor: str,
+    sort_by: DirEntrySortKey,
+    descending: bool,
+) -> tuple[Any, ...]:
+    try:
+        cursor_sort_by, cursor_descending, *sort_key = json.loads(base64.urlsafe_b64decode(cursor))
+    except (ValueError, TypeError, binascii.Error):
+        raise InvalidAPIParameters(msg="Invalid cursor")
+    if cursor_sort_by != sort_by.value or cursor_descending != descending:
+        raise InvalidAPIParameters(msg="The cursor does not match the sort order")
+    try:
+        return _list_files_cursor_key_schemas[sort_by].check(sort_key)
+    except t.DataError:
+        raise InvalidAPIParameters(msg="Invalid cursor")
+
+
+async def list_files(request: web.Request) -> web.StreamResponse:
+    """
+    List the entries of a directory in a vfolder.
+
+    If any of the pagination, sorting and filtering parameters is given, the entries are
+    returned in pages of up to ``limit`` entries with the opaque ``next_cursor`` to fetch the
+    next page.  With ``stream``, the entries are streamed as newline-delimited JSON objects
+    followed by an object having only ``next_cursor`` if there are more entries to fetch.
+    """
+
     class Params(TypedDict):
         volume: str
         vfid: VFolderID
         relpath: PurePosixPath
+        limit: Optional[int]
+        cursor: Optional[str]
+        sort_by: Optional[DirEntrySortKey]
+        order: str
+        name_prefix: str
+        stream: bool
 
     async with cast(
         AsyncContextManager[Params],
@@ -913,37 +1011,107 @@ async def list_files(request: web.Request) -> web.Response:
                     t.Key("volume"): t.String(),
                     t.Key("vfid"): tx.VFolderID(),
                     t.Key("relpath"): tx.PurePath(relative_only=True),
+                    t.Key("limit", default=None): t.Null | t.Int[1:LIST_FILES_MAX_PAGE_SIZE],
+                    t.Key("cursor", default=None): t.Null | t.String(),
+                    t.Key("sort_by", default=None): t.Null | tx.Enum(DirEntrySortKey),
+                    t.Key("order", default="asc"): t.Enum("asc", "desc"),
+                    t.Key("name_prefix", default=""): t.String(allow_blank=True),
+                    t.Key("stream", default=False): t.ToBool,
                 },
             ),
         ),
     ) as params:
         await log_manager_api_entry(log, "list_files", params)
         ctx: RootContext = request.app["ctx"]
+        paginated = (
+            params["limit"] is not None
+            or params["cursor"] is not None
+            or params["sort_by"] is not None
+            or params["name_prefix"] != ""
+            or params["stream"]
+        )
+        if not paginated:
+            async with ctx.get_volume(params["volume"]) as volume:
+                with handle_fs_errors(volume, params["vfid"]):
+                    items = [
+                        _dir_entry_to_json(item)
+                        async for item in volume.scandir(
+                            params["vfid"],
+                            params["relpath"],
+                            recursive=False,
+                        )
+                    ]
+            return web.json_response(
+                {
+                    "items": items,
+                },
+            )
+
+        sort_by = params["sort_by"] or DirEntrySortKey.NAME
+        descending = params["order"] == "desc"
+        after = None
+        if params["cursor"] is not None:
+            after = _decode_list_files_cursor(params["cursor"], sort_by, descending)
+        limit = params["limit"]
+        if limit is None and not params["stream"]:
+            limit = LIST_FILES_DEFAULT_PAGE_SIZE
+        query = ListFilesQuery(
+            sort_by=sort_by,
+            descending=descending,
+            name_prefix=params["name_prefix"],
+            after=after,
+            # Fetch one more entry to check if there is the next page.
+            limit=limit + 1 if limit is not None else None,
+        )
         async with ctx.get_volume(params["volume"]) as volume:
-            with handle_fs_errors(volume, params["vfid"]):
-                items = [
-                    {
-                        "name": item.name,
-                        "type": item.type.name,
-                        "stat": {
-                            "mode": item.stat.mode,
-                            "size": item.stat.size,
-                            "created": item.stat.created.isoformat(),
-                            "modified": item.stat.modified.isoformat(),
+            file_iter = aiter(volume.list_files(params["vfid"], params["relpath"], query))
+            try:
+                with handle_fs_errors(volume, params["vfid"]):
+                    # Check the errors such as the missing directory before starting the response.
+                    first_item = await anext(file_iter, None)
+                if not params["stream"]:
+                    items: list[DirEntry] = []
+                    if first_item is not None:
+                        items.append(first_item)
+                        with handle_fs_errors(volume, params["vfid"]):
+                            async for item in file_iter:
+                                items.append(item)
+                    next_cursor = None
+                    if limit is not None and len(items) > limit:
+                        del items[limit:]
+                        next_cursor = _encode_list_files_cursor(query, items[-1])
+                    return web.json_response(
+                        {
+                            "items": [_dir_entry_to_json(item) for item in items],
+                            "next_cursor": next_cursor,
                         },
-                        "symlink_target": item.symlink_target,
-                    }
-                    async for item in volume.scandir(
-                        params["vfid"],
-                        params["relpath"],
-                        recursive=False,
                     )
-                ]
-        return web.json_response(
-            {
-                "items": items,
-            },
-        )
+                response = web.StreamResponse(status=200)
+                response.content_type = "application/x-ndjson"
+                await response.prepare(request)
+                count = 0
+                last_item: Optional[DirEntry] = None
+                lines: list[bytes] = []
+                item = first_item
+                while item is not None:
+                    if limit is not None and count == limit:
+                        assert last_item is not None
+                        cursor_line = {"next_cursor": _encode_list_files_cursor(query, last_item)}
+                        lines.append(json.dumps(cursor_line).encode("utf-8") + b"\n")
+                        break
+                    lines.append(json.dumps(_dir_entry_to_json(item)).encode("utf-8") + b"\n")
+                    count += 1
+                    last_item = item
+                    if len(lines) >= LIST_FILES_STREAM_BATCH_SIZE:
+                        await response.write(b"".join(lines))
+                        lines.clear()
+                    item = await anext(file_iter, None)
+                if lines:
+                    await response.write(b"".join(lines))
+                await response.write_eof()
+                return response
+            finally:
+                await file_iter.aclose()  # type: ignore[attr-defined]
 
 
 async def rename_file(request: web.Request) -> web.Response:
@@ -1,3 +1,4 @@
+import uuid
 from typing import Optional, Protocol
 
 from ai.backend.common.api_handlers import APIResponse, BodyParam, PathParam, api_handler
@@ -42,7 +43,13 @@ class VFolderServiceProtocol(Protocol):
 
     async def create_vfolder(self, vfolder_key: VFolderKey) -> None: ...
 
-    async def clone_vfolder(self, vfolder_key: VFolderKey, dst_vfolder_id: VFolderID) -> None: ...
+    async def clone_vfolder(
+        self,
+        vfolder_key: VFolderKey,
+        dst_vfolder_id: VFolderID,
+        *,
+        bgtask_id: Optional[uuid.UUID] = None,
+    ) -> None: ...
 
     async def get_vfolder_info(self, vfolder_key: VFolderKey, subpath: str) -> VFolderMeta: ...
 
@@ -117,7 +124,11 @@ class VFolderHandler:
         self, path: PathParam[VFolderKeyPath], body: BodyParam[CloneVFolderReq]
     ) -> APIResponse:
         vfolder_key = VFolderKey.from_vfolder_path(path.parsed)
-        await self._storage_service.clone_vfolder(vfolder_key, body.parsed.dst_vfolder_id)
+        await self._storage_service.clone_vfolder(
+            vfolder_key,
+            body.parsed.dst_vfolder_id,
+            bgtask_id=body.parsed.bgtask_id,
+        )
         return APIResponse.no_content(status_code=204)
 
     @api_handler
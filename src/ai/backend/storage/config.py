@@ -53,6 +53,13 @@ local_config_iv = (
                     ),
                     t.Key("event-loop", default="asyncio"): t.Enum("asyncio", "uvloop"),
                     t.Key("scandir-limit", default=1000): t.Int[0:],
+                    t.Key("scandir-threads", default=8): t.Int[1:],
+                    t.Key("copy-threads", default=8): t.Int[1:],
+                    t.Key("use-usage-index", default=False): t.ToBool,
+                    t.Key("usage-index-path", default=None): t.Null
+                    | tx.Path(type="dir", auto_create=True),
+                    t.Key("usage-index-fresh-period", default="1m"): tx.TimeDuration,
+                    t.Key("usage-index-full-rescan-interval", default="1h"): tx.TimeDuration,
                     t.Key("max-upload-size", default="100g"): tx.BinarySize,
                     t.Key("secret"): t.String,  # used to generate JWT tokens
                     t.Key("session-expire"): tx.TimeDuration,
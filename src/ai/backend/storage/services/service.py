@@ -21,7 +21,7 @@ from ..exception import (
     QuotaScopeNotFoundError,
     VFolderNotFoundError,
 )
-from ..utils import log_manager_api_entry_new
+from ..utils import log_manager_api_entry_new, report_bgtask_progress
 from ..volumes.pool import VolumePool
 from ..volumes.types import (
     QuotaScopeKey,
@@ -204,10 +204,19 @@ class VolumeService:
                 except QuotaScopeNotFoundError:
                     raise ExternalError("Failed to create vfolder due to quota scope not found")
 
-    async def clone_vfolder(self, vfolder_key: VFolderKey, dst_vfolder_id: VFolderID) -> None:
+    async def clone_vfolder(
+        self,
+        vfolder_key: VFolderKey,
+        dst_vfolder_id: VFolderID,
+        *,
+        bgtask_id: Optional[uuid.UUID] = None,
+    ) -> None:
         await log_manager_api_entry_new(log, "clone_vfolder", vfolder_key)
+        progress = None
+        if bgtask_id is not None:
+            progress = report_bgtask_progress(self._volume_pool._event_producer, bgtask_id)
         async with self._volume_pool.get_volume(vfolder_key.volume_id) as volume:
-            await volume.clone_vfolder(vfolder_key.vfolder_id, dst_vfolder_id)
+            await volume.clone_vfolder(vfolder_key.vfolder_id, dst_vfolder_id, progress=progress)
 
     async def get_vfolder_info(self, vfolder_key: VFolderKey, subpath: str) -> VFolderMeta:
         vfolder_id = vfolder_key.vfolder_id
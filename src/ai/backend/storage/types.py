@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import enum
+import heapq
+from collections.abc import Iterable
 from datetime import datetime
 from pathlib import Path, PurePath
 from typing import Any, Final, Mapping, Optional
@@ -23,6 +25,8 @@ __all__ = (
     "Stat",
     "DirEntry",
     "DirEntryType",
+    "DirEntrySortKey",
+    "ListFilesQuery",
 )
 
 
@@ -81,6 +85,8 @@ class VolumeInfo:
 class TreeUsage:
     file_count: int  # TODO: refactor using DecimalSize
     used_bytes: int  # TODO: refactor using DecimalSize
+    # The UNIX timestamp when the usage was collected, if it is served from a cache.
+    collected_at: Optional[float] = None
 
 
 @attrs.define(slots=True, frozen=True)
@@ -105,3 +111,54 @@ class DirEntry:
     type: DirEntryType
     stat: Stat
     symlink_target: str
+
+
+class DirEntrySortKey(enum.StrEnum):
+    NAME = "name"
+    SIZE = "size"
+    MODIFIED = "modified"
+
+    def get_sort_key(self, entry: DirEntry) -> tuple[Any, ...]:
+        """
+        Return the key to sort the directory entries, which is also used as the pagination cursor.
+        The entry name is used to break ties so that every entry has a distinct key.
+        """
+        match self:
+            case DirEntrySortKey.NAME:
+                return (entry.name,)
+            case DirEntrySortKey.SIZE:
+                return (entry.stat.size, entry.name)
+            case DirEntrySortKey.MODIFIED:
+                return (entry.stat.modified.timestamp(), entry.name)
+
+
+@attrs.define(slots=True, frozen=True)
+class ListFilesQuery:
+    sort_by: DirEntrySortKey = DirEntrySortKey.NAME
+    descending: bool = False
+    name_prefix: str = ""
+    # The sort key of the last entry of the previous page to continue after.
+    after: Optional[tuple[Any, ...]] = None
+    limit: Optional[int] = None
+
+    def is_after_cursor(self, sort_key: tuple[Any, ...]) -> bool:
+        if self.after is None:
+            return True
+        if self.descending:
+            return sort_key < self.after
+        return sort_key > self.after
+
+    def select(self, entries: Iterable[DirEntry]) -> list[DirEntry]:
+        """
+        Filter and sort the given entries, returning the ones in the requested page.
+        """
+        get_sort_key = self.sort_by.get_sort_key
+        candidates = (
+            entry
+            for entry in entries
+            if entry.name.startswith(self.name_prefix) and self.is_after_cursor(get_sort_key(entry))
+        )
+        if self.limit is None:
+            return sorted(candidates, key=get_sort_key, reverse=self.descending)
+        select = heapq.nlargest if self.descending else heapq.nsmallest
+        return select(self.limit, candidates, key=get_sort_key)
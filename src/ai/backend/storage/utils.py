@@ -1,18 +1,24 @@
 import enum
 import json
 import logging
+import uuid
 from contextlib import asynccontextmanager as actxmgr
 from datetime import datetime
 from datetime import timezone as tz
-from typing import Any, AsyncIterator, Optional, Union
+from typing import TYPE_CHECKING, Any, AsyncIterator, Optional, Union
 
 import trafaret as t
 from aiohttp import web
 
+from ai.backend.common.bgtask import ProgressReporter
+from ai.backend.common.events import EventProducer
 from ai.backend.logging import BraceStyleAdapter
 
 from .volumes.types import LoggingInternalMeta
 
+if TYPE_CHECKING:
+    from .volumes.abc import CopyProgressCallback
+
 log = BraceStyleAdapter(logging.getLogger(__spec__.name))
 
 
@@ -153,3 +159,26 @@ async def log_manager_api_entry_new(
             name.upper(),
             str(params),
         )
+
+
+def report_bgtask_progress(
+    event_producer: EventProducer,
+    task_id: uuid.UUID,
+) -> "CopyProgressCallback":
+    """
+    Make a progress callback to report the progress of copying files as the progress of
+    the given background task of the manager.
+    """
+    reporter = ProgressReporter(event_producer, task_id)
+
+    async def _report(copied_bytes: int, total_bytes: int) -> None:
+        if (copied_bytes, total_bytes) == (reporter.current_progress, reporter.total_progress):
+            return
+        reporter.total_progress = total_bytes
+        try:
+            await reporter.update(copied_bytes - reporter.current_progress)
+        except Exception as e:
+            # Do not let the failure of progress reports fail the operation.
+            log.warning("failed to report the progress of bgtask {}: {!r}", task_id, e)
+
+    return _report
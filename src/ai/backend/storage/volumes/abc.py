@@ -6,6 +6,8 @@ from pathlib import Path, PurePosixPath
 from typing import (
     Any,
     AsyncIterator,
+    Awaitable,
+    Callable,
     ClassVar,
     Final,
     FrozenSet,
@@ -26,6 +28,7 @@ from ..types import (
     CapacityUsage,
     DirEntry,
     FSPerfMetric,
+    ListFilesQuery,
     QuotaConfig,
     QuotaUsage,
     TreeUsage,
@@ -44,6 +47,9 @@ CAP_FAST_SCAN: Final = "fast-scan"
 # ability to scan vFolder size fast (e.g. by API)
 CAP_FAST_SIZE: Final = "fast-size"
 
+# Called with the numbers of the copied bytes and the total bytes to copy.
+CopyProgressCallback = Callable[[int, int], Awaitable[None]]
+
 log = BraceStyleAdapter(logging.getLogger(__spec__.name))
 
 
@@ -127,12 +133,17 @@ class AbstractFSOpModel(metaclass=ABCMeta):
         self,
         src_path: Path,
         dst_path: Path,
+        *,
+        progress: Optional[CopyProgressCallback] = None,
     ) -> None:
         """
         The actual backend-specific implementation of copying
         files from a directory to another in an efficient way.
         The source and destination are in the same filesystem namespace
         but they may be on different physical media.
+
+        If given, the progress callback is called with the numbers of the copied bytes
+        and the total bytes to copy from time to time, if the implementation could track them.
         """
         raise NotImplementedError
 
@@ -286,6 +297,8 @@ class AbstractVolume(metaclass=ABCMeta):
         self,
         src_vfid: VFolderID,
         dst_vfid: VFolderID,
+        *,
+        progress: Optional[CopyProgressCallback] = None,
     ) -> None:
         """
         Create a new vfolder on the same volume and copy all contents of the source
@@ -412,6 +425,33 @@ class AbstractVolume(metaclass=ABCMeta):
     ) -> AsyncIterator[bytes]:
         pass
 
+    async def list_files(
+        self,
+        vfid: VFolderID,
+        relpath: PurePosixPath,
+        query: ListFilesQuery,
+    ) -> AsyncIterator[DirEntry]:
+        """
+        List the entries of the given directory in the order of the query, starting after
+        the cursor and up to the limit.  The default implementation collects all entries
+        using :meth:`scandir()`, which may be truncated by the backend's scan limit.
+        """
+        entries = [entry async for entry in self.scandir(vfid, relpath, recursive=False)]
+        for entry in query.select(entries):
+            yield entry
+
+    async def get_local_file_path(
+        self,
+        vfid: VFolderID,
+        relpath: PurePosixPath,
+    ) -> Optional[Path]:
+        """
+        Return the path of the file if it is accessible from the local filesystem so that
+        it could be served with zero-copy transfers, or ``None`` to stream it using
+        :meth:`read_file()`.
+        """
+        return None
+
     @abstractmethod
     async def delete_files(
         self,
@@ -170,6 +170,7 @@ class DellEMCOneFSVolume(BaseVolume):
 
     async def shutdown(self) -> None:
         await self.api_client.aclose()
+        await super().shutdown()
 
     async def create_quota_model(self) -> AbstractQuotaModel:
         ifs_path = Path(self.config["dell_ifs_path"])
@@ -17,6 +17,7 @@ from ..abc import (
     CAP_VFOLDER,
     AbstractFSOpModel,
     AbstractQuotaModel,
+    CopyProgressCallback,
     QuotaConfig,
     QuotaUsage,
 )
@@ -97,6 +98,8 @@ class GPFSOpModel(BaseFSOpModel):
         self,
         src_path: Path,
         dst_path: Path,
+        *,
+        progress: Optional[CopyProgressCallback] = None,
     ) -> None:
         await self.api_client.copy_folder(
             self.fs,
@@ -58,6 +58,7 @@ from ..abc import (
     CAP_VFOLDER,
     AbstractFSOpModel,
     AbstractQuotaModel,
+    CopyProgressCallback,
 )
 from ..vfs import BaseFSOpModel, BaseQuotaModel, BaseVolume
 from .netappclient import JobResponseCode, NetAppClient, StorageID, VolumeID
@@ -215,6 +216,8 @@ class XCPFSOpModel(BaseFSOpModel):
         self,
         src_path: Path,
         dst_path: Path,
+        *,
+        progress: Optional[CopyProgressCallback] = None,
     ) -> None:
         if not src_path.is_relative_to(self.mount_path):
             raise ValueError(f"Invalid path inside the volume: {src_path}")
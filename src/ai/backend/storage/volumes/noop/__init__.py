@@ -19,7 +19,7 @@ from ...types import (
     TreeUsage,
     VFolderID,
 )
-from ..abc import AbstractFSOpModel, AbstractQuotaModel, AbstractVolume
+from ..abc import AbstractFSOpModel, AbstractQuotaModel, AbstractVolume, CopyProgressCallback
 
 
 async def _return_empty_dir_entry() -> AsyncIterator[DirEntry]:
@@ -77,6 +77,8 @@ class NoopFSOpModel(AbstractFSOpModel):
         self,
         src_path: Path,
         dst_path: Path,
+        *,
+        progress: Optional[CopyProgressCallback] = None,
     ) -> None:
         pass
 
@@ -150,6 +152,8 @@ class NoopVolume(AbstractVolume):
         self,
         src_vfid: VFolderID,
         dst_vfid: VFolderID,
+        *,
+        progress: Optional[CopyProgressCallback] = None,
     ) -> None:
         return None
 
@@ -98,6 +98,7 @@ class FlashBladeVolume(BaseVolume):
 
     async def shutdown(self) -> None:
         await self.purity_client.aclose()
+        await super().shutdown()
 
     async def get_capabilities(self) -> FrozenSet[str]:
         return frozenset(
@@ -3,13 +3,14 @@ import json
 import os
 from pathlib import Path
 from subprocess import CalledProcessError
-from typing import AsyncIterator
+from typing import AsyncIterator, Optional
 
 from ai.backend.common.types import BinarySize
 
 from ...subproc import run
 from ...types import DirEntry, DirEntryType, Stat, TreeUsage
 from ...utils import fstime2datetime
+from ..abc import CopyProgressCallback
 from ..vfs import BaseFSOpModel
 
 
@@ -18,6 +19,8 @@ class RapidFileToolsFSOpModel(BaseFSOpModel):
         self,
         src_path: Path,
         dst_path: Path,
+        *,
+        progress: Optional[CopyProgressCallback] = None,
     ) -> None:
         extra_opts: list[bytes] = []
         if src_path.is_dir():
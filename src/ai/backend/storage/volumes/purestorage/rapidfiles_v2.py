@@ -3,11 +3,12 @@ import json
 import os
 from pathlib import Path
 from subprocess import CalledProcessError
-from typing import AsyncIterator
+from typing import AsyncIterator, Optional
 
 from ...subproc import run
 from ...types import DirEntry, DirEntryType, Stat, TreeUsage
 from ...utils import fstime2datetime
+from ..abc import CopyProgressCallback
 from .rapidfiles import RapidFileToolsFSOpModel
 
 
@@ -16,6 +17,8 @@ class RapidFileToolsv2FSOpModel(RapidFileToolsFSOpModel):
         self,
         src_path: Path,
         dst_path: Path,
+        *,
+        progress: Optional[CopyProgressCallback] = None,
     ) -> None:
         extra_opts: list[bytes] = []
         if src_path.is_dir():
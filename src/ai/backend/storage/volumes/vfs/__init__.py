@@ -1,22 +1,37 @@
 from __future__ import annotations
 
 import asyncio
+import bisect
 import errno
 import functools
+import hashlib
 import logging
 import os
 import secrets
 import shutil
-import time
-from collections import deque
+import tempfile
+import threading
 from pathlib import Path, PurePosixPath
-from typing import Any, AsyncIterator, FrozenSet, Optional, Sequence, Union, final
+from stat import S_ISDIR, S_ISLNK
+from typing import (
+    Any,
+    AsyncIterator,
+    Final,
+    FrozenSet,
+    Mapping,
+    Optional,
+    Sequence,
+    Union,
+    final,
+)
 
 import aiofiles.os
 import janus
 import trafaret as t
 
 from ai.backend.common.defs import DEFAULT_VFOLDER_PERMISSION_MODE
+from ai.backend.common.etcd import AsyncEtcd
+from ai.backend.common.events import EventDispatcher, EventProducer
 from ai.backend.common.types import BinarySize, HardwareMetadata, QuotaScopeID
 from ai.backend.logging import BraceStyleAdapter
 
@@ -32,8 +47,10 @@ from ...types import (
     SENTINEL,
     CapacityUsage,
     DirEntry,
+    DirEntrySortKey,
     DirEntryType,
     FSPerfMetric,
+    ListFilesQuery,
     QuotaConfig,
     QuotaUsage,
     Sentinel,
@@ -43,10 +60,106 @@ from ...types import (
 )
 from ...utils import fstime2datetime
 from ...watcher import DeletePathTask, WatcherClient
-from ..abc import CAP_VFOLDER, AbstractFSOpModel, AbstractQuotaModel, AbstractVolume
+from ..abc import (
+    CAP_FAST_SIZE,
+    CAP_VFOLDER,
+    AbstractFSOpModel,
+    AbstractQuotaModel,
+    AbstractVolume,
+    CopyProgressCallback,
+)
+from .copier import DEFAULT_COPY_THREADS, ParallelTreeCopier
+from .scanner import (
+    DEFAULT_SCAN_BATCH_SIZE,
+    DEFAULT_SCAN_THREADS,
+    ParallelTreeScanner,
+    ScanCancelled,
+    ScanKind,
+)
+from .usage_index import VFolderUsageIndex
 
 log = BraceStyleAdapter(logging.getLogger(__spec__.name))
 
+# The maximum number of entry batches of scan_tree() waiting for the consumer.
+SCAN_TREE_MAX_PENDING_BATCHES: Final = 16
+SCAN_TREE_USAGE_TIMEOUT: Final = 30.0
+DEFAULT_READ_CHUNK_SIZE: Final = 1 * 1024 * 1024  # 1 MiB
+COPY_PROGRESS_INTERVAL: Final = 1.0
+# The number of entries to take the stats at once when listing files sorted by names.
+LIST_FILES_STAT_BATCH_SIZE: Final = 1000
+READ_FILE_MAX_INFLIGHT_CHUNKS: Final = 4
+
+
+def _make_dir_entry(entry_path: Path, entry_stat: os.stat_result, base_path: Path) -> DirEntry:
+    symlink_target = ""
+    entry_type = DirEntryType.FILE
+    if S_ISDIR(entry_stat.st_mode):
+        entry_type = DirEntryType.DIRECTORY
+    elif S_ISLNK(entry_stat.st_mode):
+        entry_type = DirEntryType.SYMLINK
+        try:
+            symlink_dst = entry_path.resolve()
+            symlink_dst = symlink_dst.relative_to(base_path)
+        except (ValueError, RuntimeError, OSError):
+            # ValueError and ELOOP
+            pass
+        else:
+            symlink_target = os.fsdecode(symlink_dst)
+    return DirEntry(
+        name=entry_path.name,
+        path=entry_path.relative_to(base_path),
+        type=entry_type,
+        stat=Stat(
+            size=entry_stat.st_size,
+            owner=str(entry_stat.st_uid),
+            mode=entry_stat.st_mode,
+            modified=fstime2datetime(entry_stat.st_mtime),
+            created=fstime2datetime(entry_stat.st_ctime),
+        ),
+        symlink_target=symlink_target,
+    )
+
+
+def _list_dir_names(path: Path, query: ListFilesQuery) -> list[str]:
+    with os.scandir(path) as scanner:
+        names = [entry.name for entry in scanner if entry.name.startswith(query.name_prefix)]
+    names.sort()
+    if query.descending:
+        if query.after is not None:
+            names = names[: bisect.bisect_left(names, query.after[0])]
+        names.reverse()
+    elif query.after is not None:
+        names = names[bisect.bisect_right(names, query.after[0]) :]
+    return names
+
+
+def _stat_dir_entries(path: Path, names: Sequence[str]) -> list[DirEntry]:
+    entries = []
+    for name in names:
+        entry_path = path / name
+        try:
+            entry_stat = entry_path.lstat()
+        except (FileNotFoundError, PermissionError):
+            # the filesystem may be changed during scan
+            continue
+        entries.append(_make_dir_entry(entry_path, entry_stat, path))
+    return entries
+
+
+def _list_dir_entries(path: Path, query: ListFilesQuery) -> list[DirEntry]:
+    entries = []
+    with os.scandir(path) as scanner:
+        for entry in scanner:
+            if not entry.name.startswith(query.name_prefix):
+                continue
+            try:
+                entry_stat = entry.stat(follow_symlinks=False)
+            except (FileNotFoundError, PermissionError):
+                # the filesystem may be changed during scan
+                continue
+            entries.append(_make_dir_entry(Path(entry.path), entry_stat, path))
+    return query.select(entries)
+
 
 class BaseQuotaModel(AbstractQuotaModel):
     """
@@ -192,27 +305,46 @@ class SetGIDQuotaModel(BaseQuotaModel):
 
 class BaseFSOpModel(AbstractFSOpModel):
     def __init__(
-        self, mount_path: Path, scandir_limit: int, watcher: Optional[WatcherClient] = None
+        self,
+        mount_path: Path,
+        scandir_limit: int,
+        watcher: Optional[WatcherClient] = None,
+        *,
+        scandir_threads: int = DEFAULT_SCAN_THREADS,
+        scandir_batch_size: int = DEFAULT_SCAN_BATCH_SIZE,
+        copy_threads: int = DEFAULT_COPY_THREADS,
     ) -> None:
         self.mount_path = mount_path
         self.scandir_limit = scandir_limit
         self.watcher = watcher
+        self.scandir_threads = scandir_threads
+        self.scandir_batch_size = scandir_batch_size
+        self.copy_threads = copy_threads
 
     async def copy_tree(
         self,
         src_path: Path,
         dst_path: Path,
+        *,
+        progress: Optional[CopyProgressCallback] = None,
     ) -> None:
+        copier = ParallelTreeCopier(self.copy_threads)
         loop = asyncio.get_running_loop()
-        await loop.run_in_executor(
-            None,
-            functools.partial(
-                shutil.copytree,
-                src_path,
-                dst_path,
-                dirs_exist_ok=True,
-            ),
-        )
+        copy_fut = loop.run_in_executor(None, copier.copy, src_path, dst_path)
+        try:
+            while True:
+                done, _ = await asyncio.wait([copy_fut], timeout=COPY_PROGRESS_INTERVAL)
+                if progress is not None:
+                    await progress(copier.copied_bytes, copier.total_bytes)
+                if done:
+                    break
+        finally:
+            if not copy_fut.done():
+                # Stop the copy threads before leaving, keeping the completely copied files
+                # to resume the copy later.
+                copier.cancel()
+                await asyncio.wait([copy_fut])
+        copy_fut.result()
 
     async def move_tree(
         self,
@@ -244,76 +376,77 @@ class BaseFSOpModel(AbstractFSOpModel):
         *,
         recursive: bool = True,
     ) -> AsyncIterator[DirEntry]:
-        q: janus.Queue[Sentinel | DirEntry] = janus.Queue()
+        # The entries are transferred in batches through a bounded queue,
+        # so that the scanner threads wait for the consumer when it is slow.
+        q: janus.Queue[Sentinel | list[DirEntry]] = janus.Queue(
+            maxsize=SCAN_TREE_MAX_PENDING_BATCHES
+        )
         loop = asyncio.get_running_loop()
+        scanner = ParallelTreeScanner(
+            self.scandir_threads,
+            batch_size=self.scandir_batch_size,
+            recursive=recursive,
+            kind=ScanKind.LISTING,
+        )
 
-        def _scandir(path: Path, q: janus._SyncQueueProxy[Sentinel | DirEntry]) -> None:
-            count = 0
-            limit = self.scandir_limit
-            next_paths: deque[Path] = deque()
-            next_paths.append(path)
-            while next_paths:
-                next_path = next_paths.popleft()
-                with os.scandir(next_path) as scanner:
-                    for entry in scanner:
-                        if limit > 0 and count == limit:
-                            break
-                        symlink_target = ""
-                        entry_type = DirEntryType.FILE
-                        try:
-                            if entry.is_dir(follow_symlinks=False):
-                                entry_type = DirEntryType.DIRECTORY
-                            if entry.is_symlink():
-                                entry_type = DirEntryType.SYMLINK
-                                try:
-                                    symlink_dst = Path(entry).resolve()
-                                    symlink_dst = symlink_dst.relative_to(path)
-                                except (ValueError, RuntimeError):
-                                    # ValueError and ELOOP
-                                    pass
-                                else:
-                                    symlink_target = os.fsdecode(symlink_dst)
-                            entry_stat = entry.stat(follow_symlinks=False)
-                        except (FileNotFoundError, PermissionError):
-                            # the filesystem may be changed during scan
-                            continue
-                        item = DirEntry(
-                            name=entry.name,
-                            path=Path(entry.path).relative_to(path),
-                            type=entry_type,
-                            stat=Stat(
-                                size=entry_stat.st_size,
-                                owner=str(entry_stat.st_uid),
-                                mode=entry_stat.st_mode,
-                                modified=fstime2datetime(entry_stat.st_mtime),
-                                created=fstime2datetime(entry_stat.st_ctime),
-                            ),
-                            symlink_target=symlink_target,
-                        )
-                        q.put(item)
-                        if recursive and entry.is_dir() and not entry.is_symlink():
-                            next_paths.append(Path(entry.path))
-                        count += 1
-
-        async def _scan_task(q: janus.Queue[Sentinel | DirEntry]) -> None:
+        def _to_dir_entry(entry: os.DirEntry) -> Optional[DirEntry]:
+            try:
+                entry_stat = entry.stat(follow_symlinks=False)
+            except (FileNotFoundError, PermissionError):
+                # the filesystem may be changed during scan
+                return None
+            return _make_dir_entry(Path(entry.path), entry_stat, path)
+
+        def _handle_entries(entries: Sequence[os.DirEntry]) -> None:
+            items = [item for entry in entries if (item := _to_dir_entry(entry)) is not None]
+            if not items:
+                return
+            while not scanner.cancelled:
+                try:
+                    q.sync_q.put(items, timeout=0.1)
+                    return
+                except janus.SyncQueueFull:
+                    continue
+
+        def _scandir() -> None:
+            try:
+                scanner.scan(path, _handle_entries)
+            except ScanCancelled:
+                pass
+
+        async def _scan_task() -> None:
             try:
-                await loop.run_in_executor(None, _scandir, path, q.sync_q)
+                await loop.run_in_executor(None, _scandir)
             finally:
                 await q.async_q.put(SENTINEL)
 
         async def _aiter() -> AsyncIterator[DirEntry]:
-            scan_task = asyncio.create_task(_scan_task(q))
+            limit = self.scandir_limit
+            count = 0
+            scan_task = asyncio.create_task(_scan_task())
             await asyncio.sleep(0)
             try:
                 while True:
-                    item = await q.async_q.get()
+                    items = await q.async_q.get()
                     try:
-                        if item is SENTINEL:
+                        if items is SENTINEL:
                             break
-                        yield item
+                        for item in items:
+                            if limit > 0 and count == limit:
+                                return
+                            yield item
+                            count += 1
                     finally:
                         q.async_q.task_done()
             finally:
+                scanner.cancel()
+                # Unblock the scanner waiting for the queue.
+                while not scan_task.done():
+                    try:
+                        q.async_q.get_nowait()
+                        q.async_q.task_done()
+                    except janus.AsyncQueueEmpty:
+                        await asyncio.sleep(0.01)
                 await scan_task
                 q.close()
                 await q.wait_closed()
@@ -326,35 +459,34 @@ class BaseFSOpModel(AbstractFSOpModel):
     ) -> TreeUsage:
         total_size = 0
         total_count = 0
-        start_time = time.monotonic()
-        _timeout = 30
+        lock = threading.Lock()
+        scanner = ParallelTreeScanner(
+            self.scandir_threads,
+            batch_size=self.scandir_batch_size,
+            timeout=SCAN_TREE_USAGE_TIMEOUT,
+            kind=ScanKind.USAGE,
+        )
 
-        def _calc_usage(path: Path) -> None:
+        def _handle_entries(entries: Sequence[os.DirEntry]) -> None:
             nonlocal total_size, total_count
-            next_paths: deque[Path] = deque()
-            next_paths.append(path)
-            while next_paths:
-                next_path = next_paths.popleft()
-                with os.scandir(next_path) as scanner:  # type: ignore
-                    for entry in scanner:
-                        try:
-                            stat = entry.stat(follow_symlinks=False)
-                        except (FileNotFoundError, PermissionError):
-                            # the filesystem may be changed during scan
-                            continue
-                        total_size += stat.st_size
-                        total_count += 1
-                        if entry.is_dir() and not entry.is_symlink():
-                            next_paths.append(Path(entry.path))
-                        if total_count % 1000 == 0:
-                            # Cancel if this I/O operation takes too much time.
-                            if time.monotonic() - start_time > _timeout:
-                                raise TimeoutError
+            size = 0
+            count = 0
+            for entry in entries:
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                except (FileNotFoundError, PermissionError):
+                    # the filesystem may be changed during scan
+                    continue
+                size += stat.st_size
+                count += 1
+            with lock:
+                total_size += size
+                total_count += count
 
         loop = asyncio.get_running_loop()
         try:
-            await loop.run_in_executor(None, _calc_usage, path)
-        except TimeoutError:
+            await loop.run_in_executor(None, scanner.scan, path, _handle_entries)
+        except ScanCancelled:
             # -1 indicates "too many"
             total_size = -1
             total_count = -1
@@ -372,6 +504,73 @@ class BaseFSOpModel(AbstractFSOpModel):
 class BaseVolume(AbstractVolume):
     name = "vfs"
 
+    usage_index: Optional[VFolderUsageIndex] = None
+
+    def __init__(
+        self,
+        local_config: Mapping[str, Any],
+        mount_path: Path,
+        *,
+        etcd: AsyncEtcd,
+        event_dispatcher: EventDispatcher,
+        event_producer: EventProducer,
+        watcher: Optional[WatcherClient] = None,
+        options: Optional[Mapping[str, Any]] = None,
+    ) -> None:
+        super().__init__(
+            local_config,
+            mount_path,
+            etcd=etcd,
+            event_dispatcher=event_dispatcher,
+            event_producer=event_producer,
+            watcher=watcher,
+            options=options,
+        )
+        self._clone_tasks: dict[VFolderID, asyncio.Task[None]] = {}
+
+    async def init(self) -> None:
+        await super().init()
+        self.usage_index = await self.create_usage_index()
+
+    async def shutdown(self) -> None:
+        clone_tasks = [*self._clone_tasks.values()]
+        for task in clone_tasks:
+            task.cancel()
+        await asyncio.gather(*clone_tasks, return_exceptions=True)
+        if self.usage_index is not None:
+            await self.usage_index.close()
+        await super().shutdown()
+
+    def get_local_state_path(self, name: str, base_path: Optional[Path] = None) -> Path:
+        """
+        Return the directory to keep the local state of this volume, distinguishing
+        the volumes sharing the same base path.
+        """
+        if base_path is None:
+            ipc_base_path = self.local_config["storage-proxy"].get("ipc-base-path")
+            if ipc_base_path is None:
+                # e.g., the volumes created from a partial local config
+                ipc_base_path = Path(tempfile.gettempdir(), "backend.ai", "ipc")
+            base_path = Path(ipc_base_path, name)
+        return Path(base_path, hashlib.sha1(os.fsencode(self.mount_path)).hexdigest()[:16])
+
+    async def create_usage_index(self) -> Optional[VFolderUsageIndex]:
+        """
+        Create the usage index of vfolders for the volumes that cannot report
+        the usage of a directory quickly by themselves.
+        """
+        config = self.local_config["storage-proxy"]
+        if not config.get("use-usage-index", False):
+            return None
+        if CAP_FAST_SIZE in await self.get_capabilities():
+            return None
+        return VFolderUsageIndex(
+            self.get_local_state_path("usage-index", config.get("usage-index-path")),
+            fresh_period=config["usage-index-fresh-period"].total_seconds(),
+            full_rescan_interval=config["usage-index-full-rescan-interval"].total_seconds(),
+            scandir_threads=config.get("scandir-threads", DEFAULT_SCAN_THREADS),
+        )
+
     async def create_quota_model(self) -> AbstractQuotaModel:
         return BaseQuotaModel(self.mount_path)
 
@@ -380,6 +579,12 @@ class BaseVolume(AbstractVolume):
             self.mount_path,
             self.local_config["storage-proxy"]["scandir-limit"],
             self.watcher,
+            scandir_threads=self.local_config["storage-proxy"].get(
+                "scandir-threads", DEFAULT_SCAN_THREADS
+            ),
+            copy_threads=self.local_config["storage-proxy"].get(
+                "copy-threads", DEFAULT_COPY_THREADS
+            ),
         )
 
     async def get_capabilities(self) -> FrozenSet[str]:
@@ -412,6 +617,8 @@ class BaseVolume(AbstractVolume):
     @final
     async def delete_vfolder(self, vfid: VFolderID) -> None:
         vfpath = self.mangle_vfpath(vfid)
+        if self.usage_index is not None:
+            await self.usage_index.forget(vfid)
         await self.fsop_model.delete_tree(vfpath)
         for p in [vfpath, vfpath.parent, vfpath.parent.parent]:
             try:
@@ -430,25 +637,76 @@ class BaseVolume(AbstractVolume):
         self,
         src_vfid: VFolderID,
         dst_vfid: VFolderID,
+        *,
+        progress: Optional[CopyProgressCallback] = None,
     ) -> None:
-        # check if there is enough space in the destination
-        fs_usage = await self.get_fs_usage()
-        vfolder_usage = await self.get_usage(src_vfid)
-        if vfolder_usage.used_bytes > fs_usage.capacity_bytes - fs_usage.used_bytes:
-            raise ExecutionError("Not enough space available for clone.")
+        if (clone_task := self._clone_tasks.get(dst_vfid)) is None:
+            clone_task = asyncio.create_task(self._clone_vfolder(src_vfid, dst_vfid, progress))
+            self._clone_tasks[dst_vfid] = clone_task
+            clone_task.add_done_callback(lambda _: self._clone_tasks.pop(dst_vfid, None))
+        else:
+            # A retried request waits for the ongoing clone instead of starting another one.
+            log.info("clone_vfolder: attaching to the ongoing clone of {}", dst_vfid)
+        # Keep the clone running even when the client has gone away.
+        await asyncio.shield(clone_task)
 
-        # create the target vfolder
+    async def _clone_vfolder(
+        self,
+        src_vfid: VFolderID,
+        dst_vfid: VFolderID,
+        progress: Optional[CopyProgressCallback],
+    ) -> None:
+        # The journal marks an incomplete clone to resume it when the clone is requested again,
+        # e.g., after the storage proxy is restarted.
+        journal_file = Path(self.get_local_state_path("clone-journal"), dst_vfid.folder_id.hex)
         src_vfpath = self.mangle_vfpath(src_vfid)
-        await self.create_vfolder(dst_vfid)
         dst_vfpath = self.mangle_vfpath(dst_vfid)
 
+        def _check_journal() -> bool:
+            try:
+                return journal_file.read_text() == str(src_vfid) and dst_vfpath.is_dir()
+            except FileNotFoundError:
+                return False
+
+        def _write_journal() -> None:
+            journal_file.parent.mkdir(parents=True, exist_ok=True)
+            journal_file.write_text(str(src_vfid))
+
+        loop = asyncio.get_running_loop()
+        if await loop.run_in_executor(None, _check_journal):
+            log.info("clone_vfolder: resuming the clone of {} into {}", src_vfid, dst_vfid)
+        else:
+            # check if there is enough space in the destination
+            fs_usage = await self.get_fs_usage()
+            vfolder_usage = await self.get_usage(src_vfid)
+            if vfolder_usage.used_bytes < 0:
+                # The usage is unknown when the scan of a large vfolder has timed out,
+                # so let the copy itself fail with ENOSPC if the space runs out.
+                log.warning(
+                    "clone_vfolder: skipping the space check as the usage of {} is unknown",
+                    src_vfid,
+                )
+            elif vfolder_usage.used_bytes > fs_usage.capacity_bytes - fs_usage.used_bytes:
+                raise ExecutionError("Not enough space available for clone.")
+
+            # create the target vfolder
+            await self.create_vfolder(dst_vfid)
+            await loop.run_in_executor(None, _write_journal)
+
         # perform the file-tree copy
         try:
-            await self.fsop_model.copy_tree(src_vfpath, dst_vfpath)
+            await self.fsop_model.copy_tree(src_vfpath, dst_vfpath, progress=progress)
+        except asyncio.CancelledError:
+            # Keep the partial copy with the journal to resume it later.
+            raise
         except Exception:
             await self.delete_vfolder(dst_vfid)
+            await loop.run_in_executor(
+                None, functools.partial(journal_file.unlink, missing_ok=True)
+            )
             log.exception("clone_vfolder: error during copy_tree()")
             raise ExecutionError("Copying files from source directories failed.")
+        await loop.run_in_executor(None, functools.partial(journal_file.unlink, missing_ok=True))
 
     @final
     async def get_vfolder_mount(self, vfid: VFolderID, subpath: str) -> Path:
@@ -493,11 +751,18 @@ class BaseVolume(AbstractVolume):
         relpath: PurePosixPath = PurePosixPath("."),
     ) -> TreeUsage:
         target_path = self.sanitize_vfpath(vfid, relpath)
+        if self.usage_index is not None:
+            relpath = PurePosixPath(os.path.normpath(relpath))
+            usage = await self.usage_index.get_usage(vfid, self.mangle_vfpath(vfid), relpath)
+            if usage is not None:
+                return usage
         return await self.fsop_model.scan_tree_usage(target_path)
 
     @final
     async def get_used_bytes(self, vfid: VFolderID) -> BinarySize:
         vfpath = self.mangle_vfpath(vfid)
+        if self.usage_index is not None:
+            return await self.usage_index.get_used_bytes(vfid, vfpath)
         return await self.fsop_model.scan_tree_size(vfpath)
 
     # ------ vfolder internal operations -------
@@ -513,6 +778,39 @@ class BaseVolume(AbstractVolume):
         target_path = self.sanitize_vfpath(vfid, relpath)
         return self.fsop_model.scan_tree(target_path, recursive=recursive)
 
+    async def list_files(
+        self,
+        vfid: VFolderID,
+        relpath: PurePosixPath,
+        query: ListFilesQuery,
+    ) -> AsyncIterator[DirEntry]:
+        target_path = self.sanitize_vfpath(vfid, relpath)
+        loop = asyncio.get_running_loop()
+        if query.sort_by != DirEntrySortKey.NAME:
+            # Sorting by the attributes requires the stats of all entries.
+            entries = await loop.run_in_executor(None, _list_dir_entries, target_path, query)
+            for entry in entries:
+                yield entry
+            return
+        # The names could be listed and sorted without taking the stats,
+        # so take the stats of only the entries to return.
+        names = await loop.run_in_executor(None, _list_dir_names, target_path, query)
+        remaining = query.limit
+        batch_size = min(remaining or LIST_FILES_STAT_BATCH_SIZE, LIST_FILES_STAT_BATCH_SIZE)
+        for offset in range(0, len(names), batch_size):
+            entries = await loop.run_in_executor(
+                None,
+                _stat_dir_entries,
+                target_path,
+                names[offset : offset + batch_size],
+            )
+            for entry in entries:
+                yield entry
+                if remaining is not None:
+                    remaining -= 1
+                    if remaining == 0:
+                        return
+
     async def mkdir(
         self,
         vfid: VFolderID,
@@ -634,35 +932,62 @@ class BaseVolume(AbstractVolume):
         chunk_size: int = 0,
     ) -> AsyncIterator[bytes]:
         target_path = self.sanitize_vfpath(vfid, relpath)
-        q: janus.Queue[Union[bytes, Exception]] = janus.Queue()
+        # Keep only a few chunks in flight so that a slow consumer does not let
+        # the reader buffer the whole file in memory.
+        q: janus.Queue[Union[bytes, Exception]] = janus.Queue(
+            maxsize=READ_FILE_MAX_INFLIGHT_CHUNKS,
+        )
+        stop_event = threading.Event()
         loop = asyncio.get_running_loop()
 
+        def _put(
+            q: janus._SyncQueueProxy[Union[bytes, Exception]], item: bytes | Exception
+        ) -> bool:
+            while not stop_event.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except janus.SyncQueueFull:
+                    continue
+            return False
+
         def _read(
             q: janus._SyncQueueProxy[Union[bytes, Exception]],
             chunk_size: int,
         ) -> None:
             try:
-                with open(target_path, "rb") as f:
+                fd = os.open(target_path, os.O_RDONLY)
+                try:
+                    if hasattr(os, "posix_fadvise"):
+                        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                    offset = 0
                     while True:
-                        buf = f.read(chunk_size)
+                        # Read the chunks at the aligned offsets directly with a single syscall,
+                        # bypassing the intermediate copy of buffered I/O.
+                        buf = os.pread(fd, chunk_size, offset)
                         if not buf:
                             return
-                        q.put(buf)
+                        offset += len(buf)
+                        if not _put(q, buf):
+                            return
+                finally:
+                    os.close(fd)
             except Exception as e:
-                q.put(e)
+                _put(q, e)
             finally:
-                q.put(b"")
+                _put(q, b"")
 
         async def _aiter() -> AsyncIterator[bytes]:
             nonlocal chunk_size
             if chunk_size == 0:
-                # get the preferred io block size
+                # use large chunks aligned to the preferred io block size
                 _vfs_stat = await loop.run_in_executor(
                     None,
                     os.statvfs,
                     self.mount_path,
                 )
-                chunk_size = _vfs_stat.f_bsize
+                block_size = _vfs_stat.f_bsize or 4096
+                chunk_size = max(1, DEFAULT_READ_CHUNK_SIZE // block_size) * block_size
             read_fut = loop.run_in_executor(None, _read, q.sync_q, chunk_size)
             await asyncio.sleep(0)
             try:
@@ -675,10 +1000,21 @@ class BaseVolume(AbstractVolume):
                     if not buf:
                         return
             finally:
+                # Let the reader stop early if the consumer has gone away.
+                stop_event.set()
                 await read_fut
+                q.close()
+                await q.wait_closed()
 
         return _aiter()
 
+    async def get_local_file_path(
+        self,
+        vfid: VFolderID,
+        relpath: PurePosixPath,
+    ) -> Optional[Path]:
+        return self.sanitize_vfpath(vfid, relpath)
+
     async def delete_files(
         self,
         vfid: VFolderID,
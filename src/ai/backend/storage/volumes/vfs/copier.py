@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import errno
+import logging
+import os
+import shutil
+import stat
+import sys
+import threading
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Final, Optional
+
+from ai.backend.logging import BraceStyleAdapter
+
+from .scanner import DEFAULT_SCAN_THREADS, ParallelTreeScanner, ScanCancelled, ScanKind
+
+__all__ = (
+    "DEFAULT_COPY_THREADS",
+    "ParallelTreeCopier",
+)
+
+log = BraceStyleAdapter(logging.getLogger(__spec__.name))
+
+DEFAULT_COPY_THREADS: Final = 8
+# The number of bytes to copy per copy_file_range() call, which is also the granularity of
+# the progress updates.
+COPY_CHUNK_SIZE: Final = 64 * 1024 * 1024  # 64 MiB
+FALLBACK_COPY_BUFSIZE: Final = 1 * 1024 * 1024  # 1 MiB
+# from linux/fs.h
+FICLONE: Final = 0x40049409
+
+# The errors indicating that the filesystem does not support the copy method.
+_UNSUPPORTED_ERRNOS: Final = frozenset({
+    errno.EXDEV,
+    errno.ENOSYS,
+    errno.EOPNOTSUPP,
+    errno.ENOTTY,
+    errno.EINVAL,
+    errno.EBADF,
+})
+
+
+class ParallelTreeCopier:
+    """
+    Copies a directory tree with multiple worker threads, preserving the file permissions
+    and timestamps like :func:`shutil.copytree()`.
+
+    The files are cloned with the ``FICLONE`` ioctl (reflink) if the filesystem supports it,
+    or copied in the kernel with :func:`os.copy_file_range()`, falling back to the userspace
+    copy.  The regular files already present in the destination with the same size and mtime
+    are skipped, so that an interrupted copy could be resumed by copying the same tree again.
+    """
+
+    def __init__(self, num_threads: int = DEFAULT_COPY_THREADS) -> None:
+        self.num_threads = max(1, num_threads)
+        self.copied_bytes = 0
+        self.total_bytes = 0
+        self.copied_files = 0
+        self.skipped_files = 0
+        self._lock = threading.Lock()
+        self._use_ficlone = sys.platform == "linux"
+        self._use_copy_file_range = hasattr(os, "copy_file_range")
+        self._cancelled = threading.Event()
+        self._scanner: Optional[ParallelTreeScanner] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        if self._scanner is not None:
+            self._scanner.cancel()
+
+    def copy(self, src_path: Path, dst_path: Path) -> None:
+        """
+        Copy the given file or directory tree, merging into the existing destination directory.
+        Raises :exc:`ScanCancelled` if the copy is cancelled before completion.
+        """
+        if not src_path.is_dir():
+            src_stat = src_path.stat()
+            self._add_total(src_stat.st_size)
+            self._copy_file(src_path, dst_path, src_stat)
+            return
+        pending_files = threading.BoundedSemaphore(self.num_threads * 4)
+        copied_dirs: list[tuple[Path, Path]] = []
+        dirs_lock = threading.Lock()
+        # Keep only the first error of the copy jobs instead of the futures of all files,
+        # so that the memory usage does not grow with the number of files.
+        job_errors: list[BaseException] = []
+        walk_error: Optional[BaseException] = None
+
+        def _copy_file_job(src: Path, dst: Path, src_stat: os.stat_result) -> None:
+            try:
+                if not self.cancelled:
+                    self._copy_file(src, dst, src_stat)
+            except BaseException as e:
+                with dirs_lock:
+                    if not job_errors:
+                        job_errors.append(e)
+                self.cancel()
+            finally:
+                pending_files.release()
+
+        with ThreadPoolExecutor(
+            max_workers=self.num_threads,
+            thread_name_prefix="vfs-copy",
+        ) as executor:
+
+            def _visit(path: Path, push: Callable[[Sequence[Path]], None]) -> None:
+                dst_dir = dst_path / path.relative_to(src_path)
+                dst_dir.mkdir(parents=True, exist_ok=True)
+                with dirs_lock:
+                    copied_dirs.append((path, dst_dir))
+                subdirs: list[Path] = []
+                with os.scandir(path) as scanner_it:
+                    for entry in scanner_it:
+                        if self.cancelled:
+                            return
+                        src = Path(entry.path)
+                        dst = dst_dir / entry.name
+                        try:
+                            src_stat = entry.stat(follow_symlinks=False)
+                        except FileNotFoundError:
+                            # the filesystem may be changed during copy
+                            continue
+                        if stat.S_ISDIR(src_stat.st_mode):
+                            subdirs.append(src)
+                        elif stat.S_ISLNK(src_stat.st_mode):
+                            self._copy_symlink(src, dst)
+                        elif stat.S_ISREG(src_stat.st_mode):
+                            self._add_total(src_stat.st_size)
+                            # Limit the number of queued files to apply backpressure to the walk.
+                            pending_files.acquire()
+                            executor.submit(_copy_file_job, src, dst, src_stat)
+                        else:
+                            log.debug("skipping a special file: {}", src)
+                push(subdirs)
+
+            self._scanner = ParallelTreeScanner(
+                min(self.num_threads, DEFAULT_SCAN_THREADS),
+                kind=ScanKind.COPY,
+            )
+            try:
+                self._scanner.walk(src_path, _visit)
+            except BaseException as e:
+                self.cancel()
+                walk_error = e
+            # Leaving the executor waits for the submitted jobs.
+        # The walk error takes precedence unless the walk is just cancelled by a failed job.
+        if walk_error is not None and not (isinstance(walk_error, ScanCancelled) and job_errors):
+            raise walk_error
+        if job_errors:
+            raise job_errors[0]
+        if self.cancelled:
+            raise ScanCancelled
+        # Copy the directory timestamps after all their contents are copied, the deepest first.
+        copied_dirs.sort(key=lambda item: len(item[0].parts), reverse=True)
+        for src_dir, dst_dir in copied_dirs:
+            shutil.copystat(src_dir, dst_dir, follow_symlinks=False)
+
+    def _add_total(self, size: int) -> None:
+        with self._lock:
+            self.total_bytes += size
+
+    def _add_copied(self, size: int) -> None:
+        with self._lock:
+            self.copied_bytes += size
+
+    def _copy_symlink(self, src: Path, dst: Path) -> None:
+        target = os.readlink(src)
+        try:
+            if os.readlink(dst) == target:
+                return
+            dst.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError:
+            # not a symlink
+            dst.unlink()
+        os.symlink(target, dst)
+        shutil.copystat(src, dst, follow_symlinks=False)
+
+    def _copy_file(self, src: Path, dst: Path, src_stat: os.stat_result) -> None:
+        try:
+            dst_stat = dst.lstat()
+        except FileNotFoundError:
+            pass
+        else:
+            # The timestamps are copied only after the content is completely copied.
+            if (
+                stat.S_ISREG(dst_stat.st_mode)
+                and dst_stat.st_size == src_stat.st_size
+                and dst_stat.st_mtime_ns == src_stat.st_mtime_ns
+            ):
+                self._add_copied(src_stat.st_size)
+                with self._lock:
+                    self.skipped_files += 1
+                return
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            if not self._try_clone(fsrc.fileno(), fdst.fileno(), src_stat.st_size):
+                if not self._try_copy_file_range(fsrc.fileno(), fdst.fileno()):
+                    self._copy_in_userspace(fsrc.fileno(), fdst.fileno())
+        if self.cancelled:
+            # Leave the timestamps of the partially copied file different from the source.
+            return
+        shutil.copystat(src, dst)
+        with self._lock:
+            self.copied_files += 1
+
+    def _try_clone(self, src_fd: int, dst_fd: int, size: int) -> bool:
+        if not self._use_ficlone:
+            return False
+        import fcntl
+
+        try:
+            fcntl.ioctl(dst_fd, FICLONE, src_fd)
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED_ERRNOS:
+                raise
+            self._use_ficlone = False
+            return False
+        self._add_copied(size)
+        return True
+
+    def _try_copy_file_range(self, src_fd: int, dst_fd: int) -> bool:
+        if not self._use_copy_file_range:
+            return False
+        offset = 0
+        while not self.cancelled:
+            try:
+                copied = os.copy_file_range(src_fd, dst_fd, COPY_CHUNK_SIZE)
+            except OSError as e:
+                if offset > 0 or e.errno not in _UNSUPPORTED_ERRNOS:
+                    raise
+                self._use_copy_file_range = False
+                return False
+            if copied == 0:
+                break
+            offset += copied
+            self._add_copied(copied)
+        return True
+
+    def _copy_in_userspace(self, src_fd: int, dst_fd: int) -> None:
+        while not self.cancelled:
+            buf = os.read(src_fd, FALLBACK_COPY_BUFSIZE)
+            if not buf:
+                break
+            view = memoryview(buf)
+            while view:
+                written = os.write(dst_fd, view)
+                view = view[written:]
+            self._add_copied(len(buf))
@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import enum
+import functools
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Final, Optional
+
+from ai.backend.logging import BraceStyleAdapter
+
+__all__ = (
+    "DEFAULT_SCAN_BATCH_SIZE",
+    "DEFAULT_SCAN_THREADS",
+    "MAX_CONCURRENT_SCANS",
+    "DirVisitor",
+    "EntryBatchHandler",
+    "ParallelTreeScanner",
+    "ScanCancelled",
+    "ScanKind",
+)
+
+log = BraceStyleAdapter(logging.getLogger(__spec__.name))
+
+DEFAULT_SCAN_THREADS: Final = 8
+DEFAULT_SCAN_BATCH_SIZE: Final = 512
+
+
+class ScanKind(enum.Enum):
+    """
+    The kinds of the tree scans, each of which has its own limit of the concurrent scans so
+    that the long-running copies and background scans do not block the interactive ones.
+    """
+
+    LISTING = "listing"
+    USAGE = "usage"
+    USAGE_INDEX = "usage-index"
+    COPY = "copy"
+
+
+# The number of scans running at the same time in this process per kind, to bound the total
+# number of the worker threads as each scan runs its own thread pool.
+MAX_CONCURRENT_SCANS: Final[Mapping[ScanKind, int]] = {
+    ScanKind.LISTING: 8,
+    ScanKind.USAGE: 4,
+    ScanKind.USAGE_INDEX: 2,
+    ScanKind.COPY: 4,
+}
+
+_scan_slots: Final[Mapping[ScanKind, threading.BoundedSemaphore]] = {
+    kind: threading.BoundedSemaphore(limit) for kind, limit in MAX_CONCURRENT_SCANS.items()
+}
+
+EntryBatchHandler = Callable[[Sequence[os.DirEntry]], None]
+# Visits a directory and pushes its subdirectories to visit next.
+DirVisitor = Callable[[Path, Callable[[Sequence[Path]], None]], None]
+
+
+class ScanCancelled(Exception):
+    """
+    Raised by :meth:`ParallelTreeScanner.scan()` when the scan is cancelled or timed out
+    before visiting all directories.
+    """
+
+
+class ParallelTreeScanner:
+    """
+    Scans a directory tree with multiple worker threads.
+
+    Each worker keeps its own deque of directories to scan, taking the most recently found
+    directory from its own deque for locality and stealing the oldest one from the others
+    when it runs out of work.  The entries of each directory are passed to the handler in
+    batches of up to ``batch_size`` entries in the worker threads, so the handler should be
+    thread-safe and may block to apply backpressure.
+    """
+
+    def __init__(
+        self,
+        num_threads: int = DEFAULT_SCAN_THREADS,
+        *,
+        batch_size: int = DEFAULT_SCAN_BATCH_SIZE,
+        recursive: bool = True,
+        timeout: Optional[float] = None,
+        kind: ScanKind = ScanKind.LISTING,
+    ) -> None:
+        # A non-recursive scan has only one directory to scan.
+        self.num_threads = max(1, num_threads) if recursive else 1
+        self.batch_size = batch_size
+        self.recursive = recursive
+        self.timeout = timeout
+        self.kind = kind
+        self._queues: list[deque[Path]] = [deque() for _ in range(self.num_threads)]
+        self._cond = threading.Condition()
+        self._pending = 0
+        self._cancelled = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._deadline: Optional[float] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        """
+        Stop the scan as soon as the workers finish the current batches.
+        """
+        with self._cond:
+            self._cancelled.set()
+            self._cond.notify_all()
+
+    def walk(self, root: Path, visit: DirVisitor) -> None:
+        """
+        Visit the given directory in the calling thread and the other directories pushed by
+        the visitor in the worker threads, blocking until all directories are visited.
+        The errors from visiting the root directory are propagated as-is, while the
+        subdirectories removed or become unreadable during the walk are skipped.
+        Up to :data:`MAX_CONCURRENT_SCANS` walks of the same kind run at the same time and
+        the others wait for them, where the waiting time also counts toward the timeout.
+        """
+        self._deadline = time.monotonic() + self.timeout if self.timeout is not None else None
+        self._acquire_slot()
+        try:
+            self._walk(root, visit)
+        finally:
+            _scan_slots[self.kind].release()
+
+    def scan(self, root: Path, handler: EntryBatchHandler) -> None:
+        """
+        Scan the entries under the given directory, passing them to the handler in batches.
+        """
+        self.walk(root, functools.partial(self._scan_dir, handler))
+
+    def _acquire_slot(self) -> None:
+        while not _scan_slots[self.kind].acquire(timeout=0.1):
+            if self.check_stop():
+                raise ScanCancelled
+
+    def _walk(self, root: Path, visit: DirVisitor) -> None:
+        self._pending = 1
+        self._visit(0, root, visit, is_root=True)
+        if self.num_threads == 1:
+            self._run_worker(0, visit)
+        else:
+            with ThreadPoolExecutor(
+                max_workers=self.num_threads,
+                thread_name_prefix="vfs-scan",
+            ) as executor:
+                for worker_idx in range(self.num_threads):
+                    executor.submit(self._run_worker, worker_idx, visit)
+        if self._error is not None:
+            raise self._error
+        if self.cancelled:
+            raise ScanCancelled
+
+    def _run_worker(self, worker_idx: int, visit: DirVisitor) -> None:
+        try:
+            while (path := self._next_dir(worker_idx)) is not None:
+                if self.check_stop():
+                    break
+                self._visit(worker_idx, path, visit)
+        except BaseException as e:
+            with self._cond:
+                if self._error is None:
+                    self._error = e
+            self.cancel()
+
+    def _visit(
+        self,
+        worker_idx: int,
+        path: Path,
+        visit: DirVisitor,
+        *,
+        is_root: bool = False,
+    ) -> None:
+        try:
+            visit(path, functools.partial(self._push_dirs, worker_idx))
+        except (FileNotFoundError, PermissionError, NotADirectoryError):
+            if is_root:
+                raise
+            # the filesystem may be changed during scan
+        finally:
+            with self._cond:
+                self._pending -= 1
+                if self._pending == 0:
+                    self._cond.notify_all()
+
+    def _next_dir(self, worker_idx: int) -> Optional[Path]:
+        queues = self._queues
+        own_queue = queues[worker_idx]
+        while True:
+            if self.cancelled:
+                return None
+            try:
+                return own_queue.pop()
+            except IndexError:
+                pass
+            victims = [idx for idx in range(len(queues)) if idx != worker_idx and queues[idx]]
+            random.shuffle(victims)
+            for victim_idx in victims:
+                try:
+                    return queues[victim_idx].popleft()
+                except IndexError:
+                    # Another worker has taken it first.
+                    continue
+            with self._cond:
+                if self._pending == 0:
+                    return None
+                if not any(queues):
+                    self._cond.wait(0.1)
+
+    def _push_dirs(self, worker_idx: int, paths: Sequence[Path]) -> None:
+        if not paths:
+            return
+        with self._cond:
+            self._pending += len(paths)
+            self._queues[worker_idx].extend(paths)
+            self._cond.notify(len(paths))
+
+    def _scan_dir(
+        self,
+        handler: EntryBatchHandler,
+        path: Path,
+        push: Callable[[Sequence[Path]], None],
+    ) -> None:
+        with os.scandir(path) as scanner:
+            batch: list[os.DirEntry] = []
+            subdirs: list[Path] = []
+            for entry in scanner:
+                batch.append(entry)
+                if self.recursive:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(Path(entry.path))
+                    except OSError:
+                        pass
+                if len(batch) >= self.batch_size:
+                    if self.check_stop():
+                        return
+                    handler(batch)
+                    batch = []
+                    # Let the idle workers take the subdirectories early.
+                    push(subdirs)
+                    subdirs = []
+            if batch and not self.check_stop():
+                handler(batch)
+            if not self.cancelled:
+                push(subdirs)
+
+    def check_stop(self) -> bool:
+        """
+        Check whether the scan is cancelled or timed out, to stop visiting directories.
+        """
+        if self.cancelled:
+            return True
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            log.warning("cancelling a directory tree scan as it took too much time")
+            self.cancel()
+            return True
+        return False
@@ -0,0 +1,343 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Mapping, Sequence
+from pathlib import Path, PurePosixPath
+from typing import Any, Final, Optional
+
+import attrs
+
+from ai.backend.common import msgpack
+from ai.backend.common.types import BinarySize
+from ai.backend.logging import BraceStyleAdapter
+
+from ...types import TreeUsage, VFolderID
+from .scanner import DEFAULT_SCAN_THREADS, ParallelTreeScanner, ScanKind
+
+__all__ = ("VFolderUsageIndex",)
+
+log = BraceStyleAdapter(logging.getLogger(__spec__.name))
+
+INDEX_FORMAT_VERSION: Final = 1
+# The maximum time to wait for the first scan of a vfolder before answering "too many".
+COLD_SCAN_WAIT_TIMEOUT: Final = 30.0
+MAX_CACHED_INDEXES: Final = 64
+
+
+@attrs.define(slots=True)
+class _DirUsage:
+    mtime_ns: int
+    # The usage of the entries directly under the directory.
+    file_count: int
+    used_bytes: int
+    disk_bytes: int
+    # The disk usage of the directory itself.
+    own_disk_bytes: int
+    subdirs: list[str]
+
+    def to_row(self) -> list[Any]:
+        return [
+            self.mtime_ns,
+            self.file_count,
+            self.used_bytes,
+            self.disk_bytes,
+            self.own_disk_bytes,
+            self.subdirs,
+        ]
+
+    @classmethod
+    def from_row(cls, row: Sequence[Any]) -> _DirUsage:
+        mtime_ns, file_count, used_bytes, disk_bytes, own_disk_bytes, subdirs = row
+        return cls(mtime_ns, file_count, used_bytes, disk_bytes, own_disk_bytes, [*subdirs])
+
+
+@attrs.define(slots=True)
+class _UsageTotal:
+    file_count: int = 0
+    used_bytes: int = 0
+    disk_bytes: int = 0
+
+
+@attrs.define(slots=True)
+class _VFolderIndex:
+    # The per-directory usage keyed by the POSIX path relative to the vfolder root.
+    dirs: dict[str, _DirUsage]
+    collected_at: float
+    full_scanned_at: float
+    _totals: dict[str, _UsageTotal] = attrs.field(factory=dict, init=False)
+
+    def get_total(self, relpath: str) -> Optional[_UsageTotal]:
+        """
+        Sum up the usage of all directories under the given directory,
+        returning ``None`` if it is not an indexed directory.
+        """
+        if relpath not in self.dirs:
+            return None
+        if (total := self._totals.get(relpath)) is not None:
+            return total
+        total = _UsageTotal()
+        prefix = "" if relpath == "." else relpath + "/"
+        for dir_relpath, dir_usage in self.dirs.items():
+            if dir_relpath == relpath or dir_relpath.startswith(prefix):
+                total.file_count += dir_usage.file_count
+                total.used_bytes += dir_usage.used_bytes
+                total.disk_bytes += dir_usage.disk_bytes
+        self._totals[relpath] = total
+        return total
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "version": INDEX_FORMAT_VERSION,
+            "collected_at": self.collected_at,
+            "full_scanned_at": self.full_scanned_at,
+            "dirs": {relpath: usage.to_row() for relpath, usage in self.dirs.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> Optional[_VFolderIndex]:
+        if data.get("version") != INDEX_FORMAT_VERSION:
+            return None
+        return cls(
+            {relpath: _DirUsage.from_row(row) for relpath, row in data["dirs"].items()},
+            data["collected_at"],
+            data["full_scanned_at"],
+        )
+
+
+def _build_dir_usages(
+    scanner: ParallelTreeScanner,
+    root: Path,
+    prev_dirs: Mapping[str, _DirUsage],
+) -> dict[str, _DirUsage]:
+    """
+    Walk the tree to collect the per-directory usage, reusing the previous aggregates of
+    the directories whose mtime is not changed, as their entries are not added, removed or
+    renamed since then.  Only the subdirectories of those directories are visited again.
+    """
+    dirs: dict[str, _DirUsage] = {}
+
+    def _visit(path: Path, push: Callable[[Sequence[Path]], None]) -> None:
+        relpath = path.relative_to(root).as_posix()
+        # Take the mtime before listing so that any concurrent changes are picked up next time.
+        dir_stat = os.lstat(path)
+        prev_usage = prev_dirs.get(relpath)
+        if prev_usage is not None and prev_usage.mtime_ns == dir_stat.st_mtime_ns:
+            dirs[relpath] = prev_usage
+            push([path / name for name in prev_usage.subdirs])
+            return
+        usage = _DirUsage(dir_stat.st_mtime_ns, 0, 0, 0, dir_stat.st_blocks * 512, [])
+        with os.scandir(path) as scanner_it:
+            for entry in scanner_it:
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except (FileNotFoundError, PermissionError):
+                    # the filesystem may be changed during scan
+                    continue
+                usage.file_count += 1
+                usage.used_bytes += stat.st_size
+                usage.disk_bytes += stat.st_blocks * 512
+                if is_dir:
+                    usage.subdirs.append(entry.name)
+        dirs[relpath] = usage
+        push([path / name for name in usage.subdirs])
+
+    scanner.walk(root, _visit)
+    return dirs
+
+
+class VFolderUsageIndex:
+    """
+    A persistent index of the per-directory usage of vfolders in a volume, to answer the
+    usage queries without rescanning the whole tree every time.
+
+    Each directory keeps the number and sizes of its direct entries with its mtime.
+    A revalidation walks the tree but lists only the directories whose mtime has changed,
+    and the answers are served from the index while it is being revalidated in the background
+    (stale-while-revalidate) with the time when the index was collected.
+
+    Since overwriting an existing file does not change the mtime of its directory,
+    the whole tree is rescanned periodically to pick up such changes.
+    """
+
+    def __init__(
+        self,
+        index_path: Path,
+        *,
+        fresh_period: float,
+        full_rescan_interval: float,
+        scandir_threads: int = DEFAULT_SCAN_THREADS,
+    ) -> None:
+        self.index_path = index_path
+        self.fresh_period = fresh_period
+        self.full_rescan_interval = full_rescan_interval
+        self.scandir_threads = scandir_threads
+        self._indexes: OrderedDict[str, _VFolderIndex] = OrderedDict()
+        self._refresh_tasks: dict[str, asyncio.Task[_VFolderIndex]] = {}
+        self._scanners: dict[str, ParallelTreeScanner] = {}
+        self.index_path.mkdir(parents=True, exist_ok=True)
+
+    async def close(self) -> None:
+        for scanner in self._scanners.values():
+            scanner.cancel()
+        tasks = [*self._refresh_tasks.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def get_usage(
+        self,
+        vfid: VFolderID,
+        vfpath: Path,
+        relpath: PurePosixPath = PurePosixPath("."),
+    ) -> Optional[TreeUsage]:
+        """
+        Return the usage of the given directory in the vfolder, or ``None`` if the path is not
+        an indexed directory.
+        """
+        index = await self._get_index(vfid, vfpath, COLD_SCAN_WAIT_TIMEOUT)
+        if index is None:
+            # -1 indicates "too many"
+            return TreeUsage(file_count=-1, used_bytes=-1)
+        total = index.get_total(relpath.as_posix())
+        if total is None:
+            return None
+        return TreeUsage(
+            file_count=total.file_count,
+            used_bytes=total.used_bytes,
+            collected_at=index.collected_at,
+        )
+
+    async def get_used_bytes(self, vfid: VFolderID, vfpath: Path) -> BinarySize:
+        """
+        Return the disk usage of the vfolder including the vfolder directory itself,
+        like ``du -s``.
+        """
+        index = await self._get_index(vfid, vfpath, None)
+        assert index is not None
+        total = index.get_total(".")
+        assert total is not None
+        return BinarySize(total.disk_bytes + index.dirs["."].own_disk_bytes)
+
+    async def forget(self, vfid: VFolderID) -> None:
+        key = vfid.folder_id.hex
+        if (scanner := self._scanners.get(key)) is not None:
+            scanner.cancel()
+        if (task := self._refresh_tasks.get(key)) is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        self._indexes.pop(key, None)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, lambda: self._get_index_file(key).unlink(missing_ok=True))
+
+    def _get_index_file(self, key: str) -> Path:
+        return self.index_path / f"{key}.msgpack"
+
+    async def _get_index(
+        self,
+        vfid: VFolderID,
+        vfpath: Path,
+        wait_timeout: Optional[float],
+    ) -> Optional[_VFolderIndex]:
+        key = vfid.folder_id.hex
+        index = self._indexes.get(key)
+        if index is None:
+            loop = asyncio.get_running_loop()
+            index = await loop.run_in_executor(None, self._load, key)
+            if index is not None:
+                self._remember(key, index)
+        else:
+            self._indexes.move_to_end(key)
+        if index is not None:
+            if time.time() - index.collected_at >= self.fresh_period:
+                self._schedule_refresh(key, vfpath, index)
+            return index
+        refresh_task = self._schedule_refresh(key, vfpath, None)
+        try:
+            return await asyncio.wait_for(asyncio.shield(refresh_task), wait_timeout)
+        except asyncio.TimeoutError:
+            # Let the first scan continue in the background.
+            return None
+
+    def _schedule_refresh(
+        self,
+        key: str,
+        vfpath: Path,
+        prev_index: Optional[_VFolderIndex],
+    ) -> asyncio.Task[_VFolderIndex]:
+        if (refresh_task := self._refresh_tasks.get(key)) is not None:
+            return refresh_task
+        refresh_task = asyncio.create_task(self._refresh(key, vfpath, prev_index))
+        self._refresh_tasks[key] = refresh_task
+
+        def _done(task: asyncio.Task[_VFolderIndex]) -> None:
+            self._refresh_tasks.pop(key, None)
+            if not task.cancelled() and (e := task.exception()) is not None:
+                log.warning("failed to refresh the usage index (vfolder:{}): {!r}", key, e)
+
+        refresh_task.add_done_callback(_done)
+        return refresh_task
+
+    async def _refresh(
+        self,
+        key: str,
+        vfpath: Path,
+        prev_index: Optional[_VFolderIndex],
+    ) -> _VFolderIndex:
+        started_at = time.time()
+        full_scan = (
+            prev_index is None
+            or started_at - prev_index.full_scanned_at >= self.full_rescan_interval
+        )
+        prev_dirs = prev_index.dirs if prev_index is not None and not full_scan else {}
+        scanner = ParallelTreeScanner(self.scandir_threads, kind=ScanKind.USAGE_INDEX)
+        self._scanners[key] = scanner
+        loop = asyncio.get_running_loop()
+        try:
+            dirs = await loop.run_in_executor(None, _build_dir_usages, scanner, vfpath, prev_dirs)
+        finally:
+            self._scanners.pop(key, None)
+        if full_scan or prev_index is None:
+            full_scanned_at = started_at
+        else:
+            full_scanned_at = prev_index.full_scanned_at
+        index = _VFolderIndex(dirs, started_at, full_scanned_at)
+        self._remember(key, index)
+        try:
+            await loop.run_in_executor(None, self._save, key, index)
+        except OSError as e:
+            log.warning("failed to save the usage index (vfolder:{}): {!r}", key, e)
+        log.debug(
+            "refreshed the usage index (vfolder:{}, dirs:{}, full-scan:{}, elapsed:{:.3f}s)",
+            key,
+            len(dirs),
+            full_scan,
+            time.time() - started_at,
+        )
+        return index
+
+    def _remember(self, key: str, index: _VFolderIndex) -> None:
+        self._indexes[key] = index
+        self._indexes.move_to_end(key)
+        while len(self._indexes) > MAX_CACHED_INDEXES:
+            self._indexes.popitem(last=False)
+
+    def _load(self, key: str) -> Optional[_VFolderIndex]:
+        try:
+            data = msgpack.unpackb(self._get_index_file(key).read_bytes())
+            return _VFolderIndex.from_dict(data)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log.warning("ignoring a corrupted usage index (vfolder:{}): {!r}", key, e)
+            return None
+
+    def _save(self, key: str, index: _VFolderIndex) -> None:
+        index_file = self._get_index_file(key)
+        tmp_file = index_file.with_name(f".{index_file.name}.{os.getpid()}.tmp")
+        tmp_file.write_bytes(msgpack.packb(index.to_dict()))
+        os.replace(tmp_file, index_file)
@@ -1,23 +1,103 @@
 import json
-from typing import Optional
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Iterator, Mapping, Optional
 
+import aiohttp
 from aiohttp import web
 
 from ai.backend.client.config import APIConfig
 from ai.backend.client.session import AsyncSession as APISession
+from ai.backend.client.session import api_session as current_api_session
 from ai.backend.common.web.session import get_session
 
 from . import user_agent
 
 
-async def get_api_session(
-    request: web.Request,
-    override_api_endpoint: Optional[str] = None,
-) -> APISession:
-    config = request.app["config"]
-    api_endpoint = config["api"]["endpoint"][0]
-    if override_api_endpoint is not None:
-        api_endpoint = override_api_endpoint
+class APISessionCache:
+    """
+    A bounded LRU cache of the API client sessions keyed by the API endpoint and the access key,
+    which share a single HTTP client session and its connection pool to the managers.
+
+    The cached sessions must not be opened with ``async with`` or closed by the request handlers,
+    and the per-request states such as cookies and forwarding headers must be set to
+    the individual API requests instead of the shared HTTP client session.
+    """
+
+    def __init__(self, api_config: Mapping[str, Any], max_size: int) -> None:
+        self.domain = api_config["domain"]
+        self.skip_sslcert_validation = not api_config["ssl_verify"]
+        self.max_size = max_size
+        self._sessions: OrderedDict[tuple[str, str], APISession] = OrderedDict()
+        self._aiohttp_session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def aiohttp_session(self) -> aiohttp.ClientSession:
+        if self._aiohttp_session is None:
+            connector = aiohttp.TCPConnector(
+                ssl=not self.skip_sslcert_validation,
+                # Long-lived websocket connections also hold the connections.
+                limit=0,
+            )
+            self._aiohttp_session = aiohttp.ClientSession(
+                connector=connector,
+                # Cookies are delivered per request.
+                cookie_jar=aiohttp.DummyCookieJar(),
+            )
+        return self._aiohttp_session
+
+    def get(self, endpoint: str, access_key: str, secret_key: str) -> APISession:
+        key = (str(endpoint), access_key)
+        if (api_session := self._sessions.get(key)) is not None:
+            if api_session.config.secret_key == secret_key:
+                self._sessions.move_to_end(key)
+                return api_session
+        api_config = APIConfig(
+            domain=self.domain,
+            endpoint=endpoint,
+            endpoint_type="api",
+            access_key=access_key,
+            secret_key=secret_key,
+            user_agent=user_agent,
+            skip_sslcert_validation=self.skip_sslcert_validation,
+        )
+        api_session = APISession(
+            config=api_config,
+            proxy_mode=True,
+            aiohttp_session=self.aiohttp_session,
+        )
+        self._sessions[key] = api_session
+        self._sessions.move_to_end(key)
+        while len(self._sessions) > self.max_size:
+            # The evicted sessions own nothing to release, so the in-flight requests
+            # may keep using them.
+            self._sessions.popitem(last=False)
+        return api_session
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    async def close(self) -> None:
+        self._sessions.clear()
+        if self._aiohttp_session is not None:
+            await self._aiohttp_session.close()
+            self._aiohttp_session = None
+
+
+@contextmanager
+def activate_api_session(api_session: APISession) -> Iterator[APISession]:
+    """
+    Make the given API session current for the API requests created in the context,
+    without opening and closing it like ``async with``.
+    """
+    token = current_api_session.set(api_session)
+    try:
+        yield api_session
+    finally:
+        current_api_session.reset(token)
+
+
+async def _get_keypair(request: web.Request) -> tuple[str, str]:
     session = await get_session(request)
     if not session.get("authenticated", False):
         raise web.HTTPUnauthorized(
@@ -44,7 +124,18 @@ async def get_api_session(
             }),
             content_type="application/problem+json",
         )
-    ak, sk = token["access_key"], token["secret_key"]
+    return token["access_key"], token["secret_key"]
+
+
+async def get_api_session(
+    request: web.Request,
+    override_api_endpoint: Optional[str] = None,
+) -> APISession:
+    config = request.app["config"]
+    api_endpoint = config["api"]["endpoint"][0]
+    if override_api_endpoint is not None:
+        api_endpoint = override_api_endpoint
+    ak, sk = await _get_keypair(request)
     api_config = APIConfig(
         domain=config["api"]["domain"],
         endpoint=api_endpoint,
@@ -77,6 +168,34 @@ async def get_anonymous_session(
     return APISession(config=api_config, proxy_mode=True)
 
 
+async def get_cached_api_session(
+    request: web.Request,
+    override_api_endpoint: Optional[str] = None,
+) -> APISession:
+    """
+    Get the API session of the requesting user from the cache.
+    Unlike :func:`get_api_session()`, the returned session should be used with
+    :func:`activate_api_session()` and must not be closed.
+    """
+    api_endpoint = request.app["config"]["api"]["endpoint"][0]
+    if override_api_endpoint is not None:
+        api_endpoint = override_api_endpoint
+    ak, sk = await _get_keypair(request)
+    cache: APISessionCache = request.app["api_session_cache"]
+    return cache.get(api_endpoint, ak, sk)
+
+
+async def get_cached_anonymous_session(
+    request: web.Request,
+    override_api_endpoint: Optional[str] = None,
+) -> APISession:
+    api_endpoint = request.app["config"]["api"]["endpoint"][0]
+    if override_api_endpoint is not None:
+        api_endpoint = override_api_endpoint
+    cache: APISessionCache = request.app["api_session_cache"]
+    return cache.get(api_endpoint, "", "")
+
+
 def get_client_ip(request: web.Request) -> Optional[str]:
     client_ip = request.headers.get("X-Forwarded-For")
     if not client_ip and request.transport:
@@ -86,10 +205,7 @@ def get_client_ip(request: web.Request) -> Optional[str]:
     return client_ip
 
 
-def fill_forwarding_hdrs_to_api_session(
-    request: web.Request,
-    api_session: APISession,
-) -> None:
+def get_forwarding_hdrs(request: web.Request) -> dict[str, str]:
     _headers = {
         "X-Forwarded-Host": request.headers.get("X-Forwarded-Host", request.host),
         "X-Forwarded-Proto": request.headers.get("X-Forwarded-Proto", request.scheme),
@@ -97,4 +213,13 @@ def fill_forwarding_hdrs_to_api_session(
     client_ip = get_client_ip(request)
     if client_ip:
         _headers["X-Forwarded-For"] = client_ip
+    return _headers
+
+
+def fill_forwarding_hdrs_to_api_session(
+    request: web.Request,
+    api_session: APISession,
+) -> None:
+    _headers = get_forwarding_hdrs(request)
+    if "X-Forwarded-For" in _headers:
         api_session.aiohttp_session.headers.update(_headers)
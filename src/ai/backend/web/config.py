@@ -135,6 +135,7 @@ config_iv = t.Dict({
         t.Key("text"): t.String,
         tx.AliasedKey(["ssl_verify", "ssl-verify"], default=True): t.ToBool,
         t.Key("auth_token_name", default="sToken"): t.String,
+        t.Key("session_cache_size", default=1024): t.ToInt[1:],
     }).allow_extra("*"),
     t.Key("session"): t.Dict({
         t.Key("redis"): t.Dict({
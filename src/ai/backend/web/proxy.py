@@ -17,7 +17,12 @@ from ai.backend.client.request import Request
 from ai.backend.common.web.session import STORAGE_KEY, extra_config_headers, get_session
 from ai.backend.logging import BraceStyleAdapter
 
-from .auth import fill_forwarding_hdrs_to_api_session, get_anonymous_session, get_api_session
+from .auth import (
+    activate_api_session,
+    get_cached_anonymous_session,
+    get_cached_api_session,
+    get_forwarding_hdrs,
+)
 from .stats import WebStats
 
 log = BraceStyleAdapter(logging.getLogger(__spec__.name))
@@ -161,12 +166,12 @@ async def web_handler(
     stats.active_proxy_api_handlers.add(asyncio.current_task())  # type: ignore
     path = request.match_info.get("path", "")
     if is_anonymous:
-        api_session = await asyncio.shield(get_anonymous_session(request, api_endpoint))
+        api_session = await get_cached_anonymous_session(request, api_endpoint)
     else:
-        api_session = await asyncio.shield(get_api_session(request, api_endpoint))
+        api_session = await get_cached_api_session(request, api_endpoint)
     http_headers_to_forward_extra = http_headers_to_forward_extra or []
     try:
-        async with api_session:
+        with activate_api_session(api_session):
             # We perform request signing by ourselves using the HTTP session data,
             # but need to keep the client's version header so that
             # the final clients may perform its own API versioning support.
@@ -179,9 +184,6 @@ async def web_handler(
                 decrypted_payload_length = len(payload)
             else:
                 payload = request.content
-            fill_forwarding_hdrs_to_api_session(request, api_session)
-            # Deliver cookie for token-based authentication.
-            api_session.aiohttp_session.cookie_jar.update_cookies(request.cookies)
             # We treat all requests and responses as streaming universally
             # to be a transparent proxy.
             api_request = Request(
@@ -191,6 +193,12 @@ async def web_handler(
                 params=request.query,
                 override_api_version=request_api_version,
             )
+            # The API session is shared with other requests, so set the per-request states
+            # to the API request.
+            api_request.headers.update(get_forwarding_hdrs(request))
+            # Deliver cookie for token-based authentication.
+            if "Cookie" in request.headers:
+                api_request.headers["Cookie"] = request.headers["Cookie"]
             if "Content-Type" in request.headers:
                 api_request.content_type = request.content_type  # set for signing
                 api_request.headers["Content-Type"] = request.headers[
@@ -248,8 +256,6 @@ async def web_handler(
             }),
             content_type="application/problem+json",
         )
-    finally:
-        await api_session.close()
 
 
 async def web_plugin_handler(request, *, is_anonymous=False) -> web.StreamResponse:
@@ -262,20 +268,17 @@ async def web_plugin_handler(request, *, is_anonymous=False) -> web.StreamRespon
     stats.active_proxy_plugin_handlers.add(asyncio.current_task())  # type: ignore
     path = request.match_info["path"]
     if is_anonymous:
-        api_session = await asyncio.shield(get_anonymous_session(request))
+        api_session = await get_cached_anonymous_session(request)
     else:
-        api_session = await asyncio.shield(get_api_session(request))
+        api_session = await get_cached_api_session(request)
     try:
-        async with api_session:
+        with activate_api_session(api_session):
             content = request.content
             if path == "auth/signup":
                 body = await request.json()
                 body["domain"] = request.app["config"]["api"]["domain"]
                 content = json.dumps(body).encode("utf8")
             request_api_version = request.headers.get("X-BackendAI-Version", None)
-            fill_forwarding_hdrs_to_api_session(request, api_session)
-            # Deliver cookie for token-based authentication.
-            api_session.aiohttp_session.cookie_jar.update_cookies(request.cookies)
             api_request = Request(
                 request.method,
                 path,
@@ -284,6 +287,10 @@ async def web_plugin_handler(request, *, is_anonymous=False) -> web.StreamRespon
                 content_type=request.content_type,
                 override_api_version=request_api_version,
             )
+            api_request.headers.update(get_forwarding_hdrs(request))
+            # Deliver cookie for token-based authentication.
+            if "Cookie" in request.headers:
+                api_request.headers["Cookie"] = request.headers["Cookie"]
             for hdr in HTTP_HEADERS_TO_FORWARD:
                 if request.headers.get(hdr) is not None:
                     api_request.headers[hdr] = request.headers[hdr]
@@ -353,13 +360,12 @@ async def websocket_handler(
         should_save_session = True
 
     if is_anonymous:
-        api_session = await asyncio.shield(get_anonymous_session(request, api_endpoint))
+        api_session = await get_cached_anonymous_session(request, api_endpoint)
     else:
-        api_session = await asyncio.shield(get_api_session(request, api_endpoint))
+        api_session = await get_cached_api_session(request, api_endpoint)
     try:
-        async with api_session:
+        with activate_api_session(api_session):
             request_api_version = request.headers.get("X-BackendAI-Version", None)
-            fill_forwarding_hdrs_to_api_session(request, api_session)
             api_request = Request(
                 request.method,
                 path,
@@ -368,6 +374,7 @@ async def websocket_handler(
                 content_type=request.content_type,
                 override_api_version=request_api_version,
             )
+            api_request.headers.update(get_forwarding_hdrs(request))
             async with api_request.connect_websocket() as up_conn:
                 down_conn = web.WebSocketResponse()
                 await down_conn.prepare(request)
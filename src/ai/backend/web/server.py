@@ -43,7 +43,7 @@ from ai.backend.logging import BraceStyleAdapter, Logger, LogLevel
 from ai.backend.web.security import SecurityPolicy, security_policy_middleware
 
 from . import __version__, user_agent
-from .auth import fill_forwarding_hdrs_to_api_session, get_client_ip
+from .auth import APISessionCache, fill_forwarding_hdrs_to_api_session, get_client_ip
 from .config import config_iv
 from .proxy import decrypt_payload, web_handler, web_plugin_handler, websocket_handler
 from .stats import WebStats, track_active_handlers, view_stats
@@ -572,6 +572,7 @@ async def server_shutdown(app) -> None:
 
 
 async def server_cleanup(app) -> None:
+    await app["api_session_cache"].close()
     await app["redis"].close()
 
 
@@ -663,6 +664,10 @@ async def server_main(
     cors = aiohttp_cors.setup(app, defaults=cors_options)
 
     app["stats"] = WebStats()
+    app["api_session_cache"] = APISessionCache(
+        config["api"],
+        max_size=config["api"]["session_cache_size"],
+    )
 
     anon_web_handler = partial(web_handler, is_anonymous=True)
     anon_web_plugin_handler = partial(web_plugin_handler, is_anonymous=True)
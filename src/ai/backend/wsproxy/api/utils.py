@@ -27,19 +27,23 @@ from ..exceptions import InvalidAPIParameters
 from ..types import PydanticResponse
 
 
+def is_api_token_valid(request: web.Request) -> bool:
+    root_ctx: RootContext = request.app["_root.context"]
+    permitted_token = root_ctx.local_config.wsproxy.api_secret
+    permitted_header_values = (
+        permitted_token,
+        f"Bearer {permitted_token}",
+        f"BackendAI {permitted_token}",
+    )
+    token_to_evaluate = request.headers.get("X-BackendAI-Token")
+    return token_to_evaluate in permitted_header_values
+
+
 def auth_required(scope: Literal["manager"] | Literal["worker"]) -> Callable[[Handler], Handler]:
     def wrap(handler: Handler) -> Handler:
         @functools.wraps(handler)
         async def wrapped(request: web.Request, *args, **kwargs):
-            root_ctx: RootContext = request.app["_root.context"]
-            permitted_token = root_ctx.local_config.wsproxy.api_secret
-            permitted_header_values = (
-                permitted_token,
-                f"Bearer {permitted_token}",
-                f"BackendAI {permitted_token}",
-            )
-            token_to_evaluate = request.headers.get("X-BackendAI-Token")
-            if token_to_evaluate not in permitted_header_values:
+            if not is_api_token_valid(request):
                 raise AuthorizationFailed("Unauthorized access")
             return await handler(request, *args, **kwargs)
 
@@ -26,7 +26,7 @@ from pydantic_core import PydanticUndefined, core_schema
 from ai.backend.common import config
 from ai.backend.logging import LogFormat, LogLevel
 
-from .types import EventLoopType, ProxyProtocol
+from .types import EventLoopType, LoadBalancingStrategy, ProxyProtocol, TCPRelayMode
 
 _file_perm = (Path(__file__).parent / "server.py").stat()
 
@@ -415,6 +415,54 @@ class WSProxyConfig(BaseSchema):
         ProxyProtocol, Field(default=ProxyProtocol.HTTP, description="Proxy protocol")
     ]
 
+    load_balancing_strategy: Annotated[
+        LoadBalancingStrategy,
+        Field(
+            default=LoadBalancingStrategy.RANDOM,
+            description=(
+                "Strategy to select a route of circuits with multiple routes."
+                " random: weighted by the traffic ratio,"
+                " least-outstanding: the fewest in-flight requests,"
+                " peak-ewma: the lowest latency estimate multiplied by the in-flight requests,"
+                " p2c: the fewer in-flight requests of two randomly chosen routes."
+            ),
+        ),
+    ]
+
+    tcp_relay_mode: Annotated[
+        TCPRelayMode,
+        Field(
+            default=TCPRelayMode.SOCKET,
+            description=(
+                "How to relay the data of TCP circuits."
+                " stream: through the asyncio streams,"
+                " socket: directly between the sockets with reusable buffers,"
+                " splice: within the kernel using splice() (Linux only)."
+            ),
+        ),
+    ]
+
+    upstream_pool_size: Annotated[
+        int,
+        Field(
+            default=128,
+            gt=0,
+            description="Maximum number of connections to each route of HTTP circuits",
+        ),
+    ]
+    upstream_keepalive_timeout: Annotated[
+        float,
+        Field(
+            default=4.0,
+            ge=0,
+            description=(
+                "Seconds to keep the idle connections to the routes of HTTP circuits for reuse."
+                " Keep this shorter than the keep-alive timeout of the app servers"
+                " (e.g., 5 seconds of uvicorn) not to reuse the connections being closed by them."
+            ),
+        ),
+    ]
+
     jwt_encrypt_key: Annotated[
         str, Field(examples=["50M3G00DL00KING53CR3T"], description="JWT encryption key")
     ]
@@ -8,7 +8,9 @@ from yarl import URL
 
 from ai.backend.logging import BraceStyleAdapter
 from ai.backend.wsproxy.defs import RootContext
-from ai.backend.wsproxy.types import Circuit
+from ai.backend.wsproxy.types import Circuit, RouteInfo
+
+from .balancer import RouteBalancer
 
 log = BraceStyleAdapter(logging.getLogger(__spec__.name))
 
@@ -24,7 +26,10 @@ class HttpRequest:
 class AbstractBackend(metaclass=ABCMeta):
     root_context: RootContext
     circuit: Circuit
+    balancer: RouteBalancer
+    routes: list[RouteInfo]
 
     def __init__(self, root_context: RootContext, circuit: Circuit) -> None:
         self.root_context = root_context
         self.circuit = circuit
+        self.balancer = RouteBalancer(root_context.local_config.wsproxy.load_balancing_strategy)
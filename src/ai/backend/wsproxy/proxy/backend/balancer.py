@@ -0,0 +1,233 @@
+import logging
+import math
+import random
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Final, Iterator, Sequence
+
+from ai.backend.logging import BraceStyleAdapter
+from ai.backend.wsproxy.exceptions import WorkerNotAvailable
+from ai.backend.wsproxy.types import LoadBalancingStrategy, RouteInfo
+
+log = BraceStyleAdapter(logging.getLogger(__spec__.name))
+
+# The time constant of the exponential decay of the latency estimates.
+EWMA_DECAY_TIME: Final = 10.0
+# The number of consecutive failures to eject a route.
+EJECTION_THRESHOLD: Final = 5
+# The ejection period doubles for each consecutive ejection of the same route.
+EJECTION_BASE_DURATION: Final = 5.0
+EJECTION_MAX_DURATION: Final = 300.0
+
+RouteKey = tuple[str, int]
+
+
+def route_key(route: RouteInfo) -> RouteKey:
+    return (route.kernel_host, route.kernel_port)
+
+
+@dataclass
+class RouteStats:
+    outstanding: int = 0
+    requests: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    ejections: int = 0
+    ejected_until: float = 0.0
+    # The peak-sensitive EWMA of the latency in seconds, which jumps up to a higher latency
+    # immediately and decays towards the lower latencies over time.
+    ewma_latency: float = 0.0
+    last_observed_at: float = 0.0
+
+    def observe_latency(self, latency: float, now: float) -> None:
+        if latency > self.ewma_latency:
+            self.ewma_latency = latency
+        else:
+            weight = math.exp(-(now - self.last_observed_at) / EWMA_DECAY_TIME)
+            self.ewma_latency = self.ewma_latency * weight + latency * (1.0 - weight)
+        self.last_observed_at = now
+
+    def is_ejected(self, now: float) -> bool:
+        return self.ejected_until > now
+
+
+class RouteTracker:
+    """
+    Records the result of a request or a connection to a route, which counts as
+    an outstanding one until the tracking context exits.
+    """
+
+    def __init__(self, balancer: "RouteBalancer", route: RouteInfo, stats: RouteStats) -> None:
+        self._balancer = balancer
+        self._route = route
+        self._stats = stats
+        self._started_at = time.monotonic()
+        self.completed = False
+
+    def succeeded(self) -> None:
+        if self.completed:
+            return
+        self.completed = True
+        now = time.monotonic()
+        self._stats.observe_latency(now - self._started_at, now)
+        self._stats.consecutive_failures = 0
+        self._stats.ejections = 0
+
+    def failed(self) -> None:
+        if self.completed:
+            return
+        self.completed = True
+        self._balancer.record_failure(self._route, self._stats)
+
+
+class RouteBalancer:
+    """
+    Selects a route of a circuit for each request by the configured strategy, using the
+    per-route statistics of the requests proxied by this worker.
+
+    The routes failing :data:`EJECTION_THRESHOLD` times in a row are excluded from the selection
+    for a backoff period, unless all routes are ejected.
+    """
+
+    strategy: LoadBalancingStrategy
+    stats: dict[RouteKey, RouteStats]
+
+    def __init__(self, strategy: LoadBalancingStrategy) -> None:
+        self.strategy = strategy
+        self.stats = {}
+
+    def get_route_stats(self, route: RouteInfo) -> RouteStats:
+        key = route_key(route)
+        if (stats := self.stats.get(key)) is None:
+            stats = RouteStats()
+            self.stats[key] = stats
+        return stats
+
+    def prune(self, routes: Sequence[RouteInfo]) -> None:
+        active_keys = {route_key(route) for route in routes}
+        for key in [*self.stats.keys()]:
+            if key not in active_keys:
+                del self.stats[key]
+
+    def select(self, routes: Sequence[RouteInfo]) -> RouteInfo:
+        candidates = [route for route in routes if route.traffic_ratio > 0]
+        if not candidates:
+            raise WorkerNotAvailable
+        now = time.monotonic()
+        healthy_candidates = [
+            route for route in candidates if not self.get_route_stats(route).is_ejected(now)
+        ]
+        if healthy_candidates:
+            candidates = healthy_candidates
+        if len(candidates) == 1:
+            return candidates[0]
+        match self.strategy:
+            case LoadBalancingStrategy.RANDOM:
+                return self._select_random(candidates)
+            case LoadBalancingStrategy.LEAST_OUTSTANDING:
+                return self._select_min(candidates, self._outstanding_cost)
+            case LoadBalancingStrategy.PEAK_EWMA:
+                default_latency = self._get_default_latency(candidates)
+                return self._select_min(
+                    candidates,
+                    lambda route: self._peak_ewma_cost(route, default_latency),
+                )
+            case LoadBalancingStrategy.POWER_OF_TWO_CHOICES:
+                first = self._select_random(candidates)
+                second = self._select_random([route for route in candidates if route is not first])
+                return min(first, second, key=self._outstanding_cost)
+            case _:
+                raise RuntimeError(f"Unsupported load balancing strategy: {self.strategy}")
+
+    @contextmanager
+    def track(self, route: RouteInfo) -> Iterator[RouteTracker]:
+        """
+        Track a request or a connection to the route.  It is recorded as a failure if an
+        exception other than cancellation is raised before the result is recorded.
+        """
+        stats = self.get_route_stats(route)
+        stats.outstanding += 1
+        stats.requests += 1
+        tracker = RouteTracker(self, route, stats)
+        try:
+            yield tracker
+        except Exception:
+            tracker.failed()
+            raise
+        finally:
+            stats.outstanding -= 1
+
+    def record_failure(self, route: RouteInfo, stats: RouteStats) -> None:
+        stats.failures += 1
+        stats.consecutive_failures += 1
+        if stats.consecutive_failures >= EJECTION_THRESHOLD:
+            stats.consecutive_failures = 0
+            stats.ejections += 1
+            duration = min(
+                EJECTION_BASE_DURATION * (2 ** (stats.ejections - 1)),
+                EJECTION_MAX_DURATION,
+            )
+            stats.ejected_until = time.monotonic() + duration
+            log.warning(
+                "ejecting the route {}:{} for {:.0f}s after consecutive failures (ejections:{})",
+                route.kernel_host,
+                route.kernel_port,
+                duration,
+                stats.ejections,
+            )
+
+    def dump_stats(self, routes: Sequence[RouteInfo]) -> list[dict[str, Any]]:
+        now = time.monotonic()
+        result = []
+        for route in routes:
+            # Look up without inserting, not to revive the stats of the pruned routes.
+            if (stats := self.stats.get(route_key(route))) is None:
+                stats = RouteStats()
+            result.append({
+                "session_id": str(route.session_id),
+                "kernel_host": route.kernel_host,
+                "kernel_port": route.kernel_port,
+                "traffic_ratio": route.traffic_ratio,
+                "outstanding": stats.outstanding,
+                "requests": stats.requests,
+                "failures": stats.failures,
+                "consecutive_failures": stats.consecutive_failures,
+                "ejected": stats.is_ejected(now),
+                "ejected_for": max(0.0, stats.ejected_until - now),
+                "ewma_latency": stats.ewma_latency,
+            })
+        return result
+
+    def _select_random(self, candidates: Sequence[RouteInfo]) -> RouteInfo:
+        ratios = [route.traffic_ratio for route in candidates]
+        return random.choices(candidates, weights=ratios, k=1)[0]
+
+    def _select_min(
+        self,
+        candidates: Sequence[RouteInfo],
+        cost_fn: Callable[[RouteInfo], float],
+    ) -> RouteInfo:
+        # Break ties randomly not to send all requests to the first route when idle.
+        shuffled = random.sample(candidates, len(candidates))
+        return min(shuffled, key=cost_fn)
+
+    def _outstanding_cost(self, route: RouteInfo) -> float:
+        return (self.get_route_stats(route).outstanding + 1) / route.traffic_ratio
+
+    def _peak_ewma_cost(self, route: RouteInfo, default_latency: float) -> float:
+        stats = self.get_route_stats(route)
+        latency = stats.ewma_latency if stats.last_observed_at else default_latency
+        return latency * (stats.outstanding + 1) / route.traffic_ratio
+
+    def _get_default_latency(self, candidates: Sequence[RouteInfo]) -> float:
+        # Assume the average latency for the routes without any measurements yet
+        # not to flood them with requests.
+        latencies = [
+            stats.ewma_latency
+            for route in candidates
+            if (stats := self.get_route_stats(route)).last_observed_at
+        ]
+        if not latencies:
+            return 1.0
+        return sum(latencies) / len(latencies)
@@ -1,42 +1,107 @@
 import asyncio
 import logging
-import random
 from contextlib import asynccontextmanager
-from typing import AsyncIterator
+from dataclasses import dataclass
+from typing import AsyncIterator, Final
 
 import aiohttp
-from aiohttp import ClientConnectorError, web
+from aiohttp import ClientConnectorError, hdrs, web
 
 from ai.backend.logging import BraceStyleAdapter
-from ai.backend.wsproxy.exceptions import ContainerConnectionRefused, WorkerNotAvailable
+from ai.backend.wsproxy.exceptions import ContainerConnectionRefused
 from ai.backend.wsproxy.types import RouteInfo
 
 from .abc import AbstractBackend, HttpRequest
+from .balancer import route_key
 
 log = BraceStyleAdapter(logging.getLogger(__spec__.name))
 
 CHUNK_SIZE = 1 * 1024 * 1024  # 1 KiB
 
+# The hop-by-hop headers which would close or alter the pooled upstream connections.
+HOP_BY_HOP_HEADERS: Final = frozenset({
+    hdrs.CONNECTION.lower(),
+    hdrs.KEEP_ALIVE.lower(),
+    "proxy-connection",
+})
+# The requests safe to resend when the upstream has closed the pooled connection.
+RETRYABLE_METHODS: Final = frozenset({hdrs.METH_GET, hdrs.METH_HEAD, hdrs.METH_OPTIONS})
+
+
+@dataclass
+class UpstreamPool:
+    """
+    A persistent connection pool to a route, which is closed after the route is removed
+    and all requests and websocket connections using it are finished.
+    """
+
+    session: aiohttp.ClientSession
+    inflight: int = 0
+    retired: bool = False
+
 
 class HTTPBackend(AbstractBackend):
     routes: list[RouteInfo]
+    pools: dict[tuple[str, int], UpstreamPool]
 
     def __init__(self, routes: list[RouteInfo], *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
         self.routes = routes
+        self.pools = {}
+
+    async def update_routes(self, routes: list[RouteInfo]) -> None:
+        self.routes = routes
+        self.balancer.prune(routes)
+        active_keys = {route_key(route) for route in routes}
+        for key in [*self.pools.keys()]:
+            if key not in active_keys:
+                await self._retire_pool(self.pools.pop(key))
+
+    async def close(self) -> None:
+        self.routes = []
+        pools = [*self.pools.values()]
+        self.pools.clear()
+        for pool in pools:
+            await self._retire_pool(pool)
+
+    async def _retire_pool(self, pool: UpstreamPool) -> None:
+        pool.retired = True
+        if pool.inflight == 0:
+            await pool.session.close()
+
+    def _get_pool(self, route: RouteInfo) -> UpstreamPool:
+        key = route_key(route)
+        if (pool := self.pools.get(key)) is None:
+            config = self.root_context.local_config.wsproxy
+            connector = aiohttp.TCPConnector(
+                limit=config.upstream_pool_size,
+                keepalive_timeout=config.upstream_keepalive_timeout,
+            )
+            session = aiohttp.ClientSession(
+                base_url=f"http://{route.kernel_host}:{route.kernel_port}",
+                connector=connector,
+                auto_decompress=False,
+                # Do not share the cookies of a client with the others.
+                cookie_jar=aiohttp.DummyCookieJar(),
+            )
+            pool = UpstreamPool(session)
+            self.pools[key] = pool
+        return pool
+
+    @asynccontextmanager
+    async def use_pool(self, route: RouteInfo) -> AsyncIterator[aiohttp.ClientSession]:
+        pool = self._get_pool(route)
+        pool.inflight += 1
+        try:
+            yield pool.session
+        finally:
+            pool.inflight -= 1
+            if pool.retired and pool.inflight == 0:
+                await pool.session.close()
 
     @property
     def selected_route(self) -> RouteInfo:
-        if len(self.routes) == 0:
-            raise WorkerNotAvailable
-        elif len(self.routes) == 1:
-            selected_route = self.routes[0]
-            if selected_route.traffic_ratio == 0:
-                raise WorkerNotAvailable
-        else:
-            ratios: list[float] = [r.traffic_ratio for r in self.routes]
-            selected_route = random.choices(self.routes, weights=ratios, k=1)[0]
-        return selected_route
+        return self.balancer.select(self.routes)
 
     def get_x_forwarded_proto(self, request: web.Request) -> str:
         return request.headers.get("x-forwarded-proto") or "http"
@@ -48,33 +113,42 @@ class HTTPBackend(AbstractBackend):
     async def request_http(
         self, route: RouteInfo, request: HttpRequest
     ) -> AsyncIterator[aiohttp.ClientResponse]:
-        base_url = f"http://{route.kernel_host}:{route.kernel_port}"
-        headers = dict(request.headers)
+        headers = {k: v for k, v in request.headers.items() if k.lower() not in HOP_BY_HOP_HEADERS}
 
         if headers.get("Transfer-Encoding", "").lower() == "chunked":
             del headers["Transfer-Encoding"]
-        async with aiohttp.ClientSession(
-            base_url=base_url,
-            auto_decompress=False,
-        ) as session:
-            async with session.request(
-                request.method,
-                request.path,
-                headers=headers,
-                data=request.body,
-            ) as response:
+        retryable = request.method in RETRYABLE_METHODS and request.body.at_eof()
+        async with self.use_pool(route) as session:
+            while True:
+                try:
+                    response = await session.request(
+                        request.method,
+                        request.path,
+                        headers=headers,
+                        data=request.body,
+                    )
+                    break
+                except aiohttp.ServerDisconnectedError:
+                    # The upstream may close an idle pooled connection just before we reuse it.
+                    if not retryable:
+                        raise
+                    retryable = False
+                    log.debug(
+                        "retrying {} {} after the upstream has disconnected",
+                        request.method,
+                        request.path,
+                    )
+            async with response:
                 yield response
 
     @asynccontextmanager
     async def connect_websocket(
         self, route: RouteInfo, request: web.Request, protocols: list[str] = []
     ) -> AsyncIterator[aiohttp.ClientWebSocketResponse]:
-        base_url = f"http://{route.kernel_host}:{route.kernel_port}"
-        async with aiohttp.ClientSession(
-            base_url=base_url,
-            auto_decompress=False,
-        ) as session:
-            log.debug("connecting to {}{}", base_url, request.rel_url)
+        async with self.use_pool(route) as session:
+            log.debug(
+                "connecting to {}:{}{}", route.kernel_host, route.kernel_port, request.rel_url
+            )
             async with session.ws_connect(request.rel_url, protocols=protocols) as ws:
                 log.debug("connected")
                 yield ws
@@ -120,17 +194,22 @@ class HTTPBackend(AbstractBackend):
         )
 
         try:
-            async with self.request_http(route, upstream_request) as backend_response:
-                response = web.StreamResponse(
-                    status=backend_response.status,
-                    headers={**backend_response.headers, "Access-Control-Allow-Origin": "*"},
-                )
-                await response.prepare(request)
-                async for data in backend_response.content.iter_chunked(CHUNK_SIZE):
-                    await response.write(data)
-                await response.drain()
-
-                return response
+            with self.balancer.track(route) as tracker:
+                async with self.request_http(route, upstream_request) as backend_response:
+                    if backend_response.status >= 500:
+                        tracker.failed()
+                    else:
+                        tracker.succeeded()
+                    response = web.StreamResponse(
+                        status=backend_response.status,
+                        headers={**backend_response.headers, "Access-Control-Allow-Origin": "*"},
+                    )
+                    await response.prepare(request)
+                    async for data in backend_response.content.iter_chunked(CHUNK_SIZE):
+                        await response.write(data)
+                    await response.drain()
+
+                    return response
         except aiohttp.ClientOSError as e:
             raise ContainerConnectionRefused from e
         except:
@@ -191,23 +270,27 @@ class HTTPBackend(AbstractBackend):
         await downstream_ws.prepare(request)
 
         try:
-            async with self.connect_websocket(route, request, protocols=protocols) as upstream_ws:
-                try:
-                    async with asyncio.TaskGroup() as group:
-                        group.create_task(
-                            _proxy_task(upstream_ws, downstream_ws, tag="(up -> down)")
-                        )
-                        group.create_task(
-                            _proxy_task(downstream_ws, upstream_ws, tag="(down -> up)")
-                        )
-                        log.debug("created tasks, now waiting until one of two tasks end")
-                        await stop_event.wait()
-                finally:
-                    log.debug("tasks ended")
-                    if not downstream_ws.closed:
-                        await downstream_ws.close()
-                    if not upstream_ws.closed:
-                        await upstream_ws.close()
+            with self.balancer.track(route) as tracker:
+                async with self.connect_websocket(
+                    route, request, protocols=protocols
+                ) as upstream_ws:
+                    tracker.succeeded()
+                    try:
+                        async with asyncio.TaskGroup() as group:
+                            group.create_task(
+                                _proxy_task(upstream_ws, downstream_ws, tag="(up -> down)")
+                            )
+                            group.create_task(
+                                _proxy_task(downstream_ws, upstream_ws, tag="(down -> up)")
+                            )
+                            log.debug("created tasks, now waiting until one of two tasks end")
+                            await stop_event.wait()
+                    finally:
+                        log.debug("tasks ended")
+                        if not downstream_ws.closed:
+                            await downstream_ws.close()
+                        if not upstream_ws.closed:
+                            await upstream_ws.close()
             log.debug("websocket connection closed")
         except ClientConnectorError:
             log.debug("upstream connection closed")
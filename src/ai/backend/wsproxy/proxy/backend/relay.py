@@ -0,0 +1,162 @@
+import asyncio
+import errno
+import fcntl
+import logging
+import os
+import socket
+import sys
+import time
+from typing import Final
+
+from ai.backend.logging import BraceStyleAdapter
+
+log = BraceStyleAdapter(logging.getLogger(__spec__.name))
+
+RELAY_BUFFER_SIZE: Final[int] = 256 * 1024
+SPLICE_PIPE_SIZE: Final[int] = 1 * 1024 * 1024
+DNS_CACHE_TTL: Final[float] = 30.0
+
+SPLICE_AVAILABLE: Final[bool] = sys.platform == "linux" and hasattr(os, "splice")
+
+AddrInfo = tuple[socket.AddressFamily, socket.SocketKind, int, str, tuple]
+
+
+class HostResolver:
+    """
+    Resolves the hostnames of the routes with the event loop's resolver, caching the results
+    for :data:`DNS_CACHE_TTL` seconds not to query the resolver for every connection.
+    """
+
+    def __init__(self, ttl: float = DNS_CACHE_TTL) -> None:
+        self.ttl = ttl
+        self._cache: dict[tuple[str, int], tuple[float, list[AddrInfo]]] = {}
+
+    async def resolve(self, host: str, port: int) -> list[AddrInfo]:
+        key = (host, port)
+        now = time.monotonic()
+        if (cached := self._cache.get(key)) is not None and cached[0] > now:
+            return cached[1]
+        loop = asyncio.get_running_loop()
+        addrinfos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        self._cache[key] = (now + self.ttl, addrinfos)
+        return addrinfos
+
+    def invalidate(self, host: str, port: int) -> None:
+        self._cache.pop((host, port), None)
+
+
+resolver = HostResolver()
+
+
+def configure_socket(sock: socket.socket) -> None:
+    sock.setblocking(False)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    if sock.family in (socket.AF_INET, socket.AF_INET6):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+async def open_socket(host: str, port: int) -> socket.socket:
+    """
+    Connect to the given address without blocking the event loop, trying all resolved
+    addresses in order.
+    """
+    loop = asyncio.get_running_loop()
+    last_error: OSError | None = None
+    for family, type_, proto, _, address in await resolver.resolve(host, port):
+        sock = socket.socket(family, type_, proto)
+        try:
+            configure_socket(sock)
+            await loop.sock_connect(sock, address)
+            return sock
+        except OSError as e:
+            sock.close()
+            last_error = e
+        except BaseException:
+            sock.close()
+            raise
+    # The address may have been changed.
+    resolver.invalidate(host, port)
+    if last_error is None:
+        raise OSError(errno.EHOSTUNREACH, f"Could not resolve {host}")
+    raise last_error
+
+
+def _shutdown_write(sock: socket.socket) -> None:
+    try:
+        sock.shutdown(socket.SHUT_WR)
+    except OSError:
+        pass
+
+
+async def relay_by_socket(src: socket.socket, dst: socket.socket) -> int:
+    """
+    Relay the data from ``src`` to ``dst`` through a reusable buffer until ``src`` reaches EOF,
+    then half-close ``dst``.  Returns the number of relayed bytes.
+    """
+    loop = asyncio.get_running_loop()
+    buf = bytearray(RELAY_BUFFER_SIZE)
+    view = memoryview(buf)
+    total = 0
+    while nbytes := await loop.sock_recv_into(src, buf):
+        await loop.sock_sendall(dst, view[:nbytes])
+        total += nbytes
+    _shutdown_write(dst)
+    return total
+
+
+async def _wait_fd(loop: asyncio.AbstractEventLoop, fd: int, *, writable: bool) -> None:
+    fut = loop.create_future()
+
+    def _wakeup() -> None:
+        if not fut.done():
+            fut.set_result(None)
+
+    if writable:
+        loop.add_writer(fd, _wakeup)
+    else:
+        loop.add_reader(fd, _wakeup)
+    try:
+        await fut
+    finally:
+        if writable:
+            loop.remove_writer(fd)
+        else:
+            loop.remove_reader(fd)
+
+
+async def relay_by_splice(src: socket.socket, dst: socket.socket) -> int:
+    """
+    Relay the data from ``src`` to ``dst`` with :func:`os.splice()` through a pipe, so that the
+    data is moved within the kernel without being copied to the userspace.
+    Both sockets must be non-blocking.  Returns the number of relayed bytes.
+    """
+    loop = asyncio.get_running_loop()
+    src_fd, dst_fd = src.fileno(), dst.fileno()
+    flags = os.SPLICE_F_MOVE | os.SPLICE_F_NONBLOCK
+    pipe_r, pipe_w = os.pipe2(os.O_NONBLOCK | os.O_CLOEXEC)
+    try:
+        try:
+            fcntl.fcntl(pipe_w, fcntl.F_SETPIPE_SZ, SPLICE_PIPE_SIZE)
+        except OSError:
+            pass  # keep the default pipe size if not permitted
+        total = 0
+        while True:
+            try:
+                nbytes = os.splice(src_fd, pipe_w, SPLICE_PIPE_SIZE, flags=flags)
+            except BlockingIOError:
+                await _wait_fd(loop, src_fd, writable=False)
+                continue
+            if nbytes == 0:
+                break
+            pending = nbytes
+            while pending > 0:
+                try:
+                    pending -= os.splice(pipe_r, dst_fd, pending, flags=flags)
+                except BlockingIOError:
+                    await _wait_fd(loop, dst_fd, writable=True)
+            total += nbytes
+    finally:
+        os.close(pipe_r)
+        os.close(pipe_w)
+    _shutdown_write(dst)
+    return total
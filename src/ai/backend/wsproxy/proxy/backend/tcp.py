@@ -1,20 +1,26 @@
 import asyncio
 import logging
-import random
 import socket
 from typing import Final
 
 from ai.backend.logging import BraceStyleAdapter
-from ai.backend.wsproxy.exceptions import WorkerNotAvailable
-from ai.backend.wsproxy.types import RouteInfo
+from ai.backend.wsproxy.types import RouteInfo, TCPRelayMode
 
 from .abc import AbstractBackend
+from .relay import SPLICE_AVAILABLE, open_socket, relay_by_socket, relay_by_splice
 
 log = BraceStyleAdapter(logging.getLogger(__spec__.name))
 
 MAX_BUFFER_SIZE: Final[int] = 1 * 1024 * 1024
 
 
+def get_relay_mode(mode: TCPRelayMode) -> TCPRelayMode:
+    if mode == TCPRelayMode.SPLICE and not SPLICE_AVAILABLE:
+        log.warning("splice() is not available on this platform; using the socket relay mode")
+        return TCPRelayMode.SOCKET
+    return mode
+
+
 class TCPBackend(AbstractBackend):
     routes: list[RouteInfo]
 
@@ -24,16 +30,11 @@ class TCPBackend(AbstractBackend):
 
     @property
     def selected_route(self) -> RouteInfo:
-        if len(self.routes) == 0:
-            raise WorkerNotAvailable
-        elif len(self.routes) == 1:
-            selected_route = self.routes[0]
-            if selected_route.traffic_ratio == 0:
-                raise WorkerNotAvailable
-        else:
-            ratios: list[float] = [r.traffic_ratio for r in self.routes]
-            selected_route = random.choices(self.routes, weights=ratios, k=1)[0]
-        return selected_route
+        return self.balancer.select(self.routes)
+
+    async def update_routes(self, routes: list[RouteInfo]) -> None:
+        self.routes = routes
+        self.balancer.prune(routes)
 
     async def bind(
         self, down_reader: asyncio.StreamReader, down_writer: asyncio.StreamWriter
@@ -52,7 +53,6 @@ class TCPBackend(AbstractBackend):
                         break
                     writer.write(data)
                     await writer.drain()
-                    log.debug("TCPBackend._pipe(t: {}): sent {} bytes", tag, len(data))
             except ConnectionResetError:
                 log.debug("Conn reset")
                 pass
@@ -71,24 +71,44 @@ class TCPBackend(AbstractBackend):
         )
 
         try:
-            sock = socket.socket(family=socket.AF_INET, type=socket.SOCK_STREAM)
-            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
-            # unlike .frontend.tcp this has a chance of being a blocking call since kernel host can be a domain
-            await asyncio.get_running_loop().run_in_executor(
-                None, sock.connect, (route.kernel_host, route.kernel_port)
-            )
-
-            up_reader, up_writer = await asyncio.open_connection(sock=sock)
-            log.debug(
-                "Connected to {}:{}",
-                route.kernel_host,
-                route.kernel_port,
-            )
-            async with asyncio.TaskGroup() as group:
-                group.create_task(_pipe(up_reader, down_writer, tag="up->down"))
-                group.create_task(_pipe(down_reader, up_writer, tag="down->up"))
+            with self.balancer.track(route) as tracker:
+                sock = await open_socket(route.kernel_host, route.kernel_port)
+                up_reader, up_writer = await asyncio.open_connection(sock=sock)
+                tracker.succeeded()
+                log.debug(
+                    "Connected to {}:{}",
+                    route.kernel_host,
+                    route.kernel_port,
+                )
+                async with asyncio.TaskGroup() as group:
+                    group.create_task(_pipe(up_reader, down_writer, tag="up->down"))
+                    group.create_task(_pipe(down_reader, up_writer, tag="down->up"))
         finally:
             log.debug("tasks ended")
             down_writer.close()
             await down_writer.wait_closed()
         log.debug("TCP connection closed")
+
+    async def relay(self, down_sock: socket.socket, mode: TCPRelayMode) -> None:
+        """
+        Relay the accepted connection to a route directly between the sockets, which is much
+        cheaper than passing the data through the asyncio streams.
+        """
+        route = self.selected_route
+        log.debug("Relaying TCP connection to {}:{}", route.kernel_host, route.kernel_port)
+        relay_fn = relay_by_splice if mode == TCPRelayMode.SPLICE else relay_by_socket
+        try:
+            with self.balancer.track(route) as tracker:
+                up_sock = await open_socket(route.kernel_host, route.kernel_port)
+                tracker.succeeded()
+                try:
+                    async with asyncio.TaskGroup() as group:
+                        group.create_task(relay_fn(down_sock, up_sock))
+                        group.create_task(relay_fn(up_sock, down_sock))
+                except* (ConnectionResetError, BrokenPipeError):
+                    log.debug("TCP connection reset")
+                finally:
+                    up_sock.close()
+        finally:
+            down_sock.close()
+        log.debug("TCP connection closed")
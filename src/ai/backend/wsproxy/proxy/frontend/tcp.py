@@ -8,9 +8,12 @@ from aiohttp import web
 from ai.backend.logging import BraceStyleAdapter
 from ai.backend.wsproxy.defs import RootContext
 from ai.backend.wsproxy.proxy.backend import TCPBackend
+from ai.backend.wsproxy.proxy.backend.relay import configure_socket
+from ai.backend.wsproxy.proxy.backend.tcp import get_relay_mode
 from ai.backend.wsproxy.types import (
     Circuit,
     RouteInfo,
+    TCPRelayMode,
 )
 
 from .abc import AbstractFrontend
@@ -21,6 +24,9 @@ log = BraceStyleAdapter(logging.getLogger(__spec__.name))
 class TCPFrontend(AbstractFrontend[TCPBackend, int]):
     servers: list[asyncio.Server]
     server_tasks: list[asyncio.Task]
+    listen_socks: list[socket.socket]
+    relay_tasks: set[asyncio.Task]
+    relay_mode: TCPRelayMode
 
     root_context: RootContext
 
@@ -29,9 +35,12 @@ class TCPFrontend(AbstractFrontend[TCPBackend, int]):
 
         self.servers = []
         self.server_tasks = []
+        self.listen_socks = []
+        self.relay_tasks = set()
 
     async def start(self) -> None:
         config = self.root_context.local_config.wsproxy
+        self.relay_mode = get_relay_mode(config.tcp_relay_mode)
         port_start, port_end = config.bind_proxy_port_range
         for port in range(port_start, port_end + 1):
             service_host = config.bind_host
@@ -41,6 +50,12 @@ class TCPFrontend(AbstractFrontend[TCPBackend, int]):
             # we're trying to bind to a UNIX domain file or host is not an IP address
             # so we don't have to wrap bind() call by run_in_executor()
             sock.bind((service_host, port))
+            if self.relay_mode != TCPRelayMode.STREAM:
+                sock.listen(1024)
+                sock.setblocking(False)
+                self.listen_socks.append(sock)
+                self.server_tasks.append(asyncio.create_task(self._accept_task(port, sock)))
+                continue
             server = await asyncio.start_server(
                 functools.partial(self.pipe, port),
                 sock=sock,
@@ -48,10 +63,11 @@ class TCPFrontend(AbstractFrontend[TCPBackend, int]):
             self.servers.append(server)
             self.server_tasks.append(asyncio.create_task(self._listen_task(port, server)))
         log.info(
-            "accepting proxy requests from {}:{}~{}",
+            "accepting proxy requests from {}:{}~{} (relay-mode: {})",
             config.bind_host,
             port_start,
             port_end,
+            self.relay_mode.value,
         )
 
     async def _listen_task(self, circuit_key: int, server: asyncio.Server) -> None:
@@ -62,6 +78,22 @@ class TCPFrontend(AbstractFrontend[TCPBackend, int]):
             log.exception("TCPFrontend._listen_task(c: {}): exception:", circuit_key)
             raise
 
+    async def _accept_task(self, circuit_key: int, sock: socket.socket) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                down_sock, _ = await loop.sock_accept(sock)
+            except asyncio.CancelledError:
+                return
+            except OSError:
+                log.exception("TCPFrontend._accept_task(c: {}): exception:", circuit_key)
+                # e.g., running out of the file descriptors
+                await asyncio.sleep(0.1)
+                continue
+            task = asyncio.create_task(self.relay(circuit_key, down_sock))
+            self.relay_tasks.add(task)
+            task.add_done_callback(self.relay_tasks.discard)
+
     async def stop(self) -> None:
         for task in self.server_tasks:
             task.cancel()
@@ -69,6 +101,12 @@ class TCPFrontend(AbstractFrontend[TCPBackend, int]):
         for server in self.servers:
             server.close()
             await server.wait_closed()
+        for sock in self.listen_socks:
+            sock.close()
+        relay_tasks = [*self.relay_tasks]
+        for task in relay_tasks:
+            task.cancel()
+        await asyncio.gather(*relay_tasks, return_exceptions=True)
 
     def ensure_credential(self, request: web.Request, circuit: Circuit) -> None:
         # TCP does not support authentication
@@ -78,7 +116,7 @@ class TCPFrontend(AbstractFrontend[TCPBackend, int]):
         return TCPBackend(routes, self.root_context, circuit)
 
     async def update_backend(self, backend: TCPBackend, routes: list[RouteInfo]) -> TCPBackend:
-        backend.routes = routes
+        await backend.update_routes(routes)
         return backend
 
     async def terminate_backend(self, backend: TCPBackend) -> None:
@@ -99,5 +137,19 @@ class TCPFrontend(AbstractFrontend[TCPBackend, int]):
             log.exception("TCPFrontend.pipe(k: {}):", circuit_key)
             raise
 
+    async def relay(self, circuit_key: int, down_sock: socket.socket) -> None:
+        backend: TCPBackend | None = self.backends.get(circuit_key)
+        if not backend:
+            down_sock.close()
+            return
+
+        try:
+            configure_socket(down_sock)
+            await backend.relay(down_sock, self.relay_mode)
+        except Exception:
+            log.exception("TCPFrontend.relay(k: {}):", circuit_key)
+        finally:
+            down_sock.close()
+
     def get_circuit_key(self, circuit: Circuit) -> int:
         return circuit.port
@@ -47,6 +47,7 @@ from ai.backend.wsproxy.types import (
 )
 
 from . import __version__
+from .api.utils import is_api_token_valid
 from .config import ServerConfig
 from .config import load as load_config
 from .defs import CleanupContext, RootContext
@@ -181,8 +182,25 @@ async def hello(request: web.Request) -> web.Response:
 
 
 async def status(request: web.Request) -> web.Response:
+    """
+    Returns the API version number, with the per-route statistics of the circuits
+    if requested with the API secret.
+    """
     request["do_not_print_access_log"] = True
-    return web.json_response({"api_version": "v2"})
+    resp: dict[str, Any] = {"api_version": "v2"}
+    if is_api_token_valid(request):
+        root_ctx: RootContext = request.app["_root.context"]
+        frontend = root_ctx.proxy_frontend
+        resp["load_balancing_strategy"] = root_ctx.local_config.wsproxy.load_balancing_strategy
+        resp["circuits"] = {
+            str(circuit.id): {
+                "app": circuit.app,
+                "routes": backend.balancer.dump_stats(backend.routes),
+            }
+            for key, circuit in frontend.circuits.items()
+            if (backend := frontend.backends.get(key)) is not None
+        }
+    return web.json_response(resp)
 
 
 async def on_prepare(request: web.Request, response: web.StreamResponse) -> None:
@@ -42,6 +42,19 @@ class AppMode(str, enum.Enum):
     INFERENCE = "inference"
 
 
+class TCPRelayMode(str, enum.Enum):
+    STREAM = "stream"
+    SOCKET = "socket"
+    SPLICE = "splice"
+
+
+class LoadBalancingStrategy(str, enum.Enum):
+    RANDOM = "random"
+    LEAST_OUTSTANDING = "least-outstanding"
+    PEAK_EWMA = "peak-ewma"
+    POWER_OF_TWO_CHOICES = "p2c"
+
+
 @dataclass
 class Slot:
     frontend_mode: FrontendMode
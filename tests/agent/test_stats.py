@@ -1,6 +1,80 @@
-# currently empty
+from decimal import Decimal
 
+from ai.backend.agent.stats import Measurement, Metric, MetricTypes, MovingStatistics
 
-def test_dummy():
-    # prevent pants error due to pytest exit code 5: "no tests collected"
-    pass
+
+def test_moving_statistics() -> None:
+    stats = MovingStatistics(Decimal("1.5"))
+    assert stats.diff == Decimal(0)
+    assert stats.rate == Decimal(0)
+    for value in ("3.25", "0.5", "2"):
+        stats.update(Decimal(value))
+    assert stats.min == Decimal("0.5")
+    assert stats.max == Decimal("3.25")
+    assert stats.sum == Decimal("7.25")
+    assert stats.avg == Decimal("1.8125")
+    # Only the latest two data points are used.
+    assert stats.diff == Decimal("1.5")
+    assert stats.rate > 0
+    assert stats.to_serializable_dict() == {
+        "min": "0.5",
+        "max": "3.25",
+        "sum": "7.25",
+        "avg": "1.812",
+        "diff": "1.5",
+        "rate": stats.to_serializable_dict()["rate"],
+        "version": 2,
+    }
+    assert stats.to_serializable_dict(["max", "avg"]) == {"max": "3.25", "avg": "1.812"}
+
+
+def test_metric_serialization() -> None:
+    metric = Metric(
+        "mem",
+        MetricTypes.GAUGE,
+        unit_hint="bytes",
+        stats=MovingStatistics(Decimal(1024)),
+        stats_filter=frozenset({"max", "avg"}),
+        current=Decimal(1024),
+        capacity=Decimal(4096),
+    )
+    serialized = metric.to_serializable_dict()
+    assert serialized == {
+        "current": "1024",
+        "capacity": "4096",
+        "pct": "25",
+        "unit_hint": "bytes",
+        "stats.max": "1024",
+        "stats.avg": "1024",
+    }
+    # The serialized value is reused until the next update.
+    assert metric.to_serializable_dict() is serialized
+
+    metric.update(Measurement(Decimal("3072.0005"), capacity=Decimal(8192)))
+    assert metric.to_serializable_dict() == {
+        "current": "3072",
+        "capacity": "8192",
+        "pct": "37.5",
+        "unit_hint": "bytes",
+        "stats.max": "3072",
+        "stats.avg": "2048",
+    }
+
+    metric = Metric(
+        "cpu_util",
+        MetricTypes.UTILIZATION,
+        unit_hint="percent",
+        stats=MovingStatistics(Decimal(0)),
+        stats_filter=frozenset({"rate"}),
+        current=Decimal(0),
+        capacity=Decimal(0),
+        current_hook=lambda metric: metric.stats.diff,
+    )
+    metric.update(Measurement(Decimal("12.3456")))
+    assert metric.to_serializable_dict() == {
+        "current": "12.346",
+        "capacity": "0",
+        "pct": "0.00",
+        "unit_hint": "percent",
+        "stats.rate": metric.to_serializable_dict()["stats.rate"],
+    }
@@ -1,3 +1,4 @@
+import json
 from typing import Mapping, Optional, Union
 from unittest import mock
 from uuid import UUID
@@ -178,6 +179,67 @@ def test_vfolder_list_files():
         assert resp == payload
 
 
+def test_vfolder_list_files_paginated():
+    with Session() as session, aioresponses() as m:
+        vfolder_name = "fake-vfolder-name"
+        payload = {
+            "items": [
+                {
+                    "name": "a.txt",
+                    "type": "FILE",
+                    "size": 10,
+                    "mode": "644",
+                    "created": "2024-01-01T00:00:00+00:00",
+                    "modified": "2024-01-01T00:00:00+00:00",
+                },
+            ],
+            "next_cursor": "WyJuYW1lIiwgZmFsc2UsICJhLnR4dCJd",
+        }
+        source_vfolder_uuid: UUID = UUID("c59395cd-ac91-4cd3-a1b0-3d2568aa2d04")
+        m.get(
+            build_url(session.config, "/folders/_/id"),
+            status=200,
+            payload={"id": source_vfolder_uuid.hex},
+        )
+        m.get(
+            build_url(
+                session.config,
+                "/folders/{}/files".format(source_vfolder_uuid.hex),
+                params={"path": ".", "limit": "1", "sort_by": "name", "name_prefix": "a"},
+            ),
+            status=200,
+            payload=payload,
+        )
+        resp = session.VFolder(vfolder_name).list_files(
+            ".", limit=1, sort_by="name", name_prefix="a"
+        )
+        assert resp == payload
+
+
+def test_vfolder_iter_files():
+    with Session() as session, aioresponses() as m:
+        vfolder_name = "fake-vfolder-name"
+        items = [{"name": f"{i}.txt", "type": "FILE", "size": i} for i in range(3)]
+        source_vfolder_uuid: UUID = UUID("c59395cd-ac91-4cd3-a1b0-3d2568aa2d04")
+        m.get(
+            build_url(session.config, "/folders/_/id"),
+            status=200,
+            payload={"id": source_vfolder_uuid.hex},
+        )
+        m.get(
+            build_url(
+                session.config,
+                "/folders/{}/files".format(source_vfolder_uuid.hex),
+                params={"path": ".", "stream": "true", "order": "desc"},
+            ),
+            status=200,
+            body="".join(json.dumps(item) + "\n" for item in items),
+            content_type="application/x-ndjson",
+        )
+        resp = list(session.VFolder(vfolder_name).iter_files(".", order="desc"))
+        assert resp == items
+
+
 def test_vfolder_invite():
     with Session() as session, aioresponses() as m:
         vfolder_name = "fake-vfolder-name"
@@ -7,6 +7,7 @@ from uuid import UUID
 import pytest
 from aioresponses import aioresponses
 from aiotusclient import client
+from yarl import URL
 
 from ai.backend.client.config import API_VERSION
 from ai.backend.client.request import Request, Response
@@ -198,3 +199,51 @@ async def test_vfolder_download(mocker):
             )
             await session.VFolder(vfolder_name).download([mock_file])
             assert Path("fake-file1").exists() == 1
+
+
+@pytest.mark.asyncio
+async def test_tus_upload_in_parts(tmp_path: Path):
+    mock_file = tmp_path / "example.bin"
+    mock_file.write_bytes(secrets.token_bytes(3 * 1024 * 1024))
+    token = "fake-token"
+    upload_url = URL("http://127.0.0.1:6021/upload").with_query({"token": token})
+    part_url = upload_url.update_query({"part": "0123456789abcdef-2097152"})
+    with aioresponses() as m:
+        async with AsyncSession() as session:
+            m.options(
+                "http://127.0.0.1:6021/upload",
+                status=200,
+                headers={"Tus-Resumable": "1.0.0", "Tus-Extension": "concatenation"},
+            )
+            m.post(
+                str(upload_url),
+                status=201,
+                headers={"Location": f"upload?token={token}&part=0123456789abcdef-2097152"},
+                repeat=True,
+            )
+            m.patch(
+                str(part_url),
+                status=204,
+                headers={"Tus-Resumable": "1.0.0"},
+                repeat=True,
+            )
+            vfolder = session.VFolder("fake-vfolder-name")
+            assert await vfolder._supports_tus_concatenation(upload_url)
+            await vfolder._upload_file_in_parts(
+                mock_file, upload_url, 3 * 1024 * 1024, 2, 1024 * 1024, False
+            )
+            rqsts = {method: calls for (method, _), calls in m.requests.items()}
+            # Each part is uploaded in chunks from its own offset.
+            patch_rqsts = rqsts["PATCH"]
+            assert len(patch_rqsts) == 3
+            assert sorted(r.kwargs["headers"]["Upload-Offset"] for r in patch_rqsts) == [
+                "0",
+                "0",
+                "1048576",
+            ]
+            post_rqsts = rqsts["POST"]
+            assert [r.kwargs["headers"]["Upload-Concat"] for r in post_rqsts] == [
+                "partial",
+                "partial",
+                "final;{0} {0}".format("upload?part=0123456789abcdef-2097152"),
+            ]
@@ -115,3 +115,49 @@ async def test_stream_fanout(
         # pause keeps the TCP connection and the messages are delivered late.
         assert [*map(int, received_messages["c1"])] == [*range(0, 6)]
         assert [*map(int, received_messages["c2"])] == [*range(0, 6)]
+
+
+def test_stream_trim_window() -> None:
+    assert redis_helper.parse_stream_id(b"1700000000123-4") == (1700000000123, 4)
+    assert redis_helper.get_trim_min_id(b"1700000060000-3", 60.0) == "1700000000000-0"
+    assert not redis_helper.is_behind_trim_window(b"1700000000000-0", b"1700000060000-3", 60.0)
+    assert redis_helper.is_behind_trim_window(b"1699999999999-9", b"1700000060000-3", 60.0)
+
+
+@pytest.mark.redis
+@pytest.mark.asyncio
+async def test_stream_trim_by_time_window(redis_container: Tuple[str, HostPortPair]) -> None:
+    addr = redis_container[1]
+    r = RedisConnectionInfo(
+        Redis.from_url(url=f"redis://{addr.host}:{addr.port}", socket_timeout=0.2),
+        redis_helper_config=config.redis_helper_default_config,
+        sentinel=None,
+        name="test",
+        service_name=None,
+    )
+    await redis_helper.execute(r, lambda r: r.delete("stream2"))
+    received_messages: List[bytes] = []
+
+    async def consume() -> None:
+        async with aclosing(
+            redis_helper.read_stream(r, "stream2", count=16, trim_window=1.0, trim_interval=0)
+        ) as agen:
+            async for msg_id, msg_data in agen:
+                received_messages.append(msg_data[b"idx"])
+
+    consumer_task = asyncio.create_task(consume())
+    await asyncio.sleep(0.1)
+    # Add the messages with explicit IDs spanning over 4 seconds.
+    for i in range(400):
+        await r.client.xadd("stream2", {"idx": i}, id=f"{1000 + i * 10}-0")
+    await asyncio.sleep(0.5)
+    consumer_task.cancel()
+    await asyncio.gather(consumer_task, return_exceptions=True)
+
+    # Bounded reads deliver all messages without loss, while the messages older than
+    # the trim window from the latest message are trimmed (by the whole stream nodes).
+    assert [*map(int, received_messages)] == [*range(400)]
+    remaining = await redis_helper.execute(r, lambda r: r.xrange("stream2"))
+    assert len(remaining) < 400
+    assert remaining[-1][0] == b"4990-0"
+    await r.client.close()
@@ -6,16 +6,17 @@ import aiotools
 import attrs
 import pytest
 
-from ai.backend.common import config, redis_helper
+from ai.backend.common import config, msgpack, redis_helper
 from ai.backend.common.events import (
     AbstractEvent,
+    ArgsPositionMatcher,
     CoalescingOptions,
     CoalescingState,
     EventDispatcher,
     EventProducer,
 )
 from ai.backend.common.events_experimental import EventDispatcher as ExperimentalEventDispatcher
-from ai.backend.common.types import AgentId, RedisConfig
+from ai.backend.common.types import AgentId, HostPortPair, RedisConfig
 
 
 @attrs.define(slots=True, frozen=True)
@@ -137,6 +138,44 @@ async def test_error_on_dispatch(
     await dispatcher.close()
 
 
+@pytest.mark.asyncio
+async def test_buffered_event_producer(redis_container) -> None:
+    redis_config = RedisConfig(
+        addr=redis_container[1], redis_helper_config=config.redis_helper_default_config
+    )
+    producer = await EventProducer.new(
+        redis_config,
+        stream_key="test-buffered-events",
+        batch_size=16,
+        batch_window=0.05,
+        max_buffer_size=64,
+    )
+    # The events fewer than the batch size are buffered until the batch window expires.
+    for idx in range(5):
+        await producer.produce_event(DummyEvent(idx), source="i-test")
+    await asyncio.sleep(0.01)
+    assert len(producer._buffer) == 5
+    await asyncio.sleep(0.1)
+    assert len(producer._buffer) == 0
+
+    # Fill the buffer up to the limit to apply back-pressure, and flush the rest on close.
+    for idx in range(5, 200):
+        await producer.produce_event(DummyEvent(idx), source="i-test")
+        assert len(producer._buffer) < 64
+    await producer.close()
+
+    redis_client = redis_helper.get_redis_object(redis_config, name="test")
+    raw_events = await redis_helper.execute(
+        redis_client, lambda r: r.xrange("test-buffered-events")
+    )
+    assert [
+        DummyEvent.deserialize(msgpack.unpackb(raw_event[b"args"])).value
+        for _, raw_event in raw_events
+    ] == [idx + 2 for idx in range(200)]
+    await redis_helper.execute(redis_client, lambda r: r.flushdb())
+    await redis_client.close()
+
+
 @pytest.mark.asyncio
 async def test_event_dispatcher_rate_control():
     opts = CoalescingOptions(max_wait=0.1, max_batch_size=5)
@@ -192,3 +231,85 @@ async def test_event_dispatcher_rate_control():
             assert not t6.done()  # t5 executed but t6 should be pending
             await asyncio.sleep(0.1 + epsilon)
             assert t6.result() is True
+
+
+@pytest.mark.asyncio
+async def test_dispatch_decodes_once_and_indexes_args_matchers() -> None:
+    num_deserialized = 0
+
+    @attrs.define(slots=True, frozen=True)
+    class CountingEvent(AbstractEvent):
+        name = "testing-counting"
+
+        session_id: str = attrs.field()
+
+        def serialize(self) -> tuple:
+            return (self.session_id,)
+
+        @classmethod
+        def deserialize(cls, value: tuple):
+            nonlocal num_deserialized
+            num_deserialized += 1
+            return cls(value[0])
+
+    class RecordingObserver:
+        def __init__(self) -> None:
+            self.event_types: list[str] = []
+
+        def observe_event_success(self, *, event_type: str, duration: float) -> None:
+            self.event_types.append(event_type)
+
+        def observe_event_failure(
+            self, *, event_type: str, duration: float, exception: BaseException
+        ) -> None:
+            raise AssertionError("should not fail")
+
+    observer = RecordingObserver()
+    dispatcher = EventDispatcher(
+        RedisConfig(
+            addr=HostPortPair("127.0.0.1", 6379),
+            redis_helper_config=config.redis_helper_default_config,
+        ),
+        consumer_group=EVENT_DISPATCHER_CONSUMER_GROUP,
+        event_observer=observer,
+    )
+    records: list[tuple[str, str]] = []
+
+    def make_callback(tag: str):
+        def cb(context: object, source: AgentId, event: CountingEvent) -> None:
+            records.append((tag, event.session_id))
+
+        return cb
+
+    handlers = [
+        dispatcher.subscribe(
+            CountingEvent,
+            None,
+            make_callback(f"s{idx}"),
+            args_matcher=ArgsPositionMatcher(0, f"s{idx}"),
+        )
+        for idx in range(100)
+    ]
+    dispatcher.subscribe(
+        CountingEvent, None, make_callback("lambda"), args_matcher=lambda args: args[0] == "s1"
+    )
+    dispatcher.subscribe(CountingEvent, None, make_callback("all"))
+    assert len(dispatcher._subscriber_index[CountingEvent.name].match(("s1",))) == 3
+
+    await dispatcher._dispatch_message(
+        {b"name": b"testing-counting", b"source": b"i-test", b"args": msgpack.packb(("s1",))},
+        dispatcher.dispatch_subscribers,
+    )
+    await asyncio.sleep(0.01)
+    assert sorted(records) == [("all", "s1"), ("lambda", "s1"), ("s1", "s1")]
+    assert num_deserialized == 1
+    assert observer.event_types == ["testing-counting"]
+
+    records.clear()
+    dispatcher.unsubscribe(handlers[2])
+    await dispatcher.dispatch_subscribers(CountingEvent.name, AgentId("i-test"), ("s2",))
+    await asyncio.sleep(0.01)
+    assert records == [("all", "s2")]
+    assert "s2" not in dispatcher._subscriber_index[CountingEvent.name].by_position[0]
+    await dispatcher.subscriber_taskgroup.shutdown()
+    await dispatcher.redis_client.close()
@@ -6,10 +6,12 @@ from typeguard import TypeCheckError
 
 from ai.backend.common.types import (
     BinarySize,
+    CompactResourceSlot,
     DefaultForUnspecified,
     HardwareMetadata,
     ResourceSlot,
     SlotName,
+    SlotSchema,
     SlotTypes,
     aobject,
     check_typed_dict,
@@ -332,3 +334,46 @@ def test_resource_slot_calc_with_infinity():
     r5 = r1 + r4
     assert r5["a"] == Decimal("Infinity")
     assert r5["b"] == 5
+
+
+def test_compact_resource_slot_conversion():
+    r1 = ResourceSlot.from_json({"cpu": "1.5", "mem": "2147483648", "cuda.shares": "Infinity"})
+    c1 = CompactResourceSlot.from_resource_slot(r1)
+    assert c1.schema is SlotSchema.of(("cpu", "mem", "cuda.shares"))
+    assert c1["cpu"] == Decimal("1.5")
+    assert c1["mem"] == Decimal(2 * (2**30))
+    assert c1.get("rocm.devices") is None
+    assert c1.to_resource_slot() == r1
+    assert c1.to_json() == {"cpu": "1.5", "mem": "2147483648", "cuda.shares": "Infinity"}
+    assert CompactResourceSlot.from_json(r1.to_json()) == c1
+    # The values are quantized like the normalized user inputs.
+    assert CompactResourceSlot.from_json({"cpu": "0.12345"})["cpu"] == Decimal("0.123")
+
+
+def test_compact_resource_slot_calc_and_comparison():
+    r1 = ResourceSlot.from_json({"a": "3", "b": "200"})
+    r2 = ResourceSlot.from_json({"a": "4", "b": "100"})
+    r3 = ResourceSlot.from_json({"a": "2"})
+    c1 = CompactResourceSlot.from_resource_slot(r1)
+    c2 = CompactResourceSlot.from_resource_slot(r2)
+    c3 = CompactResourceSlot.from_resource_slot(r3)
+    assert (c1 + c2).to_resource_slot() == r1 + r2
+    assert (c1 - c3).to_resource_slot() == ResourceSlot.from_json({"a": "1", "b": "200"})
+    assert (c3 - c1)["b"] == -200
+    assert not c2 < c1
+    assert not c2 <= c1
+    assert c3 < c1
+    assert c3 <= c1
+    assert c1 > c3
+    assert c1 >= c3
+    assert c1 != c2
+    assert c3 == CompactResourceSlot.from_json({"a": "2", "b": "0"})
+    # The operands are never mutated, unlike ResourceSlot.
+    assert "b" not in c3
+    assert len(c3) == 1
+
+    c_inf = CompactResourceSlot.from_json({"a": "Infinity"})
+    assert (c_inf - c3)["a"] == Decimal("Infinity")
+    assert c1 <= c_inf + c1
+    total = CompactResourceSlot.sum([r1, c2, r3], SlotSchema.of(("a", "b")))
+    assert total.to_resource_slot() == ResourceSlot.from_json({"a": "9", "b": "300"})
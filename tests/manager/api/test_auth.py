@@ -7,7 +7,12 @@ import pytest
 from aiohttp import web
 from dateutil.tz import gettz, tzutc
 
-from ai.backend.manager.api.auth import _extract_auth_params, check_date
+from ai.backend.manager.api.auth import (
+    CredentialCache,
+    KeypairCallStats,
+    _extract_auth_params,
+    check_date,
+)
 from ai.backend.manager.api.exceptions import InvalidAuthParameters
 from ai.backend.manager.server import (
     database_ctx,
@@ -90,6 +95,84 @@ def test_check_date():
     assert check_date(request)
 
 
+def test_credential_cache(mocker):
+    mock_time = mocker.patch("ai.backend.manager.api.auth.time.monotonic", return_value=100.0)
+    cache = CredentialCache(ttl=5.0, max_size=2)
+    cache.set("AKIA1", "user1", "keypair1", generation=cache.generation)
+    cache.set("AKIA2", "user2", "keypair2", generation=cache.generation)
+    assert cache.get("AKIA1") == ("user1", "keypair1")
+
+    # The least recently used entry is evicted.
+    cache.set("AKIA3", "user3", "keypair3", generation=cache.generation)
+    assert cache.get("AKIA2") is None
+    assert len(cache) == 2
+
+    cache.invalidate("AKIA1")
+    assert cache.get("AKIA1") is None
+    assert cache.get("AKIA3") == ("user3", "keypair3")
+
+    # The rows fetched before an invalidation are not cached.
+    generation = cache.generation
+    cache.invalidate()
+    assert len(cache) == 0
+    cache.set("AKIA1", "user1", "keypair1", generation=generation)
+    assert cache.get("AKIA1") is None
+
+    cache.set("AKIA1", "user1", "keypair1", generation=cache.generation)
+    mock_time.return_value = 105.0
+    assert cache.get("AKIA1") is None
+
+
+def test_credential_cache_disabled():
+    cache = CredentialCache(ttl=0, max_size=10)
+    assert not cache.enabled
+    cache.set("AKIA1", "user1", "keypair1", generation=cache.generation)
+    assert cache.get("AKIA1") is None
+
+
+@pytest.mark.asyncio
+async def test_keypair_call_stats_flush(mocker):
+    pipe = MagicMock()
+    pipe.incrby = mocker.AsyncMock()
+    pipe.expire = mocker.AsyncMock()
+    pipe.set = mocker.AsyncMock()
+    redis = MagicMock()
+    redis.pipeline.return_value = pipe
+
+    async def mock_execute(redis_obj, builder):
+        return await builder(redis)
+
+    mock_execute_fn = mocker.patch(
+        "ai.backend.manager.api.auth.redis_helper.execute", side_effect=mock_execute
+    )
+    stats = KeypairCallStats(MagicMock(), flush_interval=1.0)
+    for _ in range(3):
+        stats.record("AKIA1")
+    stats.record("AKIA2")
+    await stats.flush()
+    mock_execute_fn.assert_called_once()
+    assert sorted(call.args for call in pipe.incrby.call_args_list) == [
+        ("kp:AKIA1:num_queries", 3),
+        ("kp:AKIA2:num_queries", 1),
+    ]
+    assert pipe.set.call_count == 2
+
+    # Nothing to flush.
+    await stats.flush()
+    mock_execute_fn.assert_called_once()
+
+    # The counters are kept for the next flush upon failures.
+    stats.record("AKIA1")
+    mock_execute_fn.side_effect = ConnectionError
+    with pytest.raises(ConnectionError):
+        await stats.flush()
+    stats.record("AKIA1")
+    mock_execute_fn.side_effect = mock_execute
+    pipe.incrby.reset_mock()
+    await stats.flush()
+    pipe.incrby.assert_called_once_with("kp:AKIA1:num_queries", 2)
+
+
 @pytest.mark.asyncio
 async def test_authorize(etcd_fixture, database_fixture, create_app_and_client, get_headers):
     # The auth module requires config_server and database to be set up.
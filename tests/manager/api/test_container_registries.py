@@ -4,6 +4,7 @@ import pytest
 
 from ai.backend.manager.server import (
     database_ctx,
+    event_dispatcher_ctx,
     hook_plugin_ctx,
     monitoring_ctx,
     redis_ctx,
@@ -83,6 +84,7 @@ async def test_associate_container_registry_with_group(
             monitoring_ctx,
             hook_plugin_ctx,
             redis_ctx,
+            event_dispatcher_ctx,
         ],
         [".container_registry", ".auth"],
     )
@@ -136,6 +138,7 @@ async def test_disassociate_container_registry_with_group(
             monitoring_ctx,
             hook_plugin_ctx,
             redis_ctx,
+            event_dispatcher_ctx,
         ],
         [".container_registry", ".auth"],
     )
@@ -6,6 +6,7 @@ from aioresponses import aioresponses
 
 from ai.backend.manager.server import (
     database_ctx,
+    event_dispatcher_ctx,
     hook_plugin_ctx,
     monitoring_ctx,
     redis_ctx,
@@ -61,6 +62,7 @@ async def test_harbor_create_project_quota(
             monitoring_ctx,
             hook_plugin_ctx,
             redis_ctx,
+            event_dispatcher_ctx,
             services_ctx,
         ],
         [".group", ".auth"],
@@ -146,6 +148,7 @@ async def test_harbor_read_project_quota(
             monitoring_ctx,
             hook_plugin_ctx,
             redis_ctx,
+            event_dispatcher_ctx,
             services_ctx,
         ],
         [".group", ".auth"],
@@ -220,6 +223,7 @@ async def test_harbor_update_project_quota(
             monitoring_ctx,
             hook_plugin_ctx,
             redis_ctx,
+            event_dispatcher_ctx,
             services_ctx,
         ],
         [".group", ".auth"],
@@ -301,6 +305,7 @@ async def test_harbor_delete_project_quota(
             monitoring_ctx,
             hook_plugin_ctx,
             redis_ctx,
+            event_dispatcher_ctx,
             services_ctx,
         ],
         [".group", ".auth"],
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import random
+import sys
 from collections.abc import Sequence
 from decimal import Decimal
+from typing import Optional
 from uuid import uuid4
 
 import pytest
@@ -14,14 +17,21 @@ from ai.backend.common.types import (
     SessionTypes,
 )
 from ai.backend.manager.models.agent import AgentRow
+from ai.backend.manager.models.kernel import KernelRow
 from ai.backend.manager.models.scaling_group import ScalingGroupOpts
 from ai.backend.manager.models.session import SessionRow
 from ai.backend.manager.scheduler.agent_selector import (
+    BaseAgentSelector,
     ConcentratedAgentSelector,
+    DispersedAgentSelector,
+    LegacyAgentSelector,
     RoundRobinAgentSelector,
+    get_num_extras,
 )
+from ai.backend.manager.scheduler.capacity_matrix import AgentCapacityMatrix
 from ai.backend.manager.scheduler.fifo import FIFOSlotScheduler
 from ai.backend.manager.scheduler.types import InMemoryResourceGroupStateStore
+from ai.backend.manager.scheduler.utils import sort_requested_slots_by_priority
 
 from .scheduler_utils import (
     agent_selection_resource_priority,
@@ -267,3 +277,156 @@ async def test_enforce_spreading_endpoint_replica(test_case) -> None:
 
     picked_agent = await ag_selector.select_agent(agents, mock_session)
     assert picked_agent == test_case["picked_agent"]
+
+
+def _select_agent_by_row_scan(
+    strategy: AgentSelectionStrategy,
+    agents: Sequence[AgentRow],
+    pending_session_or_kernel: SessionRow | KernelRow,
+    resource_priority: list[str],
+) -> Optional[AgentId]:
+    # The reference implementation which ranks the agents one by one with ResourceSlot operations.
+    # The slots are copied since the ResourceSlot operations add zero-valued keys to the operands.
+    requested_slots = ResourceSlot(pending_session_or_kernel.requested_slots.data)
+    agents = [
+        create_mock_agent(
+            ag.id,
+            available_slots=ResourceSlot(ag.available_slots.data),
+            occupied_slots=ResourceSlot(ag.occupied_slots.data),
+        )
+        for ag in agents
+    ]
+    agents = [ag for ag in agents if ag.available_slots - ag.occupied_slots >= requested_slots]
+    if not agents:
+        return None
+    resource_priorities = sort_requested_slots_by_priority(requested_slots, resource_priority)
+    match strategy:
+        case AgentSelectionStrategy.LEGACY:
+            return max(
+                agents,
+                key=lambda ag: [
+                    -get_num_extras(ag, requested_slots),
+                    *[ag.available_slots.get(key, -sys.maxsize) for key in resource_priorities],
+                ],
+            ).id
+        case AgentSelectionStrategy.CONCENTRATED:
+            return min(
+                agents,
+                key=lambda ag: (
+                    get_num_extras(ag, requested_slots),
+                    *[
+                        (ag.available_slots - ag.occupied_slots).get(key, sys.maxsize)
+                        for key in resource_priorities
+                    ],
+                ),
+            ).id
+        case AgentSelectionStrategy.DISPERSED:
+            return max(
+                agents,
+                key=lambda ag: [
+                    -get_num_extras(ag, requested_slots),
+                    *[
+                        (ag.available_slots - ag.occupied_slots).get(key, -sys.maxsize)
+                        for key in resource_priorities
+                    ],
+                ],
+            ).id
+    raise AssertionError(f"unexpected strategy: {strategy}")
+
+
+def _create_heterogeneous_agents(seed: int, num_agents: int) -> list[AgentRow]:
+    rng = random.Random(seed)
+    agents = []
+    for idx in range(num_agents):
+        available_slots = {
+            "cpu": Decimal(rng.choice(["4", "8", "16", "7.5"])),
+            "mem": Decimal(rng.choice([8, 16, 32])) * 1024**3,
+        }
+        if rng.random() < 0.5:
+            available_slots["cuda.shares"] = Decimal(rng.choice(["1.5", "2", "4.25"]))
+        if rng.random() < 0.2:
+            available_slots["rocm.devices"] = Decimal(rng.choice([1, 2]))
+        agents.append(
+            create_mock_agent(
+                AgentId(f"i-{idx:03d}"),
+                available_slots=ResourceSlot(available_slots),
+                occupied_slots=ResourceSlot({"cpu": Decimal(rng.choice(["0", "0.5", "2"]))}),
+            )
+        )
+    return agents
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "selector_cls, strategy",
+    [
+        (LegacyAgentSelector, AgentSelectionStrategy.LEGACY),
+        (ConcentratedAgentSelector, AgentSelectionStrategy.CONCENTRATED),
+        (DispersedAgentSelector, AgentSelectionStrategy.DISPERSED),
+    ],
+)
+@pytest.mark.parametrize("use_shared_matrix", [False, True])
+async def test_capacity_matrix_selection_matches_row_scan(
+    selector_cls: type[BaseAgentSelector],
+    strategy: AgentSelectionStrategy,
+    use_shared_matrix: bool,
+) -> None:
+    rng = random.Random(1234)
+    agents = _create_heterogeneous_agents(42, 50)
+    reference_agents = _create_heterogeneous_agents(42, 50)
+    sgroup_opts = ScalingGroupOpts(agent_selection_strategy=strategy)
+    ag_selector = selector_cls(
+        sgroup_opts,
+        {},
+        [*agent_selection_resource_priority],
+        state_store=InMemoryResourceGroupStateStore(selector_cls.get_state_cls()),
+    )
+    matrix = AgentCapacityMatrix.from_agents(agents)
+    if use_shared_matrix:
+        ag_selector.capacity_matrix = matrix
+
+    num_scheduled = 0
+    for _ in range(100):
+        requested_slots = {
+            "cpu": Decimal(rng.choice(["0.5", "1", "2.25", "4"])),
+            "mem": Decimal(rng.choice([1, 2, 4])) * 1024**3,
+        }
+        if rng.random() < 0.3:
+            requested_slots["cuda.shares"] = Decimal(rng.choice(["0.1", "0.5", "1"]))
+        pending_session = create_mock_session(SessionId(uuid4()), ResourceSlot(requested_slots))
+        reference_session = create_mock_session(pending_session.id, ResourceSlot(requested_slots))
+        expected_agent_id = _select_agent_by_row_scan(
+            strategy,
+            reference_agents,
+            reference_session,
+            [*agent_selection_resource_priority],
+        )
+        agent_id = await ag_selector.select_agent(agents, pending_session)
+        assert agent_id == expected_agent_id
+        if agent_id is None:
+            continue
+        num_scheduled += 1
+        update_agent_assignment(agents, agent_id, pending_session.requested_slots)
+        update_agent_assignment(reference_agents, agent_id, reference_session.requested_slots)
+        matrix.reserve(agent_id, pending_session.requested_slots)
+    assert num_scheduled > 0
+
+
+def test_capacity_matrix_keeps_fractional_slots_exact() -> None:
+    agents = [
+        create_mock_agent(
+            AgentId("i-001"),
+            available_slots=ResourceSlot({"cpu": Decimal("4"), "cuda.shares": Decimal("1")}),
+        ),
+    ]
+    matrix = AgentCapacityMatrix.from_agents(agents)
+    rows = matrix.rows_of(agents)
+    for _ in range(3):
+        matrix.reserve(AgentId("i-001"), ResourceSlot({"cuda.shares": Decimal("0.333")}))
+    # The column is rescaled when a value with more fractional digits is reserved.
+    assert matrix.filter_feasible(rows, ResourceSlot({"cuda.shares": Decimal("0.001")})) == rows
+    assert matrix.filter_feasible(rows, ResourceSlot({"cuda.shares": Decimal("0.0011")})) == []
+    assert matrix.remaining_values(rows, "cuda.shares", default=0) == [1]
+    assert matrix.filter_feasible(rows, ResourceSlot({"tpu.device": Decimal("1")})) == []
+    matrix.release(AgentId("i-001"), ResourceSlot({"cuda.shares": Decimal("0.999")}))
+    assert matrix.remaining_values(rows, "cuda.shares", default=0) == [1000]
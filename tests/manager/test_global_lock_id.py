@@ -1,4 +1,4 @@
-from ai.backend.manager.defs import LockID
+from ai.backend.manager.defs import LockID, get_sgroup_schedule_lock_id
 
 
 def test_unique_global_lock_id_value() -> None:
@@ -7,3 +7,13 @@ def test_unique_global_lock_id_value() -> None:
         int_value = member.value
         assert int_value not in lock_id_value
         lock_id_value.add(int_value)
+
+
+def test_sgroup_schedule_lock_id_does_not_overlap() -> None:
+    lock_ids = {get_sgroup_schedule_lock_id(f"sgroup-{idx}") for idx in range(100)}
+    assert len(lock_ids) == 100
+    assert get_sgroup_schedule_lock_id("default") == get_sgroup_schedule_lock_id("default")
+    for member in LockID.__members__.values():
+        assert member.value not in lock_ids
+    # must fit in the PostgreSQL's bigint advisory lock key
+    assert all(0 < lock_id < 2**63 for lock_id in lock_ids)
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import zlib
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from ai.backend.common import msgpack
+from ai.backend.common.types import AgentId
+from ai.backend.manager.heartbeat import (
+    AGENT_IMAGES_KEY_PREFIX,
+    AgentHeartbeat,
+    ImageInventoryState,
+    ImageInventoryUpdate,
+    remove_agent_images,
+)
+
+PYTHON_IMAGE = "cr.backend.ai/stable/python:3.9-ubuntu20.04"
+PYTORCH_IMAGE = "cr.backend.ai/stable/python-pytorch:2.0-py39-cuda11.8"
+TF_IMAGE = "cr.backend.ai/stable/python-tensorflow:2.12-py39-cuda11.8"
+
+
+def _make_update(
+    images: list[str],
+    inventory: dict[str, Any] | None,
+) -> ImageInventoryUpdate:
+    agent_info = {
+        "images": zlib.compress(msgpack.packb([(image, "sha256:0") for image in images])),
+        "resource_slots": {},
+        "addr": "tcp://10.0.0.1:6001",
+        "public_host": "10.0.0.1",
+        "public_key": None,
+        "version": "24.09.0",
+        "compute_plugins": {},
+    }
+    if inventory is not None:
+        agent_info["images.inventory"] = inventory
+    heartbeat = AgentHeartbeat.parse(AgentId("i-001"), agent_info)
+    return ImageInventoryUpdate.from_heartbeat(heartbeat)
+
+
+def test_image_inventory_full_sync() -> None:
+    update = _make_update(
+        [PYTHON_IMAGE, PYTORCH_IMAGE],
+        {"epoch": "e1", "generation": 3, "full": True, "removed": []},
+    )
+    assert update.images == {PYTHON_IMAGE, PYTORCH_IMAGE}
+    # Only the differences from the reverse index are written.
+    assert update.plan(ImageInventoryState("e1", 2), {PYTHON_IMAGE, TF_IMAGE}) == (
+        {PYTORCH_IMAGE},
+        {TF_IMAGE},
+    )
+    assert update.plan(ImageInventoryState("e1", 4), set()) is None
+
+    # The legacy agents always report the full list without the generation.
+    update = _make_update([PYTHON_IMAGE], None)
+    assert update.state is None
+    assert update.full
+    assert update.plan(ImageInventoryState("", 0), {TF_IMAGE}) == ({PYTHON_IMAGE}, {TF_IMAGE})
+
+
+def test_image_inventory_delta() -> None:
+    update = _make_update(
+        [PYTORCH_IMAGE],
+        {"epoch": "e1", "generation": 5, "full": False, "removed": [TF_IMAGE]},
+    )
+    assert not update.is_empty
+    assert update.plan(ImageInventoryState("e1", 4), set()) == ({PYTORCH_IMAGE}, {TF_IMAGE})
+    # Duplicate or outdated updates are ignored.
+    assert update.plan(ImageInventoryState("e1", 5), set()) is None
+    # The updates are applied after missing some of them or restarting the agent.
+    assert update.plan(ImageInventoryState("e1", 2), set()) == ({PYTORCH_IMAGE}, {TF_IMAGE})
+    assert update.plan(ImageInventoryState("e0", 9), set()) == ({PYTORCH_IMAGE}, {TF_IMAGE})
+    assert update.plan(None, set()) == ({PYTORCH_IMAGE}, {TF_IMAGE})
+
+    update = _make_update([], {"epoch": "e1", "generation": 5, "full": False, "removed": []})
+    assert update.is_empty
+
+
+def test_image_inventory_merge() -> None:
+    first = _make_update(
+        [PYTORCH_IMAGE],
+        {"epoch": "e1", "generation": 5, "full": False, "removed": [TF_IMAGE]},
+    )
+    second = _make_update(
+        [TF_IMAGE],
+        {"epoch": "e1", "generation": 6, "full": False, "removed": [PYTHON_IMAGE]},
+    )
+    # The changes of the coalesced heartbeats are applied together.
+    merged = first.merge(second)
+    assert merged.state == ImageInventoryState("e1", 6)
+    assert not merged.full
+    assert merged.plan(ImageInventoryState("e1", 4), set()) == (
+        {PYTORCH_IMAGE, TF_IMAGE},
+        {PYTHON_IMAGE},
+    )
+
+    full = _make_update(
+        [PYTHON_IMAGE, TF_IMAGE],
+        {"epoch": "e1", "generation": 5, "full": True, "removed": []},
+    )
+    merged = full.merge(second)
+    assert merged.full
+    assert merged.images == {TF_IMAGE}
+    assert merged.state == ImageInventoryState("e1", 6)
+    # A newer full synchronization replaces the earlier changes.
+    assert first.merge(full) is full
+
+
+@pytest.mark.asyncio
+async def test_remove_agent_images_without_reverse_index(mocker) -> None:
+    async def _scan_iter(**kwargs):
+        assert kwargs == {"_type": "set"}
+        for key in [PYTHON_IMAGE.encode(), f"{AGENT_IMAGES_KEY_PREFIX}i-002".encode()]:
+            yield key
+
+    pipe = MagicMock()
+    redis = MagicMock()
+    redis.pipeline.return_value = pipe
+    redis.hexists = AsyncMock(return_value=False)
+    redis.scan_iter = _scan_iter
+
+    async def _execute(redis_obj, builder):
+        return await builder(redis)
+
+    mocker.patch("ai.backend.manager.heartbeat.redis_helper.execute", side_effect=_execute)
+    await remove_agent_images(MagicMock(), AgentId("i-001"))
+    # Only the image keys are touched.
+    pipe.srem.assert_called_once_with(PYTHON_IMAGE, "i-001")
+    pipe.delete.assert_called_once_with(f"{AGENT_IMAGES_KEY_PREFIX}i-001")
@@ -1,4 +1,5 @@
-from datetime import datetime, timedelta
+import inspect
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 from typing import Any, Mapping, Type, cast
 from uuid import uuid4
@@ -9,11 +10,15 @@ from ai.backend.common import msgpack, redis_helper
 from ai.backend.common.types import KernelId, SessionId, SessionTypes
 from ai.backend.manager.api.context import RootContext
 from ai.backend.manager.idle import (
+    IDLE_TIMEOUT_VALUE,
     BaseIdleChecker,
+    IdleCheckBatch,
     IdleCheckerHost,
+    IdleCheckTarget,
     NetworkTimeoutIdleChecker,
     SessionLifetimeChecker,
     UtilizationIdleChecker,
+    UtilizationSeries,
     calculate_remaining_time,
     init_idle_checkers,
 )
@@ -957,3 +962,153 @@ async def utilization_idle_checker(
     assert should_alive
     assert remaining == expected
     assert util_info is not None
+
+
+class _FakeRedis:
+    """
+    A minimal in-memory substitute of the Redis commands used by the batched idle checks.
+    """
+
+    def __init__(self) -> None:
+        self.data: dict[str, Any] = {}
+
+    async def get(self, key: str) -> Any:
+        return self.data.get(key)
+
+    async def set(self, key: str, value: Any, ex: int | None = None) -> None:
+        self.data[key] = value.encode() if isinstance(value, str) else value
+
+    async def mget(self, keys: list[str]) -> list[Any]:
+        return [self.data.get(key) for key in keys]
+
+    def pipeline(self, transaction: bool = True) -> "_FakePipeline":
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    def __init__(self, redis: _FakeRedis) -> None:
+        self._redis = redis
+        self._commands: list[Any] = []
+
+    def __getattr__(self, name: str) -> Any:
+        async def _queue(*args, **kwargs) -> None:
+            self._commands.append(getattr(self._redis, name)(*args, **kwargs))
+
+        return _queue
+
+    async def execute(self) -> list[Any]:
+        return [await command for command in self._commands]
+
+
+@pytest.fixture
+def fake_redis(mocker) -> tuple[dict[str, _FakeRedis], list[str]]:
+    instances: dict[str, _FakeRedis] = {}
+    calls: list[str] = []
+
+    async def _execute(redis_obj, func, **kwargs) -> Any:
+        calls.append(redis_obj.name)
+        result = func(instances.setdefault(redis_obj.name, _FakeRedis()))
+        if inspect.isawaitable(result):
+            result = await result
+        if isinstance(result, _FakePipeline):
+            result = await result.execute()
+        return result
+
+    mocker.patch("ai.backend.manager.idle.redis_helper.execute", side_effect=_execute)
+    return instances, calls
+
+
+@pytest.mark.asyncio
+async def test_utilization_idle_checker_batch(fake_redis, mocker) -> None:
+    instances, calls = fake_redis
+    redis_live = mocker.MagicMock()
+    redis_live.name = "live"
+    redis_stat = mocker.MagicMock()
+    redis_stat.name = "stat"
+    checker = UtilizationIdleChecker(mocker.MagicMock(), redis_live, redis_stat)
+    await checker.populate_config({
+        "initial-grace-period": "0",
+        "resource-thresholds": {"cpu_util": {"average": "10"}},
+        "thresholds-check-operator": "and",
+        "time-window": "30",
+    })
+
+    created_at = datetime(2020, 3, 1, 12, 30, second=0, tzinfo=timezone.utc)
+    busy_kernel_id, idle_kernel_id = KernelId(uuid4()), KernelId(uuid4())
+    targets = [
+        IdleCheckTarget(
+            {
+                "id": kernel_id,
+                "session_id": SessionId(uuid4()),
+                "created_at": created_at,
+                "cluster_size": 1,
+                "occupied_slots": {"cpu": Decimal(1), "mem": Decimal(2**30)},
+                "requested_slots": {"cpu": Decimal(1), "mem": Decimal(2**30)},
+            },
+            {"idle_timeout": -1},
+        )
+        for kernel_id in (busy_kernel_id, idle_kernel_id)
+    ]
+    instances["stat"] = _FakeRedis()
+    instances["stat"].data[str(busy_kernel_id)] = msgpack.packb({"cpu_util": {"pct": "50.0"}})
+    instances["stat"].data[str(idle_kernel_id)] = msgpack.packb({"cpu_util": {"pct": "1.0"}})
+
+    results_per_tick = []
+    redis_now = created_at.timestamp() + 100
+    for tick in range(4):
+        batch = IdleCheckBatch(
+            targets,
+            db_now=created_at + timedelta(seconds=100 + tick * 15),
+            redis_now=redis_now + tick * 15,
+        )
+        calls.clear()
+        results_per_tick.append(await checker.check_idleness_batch(batch, None, redis_live))
+        # Reading the states, the live stats and writing the results back.
+        assert calls == ["live", "stat", "live"]
+
+    # Not checked until the time window is filled.
+    assert results_per_tick[0] == [True, True]
+    assert results_per_tick[1] == [True, True]
+    assert results_per_tick[2] == [True, False]
+    assert results_per_tick[3] == [True, False]
+
+    busy_session_id = targets[0].kernel["session_id"]
+    extra_info = msgpack.unpackb(
+        instances["live"].data[f"session.{busy_session_id}.utilization_extra"]
+    )
+    assert extra_info == {
+        "thresholds_check_operator": "and",
+        "resources": {"cpu_util": (50.0, 10.0)},
+    }
+    assert (
+        msgpack.unpackb(instances["live"].data[f"session.{busy_session_id}.utilization.report"])
+        == IDLE_TIMEOUT_VALUE
+    )
+
+
+def test_utilization_series() -> None:
+    window_size = 4
+    samples = [float(v) for v in (10, 20, 30, 40, 50, 60, 70, 0.1, 0.2, 0.3)]
+    series = UtilizationSeries(window_size)
+    for idx, value in enumerate(samples):
+        # Round-trip through the serialized form as the idle checker does for each tick.
+        series = UtilizationSeries.load(series.to_bytes(), window_size)
+        assert series.push("cpu_util", value) == (idx >= window_size)
+        expected = samples[max(0, idx + 1 - window_size) : idx + 1]
+        assert series.values("cpu_util") == expected
+        assert series.averages()["cpu_util"] == pytest.approx(sum(expected) / len(expected))
+
+    # Shrinking the window keeps the latest values.
+    resized = UtilizationSeries.load(series.to_bytes(), 2)
+    assert resized.values("cpu_util") == [0.2, 0.3]
+    assert resized.averages()["cpu_util"] == pytest.approx(0.25)
+
+    # The legacy series of msgpack-encoded lists are converted.
+    legacy = UtilizationSeries.load(
+        msgpack.packb({"cpu_util": [1.0, 2.0, 3.0], "mem": []}), window_size
+    )
+    assert legacy.averages() == {"cpu_util": 2.0, "mem": 0.0}
+    assert legacy.push("mem", 5.0) is False
+    assert legacy.values("cpu_util") == [1.0, 2.0, 3.0]
+
+    assert UtilizationSeries.load(b"UTS1\x00", window_size).averages() == {}
@@ -1,27 +1,48 @@
 from __future__ import annotations
 
+import asyncio
 import zlib
 from decimal import Decimal
-from typing import Optional
+from typing import Any, Optional
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 from sqlalchemy.sql.dml import Insert, Update
 
 from ai.backend.common import msgpack
-from ai.backend.common.types import BinarySize, DeviceId, ResourceSlot, SlotName
+from ai.backend.common.events import AgentTerminatedEvent
+from ai.backend.common.types import AgentId, BinarySize, DeviceId, ResourceSlot, SlotName
 from ai.backend.manager.defs import DEFAULT_IMAGE_ARCH
+from ai.backend.manager.heartbeat import AgentHeartbeatIngestor
 from ai.backend.manager.models import AgentStatus
-from ai.backend.manager.registry import AgentRegistry
+from ai.backend.manager.registry import AgentRegistry, invalidate_agent_heartbeat_cache
 
 
-@pytest.mark.asyncio
-async def test_handle_heartbeat(
-    registry_ctx: tuple[
-        AgentRegistry, MagicMock, MagicMock, MagicMock, MagicMock, MagicMock, MagicMock
-    ],
-    mocker,
-) -> None:
+def _make_agent_info(
+    image_data: bytes,
+    *,
+    scaling_group: str = "sg-testing",
+    resource_slots: Optional[dict[str, tuple[str, Decimal]]] = None,
+    addr: str = "10.0.0.5",
+) -> dict[str, Any]:
+    return {
+        "scaling_group": scaling_group,
+        "resource_slots": resource_slots
+        or {"cpu": ("count", Decimal("1")), "mem": ("bytes", Decimal("1073741824"))},
+        "region": "ap-northeast-2",
+        "addr": addr,
+        "public_host": "10.0.0.5",
+        "public_key": None,
+        "architecture": DEFAULT_IMAGE_ARCH,
+        "version": "19.12.0",
+        "compute_plugins": [],
+        "images": image_data,
+        "auto_terminate_abusing_kernel": False,
+    }
+
+
+@pytest.fixture
+def mock_heartbeat_deps(mocker) -> MagicMock:
     mock_get_known_container_registries = AsyncMock(
         # Hint: [{"project": {"registry_name": "url"}, ...}]
         return_value=[
@@ -35,14 +56,25 @@ async def test_handle_heartbeat(
         mock_get_known_container_registries,
     )
     mock_redis_wrapper = MagicMock()
-    mock_redis_wrapper.execute = AsyncMock()
+    # The stored image inventory state and the images of the agent
+    mock_redis_wrapper.execute = AsyncMock(return_value=[None, set()])
     mocker.patch("ai.backend.manager.registry.redis_helper", mock_redis_wrapper)
+    mocker.patch("ai.backend.manager.heartbeat.redis_helper", mock_redis_wrapper)
 
     def mocked_entrypoints(entry_point_group: str, blocklist: Optional[set[str]] = None):
         return []
 
     mocker.patch("ai.backend.common.plugin.scan_entrypoints", mocked_entrypoints)
+    return mock_redis_wrapper
+
 
+@pytest.mark.asyncio
+async def test_handle_heartbeat(
+    registry_ctx: tuple[
+        AgentRegistry, MagicMock, MagicMock, MagicMock, MagicMock, MagicMock, MagicMock
+    ],
+    mock_heartbeat_deps: MagicMock,
+) -> None:
     registry, mock_dbconn, mock_dbsess, mock_dbresult, mock_shared_config, _, _ = registry_ctx
     image_data = zlib.compress(
         msgpack.packb([
@@ -56,112 +88,115 @@ async def test_handle_heartbeat(
     _2g = Decimal("2147483648")
 
     # Join
-    mock_dbresult.first = MagicMock(return_value=None)
-    await registry.handle_heartbeat(
-        "i-001",
-        {
-            "scaling_group": "sg-testing",
-            "resource_slots": {"cpu": ("count", _1), "mem": ("bytes", _1g)},
-            "region": "ap-northeast-2",
-            "addr": "10.0.0.5",
-            "public_host": "10.0.0.5",
-            "public_key": None,
-            "architecture": DEFAULT_IMAGE_ARCH,
-            "version": "19.12.0",
-            "compute_plugins": [],
-            "images": image_data,
-            "auto_terminate_abusing_kernel": False,
-        },
-    )
+    mock_dbresult.__iter__ = MagicMock(return_value=iter([]))
+    await registry.handle_heartbeat("i-001", _make_agent_info(image_data))
     mock_shared_config.update_resource_slots.assert_awaited_once()
     q = mock_dbconn.execute.await_args_list[1].args[0]
     assert isinstance(q, Insert)
+    (q_params,) = mock_dbconn.execute.await_args_list[1].args[1]
+    assert q_params["id"] == "i-001"
+    assert q_params["status"] == AgentStatus.ALIVE
+    assert q_params["available_slots"] == ResourceSlot({"cpu": _1, "mem": _1g})
 
-    # Update alive instance
+    # Unchanged heartbeats of a known agent are not written to the database.
     mock_shared_config.update_resource_slots.reset_mock()
     mock_dbconn.execute.reset_mock()
-    mock_dbresult.first = MagicMock(
-        return_value={
-            "status": AgentStatus.ALIVE,
-            "addr": "10.0.0.5",
-            "public_host": "10.0.0.5",
-            "public_key": None,
-            "architecture": DEFAULT_IMAGE_ARCH,
-            "scaling_group": "sg-testing",
-            "available_slots": ResourceSlot({"cpu": _1, "mem": _1g}),
-            "version": "19.12.0",
-            "compute_plugins": [],
-            "auto_terminate_abusing_kernel": False,
-        }
-    )
+    await registry.handle_heartbeat("i-001", _make_agent_info(image_data))
+    mock_shared_config.update_resource_slots.assert_not_awaited()
+    mock_dbconn.execute.assert_not_awaited()
+
+    # Update alive instance (compared with the cached row)
     await registry.handle_heartbeat(
         "i-001",
-        {
-            "scaling_group": "sg-testing",
-            "resource_slots": {"cpu": ("count", _1), "mem": ("bytes", _2g)},
-            "region": "ap-northeast-2",
-            "addr": "10.0.0.6",
-            "public_host": "10.0.0.5",
-            "public_key": None,
-            "architecture": DEFAULT_IMAGE_ARCH,
-            "version": "19.12.0",
-            "compute_plugins": [],
-            "images": image_data,
-            "auto_terminate_abusing_kernel": False,
-        },
+        _make_agent_info(
+            image_data,
+            resource_slots={"cpu": ("count", _1), "mem": ("bytes", _2g)},
+            addr="10.0.0.6",
+        ),
     )
     mock_shared_config.update_resource_slots.assert_awaited_once()
-    q = mock_dbconn.execute.await_args_list[1].args[0]
+    mock_dbconn.execute.assert_awaited_once()
+    q = mock_dbconn.execute.await_args_list[0].args[0]
     assert isinstance(q, Update)
-    q_params = q.compile().params
-    assert q_params["addr"] == "10.0.0.6"
-    assert q_params["available_slots"] == ResourceSlot({"cpu": _1, "mem": _2g})
-    assert "scaling_group" not in q_params
+    (q_params,) = mock_dbconn.execute.await_args_list[0].args[1]
+    assert q_params["_agent_id"] == "i-001"
+    assert q_params["_addr"] == "10.0.0.6"
+    assert q_params["_available_slots"] == ResourceSlot({"cpu": _1, "mem": _2g})
+    assert "_scaling_group" not in q_params
 
-    # Rejoin
+    # Rejoin after the agent is marked lost
+    await invalidate_agent_heartbeat_cache(registry, AgentId("i-001"), AgentTerminatedEvent())
     mock_shared_config.update_resource_slots.reset_mock()
     mock_dbconn.execute.reset_mock()
-    mock_dbresult.first = MagicMock(
-        return_value={
-            "status": AgentStatus.LOST,
-            "addr": "10.0.0.5",
-            "public_host": "10.0.0.5",
-            "public_key": None,
-            "architecture": DEFAULT_IMAGE_ARCH,
-            "scaling_group": "sg-testing",
-            "available_slots": ResourceSlot({"cpu": _1, "mem": _1g}),
-            "version": "19.12.0",
-            "compute_plugins": [],
-            "auto_terminate_abusing_kernel": False,
-        }
+    mock_dbresult.__iter__ = MagicMock(
+        return_value=iter([
+            {
+                "id": "i-001",
+                "status": AgentStatus.LOST,
+                "addr": "10.0.0.5",
+                "public_host": "10.0.0.5",
+                "public_key": None,
+                "architecture": DEFAULT_IMAGE_ARCH,
+                "scaling_group": "sg-testing",
+                "available_slots": ResourceSlot({"cpu": _1, "mem": _1g}),
+                "version": "19.12.0",
+                "compute_plugins": [],
+                "auto_terminate_abusing_kernel": False,
+            }
+        ])
     )
     await registry.handle_heartbeat(
         "i-001",
-        {
-            "scaling_group": "sg-testing2",
-            "resource_slots": {"cpu": ("count", _4), "mem": ("bytes", _2g)},
-            "region": "ap-northeast-2",
-            "addr": "10.0.0.6",
-            "public_host": "10.0.0.5",
-            "public_key": None,
-            "architecture": DEFAULT_IMAGE_ARCH,
-            "version": "19.12.0",
-            "compute_plugins": [],
-            "images": image_data,
-            "auto_terminate_abusing_kernel": False,
-        },
+        _make_agent_info(
+            image_data,
+            scaling_group="sg-testing2",
+            resource_slots={"cpu": ("count", _4), "mem": ("bytes", _2g)},
+            addr="10.0.0.6",
+        ),
     )
     mock_shared_config.update_resource_slots.assert_awaited_once()
     q = mock_dbconn.execute.await_args_list[1].args[0]
     assert isinstance(q, Update)
-    q_params = q.compile().params
-    assert q_params["status"] == AgentStatus.ALIVE
-    assert q_params["addr"] == "10.0.0.6"
-    assert "lost_at=NULL" in str(q)  # stringified and removed from bind params
-    assert q_params["available_slots"] == ResourceSlot({"cpu": _4, "mem": _2g})
-    assert q_params["scaling_group"] == "sg-testing2"
-    assert "compute_plugins" in q_params
-    assert "version" in q_params
+    assert "lost_at=NULL" in str(q)
+    (q_params,) = mock_dbconn.execute.await_args_list[1].args[1]
+    assert q_params["_addr"] == "10.0.0.6"
+    assert q_params["_available_slots"] == ResourceSlot({"cpu": _4, "mem": _2g})
+    assert q_params["_scaling_group"] == "sg-testing2"
+    assert "_compute_plugins" in q_params
+    assert "_version" in q_params
+
+
+@pytest.mark.asyncio
+async def test_handle_heartbeat_in_batches(
+    registry_ctx: tuple[
+        AgentRegistry, MagicMock, MagicMock, MagicMock, MagicMock, MagicMock, MagicMock
+    ],
+    mock_heartbeat_deps: MagicMock,
+) -> None:
+    registry, mock_dbconn, _, mock_dbresult, mock_shared_config, _, _ = registry_ctx
+    ingestor = AgentHeartbeatIngestor(registry, batch_window=0.05)
+    ingestor.start()
+    registry.heartbeat_ingestor = ingestor
+    image_data = zlib.compress(msgpack.packb([]))
+    mock_heartbeat_deps.execute.return_value = [None, set()] * 2
+    try:
+        mock_dbresult.__iter__ = MagicMock(return_value=iter([]))
+        await asyncio.gather(
+            registry.handle_heartbeat("i-001", _make_agent_info(image_data)),
+            registry.handle_heartbeat("i-002", _make_agent_info(image_data)),
+            # Only the latest heartbeat of the same agent is processed.
+            registry.handle_heartbeat("i-001", _make_agent_info(image_data, addr="10.0.0.6")),
+        )
+    finally:
+        await ingestor.close()
+    mock_shared_config.update_resource_slots.assert_awaited_once()
+    # A single select and a single bulk insert
+    assert mock_dbconn.execute.await_count == 2
+    insert_params = mock_dbconn.execute.await_args_list[1].args[1]
+    assert [(p["id"], p["addr"]) for p in insert_params] == [
+        ("i-001", "10.0.0.6"),
+        ("i-002", "10.0.0.5"),
+    ]
 
 
 @pytest.mark.asyncio
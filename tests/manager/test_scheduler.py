@@ -19,11 +19,17 @@ from ai.backend.common.types import (
     AccessKey,
     AgentId,
     AgentSelectionStrategy,
+    CompactResourceSlot,
     ResourceSlot,
     SessionId,
     SessionTypes,
+    SlotName,
+    SlotSchema,
+    SlotTypes,
 )
+from ai.backend.manager.api.exceptions import InstanceNotAvailable
 from ai.backend.manager.models.agent import AgentRow
+from ai.backend.manager.models.resource_policy import DefaultForUnspecified
 from ai.backend.manager.models.scaling_group import ScalingGroupOpts
 from ai.backend.manager.models.session import SessionRow, SessionStatus
 from ai.backend.manager.registry import AgentRegistry
@@ -31,13 +37,21 @@ from ai.backend.manager.scheduler.agent_selector import (
     DispersedAgentSelector,
 )
 from ai.backend.manager.scheduler.dispatcher import (
+    AdmissionRejected,
     SchedulerDispatcher,
     _list_managed_sessions,
     load_scheduler,
 )
 from ai.backend.manager.scheduler.drf import DRFScheduler
 from ai.backend.manager.scheduler.fifo import FIFOSlotScheduler, LIFOSlotScheduler
-from ai.backend.manager.scheduler.predicates import check_reserved_batch_session
+from ai.backend.manager.scheduler.predicates import (
+    PredicateBatch,
+    check_reserved_batch_session,
+)
+from ai.backend.manager.scheduler.snapshot import (
+    ResourceGroupSnapshot,
+    SchedulingFailureKind,
+)
 from ai.backend.manager.scheduler.types import InMemoryResourceGroupStateStore
 
 from .scheduler_utils import (
@@ -509,6 +523,69 @@ async def test_drf_scheduler() -> None:
     assert agent_id == "i-001"
 
 
+def test_drf_scheduler_tracks_dominant_shares_incrementally() -> None:
+    DRFScheduler.share_trackers.clear()
+    total_capacity = ResourceSlot({"cpu": Decimal(10), "mem": Decimal(10240)})
+    sgroup_opts = ScalingGroupOpts()
+    existing_sessions = [
+        create_mock_session(
+            SessionId(uuid4()),
+            status=SessionStatus.RUNNING,
+            access_key=AccessKey("user01"),
+            requested_slots=ResourceSlot({"cpu": Decimal(4), "mem": Decimal(1024)}),
+        ),
+        create_mock_session(
+            SessionId(uuid4()),
+            status=SessionStatus.RUNNING,
+            access_key=AccessKey("user02"),
+            requested_slots=ResourceSlot({"cpu": Decimal(1), "mem": Decimal(2048)}),
+        ),
+    ]
+    pending_sessions = [
+        create_mock_session(
+            SessionId(uuid4()),
+            access_key=AccessKey(f"user0{idx % 3 + 1}"),
+            requested_slots=ResourceSlot({"cpu": Decimal(1), "mem": Decimal(4096)}),
+        )
+        for idx in range(4)
+    ]
+
+    # The first pass: user03 (no share) < user02 (0.2) < user01 (0.4)
+    scheduler = DRFScheduler(sgroup_opts, {})
+    picked_order = []
+    while pending_sessions:
+        picked_session_id = scheduler.pick_session(
+            total_capacity, pending_sessions, existing_sessions
+        )
+        assert picked_session_id is not None
+        picked_session = find_and_pop_picked_session(pending_sessions, picked_session_id)
+        picked_order.append(picked_session.access_key)
+        scheduler.update_allocation(picked_session)
+    # The allocation of user03 raises its share to 0.4, so user02 comes next.
+    assert picked_order == ["user03", "user02", "user01", "user01"]
+    tracker = DRFScheduler.share_trackers[existing_sessions[0].scaling_group_name]
+    assert scheduler.tracker is tracker
+    assert tracker.dominant_share(AccessKey("user03")) == Decimal("0.4")
+
+    # The next pass reuses the tracker, which has dropped the terminated session and
+    # forgets the allocations of the previous pass.
+    DRFScheduler.forget_session(SessionId(existing_sessions[0].id))
+    pending_sessions = [
+        create_mock_session(
+            SessionId(uuid4()),
+            access_key=AccessKey(access_key),
+            requested_slots=ResourceSlot({"cpu": Decimal(1), "mem": Decimal(1024)}),
+        )
+        for access_key in ("user02", "user01")
+    ]
+    scheduler = DRFScheduler(sgroup_opts, {})
+    picked_session_id = scheduler.pick_session(
+        total_capacity, pending_sessions, existing_sessions[1:]
+    )
+    assert picked_session_id == pending_sessions[1].id
+    assert scheduler.per_user_dominant_share == {AccessKey("user02"): Decimal("0.2")}
+
+
 @pytest.mark.asyncio
 async def test_pending_timeout() -> None:
     class DummySession:
@@ -739,3 +816,391 @@ async def test_multiple_timezones_for_reserved_batch_session_predicate(
     mock_db_conn.scalar = AsyncMock(return_value=None)
     result = await check_reserved_batch_session(mock_db_conn, mock_sched_ctx, mock_sess_ctx)
     assert result.passed
+
+
+@pytest.mark.asyncio
+async def test_predicate_batch_evaluates_limits_in_memory() -> None:
+    known_slot_types = {SlotName("cpu"): SlotTypes.COUNT, SlotName("mem"): SlotTypes.BYTES}
+    sched_ctx = MagicMock(known_slot_types=known_slot_types)
+    access_key = AccessKey("user01")
+    batch = PredicateBatch(known_slot_types, SlotSchema.of(known_slot_types.keys()))
+    batch.keypair_policies[access_key] = MagicMock(
+        total_resource_slots=ResourceSlot({"cpu": Decimal(4), "mem": Decimal(4096)}),
+        default_for_unspecified=DefaultForUnspecified.UNLIMITED,
+        max_pending_session_count=2,
+        max_pending_session_resource_slots=None,
+    )
+    pending_sessions = [
+        create_mock_session(
+            SessionId(uuid4()),
+            ResourceSlot({"cpu": Decimal(3), "mem": Decimal(1024)}),
+            access_key=access_key,
+        )
+        for _ in range(2)
+    ]
+    for sess in pending_sessions:
+        sess.user_uuid = uuid4()
+        batch.pending_sessions.setdefault(access_key, {})[sess.id] = sess.requested_slots
+
+    result = await batch.check_keypair_resource_limit(sched_ctx, pending_sessions[0])
+    assert result.passed
+    result = await batch.check_pending_session_count_limit(sched_ctx, pending_sessions[0])
+    assert not result.passed
+    assert result.message == "You cannot create more than 2 pending session(s)."
+    result = await batch.check_user_resource_limit(sched_ctx, pending_sessions[0])
+    assert not result.passed
+    assert result.message is not None and result.message.startswith("User has no main-keypair")
+
+    # The next session must see the occupancy and the pending sessions updated in memory.
+    batch.add_allocation(pending_sessions[0])
+    assert batch.keypair_occupancy[access_key]["cpu"] == Decimal(3)
+    result = await batch.check_pending_session_count_limit(sched_ctx, pending_sessions[1])
+    assert result.passed
+    result = await batch.check_keypair_resource_limit(sched_ctx, pending_sessions[1])
+    assert not result.passed
+    assert result.message is not None
+    assert result.message.startswith("Your keypair resource quota is exceeded.")
+
+
+def create_example_snapshot(agents: Sequence[AgentRow]) -> ResourceGroupSnapshot:
+    return ResourceGroupSnapshot(
+        sgroup_name=example_sgroup_name1,
+        agents={ag.id: ag for ag in agents},
+        schedulable_agent_ids=[ag.id for ag in agents],
+    )
+
+
+def test_resource_group_snapshot_reserve_and_release() -> None:
+    example_agents = create_example_agents()
+    snapshot = create_example_snapshot(example_agents)
+    agent_id = example_agents[0].id
+    requested_slots = ResourceSlot({"cpu": Decimal(1), "mem": Decimal(1024)})
+
+    alloc_ctx = snapshot.reserve(agent_id, requested_slots)
+    assert alloc_ctx.agent_id == agent_id
+    assert alloc_ctx.scaling_group == example_sgroup_name1
+    assert snapshot.agents[agent_id].occupied_slots["cpu"] == Decimal(1)
+    assert snapshot.get_remaining_slots(agent_id)["mem"] == Decimal(3072)
+    assert snapshot.occupied_deltas[agent_id]["mem"] == Decimal(1024)
+    assert snapshot.container_counts[agent_id] == 1
+
+    snapshot.release(agent_id, requested_slots)
+    assert snapshot.agents[agent_id].occupied_slots["cpu"] == Decimal(0)
+    assert snapshot.occupied_deltas[agent_id]["mem"] == Decimal(0)
+    assert snapshot.container_counts[agent_id] == 0
+
+    snapshot.max_container_count = 1
+    snapshot.reserve(agent_id, requested_slots)
+    assert [ag.id for ag in snapshot.filter_by_container_limit(example_agents)] == [
+        example_agents[1].id,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_allocation_tracks_occupancy_in_memory(
+    file_lock_factory,
+    registry_ctx: tuple[
+        AgentRegistry, MagicMock, MagicMock, MagicMock, MagicMock, MagicMock, MagicMock
+    ],
+) -> None:
+    (
+        registry,
+        mock_dbconn,
+        mock_dbsess,
+        mock_dbresult,
+        mock_shared_config,
+        mock_event_dispatcher,
+        mock_event_producer,
+    ) = registry_ctx
+    dispatcher = SchedulerDispatcher(
+        local_config=MagicMock(),
+        shared_config=mock_shared_config,
+        event_dispatcher=mock_event_dispatcher,
+        event_producer=mock_event_producer,
+        lock_factory=file_lock_factory,
+        registry=registry,
+    )
+    agstate_cls = DispersedAgentSelector.get_state_cls()
+    agselector = DispersedAgentSelector(
+        ScalingGroupOpts(),
+        {},
+        agent_selection_resource_priority,
+        state_store=InMemoryResourceGroupStateStore(agstate_cls),
+    )
+    example_agents = [
+        create_mock_agent(
+            AgentId("i-001"),
+            available_slots=ResourceSlot({"cpu": Decimal(4), "mem": Decimal(4096)}),
+        ),
+    ]
+    snapshot = create_example_snapshot(example_agents)
+    pending_sessions = [
+        create_mock_session(
+            SessionId(uuid4()),
+            ResourceSlot({"cpu": Decimal(3), "mem": Decimal(1024)}),
+        )
+        for _ in range(2)
+    ]
+
+    allocation = await dispatcher._allocate_single_node_session(
+        snapshot, agselector, pending_sessions[0], {}
+    )
+    snapshot.add_allocation(allocation)
+    assert allocation.agent_ids == [AgentId("i-001")]
+    assert example_agents[0].occupied_slots["cpu"] == Decimal(3)
+
+    # The second session must see the in-memory occupancy updated by the first one.
+    with pytest.raises(InstanceNotAvailable):
+        await dispatcher._allocate_single_node_session(
+            snapshot, agselector, pending_sessions[1], {}
+        )
+    assert len(snapshot.allocations) == 1
+    assert len(snapshot.failures) == 1
+    assert snapshot.failures[0].session is pending_sessions[1]
+    assert snapshot.failures[0].kind == SchedulingFailureKind.NO_AVAILABLE_INSTANCES
+    assert example_agents[0].occupied_slots["cpu"] == Decimal(3)
+    # The uncommitted allocations are counted when rolling back the concurrency counters.
+    assert snapshot.count_allocated_kernels(pending_sessions[1].access_key) == (1, 0)
+    assert snapshot.count_allocated_kernels(AccessKey("other-user")) == (0, 0)
+
+    # A multi-node session failing in the middle must not leave partial reservations.
+    multi_node_session = create_mock_session(
+        SessionId(uuid4()),
+        ResourceSlot({"cpu": Decimal(2), "mem": Decimal(2048)}),
+        kernel_opts=[
+            KernelOpt(ResourceSlot({"cpu": Decimal(1), "mem": Decimal(1024)})),
+            KernelOpt(ResourceSlot({"cpu": Decimal(1), "mem": Decimal(1024)})),
+        ],
+    )
+    with pytest.raises(InstanceNotAvailable):
+        await dispatcher._allocate_multi_node_session(snapshot, agselector, multi_node_session, {})
+    assert example_agents[0].occupied_slots["cpu"] == Decimal(3)
+    assert snapshot.occupied_deltas[AgentId("i-001")]["cpu"] == Decimal(3)
+
+
+@pytest.mark.asyncio
+async def test_snapshot_recheck_resource_limits_at_commit(
+    mocker,
+    file_lock_factory,
+    registry_ctx: tuple[
+        AgentRegistry, MagicMock, MagicMock, MagicMock, MagicMock, MagicMock, MagicMock
+    ],
+) -> None:
+    registry, _, _, _, mock_shared_config, mock_event_dispatcher, mock_event_producer = registry_ctx
+    dispatcher = SchedulerDispatcher(
+        local_config=MagicMock(),
+        shared_config=mock_shared_config,
+        event_dispatcher=mock_event_dispatcher,
+        event_producer=mock_event_producer,
+        lock_factory=file_lock_factory,
+        registry=registry,
+    )
+    known_slot_types = {SlotName("cpu"): SlotTypes.COUNT, SlotName("mem"): SlotTypes.BYTES}
+    sched_ctx = MagicMock(known_slot_types=known_slot_types)
+    example_agents = [
+        create_mock_agent(
+            AgentId("i-001"),
+            available_slots=ResourceSlot({"cpu": Decimal(8), "mem": Decimal(8192)}),
+        ),
+    ]
+    snapshot = create_example_snapshot(example_agents)
+    access_key = AccessKey("user01")
+    user_uuid = uuid4()
+    pending_sessions = [
+        create_mock_session(
+            SessionId(uuid4()),
+            ResourceSlot({"cpu": Decimal(3), "mem": Decimal(1024)}),
+            access_key=access_key,
+        )
+        for _ in range(2)
+    ]
+    agstate_cls = DispersedAgentSelector.get_state_cls()
+    agselector = DispersedAgentSelector(
+        ScalingGroupOpts(),
+        {},
+        agent_selection_resource_priority,
+        state_store=InMemoryResourceGroupStateStore(agstate_cls),
+    )
+    for sess in pending_sessions:
+        sess.user_uuid = user_uuid
+        allocation = await dispatcher._allocate_single_node_session(snapshot, agselector, sess, {})
+        snapshot.add_allocation(allocation)
+    assert example_agents[0].occupied_slots["cpu"] == Decimal(6)
+
+    # Another resource group has committed a session of the same keypair in the meantime.
+    batch = PredicateBatch(known_slot_types, SlotSchema.of(known_slot_types.keys()))
+    policy = MagicMock(
+        total_resource_slots=ResourceSlot({"cpu": Decimal(8), "mem": Decimal(8192)}),
+        default_for_unspecified=DefaultForUnspecified.UNLIMITED,
+    )
+    batch.keypair_policies[access_key] = policy
+    batch.main_keypair_policies[user_uuid] = policy
+    batch.group_resource_slots[pending_sessions[0].group_id] = {}
+    batch.domain_resource_slots[pending_sessions[0].domain_name] = {}
+    batch.keypair_occupancy[access_key] = CompactResourceSlot.from_resource_slot(
+        ResourceSlot({"cpu": Decimal(4), "mem": Decimal(0)}), batch.occupancy_schema
+    )
+    mocker.patch.object(PredicateBatch, "load", AsyncMock(return_value=batch))
+
+    rejected_sessions = await dispatcher._recheck_snapshot_resource_limits(sched_ctx, snapshot)
+    assert rejected_sessions == [pending_sessions[1]]
+    assert [allocation.session for allocation in snapshot.allocations] == [pending_sessions[0]]
+    assert snapshot.failures[0].kind == SchedulingFailureKind.PREDICATE_CHECKS_FAILED
+    assert snapshot.failures[0].status_data["failed_predicates"][0]["name"] == (
+        "keypair_resource_limit"
+    )
+    # The reservation of the rejected session is released.
+    assert example_agents[0].occupied_slots["cpu"] == Decimal(3)
+    assert snapshot.occupied_deltas[AgentId("i-001")]["cpu"] == Decimal(3)
+
+
+@pytest.mark.asyncio
+async def test_snapshot_commit_enforces_keypair_limit_within_pass(
+    mocker,
+    file_lock_factory,
+    registry_ctx: tuple[
+        AgentRegistry, MagicMock, MagicMock, MagicMock, MagicMock, MagicMock, MagicMock
+    ],
+) -> None:
+    registry, _, _, _, mock_shared_config, mock_event_dispatcher, mock_event_producer = registry_ctx
+    # The default settings where the per-session predicates read the occupancy from the DB,
+    # which does not include the sessions still pending in the snapshot.
+    local_config = {
+        "manager": {
+            "session_schedule_lock_scope": "global",
+            "predicate-check-mode": "per-session",
+            "scheduling-mode": "snapshot",
+        },
+    }
+    dispatcher = SchedulerDispatcher(
+        local_config=local_config,  # type: ignore[arg-type]
+        shared_config=mock_shared_config,
+        event_dispatcher=mock_event_dispatcher,
+        event_producer=mock_event_producer,
+        lock_factory=file_lock_factory,
+        registry=registry,
+    )
+    known_slot_types = {SlotName("cpu"): SlotTypes.COUNT, SlotName("mem"): SlotTypes.BYTES}
+    sched_ctx = MagicMock(known_slot_types=known_slot_types)
+    example_agents = [
+        create_mock_agent(
+            AgentId("i-001"),
+            available_slots=ResourceSlot({"cpu": Decimal(8), "mem": Decimal(8192)}),
+        ),
+    ]
+    snapshot = create_example_snapshot(example_agents)
+    access_key = AccessKey("user01")
+    user_uuid = uuid4()
+    # Each session fits the keypair limit alone, but not both together.
+    pending_sessions = [
+        create_mock_session(
+            SessionId(uuid4()),
+            ResourceSlot({"cpu": Decimal(3), "mem": Decimal(1024)}),
+            access_key=access_key,
+        )
+        for _ in range(2)
+    ]
+    agstate_cls = DispersedAgentSelector.get_state_cls()
+    agselector = DispersedAgentSelector(
+        ScalingGroupOpts(),
+        {},
+        agent_selection_resource_priority,
+        state_store=InMemoryResourceGroupStateStore(agstate_cls),
+    )
+    for sess in pending_sessions:
+        sess.user_uuid = user_uuid
+        allocation = await dispatcher._allocate_single_node_session(snapshot, agselector, sess, {})
+        snapshot.add_allocation(allocation)
+
+    batch = PredicateBatch(known_slot_types, SlotSchema.of(known_slot_types.keys()))
+    policy = MagicMock(
+        total_resource_slots=ResourceSlot({"cpu": Decimal(4), "mem": Decimal(8192)}),
+        default_for_unspecified=DefaultForUnspecified.UNLIMITED,
+    )
+    batch.keypair_policies[access_key] = policy
+    batch.main_keypair_policies[user_uuid] = MagicMock(
+        total_resource_slots=ResourceSlot({"cpu": Decimal(8), "mem": Decimal(8192)}),
+        default_for_unspecified=DefaultForUnspecified.UNLIMITED,
+    )
+    batch.group_resource_slots[pending_sessions[0].group_id] = {}
+    batch.domain_resource_slots[pending_sessions[0].domain_name] = {}
+    mocker.patch.object(PredicateBatch, "load", AsyncMock(return_value=batch))
+    dispatcher_module = "ai.backend.manager.scheduler.dispatcher"
+    mock_apply_allocations = mocker.patch(f"{dispatcher_module}._apply_snapshot_allocations")
+    mocker.patch(f"{dispatcher_module}._apply_snapshot_status_updates")
+    mock_apply_failures = mocker.patch(f"{dispatcher_module}._apply_snapshot_failures")
+    mock_rollback = mocker.patch(f"{dispatcher_module}._rollback_predicate_mutations")
+
+    await dispatcher._commit_snapshot(sched_ctx, snapshot)
+
+    assert [allocation.session for allocation in snapshot.allocations] == [pending_sessions[0]]
+    assert [failure.session for failure in snapshot.failures] == [pending_sessions[1]]
+    assert snapshot.failures[0].kind == SchedulingFailureKind.PREDICATE_CHECKS_FAILED
+    mock_apply_allocations.assert_awaited_once()
+    mock_apply_failures.assert_awaited_once()
+    mock_rollback.assert_awaited_once()
+    assert mock_rollback.await_args.args[2] is pending_sessions[1]
+    assert example_agents[0].occupied_slots["cpu"] == Decimal(3)
+
+
+@pytest.mark.asyncio
+async def test_admit_scheduled_session_at_commit(
+    mocker,
+    file_lock_factory,
+    registry_ctx: tuple[
+        AgentRegistry, MagicMock, MagicMock, MagicMock, MagicMock, MagicMock, MagicMock
+    ],
+) -> None:
+    registry, _, _, _, mock_shared_config, mock_event_dispatcher, mock_event_producer = registry_ctx
+    local_config = {
+        "manager": {
+            "session_schedule_lock_scope": "resource-group",
+            "session_schedule_lock_lifetime": 30,
+            "predicate-check-mode": "per-session",
+            "scheduling-mode": "per-session",
+        },
+    }
+    dispatcher = SchedulerDispatcher(
+        local_config=local_config,  # type: ignore[arg-type]
+        shared_config=mock_shared_config,
+        event_dispatcher=mock_event_dispatcher,
+        event_producer=mock_event_producer,
+        lock_factory=file_lock_factory,
+        registry=registry,
+    )
+    known_slot_types = {SlotName("cpu"): SlotTypes.COUNT, SlotName("mem"): SlotTypes.BYTES}
+    sched_ctx = MagicMock(known_slot_types=known_slot_types)
+    access_key = AccessKey("user01")
+    sess = create_mock_session(
+        SessionId(uuid4()),
+        ResourceSlot({"cpu": Decimal(3), "mem": Decimal(1024)}),
+        access_key=access_key,
+    )
+    sess.user_uuid = uuid4()
+    batch = PredicateBatch(known_slot_types, SlotSchema.of(known_slot_types.keys()))
+    policy = MagicMock(
+        total_resource_slots=ResourceSlot({"cpu": Decimal(4), "mem": Decimal(8192)}),
+        default_for_unspecified=DefaultForUnspecified.UNLIMITED,
+    )
+    batch.keypair_policies[access_key] = policy
+    batch.main_keypair_policies[sess.user_uuid] = policy
+    batch.group_resource_slots[sess.group_id] = {}
+    batch.domain_resource_slots[sess.domain_name] = {}
+    mocker.patch.object(PredicateBatch, "load", AsyncMock(return_value=batch))
+    dispatcher_module = "ai.backend.manager.scheduler.dispatcher"
+    mock_release = mocker.patch(f"{dispatcher_module}._release_agent")
+    mocker.patch(f"{dispatcher_module}._rollback_predicate_mutations")
+    reservations = [(AgentId("i-001"), sess.requested_slots)]
+
+    # The session fits the keypair limit.
+    await dispatcher._admit_scheduled_session(sched_ctx, sess, reservations)
+    mock_release.assert_not_awaited()
+
+    # Another resource group has committed a session of the same keypair in the meantime.
+    batch.keypair_occupancy[access_key] = CompactResourceSlot.from_resource_slot(
+        ResourceSlot({"cpu": Decimal(2), "mem": Decimal(0)}), batch.occupancy_schema
+    )
+    with pytest.raises(AdmissionRejected):
+        await dispatcher._admit_scheduled_session(sched_ctx, sess, reservations)
+    mock_release.assert_awaited_once()
+    assert mock_release.await_args.args[1:] == reservations[0]
@@ -73,3 +73,69 @@ async def test_scan_tree_with_limit(dummy_path) -> None:
     async for item in fsop_model.scan_tree(dummy_path, recursive=False):
         result.append(item)
     assert len(result) == 5
+
+
+@pytest.mark.asyncio
+async def test_scan_tree_usage(dummy_path) -> None:
+    fsop_model = BaseFSOpModel(dummy_path, 0, scandir_threads=4, scandir_batch_size=2)
+
+    usage = await fsop_model.scan_tree_usage(dummy_path)
+    assert usage.file_count == 9
+    assert usage.used_bytes == sum(p.lstat().st_size for p in dummy_path.rglob("*"))
+
+
+@pytest.mark.asyncio
+async def test_scan_tree_in_parallel(dummy_path) -> None:
+    for i in range(10):
+        for j in range(10):
+            (dummy_path / "many" / f"d{i}" / f"e{j}").mkdir(parents=True)
+            (dummy_path / "many" / f"d{i}" / f"e{j}" / "f.txt").write_bytes(b"x")
+    fsop_model = BaseFSOpModel(dummy_path, 0, scandir_threads=4, scandir_batch_size=3)
+
+    paths = [item.path async for item in fsop_model.scan_tree(dummy_path, recursive=True)]
+    assert len(paths) == len(set(paths))
+    assert set(paths) == {p.relative_to(dummy_path) for p in dummy_path.rglob("*")}
+
+    # Stopping the iteration in the middle cancels the scan.
+    async for item in fsop_model.scan_tree(dummy_path, recursive=True):
+        break
+
+
+@pytest.mark.asyncio
+async def test_copy_tree(dummy_path) -> None:
+    src_path = dummy_path / "src"
+    for i in range(4):
+        (src_path / f"d{i}" / "inner").mkdir(parents=True)
+        (src_path / f"d{i}" / "inner" / "f.bin").write_bytes(b"x" * 1000 * i)
+    (src_path / "link").symlink_to("d0")
+    (src_path / "d1").chmod(0o750)
+    dst_path = dummy_path / "dst"
+    fsop_model = BaseFSOpModel(dummy_path, 0, copy_threads=4)
+    reports: list[tuple[int, int]] = []
+
+    async def _progress(copied_bytes: int, total_bytes: int) -> None:
+        reports.append((copied_bytes, total_bytes))
+
+    await fsop_model.copy_tree(src_path, dst_path, progress=_progress)
+    assert reports[-1] == (6000, 6000)
+    for src in src_path.rglob("*"):
+        dst = dst_path / src.relative_to(src_path)
+        src_stat = src.lstat()
+        dst_stat = dst.lstat()
+        assert dst_stat.st_mode == src_stat.st_mode
+        assert dst_stat.st_mtime_ns == src_stat.st_mtime_ns
+        if src.is_symlink():
+            assert dst.readlink() == src.readlink()
+        elif src.is_file():
+            assert dst.read_bytes() == src.read_bytes()
+
+    # Copying again resumes the copy, rewriting only the incomplete files.
+    (dst_path / "d2" / "inner" / "f.bin").write_bytes(b"x" * 10)
+    (dst_path / "d3" / "inner" / "f.bin").unlink()
+    await fsop_model.copy_tree(src_path, dst_path)
+    assert (dst_path / "d2" / "inner" / "f.bin").read_bytes() == b"x" * 2000
+    assert (dst_path / "d3" / "inner" / "f.bin").read_bytes() == b"x" * 3000
+
+    # A single file could be copied as well.
+    await fsop_model.copy_tree(src_path / "d1" / "inner" / "f.bin", dummy_path / "f.bin")
+    assert (dummy_path / "f.bin").read_bytes() == b"x" * 1000
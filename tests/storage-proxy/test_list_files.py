@@ -0,0 +1,189 @@
+import base64
+import json
+import os
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+from aiohttp import web
+
+from ai.backend.storage.api import manager as manager_api
+from ai.backend.storage.types import VFolderID
+from ai.backend.storage.volumes.abc import AbstractVolume
+
+NUM_FILES = 23
+PAGE_SIZE = 5
+
+
+@pytest.fixture
+async def vfolder_with_files(volume: AbstractVolume, empty_vfolder: VFolderID) -> VFolderID:
+    vfpath = volume.mangle_vfpath(empty_vfolder)
+    base_mtime = 1_700_000_000
+    for idx in range(NUM_FILES):
+        file_path = vfpath / f"file{idx:02d}.txt"
+        # Let the entries share the sizes and the modification times to check the tie-breaks.
+        file_path.write_bytes(b"x" * (idx % 4))
+        os.utime(file_path, (base_mtime, base_mtime + idx % 3))
+    (vfpath / "subdir").mkdir()
+    (vfpath / "subdir" / "inner.txt").write_bytes(b"inner")
+    (vfpath / "other.dat").write_bytes(b"other")
+    return empty_vfolder
+
+
+@pytest.fixture
+async def client(aiohttp_client, volume: AbstractVolume):
+    @asynccontextmanager
+    async def _get_volume(name: str) -> AsyncIterator[AbstractVolume]:
+        yield volume
+
+    ctx = MagicMock()
+    ctx.get_volume = _get_volume
+    app = web.Application()
+    app["ctx"] = ctx
+    app.router.add_route("POST", "/folder/file/list", manager_api.list_files)
+    return await aiohttp_client(app)
+
+
+def _expected_names(volume: AbstractVolume, vfid: VFolderID, sort_by: str, order: str) -> list[str]:
+    def _sort_key(entry: os.DirEntry) -> tuple[Any, ...]:
+        entry_stat = entry.stat(follow_symlinks=False)
+        match sort_by:
+            case "name":
+                return (entry.name,)
+            case "size":
+                return (entry_stat.st_size, entry.name)
+            case "modified":
+                return (entry_stat.st_mtime, entry.name)
+        raise ValueError(sort_by)
+
+    with os.scandir(volume.mangle_vfpath(vfid)) as scanner:
+        entries = sorted(scanner, key=_sort_key, reverse=order == "desc")
+    return [entry.name for entry in entries]
+
+
+async def _list_page(client, vfid: VFolderID, **params: Any) -> Any:
+    return await client.post(
+        "/folder/file/list",
+        json={"volume": "local", "vfid": str(vfid), "relpath": ".", **params},
+    )
+
+
+async def _list_all_pages(client, vfid: VFolderID, **params: Any) -> list[str]:
+    names: list[str] = []
+    cursor = None
+    while True:
+        resp = await _list_page(client, vfid, limit=PAGE_SIZE, cursor=cursor, **params)
+        assert resp.status == 200
+        result = await resp.json()
+        assert len(result["items"]) <= PAGE_SIZE
+        names.extend(item["name"] for item in result["items"])
+        cursor = result["next_cursor"]
+        if cursor is None:
+            return names
+
+
+async def _stream_all_pages(client, vfid: VFolderID, **params: Any) -> list[str]:
+    names: list[str] = []
+    cursor = None
+    while True:
+        resp = await _list_page(client, vfid, limit=PAGE_SIZE, cursor=cursor, stream=True, **params)
+        assert resp.status == 200
+        assert resp.content_type == "application/x-ndjson"
+        lines = [json.loads(line) for line in (await resp.text()).splitlines()]
+        cursor = None
+        if lines and "next_cursor" in lines[-1]:
+            cursor = lines.pop()["next_cursor"]
+        assert len(lines) <= PAGE_SIZE
+        names.extend(item["name"] for item in lines)
+        if cursor is None:
+            return names
+
+
+def _make_cursor(*payload: Any) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sort_by", ["name", "size", "modified"])
+@pytest.mark.parametrize("order", ["asc", "desc"])
+async def test_list_files_pages(
+    client, volume: AbstractVolume, vfolder_with_files: VFolderID, sort_by: str, order: str
+) -> None:
+    expected = _expected_names(volume, vfolder_with_files, sort_by, order)
+    assert len(expected) == NUM_FILES + 2
+    names = await _list_all_pages(client, vfolder_with_files, sort_by=sort_by, order=order)
+    # The pages have neither the duplicates nor the gaps.
+    assert names == expected
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sort_by", ["name", "size", "modified"])
+async def test_list_files_stream_pages(
+    client, volume: AbstractVolume, vfolder_with_files: VFolderID, sort_by: str
+) -> None:
+    expected = _expected_names(volume, vfolder_with_files, sort_by, "asc")
+    names = await _stream_all_pages(client, vfolder_with_files, sort_by=sort_by)
+    assert names == expected
+
+
+@pytest.mark.asyncio
+async def test_list_files_stream_without_limit(client, vfolder_with_files: VFolderID) -> None:
+    resp = await _list_page(client, vfolder_with_files, stream=True)
+    assert resp.status == 200
+    lines = [json.loads(line) for line in (await resp.text()).splitlines()]
+    # All entries are streamed without the trailing cursor.
+    assert len(lines) == NUM_FILES + 2
+    assert all("next_cursor" not in line for line in lines)
+    subdir = next(line for line in lines if line["name"] == "subdir")
+    assert subdir["type"] == "DIRECTORY"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sort_by", ["name", "size"])
+async def test_list_files_name_prefix(
+    client, volume: AbstractVolume, vfolder_with_files: VFolderID, sort_by: str
+) -> None:
+    expected = [
+        name
+        for name in _expected_names(volume, vfolder_with_files, sort_by, "asc")
+        if name.startswith("file1")
+    ]
+    assert len(expected) == 10
+    names = await _list_all_pages(client, vfolder_with_files, sort_by=sort_by, name_prefix="file1")
+    assert names == expected
+    resp = await _list_page(client, vfolder_with_files, name_prefix="no-such-prefix")
+    assert resp.status == 200
+    assert await resp.json() == {"items": [], "next_cursor": None}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "sort_by, cursor",
+    [
+        # malformed cursors
+        ("name", "not a cursor!"),
+        ("name", base64.urlsafe_b64encode(b"{broken").decode("ascii")),
+        ("name", _make_cursor()),
+        ("name", base64.urlsafe_b64encode(b"123").decode("ascii")),
+        # the cursors of the other sort orders
+        ("size", _make_cursor("name", False, "file01.txt")),
+        ("name", _make_cursor("name", True, "file01.txt")),
+        # the cursors having the sort keys of the mismatched types
+        ("name", _make_cursor("name", False, 1)),
+        ("name", _make_cursor("name", False, "file01.txt", "extra")),
+        ("size", _make_cursor("size", False, "large", "file01.txt")),
+        ("size", _make_cursor("size", False, 1)),
+        ("modified", _make_cursor("modified", False, None, "file01.txt")),
+    ],
+)
+async def test_list_files_rejects_invalid_cursor(
+    client, vfolder_with_files: VFolderID, sort_by: str, cursor: str
+) -> None:
+    resp = await _list_page(client, vfolder_with_files, sort_by=sort_by, cursor=cursor, limit=3)
+    assert resp.status == 400
+    resp = await _list_page(
+        client, vfolder_with_files, sort_by=sort_by, cursor=cursor, limit=3, stream=True
+    )
+    assert resp.status == 400
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import threading
+from collections.abc import Callable, Iterator, Sequence
+from pathlib import Path
+
+import pytest
+
+from ai.backend.storage.volumes.vfs.scanner import (
+    MAX_CONCURRENT_SCANS,
+    ParallelTreeScanner,
+    ScanCancelled,
+    ScanKind,
+)
+
+
+@pytest.fixture
+def tree_path() -> Iterator[Path]:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir_path = Path(tmpdir)
+        for idx in range(4):
+            (tmpdir_path / f"dir{idx}" / "inner").mkdir(parents=True)
+            (tmpdir_path / f"dir{idx}" / "inner" / "a.txt").write_bytes(b"123")
+            (tmpdir_path / f"file{idx}.txt").write_bytes(b"qwer")
+        yield tmpdir_path
+
+
+def _collect_names(scanner: ParallelTreeScanner, path: Path) -> list[str]:
+    names: list[str] = []
+    lock = threading.Lock()
+
+    def _handle_entries(entries: Sequence[os.DirEntry]) -> None:
+        with lock:
+            names.extend(entry.name for entry in entries)
+
+    scanner.scan(path, _handle_entries)
+    return names
+
+
+def test_scan(tree_path: Path) -> None:
+    names = _collect_names(ParallelTreeScanner(4), tree_path)
+    assert sorted(names) == sorted([
+        *(f"dir{idx}" for idx in range(4)),
+        *(f"file{idx}.txt" for idx in range(4)),
+        *(["inner"] * 4),
+        *(["a.txt"] * 4),
+    ])
+    names = _collect_names(ParallelTreeScanner(4, recursive=False), tree_path)
+    assert len(names) == 8
+
+
+def test_listing_not_starved_by_long_running_walks(tree_path: Path) -> None:
+    release = threading.Event()
+    started = threading.Semaphore(0)
+
+    def _blocking_visit(path: Path, push: Callable[[Sequence[Path]], None]) -> None:
+        started.release()
+        release.wait()
+
+    num_copies = MAX_CONCURRENT_SCANS[ScanKind.COPY]
+    copy_threads = [
+        threading.Thread(
+            target=ParallelTreeScanner(1, kind=ScanKind.COPY).walk,
+            args=(tree_path, _blocking_visit),
+        )
+        for _ in range(num_copies)
+    ]
+    for thread in copy_threads:
+        thread.start()
+    try:
+        for _ in range(num_copies):
+            assert started.acquire(timeout=5)
+        # Another copy waits for a free slot of the copies until its timeout.
+        with pytest.raises(ScanCancelled):
+            ParallelTreeScanner(1, kind=ScanKind.COPY, timeout=0.3).walk(tree_path, _blocking_visit)
+        # The listings and the usage scans have their own slots.
+        names = _collect_names(ParallelTreeScanner(2, kind=ScanKind.LISTING, timeout=5), tree_path)
+        assert len(names) == 16
+        names = _collect_names(ParallelTreeScanner(2, kind=ScanKind.USAGE, timeout=5), tree_path)
+        assert len(names) == 16
+    finally:
+        release.set()
+        for thread in copy_threads:
+            thread.join()
@@ -0,0 +1,195 @@
+import asyncio
+import errno
+import os
+import uuid
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock
+
+import jwt
+import pytest
+from aiohttp import web
+from yarl import URL
+
+from ai.backend.common.types import QuotaScopeID, QuotaScopeType
+from ai.backend.storage.api import client as client_api
+from ai.backend.storage.types import VFolderID
+
+SECRET = "test-secret"
+FILE_CONTENT = b"hello, backend.ai!"
+
+
+class DummyVolume:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def mangle_vfpath(self, vfid: VFolderID) -> Path:
+        return self.root / str(vfid.folder_id)
+
+
+@pytest.fixture
+def vfid() -> VFolderID:
+    return VFolderID(QuotaScopeID(QuotaScopeType.USER, uuid.uuid4()), uuid.uuid4())
+
+
+@pytest.fixture
+def volume(vfroot: Path) -> DummyVolume:
+    return DummyVolume(vfroot)
+
+
+@pytest.fixture
+def upload_session(volume: DummyVolume, vfid: VFolderID) -> Path:
+    session_id = uuid.uuid4().hex
+    upload_temp_path = volume.mangle_vfpath(vfid) / ".upload" / session_id
+    upload_temp_path.parent.mkdir(parents=True)
+    upload_temp_path.touch()
+    return upload_temp_path
+
+
+@pytest.fixture
+def token(vfid: VFolderID, upload_session: Path) -> str:
+    return jwt.encode(
+        {
+            "op": "upload",
+            "volume": "local",
+            "vfid": str(vfid),
+            "relpath": "data/hello.txt",
+            "session": upload_session.name,
+            "size": len(FILE_CONTENT),
+        },
+        SECRET,
+        algorithm="HS256",
+    )
+
+
+@pytest.fixture
+async def client(aiohttp_client, volume: DummyVolume):
+    @asynccontextmanager
+    async def _get_volume(name: str) -> AsyncIterator[DummyVolume]:
+        yield volume
+
+    ctx = MagicMock()
+    ctx.local_config = {"storage-proxy": {"secret": SECRET}}
+    ctx.get_volume = _get_volume
+    app = web.Application()
+    app["ctx"] = ctx
+    r = app.router.add_resource("/upload")
+    r.add_route("HEAD", client_api.tus_check_session)
+    r.add_route("POST", client_api.tus_create_upload)
+    r.add_route("PATCH", client_api.tus_upload_part)
+    return await aiohttp_client(app)
+
+
+async def _upload_parts(client, token: str, chunks: list[bytes]) -> list[str]:
+    locations = []
+    for chunk in chunks:
+        resp = await client.post(
+            "/upload",
+            params={"token": token},
+            headers={"Upload-Concat": "partial", "Upload-Length": str(len(chunk))},
+        )
+        assert resp.status == 201
+        location = URL("/upload").with_query(URL(resp.headers["Location"]).query)
+        resp = await client.patch(
+            location,
+            data=chunk,
+            headers={"Upload-Offset": "0", "Content-Type": "application/offset+octet-stream"},
+        )
+        assert resp.status == 204
+        assert resp.headers["Upload-Offset"] == str(len(chunk))
+        locations.append(str(location))
+    return locations
+
+
+async def _concat(client, token: str, locations: list[str]) -> Any:
+    return await client.post(
+        "/upload",
+        params={"token": token},
+        headers={"Upload-Concat": "final;" + " ".join(locations)},
+    )
+
+
+@pytest.mark.asyncio
+async def test_concat_uploads(
+    client, token: str, upload_session: Path, volume: DummyVolume, vfid: VFolderID
+) -> None:
+    locations = await _upload_parts(client, token, [FILE_CONTENT[:5], FILE_CONTENT[5:]])
+    # The parts are resolved against the token of the final upload request.
+    part_refs = [
+        str(URL(location).with_query({"part": URL(location).query["part"]}))
+        for location in locations
+    ]
+    resp = await _concat(client, token, part_refs)
+    assert resp.status == 201
+    assert resp.headers["Upload-Offset"] == str(len(FILE_CONTENT))
+    target_path = volume.mangle_vfpath(vfid) / "data" / "hello.txt"
+    assert target_path.read_bytes() == FILE_CONTENT
+    assert not upload_session.exists()
+    assert not client_api.get_upload_parts_path(upload_session).exists()
+
+
+@pytest.mark.asyncio
+async def test_concat_uploads_rejects_incomplete_parts(client, token: str) -> None:
+    locations = await _upload_parts(client, token, [FILE_CONTENT[:5]])
+    resp = await _concat(client, token, locations)
+    assert resp.status == 400
+
+
+@pytest.mark.asyncio
+async def test_concat_uploads_concurrently(
+    client, token: str, volume: DummyVolume, vfid: VFolderID
+) -> None:
+    locations = await _upload_parts(client, token, [FILE_CONTENT[:5], FILE_CONTENT[5:]])
+    responses = await asyncio.gather(
+        _concat(client, token, locations),
+        _concat(client, token, locations),
+    )
+    statuses = sorted(resp.status for resp in responses)
+    assert statuses[0] == 201
+    # The other one finds the session already concatenated or finalized.
+    assert statuses[1] in (404, 409)
+    target_path = volume.mangle_vfpath(vfid) / "data" / "hello.txt"
+    assert target_path.read_bytes() == FILE_CONTENT
+
+
+@pytest.mark.asyncio
+async def test_concat_uploads_retry_after_failure(
+    mocker, client, token: str, upload_session: Path, volume: DummyVolume, vfid: VFolderID
+) -> None:
+    chunks = [FILE_CONTENT[:5], FILE_CONTENT[5:9], FILE_CONTENT[9:]]
+    locations = await _upload_parts(client, token, chunks)
+    parts_path = client_api.get_upload_parts_path(upload_session)
+    part_paths = sorted(parts_path.iterdir())
+
+    num_copied = 0
+    real_copyfileobj = client_api.shutil.copyfileobj
+
+    def _copy_and_fail(fsrc, fdst, length=0):
+        nonlocal num_copied
+        if num_copied == 1:
+            raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC))
+        num_copied += 1
+        real_copyfileobj(fsrc, fdst, length)
+
+    # Fail in the middle of the concatenation, after copying the first part.
+    mocker.patch.object(
+        client_api.os,
+        "copy_file_range",
+        create=True,
+        side_effect=OSError(errno.EXDEV, os.strerror(errno.EXDEV)),
+    )
+    mocker.patch.object(client_api.shutil, "copyfileobj", side_effect=_copy_and_fail)
+    resp = await _concat(client, token, locations)
+    assert resp.status == 500
+    # Both the session file and the partial uploads are left intact.
+    assert upload_session.stat().st_size == 0
+    assert sorted(parts_path.iterdir()) == part_paths
+    assert sorted(path.stat().st_size for path in part_paths) == sorted(map(len, chunks))
+
+    mocker.stopall()
+    resp = await _concat(client, token, locations)
+    assert resp.status == 201
+    target_path = volume.mangle_vfpath(vfid) / "data" / "hello.txt"
+    assert target_path.read_bytes() == FILE_CONTENT
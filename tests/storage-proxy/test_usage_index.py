@@ -0,0 +1,71 @@
+import asyncio
+import tempfile
+import uuid
+from pathlib import Path, PurePosixPath
+
+import pytest
+
+from ai.backend.common.types import QuotaScopeID, QuotaScopeType
+from ai.backend.storage.types import VFolderID
+from ai.backend.storage.volumes.vfs.usage_index import VFolderUsageIndex
+
+
+@pytest.fixture
+def vfolder_path():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir_path = Path(tmpdir)
+        (tmpdir_path / "a.txt").write_bytes(b"123")
+        (tmpdir_path / "inner1").mkdir()
+        (tmpdir_path / "inner1" / "b.txt").write_bytes(b"qwer")
+        (tmpdir_path / "inner2" / "inner3").mkdir(parents=True)
+        (tmpdir_path / "inner2" / "inner3" / "c.txt").write_bytes(b"asdfg")
+        yield tmpdir_path
+
+
+@pytest.fixture
+def index_path():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield Path(tmpdir)
+
+
+async def _wait_refresh(usage_index: VFolderUsageIndex) -> None:
+    while usage_index._refresh_tasks:
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_usage_index(vfolder_path: Path, index_path: Path) -> None:
+    vfid = VFolderID(QuotaScopeID(QuotaScopeType.USER, uuid.uuid4()), uuid.uuid4())
+    usage_index = VFolderUsageIndex(index_path, fresh_period=0, full_rescan_interval=3600)
+    try:
+        usage = await usage_index.get_usage(vfid, vfolder_path)
+        assert usage is not None
+        assert usage.file_count == 6
+        assert usage.collected_at is not None
+        usage = await usage_index.get_usage(vfid, vfolder_path, PurePosixPath("inner2"))
+        assert usage is not None
+        assert usage.file_count == 2
+        assert await usage_index.get_usage(vfid, vfolder_path, PurePosixPath("a.txt")) is None
+
+        # The stale index is served while being revalidated.
+        await _wait_refresh(usage_index)
+        (vfolder_path / "inner2" / "inner3" / "d.txt").write_bytes(b"x" * 100)
+        usage = await usage_index.get_usage(vfid, vfolder_path)
+        assert usage is not None
+        assert usage.file_count == 6
+        await _wait_refresh(usage_index)
+        usage = await usage_index.get_usage(vfid, vfolder_path)
+        assert usage is not None
+        assert usage.file_count == 7
+
+        # The index is persisted.
+        another_index = VFolderUsageIndex(index_path, fresh_period=60, full_rescan_interval=3600)
+        usage = await another_index.get_usage(vfid, vfolder_path, PurePosixPath("inner2"))
+        assert usage is not None
+        assert usage.file_count == 3
+        assert not another_index._refresh_tasks
+
+        await usage_index.forget(vfid)
+        assert not list(index_path.iterdir())
+    finally:
+        await usage_index.close()
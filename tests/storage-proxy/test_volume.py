@@ -1,3 +1,4 @@
+import secrets
 import uuid
 from pathlib import PurePosixPath
 
@@ -101,6 +102,24 @@ async def test_volume_scandir(volume: AbstractVolume, empty_vfolder: VFolderID)
     assert "inner2" in merged_output
 
 
+@pytest.mark.asyncio
+async def test_volume_read_file(volume: AbstractVolume, empty_vfolder: VFolderID) -> None:
+    vfpath = volume.mangle_vfpath(empty_vfolder)
+    data = secrets.token_bytes(3 * 1024 * 1024 + 123)
+    (vfpath / "test.bin").write_bytes(data)
+    chunks = []
+    async for chunk in volume.read_file(empty_vfolder, PurePosixPath("test.bin")):
+        chunks.append(chunk)
+    assert chunks[-1] == b""
+    assert b"".join(chunks) == data
+    # The reader should stop when the consumer goes away.
+    file_iter = volume.read_file(empty_vfolder, PurePosixPath("test.bin"), chunk_size=4096)
+    async for chunk in file_iter:
+        assert chunk == data[:4096]
+        break
+    await file_iter.aclose()  # type: ignore[attr-defined]
+
+
 @pytest.mark.asyncio
 async def test_volume_clone(volume: AbstractVolume) -> None:
     qsid1 = QuotaScopeID(QuotaScopeType.USER, uuid.uuid4())
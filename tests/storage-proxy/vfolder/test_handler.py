@@ -62,7 +62,7 @@ def mock_vfolder_service():
         async def create_vfolder(self, vfolder_key):
             pass
 
-        async def clone_vfolder(self, src_vfolder_key, dst_vfolder_key):
+        async def clone_vfolder(self, src_vfolder_key, dst_vfolder_key, *, bgtask_id=None):
             pass
 
         async def get_vfolder_info(self, vfolder_key, subpath):
@@ -222,7 +222,7 @@ async def test_clone_vfolder(mock_log, mock_service, mock_volume_pool):
     await mock_service.clone_vfolder(vfolder_key, dst_vfolder_id)
 
     mock_log.assert_called_once_with(service_log, "clone_vfolder", vfolder_key)
-    mock_volume.clone_vfolder.assert_called_once_with(src_vfolder_id, dst_vfolder_id)
+    mock_volume.clone_vfolder.assert_called_once_with(src_vfolder_id, dst_vfolder_id, progress=None)
 
 
 @pytest.mark.asyncio
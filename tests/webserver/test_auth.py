@@ -5,7 +5,14 @@ import pytest
 import yarl
 from aiohttp import web
 
-from ai.backend.web.auth import get_anonymous_session, get_api_session
+from ai.backend.client.request import Request
+from ai.backend.web.auth import (
+    APISessionCache,
+    activate_api_session,
+    get_anonymous_session,
+    get_api_session,
+    get_cached_api_session,
+)
 
 
 class DummyRequest:
@@ -129,3 +136,65 @@ async def test_get_anonymous_session_with_specific_api_endpoint(mocker):
     mock_get_session.assert_not_called()
     async with api_session:
         assert str(api_session.config.endpoint) == specific_api_endpoint
+
+
+@pytest.mark.asyncio
+async def test_api_session_cache():
+    cache = APISessionCache({"domain": "default", "ssl_verify": False}, max_size=2)
+    try:
+        session_a = cache.get("https://api.backend.ai", "ABC", "xyz")
+        session_b = cache.get("https://api.backend.ai", "DEF", "uvw")
+        assert cache.get("https://api.backend.ai", "ABC", "xyz") is session_a
+        assert session_a.aiohttp_session is session_b.aiohttp_session
+        assert session_a.config.secret_key == "xyz"
+        assert not session_a.config.is_anonymous
+
+        # The least recently used session should be evicted.
+        session_c = cache.get("https://alternative.backend.ai", "ABC", "xyz")
+        assert session_c is not session_a
+        assert len(cache) == 2
+        assert cache.get("https://api.backend.ai", "DEF", "uvw") is not session_b
+        assert cache.get("https://api.backend.ai", "ABC", "xyz") is not session_a
+
+        # The session should be renewed if the secret key has been changed.
+        session_d = cache.get("https://api.backend.ai", "ABC", "rst")
+        assert session_d.config.secret_key == "rst"
+
+        anonymous_session = cache.get("https://api.backend.ai", "", "")
+        assert anonymous_session.config.is_anonymous
+    finally:
+        await cache.close()
+    assert session_a.aiohttp_session.closed
+
+
+@pytest.mark.asyncio
+async def test_get_cached_api_session(mocker):
+    cache = APISessionCache({"domain": "default", "ssl_verify": False}, max_size=8)
+    mock_request = DummyRequest({
+        "config": {
+            "api": {
+                "domain": "default",
+                "endpoint": [yarl.URL("https://api.backend.ai")],
+                "ssl_verify": False,
+            },
+        },
+        "api_session_cache": cache,
+    })
+    mock_get_session = AsyncMock(
+        return_value={
+            "authenticated": True,
+            "token": {"type": "keypair", "access_key": "ABC", "secret_key": "xyz"},
+        }
+    )
+    mocker.patch("ai.backend.web.auth.get_session", mock_get_session)
+    try:
+        api_session = await get_cached_api_session(mock_request)
+        assert await get_cached_api_session(mock_request) is api_session
+        for _ in range(2):
+            # The cached session should be reusable after the context exits.
+            with activate_api_session(api_session):
+                api_request = Request("GET", "/folders")
+                assert api_request.session is api_session
+        assert not api_session.closed
+    finally:
+        await cache.close()
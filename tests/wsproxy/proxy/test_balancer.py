@@ -0,0 +1,82 @@
+from uuid import UUID
+
+import pytest
+
+from ai.backend.wsproxy.exceptions import WorkerNotAvailable
+from ai.backend.wsproxy.proxy.backend.balancer import EJECTION_THRESHOLD, RouteBalancer
+from ai.backend.wsproxy.types import LoadBalancingStrategy, ProxyProtocol, RouteInfo
+
+
+def create_route(port: int, traffic_ratio: float = 1.0) -> RouteInfo:
+    return RouteInfo(
+        session_id=UUID("f5cd34ba-ae53-4537-a813-09f38496443d"),
+        session_name=None,
+        kernel_host="127.0.0.1",
+        kernel_port=port,
+        protocol=ProxyProtocol.HTTP,
+        traffic_ratio=traffic_ratio,
+    )
+
+
+def test_select_without_available_routes() -> None:
+    balancer = RouteBalancer(LoadBalancingStrategy.RANDOM)
+    with pytest.raises(WorkerNotAvailable):
+        balancer.select([])
+    with pytest.raises(WorkerNotAvailable):
+        balancer.select([create_route(30000, traffic_ratio=0)])
+
+
+@pytest.mark.parametrize(
+    "strategy",
+    [LoadBalancingStrategy.LEAST_OUTSTANDING, LoadBalancingStrategy.POWER_OF_TWO_CHOICES],
+)
+def test_select_least_outstanding(strategy: LoadBalancingStrategy) -> None:
+    balancer = RouteBalancer(strategy)
+    busy_route, idle_route = create_route(30000), create_route(30001)
+    balancer.get_route_stats(busy_route).outstanding = 3
+    for _ in range(10):
+        assert balancer.select([busy_route, idle_route]) is idle_route
+
+
+def test_select_peak_ewma() -> None:
+    balancer = RouteBalancer(LoadBalancingStrategy.PEAK_EWMA)
+    slow_route, fast_route = create_route(30000), create_route(30001)
+    balancer.get_route_stats(slow_route).observe_latency(2.0, 100.0)
+    balancer.get_route_stats(fast_route).observe_latency(0.1, 100.0)
+    for _ in range(10):
+        assert balancer.select([slow_route, fast_route]) is fast_route
+    # The estimate jumps up to a higher latency immediately.
+    balancer.get_route_stats(fast_route).observe_latency(3.0, 101.0)
+    assert balancer.select([slow_route, fast_route]) is slow_route
+
+
+def test_eject_failing_route() -> None:
+    balancer = RouteBalancer(LoadBalancingStrategy.RANDOM)
+    failing_route, healthy_route = create_route(30000), create_route(30001)
+    for _ in range(EJECTION_THRESHOLD):
+        with pytest.raises(ConnectionRefusedError):
+            with balancer.track(failing_route):
+                raise ConnectionRefusedError
+    stats = balancer.get_route_stats(failing_route)
+    assert stats.failures == EJECTION_THRESHOLD
+    assert stats.outstanding == 0
+    assert stats.ejections == 1
+    for _ in range(10):
+        assert balancer.select([failing_route, healthy_route]) is healthy_route
+    # Fall back to the ejected routes if all routes are ejected.
+    assert balancer.select([failing_route]) is failing_route
+
+    balancer.prune([healthy_route])
+    assert balancer.stats.keys() == {("127.0.0.1", 30001)}
+
+
+def test_dump_stats_does_not_revive_pruned_routes() -> None:
+    balancer = RouteBalancer(LoadBalancingStrategy.RANDOM)
+    active_route, pruned_route = create_route(30000), create_route(30001)
+    with balancer.track(active_route) as tracker:
+        tracker.succeeded()
+    balancer.get_route_stats(pruned_route).requests = 5
+    balancer.prune([active_route])
+    dumped = balancer.dump_stats([active_route, pruned_route])
+    assert [item["requests"] for item in dumped] == [1, 0]
+    assert len(balancer.stats) == 1
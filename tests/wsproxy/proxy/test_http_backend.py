@@ -0,0 +1,85 @@
+from uuid import UUID
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from ai.backend.wsproxy.proxy.backend.abc import HttpRequest
+from ai.backend.wsproxy.proxy.backend.http import HTTPBackend
+from ai.backend.wsproxy.types import LoadBalancingStrategy, ProxyProtocol, RouteInfo
+
+
+def create_route(port: int) -> RouteInfo:
+    return RouteInfo(
+        session_id=UUID("f5cd34ba-ae53-4537-a813-09f38496443d"),
+        session_name=None,
+        kernel_host="127.0.0.1",
+        kernel_port=port,
+        protocol=ProxyProtocol.HTTP,
+        traffic_ratio=1.0,
+    )
+
+
+@pytest.fixture
+async def upstream_server():
+    async def handler(request: web.Request) -> web.Response:
+        peername = request.transport.get_extra_info("peername") if request.transport else None
+        return web.json_response({"peer_port": peername[1] if peername else None})
+
+    app = web.Application()
+    app.router.add_route("GET", "/", handler)
+    server = TestServer(app, host="127.0.0.1")
+    await server.start_server()
+    try:
+        yield server
+    finally:
+        await server.close()
+
+
+def create_backend(mocker, routes: list[RouteInfo]) -> HTTPBackend:
+    root_context = mocker.MagicMock()
+    root_context.local_config.wsproxy.load_balancing_strategy = LoadBalancingStrategy.RANDOM
+    root_context.local_config.wsproxy.upstream_pool_size = 8
+    root_context.local_config.wsproxy.upstream_keepalive_timeout = 30.0
+    return HTTPBackend(routes, root_context, mocker.MagicMock())
+
+
+async def _fetch_peer_port(backend: HTTPBackend, route: RouteInfo) -> int:
+    request = HttpRequest("GET", "/", {"Connection": "close"}, aiohttp.streams.EMPTY_PAYLOAD)
+    async with backend.request_http(route, request) as response:
+        assert response.status == 200
+        return (await response.json())["peer_port"]
+
+
+@pytest.mark.asyncio
+async def test_http_backend_reuses_pooled_connections(mocker, upstream_server):
+    route = create_route(upstream_server.port)
+    backend = create_backend(mocker, [route])
+
+    # The client's hop-by-hop headers should not close the pooled connection.
+    first_peer_port = await _fetch_peer_port(backend, route)
+    second_peer_port = await _fetch_peer_port(backend, route)
+    assert first_peer_port == second_peer_port
+    assert len(backend.pools) == 1
+
+    pool = backend.pools[(route.kernel_host, route.kernel_port)]
+    await backend.update_routes([])
+    assert not backend.pools
+    assert pool.session.closed
+
+
+@pytest.mark.asyncio
+async def test_http_backend_closes_retired_pool_after_requests(mocker, upstream_server):
+    route = create_route(upstream_server.port)
+    backend = create_backend(mocker, [route])
+
+    request = HttpRequest("GET", "/", {}, aiohttp.streams.EMPTY_PAYLOAD)
+    async with backend.request_http(route, request) as response:
+        pool = backend.pools[(route.kernel_host, route.kernel_port)]
+        await backend.close()
+        # The in-flight request keeps the retired pool open.
+        assert not pool.session.closed
+        assert response.status == 200
+        await response.read()
+    assert pool.session.closed
@@ -0,0 +1,76 @@
+import asyncio
+import os
+import socket
+from uuid import UUID
+
+import pytest
+
+from ai.backend.wsproxy.proxy.backend.relay import SPLICE_AVAILABLE, configure_socket
+from ai.backend.wsproxy.proxy.backend.tcp import TCPBackend
+from ai.backend.wsproxy.types import LoadBalancingStrategy, ProxyProtocol, RouteInfo, TCPRelayMode
+
+
+@pytest.fixture
+async def echo_server():
+    async def handler(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        while data := await reader.read(65536):
+            writer.write(data)
+            await writer.drain()
+        writer.close()
+        await writer.wait_closed()
+
+    server = await asyncio.start_server(handler, "127.0.0.1", 0)
+    try:
+        yield server.sockets[0].getsockname()[1]
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "mode",
+    [
+        TCPRelayMode.SOCKET,
+        pytest.param(
+            TCPRelayMode.SPLICE,
+            marks=pytest.mark.skipif(not SPLICE_AVAILABLE, reason="splice() is not available"),
+        ),
+    ],
+)
+async def test_tcp_backend_relay(mocker, echo_server, mode: TCPRelayMode) -> None:
+    root_context = mocker.MagicMock()
+    root_context.local_config.wsproxy.load_balancing_strategy = LoadBalancingStrategy.RANDOM
+    route = RouteInfo(
+        session_id=UUID("f5cd34ba-ae53-4537-a813-09f38496443d"),
+        session_name=None,
+        kernel_host="127.0.0.1",
+        kernel_port=echo_server,
+        protocol=ProxyProtocol.TCP,
+        traffic_ratio=1.0,
+    )
+    backend = TCPBackend([route], root_context, mocker.MagicMock())
+    loop = asyncio.get_running_loop()
+    client_sock, down_sock = socket.socketpair()
+    client_sock.setblocking(False)
+    configure_socket(down_sock)
+    relay_task = asyncio.create_task(backend.relay(down_sock, mode))
+    payload = os.urandom(4 * 1024 * 1024 + 17)
+
+    async def _send() -> None:
+        await loop.sock_sendall(client_sock, payload)
+        client_sock.shutdown(socket.SHUT_WR)
+
+    async def _receive() -> bytes:
+        received = bytearray()
+        while data := await loop.sock_recv(client_sock, 65536):
+            received += data
+        return bytes(received)
+
+    try:
+        _, received = await asyncio.gather(_send(), _receive())
+        assert received == payload
+        await asyncio.wait_for(relay_task, timeout=5.0)
+        assert backend.balancer.get_route_stats(route).outstanding == 0
+    finally:
+        client_sock.close()